@@ -299,10 +299,13 @@ class MinecraftBot(commands.Bot):
         """Called during bot startup - load extensions but DON'T sync yet."""
         self.tree.on_error = self.on_tree_error
         
-        # Initialize shared session
-        import aiohttp
-        self.session = aiohttp.ClientSession()
-        logger.debug("Initialized shared aiohttp ClientSession")
+        # Shared pooled session (src/http_client.py) — the same one every module uses
+        from src.http_client import http_client
+        self.session = http_client.session()
+
+        # Open data/state.db (schema, one-time JSON migration) off the event loop, before any cog uses it
+        from src.storage import init_storage
+        await init_storage()
         
         # Global command channel check
         async def restrict_command_channel(interaction: discord.Interaction) -> bool:
@@ -447,7 +450,7 @@ class MinecraftBot(commands.Bot):
 
         # Check for pending bot restart message
         try:
-            bot_cfg = config.load_bot_config()
+            bot_cfg = await config.aload_bot_config()
             restart_channel_id = bot_cfg.get('restart_channel_id')
             restart_message_id = bot_cfg.get('restart_message_id')
             if restart_channel_id and restart_message_id:
@@ -456,15 +459,16 @@ class MinecraftBot(commands.Bot):
                     msg = await channel.fetch_message(int(restart_message_id))
                     await msg.edit(content="✅ Bot restarted successfully!")
                 
-                with config.update_bot_config() as data:
+                def clear_restart_message(data):
                     data.pop('restart_channel_id', None)
                     data.pop('restart_message_id', None)
+                await config.aupdate_bot_config(clear_restart_message)
         except Exception as e:
             logger.error(f"Failed to update restart message: {e}")
 
         # Check for update/restart pending notification
         try:
-            bot_cfg = config.load_bot_config()
+            bot_cfg = await config.aload_bot_config()
             pending_type = bot_cfg.get('update_restart_pending')
             if pending_type:
                 # Set intentional_stop to False and start the server in the background
@@ -482,8 +486,7 @@ class MinecraftBot(commands.Bot):
                             msg = "🔄 **Bot restarted successfully!** Starting Minecraft server..."
                         await channel.send(msg)
                 
-                with config.update_bot_config() as data:
-                    data.pop('update_restart_pending', None)
+                await config.aupdate_bot_config(lambda data: data.pop('update_restart_pending', None))
         except Exception as e:
             logger.error(f"Failed to send pending restart notification: {e}")
 
@@ -564,12 +567,26 @@ async def shutdown_handler(bot):
     try:
         # Close bot connection
         logger.info("Closing bot connection...")
-        if bot.session:
-            await bot.session.close()
-            logger.info("Shared aiohttp session closed")
+        from src.http_client import http_client
+        await http_client.close()
         
         from src.rcon_manager import rcon_manager
         await rcon_manager.close()
+
+        from src.backup_export import export_server
+        await export_server.stop()
+
+        # Persist any debounced player-list change before exiting
+        from src.online_players import online_players
+        online_players.flush()
+
+        # Write any batched link session stamps (last_verified / last_disconnect)
+        from src.mc_link_manager import flush_all
+        await flush_all()
+
+        # Keep cached Mojang profile lookups for the next start
+        from src.mojang import mojang_profiles
+        await asyncio.to_thread(mojang_profiles.flush)
             
         await bot.close()
     except Exception as e:
@@ -2,10 +2,11 @@ import discord
 from discord.ext import commands
 import asyncio
 import random
-import re
 from src.utils import rcon_cmd
 from src.logger import logger
 from src.config import config
+from src.online_players import online_players
+from src.storage import get_storage
 
 COLORS = [discord.Color.blue(), discord.Color.green(), discord.Color.gold(), discord.Color.purple()]  # Currently unused, kept for future UI enhancements
 
@@ -13,7 +14,7 @@ class EconomyCog(commands.Cog):
     """
     Manages the server economy system.
     Features:
-    - Balance tracking (stored in `bot_config.json`).
+    - Balance tracking (stored in `data/state.db`, see src/storage.py).
     - /pay and /balance commands.
     - "Word Hunt" minigame: Spawns a word in chat, first to type it wins coins.
     """
@@ -40,9 +41,7 @@ class EconomyCog(commands.Cog):
             logger.info(f"Next Word Hunt in {wait_min} minutes.")
             await asyncio.sleep(wait_min * 60)
             
-            bot_config = config.load_bot_config()
-            players = bot_config.get('online_players', [])
-            if len(players) < 1: # User said >1, but for testing lets say >=1
+            if online_players.count < 1: # User said >1, but for testing lets say >=1
                 logger.info("Skipping Word Hunt: Not enough players.")
                 continue
 
@@ -80,21 +79,19 @@ class EconomyCog(commands.Cog):
         - The parent task times out (Game over).
         """
         from src.log_dispatcher import log_dispatcher
-        q = log_dispatcher.subscribe()
+        q = log_dispatcher.subscribe(batch=True, name="word_hunt", policy="drop_oldest")
         await log_dispatcher.start()
 
         try:
             while self.word_hunt_active:
                 try:
-                    line = await asyncio.wait_for(q.get(), timeout=1.0)
+                    events = await asyncio.wait_for(q.get(), timeout=1.0)
+                    target = self.current_word.lower()
                     
-                    # Regex: <(.*?)> (.*)
-                    match = re.search(r'<(.*?)> (.*)', line)
-                    if match:
-                        player, message = match.groups()
-                        
-                        if self.current_word.lower() in message.lower():
-                            await self.award_winner(player)
+                    for event in events:
+                        # Chat lines are parsed by the dispatcher's classifier: <player> message
+                        if event.kind == "chat" and target in event.data.lower():
+                            await self.award_winner(event.player)
                             return
 
                     # Total timeout check (e.g. 5 mins?) call ended by wait_for wrapper in start_word_hunt
@@ -110,11 +107,10 @@ class EconomyCog(commands.Cog):
     async def award_winner(self, player_name):
         reward = 100
         # bot_config = load_bot_config()
-        bot_config = config.load_bot_config()
-        economy = bot_config.get('economy', {})
+        bot_config = await config.aload_bot_config()
         
         # We need to map player name to discord ID if possible, or store by MC Name?
-        # User requested "bot_config['economy'] = {'user_id': balance}".
+        # Balances are keyed by Discord user ID (economy table in data/state.db).
         # If we only have MC Name, we have to reverse lookup.
         
         user_id = None
@@ -125,10 +121,7 @@ class EconomyCog(commands.Cog):
         
         if user_id:
             try:
-                with config.update_bot_config() as bot_cfg:
-                    economy = bot_cfg.get('economy', {})
-                    economy[user_id] = economy.get(user_id, 0) + reward
-                    bot_cfg['economy'] = economy
+                await asyncio.to_thread(get_storage().add_balance, user_id, reward)
             except Exception as e:
                 logger.error(f"Failed to update economy: {e}")
 
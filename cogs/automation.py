@@ -2,10 +2,10 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import asyncio
-import time
 from src.utils import rcon_cmd, has_role
 from src.config import config
 from src.logger import logger
+from src.trigger_engine import TriggerEngine, parse_trigger
 
 class AutomationCog(commands.Cog):
     """
@@ -17,6 +17,8 @@ class AutomationCog(commands.Cog):
         self.bot = bot
         self.log_task = None
         self.stop_scan = asyncio.Event()
+        self.trigger_engine = TriggerEngine()
+        self._triggers_version = None
 
     def cog_unload(self):
         if self.log_task:
@@ -29,18 +31,28 @@ class AutomationCog(commands.Cog):
 
     async def cog_load(self):
         from src.log_dispatcher import log_dispatcher
-        self.log_queue = log_dispatcher.subscribe()
+        self.log_queue = log_dispatcher.subscribe(batch=True, name="automation")
         await log_dispatcher.start()
         self.log_task = asyncio.create_task(self.scan_logs_for_triggers())
 
+    def _sync_triggers(self):
+        """
+        Rebuild the trigger engine from the published user_config snapshot, but only when
+        Config reports a new version — no disk reads or file locks in the log hot path.
+        """
+        version = config.user_config_version
+        if version != self._triggers_version:
+            self.trigger_engine.load(config.user_snapshot.get('triggers', {}))
+            self._triggers_version = version
+
     async def scan_logs_for_triggers(self):
         """
         Continuously scans the Docker container logs for Trigger phrases defined in `user_config.json`.
         
         Mechanism:
         - Subscribes to LogDispatcher queue.
-        - Reads lines asynchronously.
-        - Checks each line against configured triggers.
+        - Reads batches of lines asynchronously.
+        - Checks each line against configured triggers (compiled by TriggerEngine).
         - Executes RCON commands if a match is found.
         """
         await self.bot.wait_until_ready()
@@ -52,27 +64,17 @@ class AutomationCog(commands.Cog):
                 
                 while not self.stop_scan.is_set():
                     try:
-                        line = await asyncio.wait_for(self.log_queue.get(), timeout=1.0)
-                        
-                        # Parse MC log format if needed, or just scan raw line
-                        # Format: [HH:MM:SS] [Thread/LEVEL]: Message
-                        clean_line = line
-                        
-                        if "[Bot]" in clean_line: continue # Skip bot's own messages (via RCON echo)
+                        events = await asyncio.wait_for(self.log_queue.get(), timeout=1.0)
 
-                        if getattr(self, '_last_cfg_sync', 0) < time.time() - 30:
-                            user_config = config.load_user_config()
-                            self._cached_triggers = user_config.get('triggers', {})
-                            self._last_cfg_sync = time.time()
-                        
-                        triggers = getattr(self, '_cached_triggers', {})
-                        
-                        lower_line = clean_line.lower()
-                        
-                        for trigger_phrase, response_cmd in triggers.items():
-                            if trigger_phrase.lower() in lower_line:
-                                logger.info(f"Trigger fired: '{trigger_phrase}' -> '{response_cmd}'")
-                                _, _ = await rcon_cmd(response_cmd)
+                        self._sync_triggers()
+
+                        # Scan raw lines — format: [HH:MM:SS] [Thread/LEVEL]: Message
+                        for event in events:
+                            if "[Bot]" in event.raw: continue # Skip bot's own messages (via RCON echo)
+
+                            for trigger in self.trigger_engine.match(event.raw):
+                                logger.info(f"Trigger fired: '{trigger.phrase}' -> '{trigger.command}'")
+                                _, _ = await rcon_cmd(trigger.command)
                                 
                     except asyncio.TimeoutError:
                         continue
@@ -91,13 +93,28 @@ class AutomationCog(commands.Cog):
 
     @app_commands.command(name="trigger_add", description="Add a custom chat trigger")
     @has_role("trigger_admin")
-    async def trigger_add(self, interaction: discord.Interaction, phrase: str, command: str):
+    @app_commands.describe(
+        regex="Treat the phrase as a regular expression (case-insensitive)",
+        cooldown="Minimum seconds between two firings of this trigger"
+    )
+    async def trigger_add(self, interaction: discord.Interaction, phrase: str, command: str,
+                          regex: bool = False, cooldown: app_commands.Range[int, 0, 86400] = 0):
         await interaction.response.defer(ephemeral=True)
+        # Plain triggers keep the legacy `phrase: command` format
+        spec = {"command": command, "regex": regex, "cooldown": cooldown} if (regex or cooldown) else command
+        try:
+            parse_trigger(phrase, spec)
+        except Exception as e:
+            await interaction.followup.send(f"❌ Invalid trigger: {e}")
+            return
+
         try:
             with config.update_user_config() as user_config:
                 triggers = user_config.get('triggers', {})
-                triggers[phrase] = command
+                triggers[phrase] = spec
                 user_config['triggers'] = triggers
+            # Committing the update publishes a new snapshot; pick it up right away
+            self._sync_triggers()
             
             await interaction.followup.send(f"Added trigger: `{phrase}` -> `{command}`")
         except Exception as e:
@@ -106,16 +123,21 @@ class AutomationCog(commands.Cog):
     @app_commands.command(name="trigger_list", description="List custom triggers")
     @has_role("trigger_list")
     async def trigger_list(self, interaction: discord.Interaction):
-        user_config = config.load_user_config()
-        triggers = user_config.get('triggers', {})
+        self._sync_triggers()
         
-        if not triggers:
+        if not self.trigger_engine.triggers:
              await interaction.response.send_message("No triggers set.", ephemeral=True)
              return
              
         msg = "**Custom Triggers**\n"
-        for k, v in triggers.items():
-            msg += f"- `{k}` -> `{v}`\n"
+        for t in self.trigger_engine.triggers:
+            flags = []
+            if t.regex:
+                flags.append("regex")
+            if t.cooldown:
+                flags.append(f"cooldown {t.cooldown:g}s")
+            flag_str = f" ({', '.join(flags)})" if flags else ""
+            msg += f"- `{t.phrase}` -> `{t.command}`{flag_str} — fired {t.hits}x\n"
             
         await interaction.response.send_message(msg, ephemeral=True)
 
@@ -131,6 +153,8 @@ class AutomationCog(commands.Cog):
                     success = True
                 else:
                     success = False
+            if success:
+                self._sync_triggers()
             
             if success:
                 await interaction.followup.send(f"Removed trigger: `{phrase}`")
@@ -7,11 +7,15 @@ from datetime import datetime
 from src.config import config
 from src.logger import logger
 from src.backup_manager import backup_manager
+from src.backup_export import export_server
+from src.backup_store import SNAPSHOT_EXT
 from src.utils import has_role
 
 # --- Constants ---
 BACKUP_LIST_LIMIT = 5  # Number of backups to show in the list command
 BACKUP_VIEW_TIMEOUT = 120 # Timeout for the backup download view in seconds
+DEFAULT_UPLOAD_LIMIT = 10 * 1024 * 1024  # Discord attachment limit outside a guild (bytes)
+LINK_LIST_LIMIT = 5  # Split volumes listed in the download message (the rest are in manifest.json)
 
 class BackupCog(commands.Cog):
     """
@@ -45,8 +49,8 @@ class BackupCog(commands.Cog):
         
         try:
             # Load configs
-            user_config = config.load_user_config()
-            bot_config = config.load_bot_config()
+            user_config = await config.aload_user_config()
+            bot_config = await config.aload_bot_config()
             
             backup_time = user_config.get('backup_time', '03:00')
             now = datetime.now()
@@ -71,8 +75,7 @@ class BackupCog(commands.Cog):
                     if success:
                         # Update last run
                         try:
-                            with config.update_bot_config() as bot_cfg:
-                                bot_cfg['last_auto_backup'] = today_str
+                            await config.aupdate_bot_config(lambda bot_cfg: bot_cfg.update(last_auto_backup=today_str))
                         except Exception as cfg_error:
                             logger.error(f"Failed to update last_auto_backup: {cfg_error}")
                         
@@ -122,35 +125,17 @@ class BackupCog(commands.Cog):
         """
         await interaction.response.defer(ephemeral=True)
         
-        # Helper to get files
-        def get_backups(directory: str) -> list[str]:
-            """
-            Lists zip files in the specified directory.
-
-            Args:
-                directory (str): The path to the directory to list.
-
-            Returns:
-                list[str]: A list of filenames.
-            """
-            try:
-                if not os.path.exists(directory):
-                    return []
-                return [f for f in os.listdir(directory) if f.endswith('.zip')]
-            except Exception as e:
-                logger.error(f"Failed to list backups in {directory}: {e}")
-                return []
-
-        auto_backups = await asyncio.to_thread(get_backups, backup_manager.auto_dir)
-        custom_backups = await asyncio.to_thread(get_backups, backup_manager.custom_dir)
-        
-        # Sort by time
-        auto_backups.sort(reverse=True)
-        custom_backups.sort(reverse=True)
+        # From the backup catalog, newest first (no directory scan)
+        try:
+            auto_backups = await backup_manager.list_backups('auto')
+            custom_backups = await backup_manager.list_backups('custom')
+        except Exception as e:
+            logger.error(f"Failed to list backups: {e}")
+            auto_backups, custom_backups = [], []
         
         msg = "📂 **Available Backups**\n\n**Custom**:\n"
         if custom_backups:
-            msg += "\n".join([f"- `{f}`" for f in custom_backups[:BACKUP_LIST_LIMIT]])
+            msg += "\n".join([format_entry(e) for e in custom_backups[:BACKUP_LIST_LIMIT]])
             if len(custom_backups) > BACKUP_LIST_LIMIT:
                 msg += f"\n... and {len(custom_backups)-BACKUP_LIST_LIMIT} more"
         else:
@@ -158,7 +143,7 @@ class BackupCog(commands.Cog):
             
         msg += "\n\n**Auto**:\n"
         if auto_backups:
-            msg += "\n".join([f"- `{f}`" for f in auto_backups[:BACKUP_LIST_LIMIT]])
+            msg += "\n".join([format_entry(e) for e in auto_backups[:BACKUP_LIST_LIMIT]])
             if len(auto_backups) > BACKUP_LIST_LIMIT:
                 msg += f"\n... and {len(auto_backups)-BACKUP_LIST_LIMIT} more"
         else:
@@ -191,11 +176,7 @@ class BackupCog(commands.Cog):
             return
 
         await interaction.followup.send("⏳ Preparing download...", ephemeral=True)
-        try:
-            await interaction.followup.send(file=discord.File(filepath), ephemeral=True)
-        except Exception as e:
-            logger.error(f"Failed to send backup file: {e}")
-            await interaction.followup.send("❌ Failed to send the file.", ephemeral=True)
+        await send_backup(interaction, filepath)
 
     @backup_download.autocomplete("filename")
     async def backup_download_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice]:
@@ -209,19 +190,106 @@ class BackupCog(commands.Cog):
         Returns:
             list[app_commands.Choice]: A list of autocomplete choices.
         """
-        files = []
-        for directory in (backup_manager.custom_dir, backup_manager.auto_dir):
-            try:
-                files.extend(f for f in os.listdir(directory) if f.endswith(".zip"))
-            except (FileNotFoundError, OSError):
-                pass
-        files.sort(reverse=True)
+        # Served from the in-memory catalog, newest first — no disk access per keystroke
+        try:
+            entries = await backup_manager.list_backups()
+        except Exception as e:
+            logger.error(f"Backup autocomplete failed: {e}")
+            return []
+        current = current.lower()
         return [
-            app_commands.Choice(name=f, value=f)
-            for f in files
-            if current.lower() in f.lower()
+            app_commands.Choice(name=e['name'], value=e['name'])
+            for e in entries
+            if current in e['name'].lower()
         ][:25]
 
+# --- Helpers ---
+
+def format_entry(entry: dict) -> str:
+    """
+    One /backup_list line for a catalog entry. A snapshot's file is only its manifest, so it
+    shows the world size and what the snapshot added to the chunk store instead.
+    """
+    mb = 1024 * 1024
+    if entry.get('format') == 'dedup' and entry.get('data_bytes') is not None:
+        line = f"- `{entry['name']}` — {entry['data_bytes'] / mb:,.1f} MB world"
+        if entry.get('new_bytes') is not None:
+            line += f" (+{entry['new_bytes'] / mb:,.1f} MB new)"
+    else:
+        line = f"- `{entry['name']}` — {entry['size'] / mb:,.1f} MB"
+    if entry.get('mc_version'):
+        line += f", {entry['mc_version']}"
+    return line + f", <t:{int(entry['created'])}:R>"
+
+
+async def send_backup(interaction: discord.Interaction, filepath: str) -> bool:
+    """
+    Sends a backup to the user: as an attachment if it fits the upload limit (a snapshot is
+    written out as a zip first), otherwise as resumable download links from the backup export server.
+
+    Returns:
+        bool: True if the file or the links were sent.
+    """
+    limit = interaction.guild.filesize_limit if interaction.guild else DEFAULT_UPLOAD_LIMIT
+    try:
+        if backup_manager.fits_upload(filepath, limit):
+            await interaction.followup.send(file=discord.File(filepath), ephemeral=True)
+            return True
+        if filepath.endswith(SNAPSHOT_EXT):
+            attachment = await asyncio.to_thread(backup_manager.snapshot_attachment, filepath, limit)
+            if attachment:
+                name = os.path.basename(filepath)[:-len(SNAPSHOT_EXT)] + '.zip'
+                try:
+                    await interaction.followup.send(file=discord.File(attachment, filename=name), ephemeral=True)
+                finally:
+                    await asyncio.to_thread(os.remove, attachment)
+                return True
+        if not export_server.exposed():
+            await interaction.followup.send(not_exposed_message(filepath), ephemeral=True)
+            return False
+        links = await export_server.publish(filepath)
+        await interaction.followup.send(format_links(links, limit), ephemeral=True)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send backup file: {e}")
+        await interaction.followup.send("❌ Failed to send the file.", ephemeral=True)
+        return False
+
+
+def not_exposed_message(filepath: str) -> str:
+    """Reply when a backup is too large to attach and the download server is only reachable locally."""
+    return (
+        f"📦 **{os.path.basename(filepath)}** is too large to attach, and the backup download server "
+        f"is not exposed, so there is no link to share.\n"
+        f"An admin can enable links in `.env`: `BACKUP_HTTP_HOST=0.0.0.0` (port "
+        f"`{config.BACKUP_HTTP_PORT}` must be reachable), or `BACKUP_HTTP_URL` for a reverse proxy."
+    )
+
+
+def format_links(links: dict, limit: int) -> str:
+    """
+    Discord message for a published backup (see ExportServer.publish). Only blames the upload
+    `limit` when the download really exceeds it; smaller backups get a link because their
+    format can't be attached as-is.
+    """
+    size_mb = links['size'] / 1024 / 1024
+    if links['size'] > limit:
+        reason = f"is too large for Discord (limit {limit / 1024 / 1024:,.0f} MB)"
+    else:
+        reason = "can't be attached in this format"
+    msg = (
+        f"📦 **{links['name']}** ({size_mb:,.1f} MB) {reason}.\n"
+        f"⬇️ Download (resumable, valid <t:{int(links['expires'])}:R>):\n{links['url']}"
+    )
+    volumes = links['volumes']
+    if len(volumes) > 1:
+        msg += f"\n\nOr in {len(volumes)} parts — join them with `cat {links['name']}.* > {links['name']}`:\n"
+        msg += "\n".join(url for url, _ in volumes[:LINK_LIST_LIMIT])
+        if len(volumes) > LINK_LIST_LIMIT:
+            msg += f"\n... all parts: {links['manifest_url']}"
+    return msg
+
+
 # --- Views ---
 
 class BackupDownloadView(discord.ui.View):
@@ -253,14 +321,10 @@ class BackupDownloadView(discord.ui.View):
             await interaction.followup.send("Already sent!", ephemeral=True)
             return
 
-        try:
-            await interaction.followup.send(file=discord.File(self.filepath), ephemeral=True)
+        if await send_backup(interaction, self.filepath):
             self.uploaded = True
             button.disabled = True
             await interaction.edit_original_response(view=self)
-        except Exception as e:
-            logger.error(f"Failed to send backup file: {e}")
-            await interaction.followup.send("❌ Failed to send the file.", ephemeral=True)
 
 
 async def setup(bot):
@@ -1,11 +1,14 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import re
 from src.config import config
 from src.utils import rcon_cmd, has_role
 from src.logger import logger
 
+_PROBLEM_LEVELS = {"WARN", "WARNING", "ERROR", "FATAL"}
+_JOIN_KINDS = {"join", "leave", "connect"}
+_DEFAULT_KINDS = _JOIN_KINDS | {"death", "chat"}
+
 class LogsView(discord.ui.View):
     def __init__(self, bot, initial_filter="default"):
         super().__init__(timeout=600)
@@ -26,31 +29,35 @@ class LogsView(discord.ui.View):
                 }
                 child.disabled = (label_map.get(self.current_filter) == child.label)
 
-    def _filter_logs(self, lines):
+    def _filter_logs(self, events):
+        """Filters classified LogEvents (see src/log_classifier.py) and returns their raw lines."""
         if self.current_filter == "raw":
-            return lines
+            return [event.raw for event in events]
         
         filtered = []
-        for line in lines:
+        for event in events:
+            line = event.raw
             # Strip RCON noise by default for all other filters
             if "RCON Client" in line or "issued server command: /list" in line:
                 continue
-                
+
+            kind = event.kind
+            is_problem = event.level in _PROBLEM_LEVELS or "EXCEPTION" in line.upper()
+
             if self.current_filter == "chat":
-                if re.search(r"<.+> .*", line):
-                    filtered.append(line)
+                keep = kind == "chat"
             elif self.current_filter == "errors":
-                if any(x in line.upper() for x in ["ERROR", "EXCEPTION", "WARN", "WARNING"]):
-                    filtered.append(line)
+                keep = is_problem
             elif self.current_filter == "joins":
-                if any(x in line for x in ["joined the game", "left the game", "logged in with entity id"]):
-                    filtered.append(line)
+                keep = kind in _JOIN_KINDS
             elif self.current_filter == "default":
                 # Joins, Leaves, Deaths, Chat, Errors, Warnings
-                if any(x in line for x in ["joined the game", "left the game", "logged in with entity id", "died", "was slain by", "was blown up by"]) or \
-                   re.search(r"<.+> .*", line) or \
-                   any(x in line.upper() for x in ["ERROR", "EXCEPTION", "WARN", "WARNING"]):
-                    filtered.append(line)
+                keep = kind in _DEFAULT_KINDS or is_problem
+            else:
+                keep = False
+
+            if keep:
+                filtered.append(line)
         return filtered
 
     def _format_logs(self, lines):
@@ -76,7 +83,7 @@ class LogsView(discord.ui.View):
 
     async def _update_message(self, interaction: discord.Interaction):
         from src.log_dispatcher import log_dispatcher
-        all_logs = log_dispatcher.get_recent_logs()
+        all_logs = log_dispatcher.get_recent_events()
         filtered = self._filter_logs(all_logs)
         content = self._format_logs(filtered)
         
@@ -122,7 +129,7 @@ class ConsoleCog(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         from src.log_dispatcher import log_dispatcher
-        recent = log_dispatcher.get_recent_logs()
+        recent = log_dispatcher.get_recent_events()
         
         view = LogsView(self.bot)
         filtered = view._filter_logs(recent)
@@ -137,9 +144,7 @@ class ConsoleCog(commands.Cog):
         if not owner_id:
             app_info = await self.bot.application_info()
             if app_info.owner.id == interaction.user.id:
-                bot_config = config.load_bot_config()
-                bot_config['owner_id'] = interaction.user.id
-                config.save_bot_config(bot_config)
+                await config.aupdate_bot_config(lambda data: data.update(owner_id=interaction.user.id))
             else:
                 await interaction.response.send_message("❌ This command is restricted to the bot owner.", ephemeral=True)
                 return
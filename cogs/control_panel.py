@@ -110,7 +110,7 @@ class ControlPanelCog(commands.Cog):
     async def before_task(self):
         await self.bot.wait_until_ready()
         # Restore message_id from config so we edit the existing panel after restart
-        bot_config = config.load_bot_config()
+        bot_config = await config.aload_bot_config()
         self.message_id = bot_config.get('control_panel_message_id')
 
     async def update_panel(self):
@@ -121,7 +121,7 @@ class ControlPanelCog(commands.Cog):
 
         import os
         # Check if setup is complete
-        bot_config = config.load_bot_config()
+        bot_config = config.bot_snapshot
         server_jar_path = os.path.join(config.SERVER_DIR, "server.jar")
         setup_complete = bot_config.get('installed_version') and os.path.exists(server_jar_path)
 
@@ -160,9 +160,7 @@ class ControlPanelCog(commands.Cog):
             except discord.NotFound:
                 # Message was deleted — need to post a new one
                 self.message_id = None
-                bot_config = config.load_bot_config()
-                bot_config.pop('control_panel_message_id', None)
-                config.save_bot_config(bot_config)
+                await config.aupdate_bot_config(lambda bot_cfg: bot_cfg.pop('control_panel_message_id', None))
             except Exception:
                 # Transient error (rate limit, network) — skip this tick, retry next loop
                 return
@@ -181,9 +179,7 @@ class ControlPanelCog(commands.Cog):
         try:
             new_msg = await channel.send(embed=embed, view=view)
             self.message_id = new_msg.id
-            bot_config = config.load_bot_config()
-            bot_config['control_panel_message_id'] = new_msg.id
-            config.save_bot_config(bot_config)
+            await config.aupdate_bot_config(lambda bot_cfg: bot_cfg.update(control_panel_message_id=new_msg.id))
         except Exception as e:
             logger.error(f"Failed to send Control Panel: {e}")
 
@@ -1,9 +1,11 @@
+import asyncio
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 from datetime import datetime, timedelta
 from src.config import config
 from src.logger import logger
+from src.storage import get_storage
 from src.utils import has_role
 
 class EventsCog(commands.Cog):
@@ -18,47 +20,28 @@ class EventsCog(commands.Cog):
     async def event_loop(self):
         """Checks for upcoming events and sends reminders."""
         try:
-            with config.update_bot_config() as bot_cfg:
-                events = bot_cfg.get('events', [])
-                updated = False
-                now = datetime.now()
-                active_events = []
+            storage = get_storage()
+            now = datetime.now()
+            # Keep events until they are 24h past
+            await asyncio.to_thread(storage.delete_events_before, (now - timedelta(hours=24)).isoformat(timespec='seconds'))
 
-                for event in events:
-                    try:
-                        event_time = datetime.fromisoformat(event['time'])
-                        
-                        # Reminders (24h and 1h)
-                        if 'reminded_24h' not in event:
-                            event['reminded_24h'] = False
-                        if 'reminded_1h' not in event:
-                            event['reminded_1h'] = False
+            for event in await asyncio.to_thread(storage.list_events):
+                try:
+                    event_time = datetime.fromisoformat(event['time'])
+                    time_left = event_time - now
 
-                        time_left = event_time - now
-                        
-                        # Check 24h
-                        if timedelta(hours=23, minutes=59) <= time_left <= timedelta(hours=24, minutes=1) and not event['reminded_24h']:
-                            await self.send_reminder(event, "24 hours")
-                            event['reminded_24h'] = True
-                            updated = True
-                        
-                        # Check 1h
-                        if timedelta(minutes=59) <= time_left <= timedelta(hours=1, minutes=1) and not event['reminded_1h']:
-                            await self.send_reminder(event, "1 hour")
-                            event['reminded_1h'] = True
-                            updated = True
+                    # Check 24h
+                    if timedelta(hours=23, minutes=59) <= time_left <= timedelta(hours=24, minutes=1) and not event['reminded_24h']:
+                        await self.send_reminder(event, "24 hours")
+                        await asyncio.to_thread(storage.mark_event_reminded, event['id'], 'reminded_24h')
 
-                        # Keep events that are not yet 24h past
-                        if now - event_time < timedelta(hours=24):
-                            active_events.append(event)
-                        else:
-                            updated = True # One removed
+                    # Check 1h
+                    if timedelta(minutes=59) <= time_left <= timedelta(hours=1, minutes=1) and not event['reminded_1h']:
+                        await self.send_reminder(event, "1 hour")
+                        await asyncio.to_thread(storage.mark_event_reminded, event['id'], 'reminded_1h')
 
-                    except Exception as e:
-                        logger.error(f"Error checking event {event.get('name')}: {e}")
-                
-                if updated:
-                    bot_cfg['events'] = active_events
+                except Exception as e:
+                    logger.error(f"Error checking event {event.get('name')}: {e}")
         except Exception as e:
             logger.error(f"Error in event loop: {e}")
 
@@ -93,21 +76,16 @@ class EventsCog(commands.Cog):
             return
 
         try:
-            with config.update_bot_config() as bot_cfg:
-                events = bot_cfg.get('events', [])
-                
-                new_event = {
-                    "name": name,
-                    "time": event_dt.isoformat(),
-                    "description": description,
-                    "mentions": mentions,
-                    "creator": interaction.user.id,
-                    "reminded_24h": False,
-                    "reminded_1h": False
-                }
-                
-                events.append(new_event)
-                bot_cfg['events'] = events
+            new_event = {
+                "name": name,
+                "time": event_dt.isoformat(),
+                "description": description,
+                "mentions": mentions,
+                "creator": interaction.user.id,
+                "reminded_24h": False,
+                "reminded_1h": False
+            }
+            await asyncio.to_thread(get_storage().add_event, new_event)
             
             embed = discord.Embed(title="✅ Event Created", color=discord.Color.green())
             embed.add_field(name="Name", value=name)
@@ -120,15 +98,12 @@ class EventsCog(commands.Cog):
 
     @app_commands.command(name="event_list", description="List upcoming events")
     async def list_events(self, interaction: discord.Interaction):
-        bot_config = config.load_bot_config()
-        events = bot_config.get('events', [])
+        # Already ordered by time
+        events = await asyncio.to_thread(get_storage().list_events)
         
         if not events:
             await interaction.response.send_message("📅 No upcoming events.", ephemeral=True)
             return
-            
-        # Sort by time
-        events.sort(key=lambda x: x['time'])
         
         embed = discord.Embed(title="📅 Upcoming Events", color=discord.Color.blue())
         for i, event in enumerate(events):
@@ -145,15 +120,15 @@ class EventsCog(commands.Cog):
     @has_role('event_manage')
     async def delete_event(self, interaction: discord.Interaction, index: int):
         try:
-            with config.update_bot_config() as bot_cfg:
-                events = bot_cfg.get('events', [])
+            # Index as shown by /event_list (ordered by time)
+            events = await asyncio.to_thread(get_storage().list_events)
+            
+            if index < 1 or index > len(events):
+                await interaction.response.send_message("❌ Invalid event index.", ephemeral=True)
+                return
                 
-                if index < 1 or index > len(events):
-                    await interaction.response.send_message("❌ Invalid event index.", ephemeral=True)
-                    return
-                    
-                deleted = events.pop(index - 1)
-                bot_cfg['events'] = events
+            deleted = events[index - 1]
+            await asyncio.to_thread(get_storage().delete_event, deleted['id'])
             
             await interaction.response.send_message(f"🗑️ Deleted event: **{deleted['name']}**", ephemeral=True)
         except Exception as e:
@@ -2,11 +2,15 @@ import os
 import psutil
 from pathlib import Path
 from discord.ext import commands, tasks
+from src.backup_manager import backup_manager
 from src.config import config
 from src.logger import logger
 from src.utils import send_debug
 from src.mod_updater import ModUpdater
 
+DISK_CRITICAL_PERCENT = 90  # Disk usage that triggers backup pruning
+DISK_TARGET_PERCENT = 85    # Usage to prune back down to
+
 class Healer(commands.Cog):
     """
     Self-healing module for automated error recovery and infrastructure maintenance.
@@ -26,9 +30,9 @@ class Healer(commands.Cog):
         try:
             # 1. Disk Space Check
             usage = psutil.disk_usage('/')
-            if usage.percent > 90:
+            if usage.percent > DISK_CRITICAL_PERCENT:
                 logger.warning(f"🚨 Disk space critical: {usage.percent}% used!")
-                await self._cleanup_old_data(usage.percent)
+                await self._cleanup_old_data(usage)
             
             # 2. Log Rotation Check
             # (Handled by logger.py, but we can verify directory sizes here)
@@ -39,22 +43,17 @@ class Healer(commands.Cog):
         except Exception as e:
             logger.error(f"Healer: maintenance error: {e}")
 
-    async def _cleanup_old_data(self, percent):
-        """Automatically delete oldest auto-backups to free space."""
-        backup_dir = os.path.join(os.getcwd(), 'backups', 'auto')
-        if not os.path.exists(backup_dir):
-            return
-
-        files = sorted(
-            [os.path.join(backup_dir, f) for f in os.listdir(backup_dir) if f.endswith('.zip')],
-            key=os.path.getctime
-        )
+    async def _cleanup_old_data(self, usage):
+        """Automatically delete old auto-backups until disk usage is back under DISK_TARGET_PERCENT."""
+        needed = usage.used - usage.total * DISK_TARGET_PERCENT // 100
+        # The retention planner picks them (oldest first, never the newest); chunks only the deleted
+        # snapshots used are freed as well
+        deleted = await backup_manager.free_space(needed)
 
-        if files:
-            oldest = files[0]
-            os.remove(oldest)
-            logger.info(f"Healer: Deleted oldest backup {os.path.basename(oldest)} to free disk space ({percent}% used).")
-            await send_debug(self.bot, f"🧹 Self-Healer: Deleted `{os.path.basename(oldest)}` due to low disk space ({percent}%).")
+        if deleted:
+            names = ", ".join(f"`{name}`" for name in deleted)
+            logger.info(f"Healer: Deleted {len(deleted)} old backup(s) to free disk space ({usage.percent}% used): {names}")
+            await send_debug(self.bot, f"🧹 Self-Healer: Deleted {names} due to low disk space ({usage.percent}%).")
 
     @tasks.loop(seconds=30)
     async def crash_analyzer_loop(self):
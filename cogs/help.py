@@ -45,7 +45,7 @@ class Help(commands.Cog):
                 "🎮 Server Controls": ["control", "start", "stop", "restart", "status", "kill"],
                 "ℹ️ Server Information": ["info", "players", "version", "seed", "mods", "uptime", "ip"],
                 "🛠️ Administration": ["setup", "cmd", "backup", "backup_list", "backup_download", "logs", "whitelist_add", "set_spawn", "sync", "reload_config", "bot_restart", "players_manage", "settings", "mod_search", "update"],
-                "📊 Statistics": ["stats"],
+                "📊 Statistics": ["stats", "leaderboard"],
                 "📅 Events": ["event_create", "event_list", "event_delete"],
                 "🤖 Automation": ["trigger_add", "trigger_list", "trigger_remove"],
                 "🔗 Linking": ["link", "verify", "unlink", "linked", "unlink_admin"]
@@ -10,6 +10,7 @@ from datetime import timedelta
 from src.config import config
 from src.utils import rcon_cmd, has_role, parse_server_version, get_server_mod_folder, get_dir_size_gb
 from src.logger import logger
+from src.online_players import online_players
 from src.server_info_manager import ServerInfoManager
 
 class Info(commands.Cog):
@@ -25,10 +26,9 @@ class Info(commands.Cog):
         RCON_DOWN_MSG = "Unable to fetch player list"
 
         if not success or not rcon_response or rcon_response == RCON_DOWN_MSG or str(rcon_response).startswith("Error:"):
-            # RCON Down Fallback: Use LogWatcher's memory from config
+            # RCON Down Fallback: Use the player list tracked from the logs
             try:
-                bot_cfg = config.load_bot_config()
-                players = bot_cfg.get('online_players', [])
+                players = online_players.names()
                 if not players:
                     return "No players online (RCON down)", "0", "?"
                 
@@ -229,7 +229,7 @@ class Info(commands.Cog):
                 if playit_cog and playit_cog.cached_address:
                     ip = playit_cog.cached_address
                 else:
-                    bot_cfg = config.load_bot_config()
+                    bot_cfg = await config.aload_bot_config()
                     ip = bot_cfg.get('playit_ip', "Unknown (Check /ip)")
             except Exception as e:
                 logger.error(f"Failed to fetch IP for info command: {e}")
@@ -12,6 +12,10 @@ class Link(commands.Cog):
         self.bot = bot
         self.link_manager = MCLinkManager()
 
+    async def cog_load(self):
+        # The store is shared with JoinGuard: a cold load inside its login budget would fail closed
+        await self.link_manager.load()
+
     # ── /link ─────────────────────────────────────────────────────────────────
 
     @app_commands.command(
@@ -43,7 +47,7 @@ class Link(commands.Cog):
                     return
                 replacement_notice = f"\n*(Zamenjuje prejsnjo povezavo z **{old_name}**)*"
 
-            is_premium = await verify_premium_mc_account(username)
+            is_premium = await verify_premium_mc_account(username, session=getattr(self.bot, 'session', None))
             await self.link_manager.link_account(interaction.user.id, username, is_premium)
 
             if is_premium:
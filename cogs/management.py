@@ -7,6 +7,7 @@ import os
 import time
 from src.logger import logger
 from src.log_dispatcher import log_dispatcher
+from src.online_players import online_players
 from src.server_info_manager import ServerInfoManager
 from src.rcon_manager import rcon_manager
 from cogs.control_panel import ControlPanelView
@@ -248,7 +249,19 @@ class Management(commands.Cog):
             if status_state == "online":
                 # Players
                 embed.add_field(name="👥 Players", value=f"`{current_players}/{max_players}`", inline=True)
-                    
+
+        # Log pipeline health — is the auth pipeline keeping up?
+        pipeline = log_dispatcher.get_stats()
+        if pipeline:
+            rows = []
+            for s in pipeline:
+                flag = "⚠️" if s["dropped"] or s["stalls"] else "✅"
+                rows.append(
+                    f"{flag} `{s['name']}` ({s['policy']}) — queue {s['depth']}/{s['peak_depth']} peak, "
+                    f"dropped {s['dropped']}, lag {s['peak_lag'] * 1000:.0f} ms peak"
+                )
+            embed.add_field(name="📡 Log Pipeline", value="\n".join(rows)[:1024], inline=False)
+
         embed.set_footer(text="Minecraft Server Manager")
         await interaction.followup.send(embed=embed)
 
@@ -366,12 +379,7 @@ class Management(commands.Cog):
                 color=discord.Color.red()
             )
             # Clear player list — stop doesn't fire individual "left the game" events
-            try:
-                with config.update_bot_config() as bot_cfg:
-                    if bot_cfg.get('online_players'):
-                        bot_cfg['online_players'] = []
-            except Exception as e:
-                logger.error(f"Failed to clear online players in stop: {e}", exc_info=True)
+            online_players.clear()
 
             # Update info channel
             await ServerInfoManager(self.bot).update_info(interaction.guild)
@@ -416,12 +424,7 @@ class Management(commands.Cog):
                 color=discord.Color.green()
             )
             # Clear player list — restart doesn't fire individual "left the game" events immediately
-            try:
-                with config.update_bot_config() as bot_cfg:
-                    if bot_cfg.get('online_players'):
-                        bot_cfg['online_players'] = []
-            except Exception as e:
-                logger.error(f"Failed to clear online players in restart: {e}", exc_info=True)
+            online_players.clear()
 
             # Update info channel
             await ServerInfoManager(self.bot).update_info(interaction.guild)
@@ -459,12 +462,7 @@ class Management(commands.Cog):
                 color=discord.Color.red()
             )
             # Clear player list
-            try:
-                with config.update_bot_config() as bot_cfg:
-                    if bot_cfg.get('online_players'):
-                        bot_cfg['online_players'] = []
-            except Exception as e:
-                logger.error(f"Error clearing online players in kill: {e}", exc_info=True)
+            online_players.clear()
                 
             # Update info channel
             await ServerInfoManager(self.bot).update_info(interaction.guild)
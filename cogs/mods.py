@@ -7,6 +7,7 @@ import os
 import aiofiles
 import asyncio
 from src.config import config
+from src.http_client import get_session
 from src.utils import has_role, send_debug, get_server_mod_folder
 
 logger = logging.getLogger('mc_bot')
@@ -56,12 +57,12 @@ class ModsCog(commands.Cog):
 
     async def _modrinth_search(self, query: str, limit: int = 10) -> list[dict]:
         try:
-            headers = {"User-Agent": "slogiker/mc-bot/v3.2.0 (slogiker/mc-bot)"}
-            async with aiohttp.ClientSession(headers=headers, timeout=aiohttp.ClientTimeout(total=3)) as session:
-                params = {"query": query, "limit": limit, "index": "relevance"}
-                async with session.get("https://api.modrinth.com/v2/search", params=params) as resp:
-                    if resp.status == 200:
-                        return (await resp.json()).get("hits", [])
+            # Pooled keep-alive session: autocomplete keystrokes skip the TCP/TLS handshake
+            params = {"query": query, "limit": limit, "index": "relevance"}
+            async with get_session().get("https://api.modrinth.com/v2/search", params=params,
+                                         timeout=aiohttp.ClientTimeout(total=3)) as resp:
+                if resp.status == 200:
+                    return (await resp.json()).get("hits", [])
         except Exception:
             pass
         return []
@@ -109,53 +110,52 @@ class ModsCog(commands.Cog):
         installed_files = []
         failed_mods = []
 
-        headers = {"User-Agent": "slogiker/mc-bot/v3.2.0 (slogiker/mc-bot)"}
-        async with aiohttp.ClientSession(headers=headers) as session:
-            for i, slug in enumerate(slugs):
-                logger.info(f"Mod Search: '{slug}' - Querying Modrinth (version={mc_version}, loader={loader})")
-                await msg.edit(content=f"📥 [{i+1}/{len(slugs)}] Locating latest compatible version for `{slug}`...")
-
-                api_url = f"https://api.modrinth.com/v2/project/{slug}/version"
-                params = {
-                    "loaders": f'["{loader}"]',
-                    "game_versions": f'["{mc_version}"]'
-                }
-
-                try:
-                    async with session.get(api_url, params=params) as resp:
-                        logger.info(f"Mod Search: '{slug}' - API check status {resp.status}")
-                        if resp.status != 200:
-                            failed_mods.append(f"`{slug}` (API error)")
-                            continue
-
-                        versions = await resp.json()
-                        if not versions:
-                            logger.warning(f"Mod Search: '{slug}' - No compatible version found (404)")
-                            failed_mods.append(f"`{slug}` (no version for {mc_version} / {loader})")
-                            continue
-
-                        latest_file = versions[0]['files'][0]
-                        download_url = latest_file['url']
-                        filename = latest_file['filename']
-
-                        dest_path = os.path.join(config.SERVER_DIR, dest_folder, filename)
-
-                        logger.info(f"Mod Search: '{slug}' - Downloading '{filename}'...")
-                        await msg.edit(content=f"📥 [{i+1}/{len(slugs)}] Downloading `{filename}`...")
-
-                        async with session.get(download_url) as file_resp:
-                            if file_resp.status == 200:
-                                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                                async with aiofiles.open(dest_path, mode='wb') as f:
-                                    await f.write(await file_resp.read())
-                                installed_files.append(filename)
-                                logger.info(f"Mod Search: '{slug}' - Download completed (200)")
-                            else:
-                                logger.error(f"Mod Search: '{slug}' - Download failed ({file_resp.status})")
-                                failed_mods.append(f"`{slug}` (download error)")
-                except Exception as e:
-                    logger.error(f"Mod Search: '{slug}' - Process failed: {e}")
-                    failed_mods.append(f"`{slug}` ({str(e)})")
+        session = get_session()
+        for i, slug in enumerate(slugs):
+            logger.info(f"Mod Search: '{slug}' - Querying Modrinth (version={mc_version}, loader={loader})")
+            await msg.edit(content=f"📥 [{i+1}/{len(slugs)}] Locating latest compatible version for `{slug}`...")
+
+            api_url = f"https://api.modrinth.com/v2/project/{slug}/version"
+            params = {
+                "loaders": f'["{loader}"]',
+                "game_versions": f'["{mc_version}"]'
+            }
+
+            try:
+                async with session.get(api_url, params=params) as resp:
+                    logger.info(f"Mod Search: '{slug}' - API check status {resp.status}")
+                    if resp.status != 200:
+                        failed_mods.append(f"`{slug}` (API error)")
+                        continue
+
+                    versions = await resp.json()
+                    if not versions:
+                        logger.warning(f"Mod Search: '{slug}' - No compatible version found (404)")
+                        failed_mods.append(f"`{slug}` (no version for {mc_version} / {loader})")
+                        continue
+
+                    latest_file = versions[0]['files'][0]
+                    download_url = latest_file['url']
+                    filename = latest_file['filename']
+
+                    dest_path = os.path.join(config.SERVER_DIR, dest_folder, filename)
+
+                    logger.info(f"Mod Search: '{slug}' - Downloading '{filename}'...")
+                    await msg.edit(content=f"📥 [{i+1}/{len(slugs)}] Downloading `{filename}`...")
+
+                    async with session.get(download_url) as file_resp:
+                        if file_resp.status == 200:
+                            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                            async with aiofiles.open(dest_path, mode='wb') as f:
+                                await f.write(await file_resp.read())
+                            installed_files.append(filename)
+                            logger.info(f"Mod Search: '{slug}' - Download completed (200)")
+                        else:
+                            logger.error(f"Mod Search: '{slug}' - Download failed ({file_resp.status})")
+                            failed_mods.append(f"`{slug}` (download error)")
+            except Exception as e:
+                logger.error(f"Mod Search: '{slug}' - Process failed: {e}")
+                failed_mods.append(f"`{slug}` ({str(e)})")
 
         # Build final status embed
         embed = discord.Embed(title="📦 Mod Installation Results", color=discord.Color.green())
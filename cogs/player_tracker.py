@@ -1,27 +1,12 @@
 import discord
 from discord.ext import commands
 import asyncio
-import re
 from src.config import config
 from src.logger import logger
+from src.online_players import online_players
 
-# Log lines containing any of these strings are never shown to users
-_LOG_NOISE = {
-    "Thread RCON Listener started",
-    "RCON running on",
-    "RCON Listener #",
-    "Stopping remote control listener",
-    "UUID of player",
-}
-
-_DEATH_WORDS = [
-    "was slain", "was shot", "drowned", "experienced kinetic energy",
-    "blew up", "was killed", "hit the ground", "fell from",
-    "went up in flames", "burned to death", "walked into fire",
-    "tried to swim in lava", "died", "was squashed", "was pummeled",
-    "was pricked", "starved to death", "suffocated", "was impaled",
-    "was frozen", "withered away",
-]
+# Lines that change the online player list / presence — kept even if the consumer falls behind
+_TRACKED_EVENTS = ("joined the game", "left the game", "Done (", "Starting minecraft server version")
 
 
 class PlayerTracker(commands.Cog):
@@ -35,7 +20,9 @@ class PlayerTracker(commands.Cog):
 
     async def cog_load(self):
         from src.log_dispatcher import log_dispatcher
-        self.log_queue = log_dispatcher.subscribe()
+        self.log_queue = log_dispatcher.subscribe(
+            batch=True, name="player_tracker", policy="drop_oldest", priority=_TRACKED_EVENTS
+        )
         await log_dispatcher.start()
         self.log_task = asyncio.create_task(self._consume())
 
@@ -58,69 +45,8 @@ class PlayerTracker(commands.Cog):
 
         while not self.stop_event.is_set():
             try:
-                line = await asyncio.wait_for(self.log_queue.get(), timeout=1.0)
-                if not line:
-                    continue
-
-                match = re.search(r'\[(.*?)] \[(.*?)/(.*?)\]: (.*)', line)
-                if not match:
-                    continue
-
-                _time, _thread, _level, msg = match.groups()
-
-                if any(noise in msg for noise in _LOG_NOISE):
-                    continue
-
-                if "Starting minecraft server version" in msg:
-                    await self.bot.change_presence(
-                        activity=discord.Activity(type=discord.ActivityType.playing, name="Server Starting..."),
-                        status=discord.Status.idle
-                    )
-
-                elif "Done (" in msg and "! For help, type" in msg:
-                    bot_config = config.load_bot_config()
-                    count = len(bot_config.get('online_players', []))
-                    await self.bot.change_presence(
-                        activity=discord.Activity(type=discord.ActivityType.playing, name=f"Minecraft: {count} Players"),
-                        status=discord.Status.online
-                    )
-
-                elif "joined the game" in msg:
-                    m = re.match(r'^(\w+) joined the game', msg)
-                    if m:
-                        player = m.group(1)
-                        bot_config = config.load_bot_config()
-                        players = bot_config.get('online_players', [])
-                        if player not in players:
-                            players.append(player)
-                            bot_config['online_players'] = players
-                            config.save_bot_config(bot_config)
-                        await self.bot.change_presence(
-                            activity=discord.Activity(type=discord.ActivityType.playing, name=f"Minecraft: {len(players)} Players"),
-                            status=discord.Status.online
-                        )
-                        await self.send_event_notification("join", player)
-
-                elif "left the game" in msg:
-                    m = re.match(r'^(\w+) left the game', msg)
-                    if m:
-                        player = m.group(1)
-                        bot_config = config.load_bot_config()
-                        players = bot_config.get('online_players', [])
-                        if player in players:
-                            players.remove(player)
-                            bot_config['online_players'] = players
-                            config.save_bot_config(bot_config)
-                        await self.bot.change_presence(
-                            activity=discord.Activity(type=discord.ActivityType.playing, name=f"Minecraft: {len(players)} Players"),
-                            status=discord.Status.online
-                        )
-                        await self.send_event_notification("leave", player)
-
-                elif any(word in msg for word in _DEATH_WORDS):
-                    player = msg.split()[0] if msg else None
-                    if player:
-                        await self.send_event_notification("death", player, msg)
+                events = await asyncio.wait_for(self.log_queue.get(), timeout=1.0)
+                await self._handle_batch(events)
 
             except asyncio.TimeoutError:
                 continue
@@ -128,6 +54,47 @@ class PlayerTracker(commands.Cog):
                 logger.error(f"PlayerTracker error: {e}", exc_info=True)
                 await asyncio.sleep(1)
 
+    async def _handle_batch(self, events: list):
+        """
+        Processes one batch of classified log events (see src/log_classifier.py) in a single pass.
+        Joins/leaves go to the in-memory OnlinePlayers registry (persisted debounced, off-loop),
+        and presence is updated at most once per batch.
+        """
+        presence = None  # (name, status) of the last presence change in this batch
+        notifications = []
+
+        for event in events:
+            kind = event.kind
+
+            if kind == "starting":
+                presence = ("Server Starting...", discord.Status.idle)
+
+            elif kind == "started":
+                presence = (f"Minecraft: {online_players.count} Players", discord.Status.online)
+
+            elif kind == "join":
+                online_players.add(event.player)
+                presence = (f"Minecraft: {online_players.count} Players", discord.Status.online)
+                notifications.append(("join", event.player, None))
+
+            elif kind == "leave":
+                online_players.remove(event.player)
+                presence = (f"Minecraft: {online_players.count} Players", discord.Status.online)
+                notifications.append(("leave", event.player, None))
+
+            elif kind == "death":
+                notifications.append(("death", event.player, event.data))
+
+        if presence:
+            name, status = presence
+            await self.bot.change_presence(
+                activity=discord.Activity(type=discord.ActivityType.playing, name=name),
+                status=status
+            )
+
+        for event_type, player, extra in notifications:
+            await self.send_event_notification(event_type, player, extra)
+
     async def send_event_notification(self, event_type: str, player_name: str, extra_msg: str = None):
         """Send player event notifications to the debug channel."""
         try:
@@ -6,6 +6,7 @@ import aiohttp
 import os
 import time
 from src.config import config
+from src.http_client import get_session
 from src.logger import logger
 from src.utils import has_role
 
@@ -24,9 +25,10 @@ class PlayitCog(commands.Cog):
         self.tunnels = []
         self._current_claim_code = None
         self._claim_link = None
-        
+
+    async def cog_load(self):
         # Load from config if available
-        bot_cfg = config.load_bot_config()
+        bot_cfg = await config.aload_bot_config()
         self.cached_address = bot_cfg.get('playit_ip')
         if self.cached_address:
             self.tunnels = [self.cached_address]
@@ -53,8 +55,7 @@ class PlayitCog(commands.Cog):
             self.cached_address = address
             self.cache_time = time.time()
             self.tunnels = [address]
-            with config.update_bot_config() as data:
-                data['playit_ip'] = address
+            await config.aupdate_bot_config(lambda data: data.update(playit_ip=address))
             logger.info(f"Playit IP address updated: {address}")
             
             # Trigger server info update so #server-information is accurate
@@ -272,21 +273,21 @@ class PlayitCog(commands.Cog):
         headers = {"Authorization": f"Agent-Key {secret_key}", "Content-Type": "application/json"}
         try:
             timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, headers=headers, json={}) as resp:
-                    if resp.status == 401:
-                        logger.error(f"Playit API 401 Unauthorized. Key length: {len(secret_key)}. First 4 chars: {secret_key[:4]}... Last 4: ...{secret_key[-4:]}")
-                        return None, "❌ Playit rejected the secret key (401 Unauthorized)."
-                    if resp.status != 200:
-                        return None, f"❌ Playit API error ({resp.status})."
-                    data = await resp.json()
-                    tunnels = data.get("data", {}).get("tunnels", [])
-                    if not tunnels:
-                        return None, "❌ No tunnels configured."
-                    for tunnel in tunnels:
-                        if tunnel.get("tunnel_type") == "minecraft-java":
-                            return tunnel["display_address"], None
-                    return tunnels[0]["display_address"], None
+            session = get_session()
+            async with session.post(url, headers=headers, json={}, timeout=timeout) as resp:
+                if resp.status == 401:
+                    logger.error(f"Playit API 401 Unauthorized. Key length: {len(secret_key)}. First 4 chars: {secret_key[:4]}... Last 4: ...{secret_key[-4:]}")
+                    return None, "❌ Playit rejected the secret key (401 Unauthorized)."
+                if resp.status != 200:
+                    return None, f"❌ Playit API error ({resp.status})."
+                data = await resp.json()
+                tunnels = data.get("data", {}).get("tunnels", [])
+                if not tunnels:
+                    return None, "❌ No tunnels configured."
+                for tunnel in tunnels:
+                    if tunnel.get("tunnel_type") == "minecraft-java":
+                        return tunnel["display_address"], None
+                return tunnels[0]["display_address"], None
         except Exception as e:
             logger.error(f"Error fetching Playit address: {e}")
             return None, "❌ Unexpected error fetching Playit address."
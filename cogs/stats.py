@@ -1,20 +1,33 @@
 
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 import os
-import aiohttp
-import nbtlib
 import asyncio
 import uuid # Moved from get_offline_uuid
 from src.config import config
 from src.utils import has_role, get_uuid # Standardized import
 from src.logger import logger
+from src.nbt_reader import read_nbt_fields
 from src.mc_link_manager import MCLinkManager
+from src.mojang import mojang_profiles
+from src.stats_index import stats_index
+from src.usercache import usercache
 
 # --- Constants ---
 TICKS_PER_SECOND = 20
 SECONDS_PER_HOUR = 3600
+LEADERBOARD_SIZE = 10         # Players shown by /leaderboard
+STATS_INDEX_MINUTES = 5       # How often the stats index re-scans world/stats
+PLAYERDATA_FIELDS = ("Pos", "Health", "XpLevel", "Dimension")  # Only these are read from playerdata/<uuid>.dat
+
+LEADERBOARD_STATS = {
+    "play_time":    "Playtime",
+    "deaths":       "Deaths",
+    "player_kills": "Player Kills",
+    "mob_kills":    "Mob Kills",
+    "mined":        "Blocks Mined",
+}
 
 class StatsCog(commands.Cog):
     """
@@ -27,11 +40,29 @@ class StatsCog(commands.Cog):
         """Initializes the StatsCog with the bot instance."""
         self.bot = bot
 
+    async def cog_load(self):
+        self.stats_index_loop.start()
+
+    def cog_unload(self):
+        self.stats_index_loop.cancel()
+
+    # --- Background Tasks ---
+
+    @tasks.loop(minutes=STATS_INDEX_MINUTES)
+    async def stats_index_loop(self):
+        """Keeps the leaderboard index current; only changed stats files are re-read."""
+        try:
+            changed = await asyncio.to_thread(stats_index.refresh)
+            if changed:
+                logger.debug(f"Stats index: {changed} player(s) updated, {len(stats_index)} indexed")
+        except Exception as e:
+            logger.error(f"Stats index refresh failed: {e}")
+
     # --- Data Fetching Helpers ---
 
     async def get_uuid_online(self, username: str):
         """
-        Fetches UUID and official name from Mojang API.
+        Fetches UUID and official name from Mojang API (through the shared profile cache).
 
         Used for legitimate (premium) accounts to get accurate skins and IDs.
 
@@ -41,15 +72,10 @@ class StatsCog(commands.Cog):
         Returns:
             tuple[str | None, str | None]: A tuple containing (uuid, official_name).
         """
-        timeout = aiohttp.ClientTimeout(total=10)
-        try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(f'https://api.mojang.com/users/profiles/minecraft/{username}') as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return data.get('id'), data.get('name')
-        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
-            logger.warning(f"Mojang API request failed for '{username}': {e}")
+        # Shared, cached lookup (src/mojang.py) — repeated calls within the TTL don't hit the API
+        profile = await mojang_profiles.lookup(username, session=getattr(self.bot, 'session', None))
+        if profile:
+            return profile['id'], profile['name']
         return None, None
 
     async def get_offline_uuid(self, username: str):
@@ -70,14 +96,14 @@ class StatsCog(commands.Cog):
         Parses player statistics from local server files.
 
         1. Reads world/stats/<uuid>.json for standard stats.
-        2. Reads world/playerdata/<uuid>.dat using nbtlib for additional data.
+        2. Reads PLAYERDATA_FIELDS from world/playerdata/<uuid>.dat (the rest of the file is skipped).
 
         Args:
             uuid_str (str): The Minecraft UUID of the player.
             server_path (str): The path to the Minecraft server directory.
 
         Returns:
-            tuple[dict, dict]: A tuple containing (stats_json, nbt_data).
+            tuple[dict, dict]: A tuple containing (stats_json, nbt_data) — nbt_data holds plain values.
         """
         # Format UUID with dashes using uuid.UUID object
         formatted_uuid = str(uuid.UUID(uuid_str))
@@ -101,8 +127,7 @@ class StatsCog(commands.Cog):
         nbt_data = {}
         if os.path.exists(player_dat):
             try:
-                nbt_file = nbtlib.load(player_dat)
-                nbt_data = nbt_file.root
+                nbt_data = read_nbt_fields(player_dat, PLAYERDATA_FIELDS)
             except Exception as e:
                 logger.error(f"Failed to load user NBT: {e}")
         
@@ -207,6 +232,16 @@ class StatsCog(commands.Cog):
         embed.add_field(name="Deaths", value=str(deaths), inline=True)
         embed.add_field(name="Player Kills", value=str(player_kills), inline=True)
         embed.add_field(name="Mob Kills", value=str(mob_kills), inline=True)
+        if "XpLevel" in nbt_data:
+            embed.add_field(name="XP Level", value=str(nbt_data["XpLevel"]), inline=True)
+        pos = nbt_data.get("Pos")
+        if isinstance(pos, list) and len(pos) == 3:
+            dimension = nbt_data.get("Dimension", "minecraft:overworld")
+            if isinstance(dimension, int):
+                # Pre-1.16 player files store the dimension as a number
+                dimension = {-1: "the_nether", 0: "overworld", 1: "the_end"}.get(dimension, str(dimension))
+            dimension = dimension.removeprefix("minecraft:")
+            embed.add_field(name="Last Position", value=f"{pos[0]:.0f}, {pos[1]:.0f}, {pos[2]:.0f} ({dimension})", inline=True)
         
         if is_cracked:
             embed.set_footer(text="Account Type: Cracked / Offline")
@@ -215,6 +250,42 @@ class StatsCog(commands.Cog):
 
         await interaction.followup.send(embed=embed)
 
+    @app_commands.command(name="leaderboard", description="Top players for a statistic")
+    @app_commands.describe(stat="Statistic to rank by")
+    @app_commands.choices(stat=[app_commands.Choice(name=label, value=key) for key, label in LEADERBOARD_STATS.items()])
+    @has_role("stats")
+    async def leaderboard(self, interaction: discord.Interaction, stat: str = "play_time"):
+        """
+        Ranks players by a statistic from the in-memory stats index.
+
+        Args:
+            interaction (discord.Interaction): The interaction that triggered the command.
+            stat (str): One of LEADERBOARD_STATS.
+        """
+        await interaction.response.defer()
+
+        if not stats_index.loaded:
+            # First request before the background loop ran
+            await asyncio.to_thread(stats_index.refresh)
+
+        top = stats_index.top(stat, LEADERBOARD_SIZE)
+        if not top:
+            await interaction.followup.send("❌ No player statistics found yet.")
+            return
+
+        names = await asyncio.to_thread(lambda: [usercache.get_name(u) or u[:8] for u, _ in top])
+        lines = []
+        for rank, ((_, value), name) in enumerate(zip(top, names), start=1):
+            if stat == "play_time":
+                shown = f"{value / TICKS_PER_SECOND / SECONDS_PER_HOUR:.1f} h"
+            else:
+                shown = f"{value:,}"
+            lines.append(f"**{rank}.** {discord.utils.escape_markdown(name)} — {shown}")
+
+        embed = discord.Embed(title=f"🏆 {LEADERBOARD_STATS[stat]} Leaderboard", description="\n".join(lines), color=discord.Color.gold())
+        embed.set_footer(text=f"{len(stats_index)} players tracked")
+        await interaction.followup.send(embed=embed)
+
 
 async def setup(bot):
     await bot.add_cog(StatsCog(bot))
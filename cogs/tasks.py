@@ -6,6 +6,7 @@ import subprocess
 import os
 from src.config import config
 from src.logger import logger
+from src.online_players import online_players
 from src.utils import send_debug
 
 class Tasks(commands.Cog):
@@ -32,10 +33,8 @@ class Tasks(commands.Cog):
         
         # Clear stale online_players if server is not running at startup
         if not self.bot.server.is_running():
-            bot_cfg = config.load_bot_config()
-            if bot_cfg.get('online_players'):
-                bot_cfg['online_players'] = []
-                config.save_bot_config(bot_cfg)
+            if online_players.count:
+                online_players.clear()
                 logger.info("Cleared stale online_players list on startup.")
 
         if not self.crash_check.is_running():
@@ -56,10 +55,7 @@ class Tasks(commands.Cog):
             return
 
         # Clear stale player list — crash means no "left the game" messages were fired
-        bot_config = config.load_bot_config()
-        if bot_config.get('online_players'):
-            bot_config['online_players'] = []
-            config.save_bot_config(bot_config)
+        online_players.clear()
 
         # specific check to ensure we update status if it crashed
         if self.bot.status != discord.Status.dnd:
@@ -130,10 +126,7 @@ class Tasks(commands.Cog):
                 logger.info("🚨 Minecraft server crash detected! Attempting auto-restart...")
 
                 # Clear stale player list — crash means no "left the game" messages were fired
-                bot_config = config.load_bot_config()
-                if bot_config.get('online_players'):
-                    bot_config['online_players'] = []
-                    config.save_bot_config(bot_config)
+                online_players.clear()
 
                 # specific check to ensure we update status if it crashed
                 if self.bot.status != discord.Status.dnd:
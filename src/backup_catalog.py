@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import datetime
+from src import backup_store
+from src.backup_store import SNAPSHOT_EXT
+from src.logger import logger
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Catalog of every backup in backups/auto and backups/custom.
+#
+# One entry per backup (size, creation time, world, Minecraft version, file
+# count, checksum, kind, format), persisted to backups/catalog.json.
+# BackupManager records each backup it writes or deletes, so listing,
+# autocomplete and retention read memory instead of listing and stat-ing the
+# backup folders. reconcile() picks up files copied in or removed by hand; it
+# only opens backups it has not seen before (or whose size/mtime changed).
+# ──────────────────────────────────────────────────────────────────────────────
+
+CATALOG_VERSION   = 1
+CATALOG_FILE      = "catalog.json"
+HASH_BUFFER       = 1024 * 1024
+# Files in auto/ and custom/ that are backups: legacy/"zip" format archives and dedup snapshot manifests
+BACKUP_EXTENSIONS = (".zip", SNAPSHOT_EXT)
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BUFFER):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HashingWriter:
+    """Wraps a binary file and hashes everything written through it (checksum without a second read)."""
+
+    def __init__(self, f):
+        self._f = f
+        self._digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self._digest.update(data)
+        return self._f.write(data)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def describe(path: str, kind: str, manifest: dict | None = None, **known) -> dict:
+    """
+    Catalog entry of one backup file. `known` overrides what would otherwise be read from the
+    file (`created`, `world`, `mc_version`, `sha256`). Snapshots are described from their
+    manifest; zips from their central directory. Zips found on disk are not hashed (they can
+    be many GB), so their `sha256` is None.
+    """
+    st = os.stat(path)
+    name = os.path.basename(path)
+    entry = {
+        "name": name,
+        "kind": kind,
+        "format": "dedup" if name.endswith(SNAPSHOT_EXT) else "zip",
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "created": st.st_mtime,
+        "world": None,
+        "mc_version": None,
+        "files": None,
+        "data_bytes": None,      # uncompressed world size
+        "new_bytes": st.st_size, # disk space this backup added (new chunks for a snapshot)
+        "sha256": None,
+    }
+    try:
+        if entry["format"] == "dedup":
+            manifest = manifest or backup_store.load_manifest(path)
+            stats = manifest.get("stats", {})
+            entry.update(
+                created=datetime.fromisoformat(manifest["created"]).timestamp(),
+                world=manifest.get("world"),
+                files=len(manifest["files"]),
+                data_bytes=sum(e["size"] for e in manifest["files"]),
+                new_bytes=stats.get("new_bytes", 0) + st.st_size,
+                sha256=known.get("sha256") or sha256_file(path),
+            )
+        else:
+            with zipfile.ZipFile(path) as zf:
+                infos = zf.infolist()
+            entry.update(files=len(infos), data_bytes=sum(i.file_size for i in infos))
+    except Exception as e:
+        # Still listed (and subject to retention); only the details are missing
+        logger.warning(f"Backup catalog: cannot read {name}: {e}")
+    entry.update({k: v for k, v in known.items() if v is not None})
+    return entry
+
+
+class BackupCatalog:
+    """
+    Entries keyed by (kind, name). `dirs` maps each kind ("auto", "custom") to its folder.
+    Queries are served from memory; reconcile() and the updates do file I/O (call via
+    asyncio.to_thread).
+    """
+
+    def __init__(self, path: str, dirs: dict[str, str]):
+        self.path = path
+        self.dirs = dirs
+        self._lock = threading.Lock()          # guards the table
+        self._refresh_lock = threading.Lock()  # one reconcile at a time
+        self._entries = {}           # (kind, name) -> entry
+        self.loaded = False
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def entries(self, kind: str | None = None) -> list[dict]:
+        """Copies of the entries (with their `path`), newest first; all kinds if `kind` is None."""
+        with self._lock:
+            items = [dict(e, path=self.path_of(e)) for e in self._entries.values()
+                     if kind is None or e["kind"] == kind]
+        items.sort(key=lambda e: (e["created"], e["name"]), reverse=True)
+        return items
+
+    def get(self, kind: str, name: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get((kind, name))
+            return dict(entry, path=self.path_of(entry)) if entry else None
+
+    def path_of(self, entry: dict) -> str:
+        return os.path.join(self.dirs[entry["kind"]], entry["name"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── Updates (blocking) ────────────────────────────────────────────────────
+
+    def add(self, path: str, kind: str, manifest: dict | None = None, **known) -> dict:
+        """Record a backup that was just written."""
+        self.ensure_loaded()
+        entry = describe(path, kind, manifest, **known)
+        with self._lock:
+            self._entries[(kind, entry["name"])] = entry
+            self._save()
+        return entry
+
+    def remove(self, kind: str, name: str):
+        self.ensure_loaded()
+        with self._lock:
+            if self._entries.pop((kind, name), None) is not None:
+                self._save()
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.reconcile()
+
+    def reconcile(self) -> tuple[int, int]:
+        """Bring the catalog in line with the backup folders. Returns (added or updated, removed)."""
+        with self._refresh_lock:
+            if not self.loaded:
+                self._load()
+            with self._lock:
+                before = {key: (e["size"], e["mtime_ns"]) for key, e in self._entries.items()}
+
+            seen = {}
+            for kind, directory in self.dirs.items():
+                try:
+                    with os.scandir(directory) as it:
+                        for item in it:
+                            if item.name.endswith(BACKUP_EXTENSIONS) and item.is_file():
+                                st = item.stat()
+                                seen[(kind, item.name)] = (st.st_size, st.st_mtime_ns, item.path)
+                except FileNotFoundError:
+                    pass
+
+            changed = {}
+            for key, (size, mtime_ns, path) in seen.items():
+                if before.get(key) != (size, mtime_ns):
+                    try:
+                        changed[key] = describe(path, key[0])
+                    except OSError as e:
+                        logger.debug(f"Backup catalog: skipping {path}: {e}")
+            # Only entries that existed before the scan can be stale; newer ones were added meanwhile
+            removed = [key for key in before if key not in seen]
+
+            with self._lock:
+                self._entries.update(changed)
+                for key in removed:
+                    self._entries.pop(key, None)
+                if changed or removed or not os.path.exists(self.path):
+                    self._save()
+            self.loaded = True
+            if changed or removed:
+                logger.info(f"Backup catalog: {len(changed)} added/updated, {len(removed)} removed")
+            return len(changed), len(removed)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CATALOG_VERSION:
+                raise ValueError(f"unsupported catalog version {data.get('version')}")
+            entries = {(e["kind"], e["name"]): e for e in data["backups"] if e.get("kind") in self.dirs}
+        except FileNotFoundError:
+            entries = {}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Backup catalog: rebuilding unreadable {self.path}: {e}")
+            entries = {}
+        with self._lock:
+            self._entries = entries
+
+    def _save(self):
+        # Caller holds self._lock
+        data = {"version": CATALOG_VERSION, "backups": list(self._entries.values())}
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".catalog.", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
@@ -0,0 +1,430 @@
+import asyncio
+import bisect
+import ipaddress
+import json
+import os
+import re
+import secrets
+import tempfile
+import time
+import zlib
+from aiohttp import web
+from src import backup_store
+from src.backup_store import SNAPSHOT_EXT
+from src.logger import logger
+from src.zip_writer import FLAG_UTF8, ZIP_STORED, central_record, dos_datetime, end_records, local_header
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Streaming backup downloads over HTTP.
+#
+# A snapshot is served as a virtual STORED zip: its layout (local headers,
+# file data, central directory) is computed from the manifest, and any byte
+# range is produced on demand from the chunk store — no archive is written to
+# disk. Plain .zip backups are served from the file. Either can be fetched
+# whole or as fixed-size volumes (`<name>.zip.001`, …; join with `cat`), all
+# with HTTP Range support so interrupted downloads resume.
+#
+# Each published backup gets `backups/exports/<name>.export.json` holding the
+# access token and expiry. The zip layout comes from the manifest alone (it
+# records every file's CRC-32), so publishing never reads the world back, and
+# links and partial downloads stay valid across bot restarts. Only snapshots
+# taken before region CRCs were recorded have theirs computed here, once, and
+# kept in the record.
+# ──────────────────────────────────────────────────────────────────────────────
+
+EXPORT_VERSION = 1
+VOLUME_SIZE    = 1024 * 1024 * 1024  # bytes per split volume
+LINK_TTL       = 24 * 3600           # seconds a download link stays valid
+STREAM_BUFFER  = 1024 * 1024         # bytes read per thread hop while streaming
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileSource:
+    """A plain file (legacy .zip backup) as a byte-range source."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+
+    def iter_range(self, start: int, end: int):
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            while start < end:
+                data = f.read(min(STREAM_BUFFER, end - start))
+                if not data:
+                    raise EOFError(f"{self.path} shrank while streaming")
+                start += len(data)
+                yield data
+
+
+class VirtualZip:
+    """
+    The STORED zip of a snapshot, addressed by byte offset. `crcs` maps path → CRC-32 for
+    entries whose manifest has none (see compute_crcs()).
+    """
+
+    def __init__(self, manifest: dict, crcs: dict, store):
+        self._store = store
+        self._parts = []             # (offset, bytes | manifest entry)
+        offset = 0
+        records = []
+        for entry in manifest["files"]:
+            crc = entry["crc32"] if entry.get("crc32") is not None else crcs[entry["path"]]
+            encoded = entry["path"].encode("utf-8")
+            dos_time, dos_date = dos_datetime(entry["mtime_ns"])
+            header = local_header(encoded, ZIP_STORED, dos_time, dos_date, crc, entry["size"], entry["size"])
+            records.append(central_record(encoded, ZIP_STORED, dos_time, dos_date, crc, entry["size"],
+                                          entry["size"], offset, entry.get("mode", 0o644), flags=FLAG_UTF8))
+            self._parts.append((offset, header))
+            offset += len(header)
+            self._parts.append((offset, entry))
+            offset += entry["size"]
+        directory = b"".join(records)
+        self._parts.append((offset, directory + end_records(len(records), len(directory), offset)))
+        self.size = offset + len(self._parts[-1][1])
+        self._offsets = [part_offset for part_offset, _ in self._parts]
+
+    def iter_range(self, start: int, end: int):
+        index = max(bisect.bisect_right(self._offsets, start) - 1, 0)
+        while start < end and index < len(self._parts):
+            part_offset, part = self._parts[index]
+            length = len(part) if isinstance(part, bytes) else part["size"]
+            lo, hi = start - part_offset, min(end, part_offset + length) - part_offset
+            if hi > lo:
+                if isinstance(part, bytes):
+                    yield part[lo:hi]
+                else:
+                    yield from backup_store.iter_file_range(part, self._store, lo, hi)
+            start = part_offset + length
+            index += 1
+
+
+def compute_crcs(manifest: dict, store) -> dict:
+    """CRC-32 of every entry without one (region files of older snapshots), by reading it back from the store."""
+    crcs = {}
+    for entry in manifest["files"]:
+        if entry.get("crc32") is None:
+            crc = 0
+            for data in backup_store.iter_file_data(entry, store):
+                crc = zlib.crc32(data, crc)
+            crcs[entry["path"]] = crc
+    return crcs
+
+
+def volume_ranges(size: int, volume_size: int = VOLUME_SIZE) -> list[tuple[int, int]]:
+    return [(start, min(start + volume_size, size)) for start in range(0, size, volume_size)] or [(0, 0)]
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """A single `Range: bytes=a-b` → [start, end); None = whole body. Raises ValueError if unsatisfiable."""
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        raise ValueError(header)
+    first, last = match.groups()
+    if first == "":
+        start, end = max(size - int(last), 0), size      # suffix range: the last N bytes
+    else:
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    if start >= end:
+        raise ValueError(header)
+    return start, end
+
+
+class ExportServer:
+    """
+    Small aiohttp server for backup downloads, started on first use.
+
+    GET /dl/<token>/<name>.zip          the whole archive
+    GET /dl/<token>/<name>.zip.NNN      volume NNN (1-based)
+    GET /dl/<token>/manifest.json       size, volume offsets and sizes (for resuming tools)
+    """
+
+    def __init__(self):
+        self._runner = None
+        self._start_lock = None
+        self._exports = {}           # token -> export record (export.json contents)
+        self._sources = {}           # token -> (backup mtime_ns, FileSource | VirtualZip)
+
+    @property
+    def export_dir(self) -> str:
+        from src.backup_manager import backup_manager
+        return backup_manager.export_dir
+
+    @staticmethod
+    def exposed() -> bool:
+        """
+        Whether download links can work for Discord users: a public URL is configured, or the
+        server listens beyond loopback.
+        """
+        from src.config import config
+        if config.BACKUP_HTTP_URL:
+            return True
+        host = config.BACKUP_HTTP_HOST.strip("[]")
+        if host == "localhost":
+            return False
+        try:
+            return not ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            return True     # a host name: assume the operator bound it on purpose
+
+    def base_url(self) -> str:
+        from src.config import config
+        if config.BACKUP_HTTP_URL:
+            return config.BACKUP_HTTP_URL.rstrip("/")
+        return f"http://{config.CUSTOM_IP or 'localhost'}:{self.port or config.BACKUP_HTTP_PORT}"
+
+    # ── Publishing ────────────────────────────────────────────────────────────
+
+    async def publish(self, backup_path: str) -> dict:
+        """
+        Make a backup downloadable. Returns {"name", "size", "url", "manifest_url", "volumes", "expires"};
+        `volumes` is a list of (url, size).
+        """
+        record = await asyncio.to_thread(self._prepare, backup_path)
+        await self.start()      # before base_url(), which may need the bound port
+        self._exports[record["token"]] = record
+        base = f"{self.base_url()}/dl/{record['token']}"
+        name = record["name"]
+        return {
+            "name": name,
+            "size": record["size"],
+            "url": f"{base}/{name}",
+            "manifest_url": f"{base}/manifest.json",
+            "volumes": [(f"{base}/{name}.{i:03d}", end - start)
+                        for i, (start, end) in enumerate(volume_ranges(record["size"], record["volume_size"]), 1)],
+            "expires": record["expires"],
+        }
+
+    def _prepare(self, backup_path: str) -> dict:
+        """Load or (re)build the export record of a backup. Blocking."""
+        os.makedirs(self.export_dir, exist_ok=True)
+        self._prune()
+        base = os.path.basename(backup_path)
+        stem = base[:-len(SNAPSHOT_EXT)] if base.endswith(SNAPSHOT_EXT) else base[:-len(".zip")]
+        record_path = os.path.join(self.export_dir, f"{stem}.export.json")
+        mtime_ns = os.stat(backup_path).st_mtime_ns
+
+        record = _read_json(record_path)
+        if not record or record.get("version") != EXPORT_VERSION or record.get("backup_mtime_ns") != mtime_ns:
+            record = {
+                "version": EXPORT_VERSION,
+                "backup": backup_path,
+                "backup_mtime_ns": mtime_ns,
+                "name": f"{stem}.zip",
+                "token": secrets.token_urlsafe(16),
+                "volume_size": VOLUME_SIZE,
+                "crcs": {},
+            }
+            if backup_path.endswith(SNAPSHOT_EXT):
+                manifest = backup_store.load_manifest(backup_path)
+                if any(e.get("crc32") is None for e in manifest["files"]):
+                    started = time.monotonic()
+                    record["crcs"] = compute_crcs(manifest, self._store())
+                    logger.info(f"Export: indexed {base} in {time.monotonic() - started:.1f}s (snapshot predates region CRCs)")
+        record["expires"] = time.time() + LINK_TTL
+        record["size"] = self._source(record).size
+        _write_json(record_path, record)
+        return record
+
+    def _prune(self):
+        """Drop expired export records and zips left by the old materialising export."""
+        now = time.time()
+        for fname in os.listdir(self.export_dir):
+            path = os.path.join(self.export_dir, fname)
+            if fname.endswith(".export.json"):
+                record = _read_json(path)
+                if record and record.get("expires", 0) > now:
+                    continue
+                if record:
+                    self._exports.pop(record.get("token"), None)
+                    self._sources.pop(record.get("token"), None)
+            elif not fname.endswith(".zip"):
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Export: could not remove {fname}: {e}")
+
+    @staticmethod
+    def _store():
+        from src.backup_manager import backup_manager
+        return backup_manager.chunk_store()
+
+    def _source(self, record: dict):
+        """FileSource / VirtualZip for a record, cached while the backup file is unchanged."""
+        path = record["backup"]
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = self._sources.get(record["token"])
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        if path.endswith(SNAPSHOT_EXT):
+            source = VirtualZip(backup_store.load_manifest(path), record["crcs"], self._store())
+        else:
+            source = FileSource(path)
+        self._sources[record["token"]] = (mtime_ns, source)
+        return source
+
+    def _load_exports(self):
+        """Index the links published before a restart by token. Blocking; runs once, at start()."""
+        if not os.path.isdir(self.export_dir):
+            return
+        now = time.time()
+        for fname in os.listdir(self.export_dir):
+            if fname.endswith(".export.json"):
+                record = _read_json(os.path.join(self.export_dir, fname))
+                if record and record.get("token") and record.get("expires", 0) > now:
+                    self._exports.setdefault(record["token"], record)
+
+    def _lookup(self, token: str) -> dict | None:
+        record = self._exports.get(token)
+        if record is None or record.get("expires", 0) < time.time():
+            return None
+        return record
+
+    # ── HTTP ──────────────────────────────────────────────────────────────────
+
+    async def start(self):
+        if self._runner:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._runner:
+                return
+            from src.config import config
+            await asyncio.to_thread(self._load_exports)
+            app = web.Application()
+            app.router.add_get("/dl/{token}/{name}", self._handle)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            try:
+                await web.TCPSite(runner, config.BACKUP_HTTP_HOST, config.BACKUP_HTTP_PORT).start()
+            except BaseException:
+                await runner.cleanup()
+                raise
+            self._runner = runner
+            logger.info(f"Backup download server listening on {config.BACKUP_HTTP_HOST}:{config.BACKUP_HTTP_PORT}")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def port(self) -> int | None:
+        """The bound port (useful when BACKUP_HTTP_PORT is 0)."""
+        if self._runner and self._runner.addresses:
+            return self._runner.addresses[0][1]
+        return None
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        record = self._lookup(request.match_info["token"])
+        if record is None:
+            raise web.HTTPNotFound(text="Unknown or expired download link")
+        name = request.match_info["name"]
+        try:
+            source = await asyncio.to_thread(self._source, record)
+        except FileNotFoundError:
+            raise web.HTTPGone(text="This backup has been deleted")
+
+        volumes = volume_ranges(source.size, record["volume_size"])
+        if name == "manifest.json":
+            return web.json_response({
+                "name": record["name"],
+                "size": source.size,
+                "volumes": [{"name": f"{record['name']}.{i:03d}", "offset": start, "size": end - start}
+                            for i, (start, end) in enumerate(volumes, 1)],
+                "expires": int(record["expires"]),
+            })
+        if name == record["name"]:
+            base, length = 0, source.size
+        elif name.startswith(record["name"] + ".") and name.rsplit(".", 1)[1].isdigit():
+            number = int(name.rsplit(".", 1)[1])
+            if not 1 <= number <= len(volumes):
+                raise web.HTTPNotFound()
+            base, end = volumes[number - 1]
+            length = end - base
+        else:
+            raise web.HTTPNotFound()
+
+        try:
+            byte_range = parse_range(request.headers.get("Range"), length)
+        except ValueError:
+            raise web.HTTPRequestRangeNotSatisfiable(headers={"Content-Range": f"bytes */{length}"})
+        start, end = byte_range or (0, length)
+
+        response = web.StreamResponse(status=206 if byte_range else 200)
+        response.headers["Accept-Ranges"] = "bytes"
+        response.headers["Content-Type"] = "application/octet-stream"
+        response.headers["Content-Disposition"] = f'attachment; filename="{name}"'
+        response.content_length = end - start
+        if byte_range:
+            response.headers["Content-Range"] = f"bytes {start}-{end - 1}/{length}"
+        await response.prepare(request)
+        if request.method == "HEAD":
+            return response
+
+        pieces = source.iter_range(base + start, base + end)
+        while True:
+            data = await asyncio.to_thread(_read_batch, pieces)
+            if not data:
+                break
+            await response.write(data)
+        await response.write_eof()
+        return response
+
+
+def published_backups(export_dir: str) -> frozenset[str]:
+    """
+    Paths of backups with an unexpired download link. Retention keeps these (and so garbage
+    collection keeps their chunks) until the link expires. Blocking.
+    """
+    if not os.path.isdir(export_dir):
+        return frozenset()
+    now = time.time()
+    paths = set()
+    for fname in os.listdir(export_dir):
+        if fname.endswith(".export.json"):
+            record = _read_json(os.path.join(export_dir, fname))
+            if record and record.get("backup") and record.get("expires", 0) > now:
+                paths.add(record["backup"])
+    return frozenset(paths)
+
+
+def _read_batch(pieces) -> bytes:
+    """Up to STREAM_BUFFER bytes from a piece iterator (one thread hop per batch, not per piece)."""
+    batch = bytearray()
+    for piece in pieces:
+        batch += piece
+        if len(batch) >= STREAM_BUFFER:
+            break
+    return bytes(batch)
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict):
+    fd, tmp_path = tempfile.mkstemp(prefix=".export.", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+export_server = ExportServer()
@@ -1,9 +1,21 @@
 import os
+import time
+import shutil
 import asyncio
+import tempfile
 import zipfile
 from datetime import datetime
+from src import backup_store
+from src.backup_catalog import CATALOG_FILE, BackupCatalog, HashingWriter
+from src.backup_retention import (
+    ESTIMATE_MARGIN, RESERVED_BYTES, InsufficientDiskSpace, RetentionPolicy,
+    build_ledger, estimate_backup_bytes, plan_retention, world_bytes,
+)
+from src.backup_store import SNAPSHOT_EXT, ChunkStore
 from src.config import config
 from src.logger import logger
+from src.world_staging import ReflinkUnsupported, stage_world
+from src.zip_writer import ZIP_STORED, ZipWriter
 
 class BackupManager:
     def __init__(self):
@@ -11,11 +23,55 @@ class BackupManager:
         self.backup_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backups'))
         self.auto_dir = os.path.join(self.backup_dir, 'auto')
         self.custom_dir = os.path.join(self.backup_dir, 'custom')
+        self._reflink_works = False   # set once a reflink staging succeeded (disk space checks)
         
         # Sync initialization is OK here (happens once at startup)
         os.makedirs(self.auto_dir, exist_ok=True)
         os.makedirs(self.custom_dir, exist_ok=True)
 
+    @property
+    def store_dir(self):
+        """Shared chunk store of all `.snap` backups."""
+        return os.path.join(self.backup_dir, 'store')
+
+    @property
+    def export_dir(self):
+        """Download link records (see src/backup_export.py)."""
+        return os.path.join(self.backup_dir, 'exports')
+
+    @property
+    def catalog(self):
+        """Index of all backups (see src/backup_catalog.py), created on first use."""
+        if not hasattr(self, '_catalog'):
+            self._catalog = BackupCatalog(
+                os.path.join(self.backup_dir, CATALOG_FILE),
+                {'auto': self.auto_dir, 'custom': self.custom_dir},
+            )
+        return self._catalog
+
+    async def list_backups(self, kind=None):
+        """Catalog entries, newest first: all backups, or only 'auto' / 'custom' ones."""
+        catalog = self.catalog
+        if not catalog.loaded:
+            await asyncio.to_thread(catalog.reconcile)
+        return catalog.entries(kind)
+
+    def chunk_store(self):
+        return ChunkStore(self.store_dir, config.BACKUP_COMPRESSION, config.BACKUP_COMPRESSION_LEVEL)
+
+    @staticmethod
+    def _workers():
+        """`backup_workers` from user_config, else half the cores (the server needs the rest), at most 4."""
+        if config.BACKUP_WORKERS:
+            return config.BACKUP_WORKERS
+        return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+    def _zip_options(self):
+        """(workers, deflate level, forced method) for zip output. zstd is not used inside zips."""
+        level = min(config.BACKUP_COMPRESSION_LEVEL or 6, 9)
+        method = ZIP_STORED if config.BACKUP_COMPRESSION == 'store' else None
+        return self._workers(), level, method
+
     @property
     def _lock(self):
         if not hasattr(self, '_lazy_lock'):
@@ -27,16 +83,25 @@ class BackupManager:
         Creates a backup asynchronously.
         - **Custom**: If a name is provided, it is stored in 'backups/custom/' and never auto-deleted.
         - **Auto**: If no name, it is stored in 'backups/auto/' and subject to 7-day retention policy.
+        - **Format**: `backup_format` "dedup" (default) writes a `.snap` manifest into the shared
+          chunk store; "zip" writes a self-contained `.zip` as before.
+        - **Staging**: While the server runs, the flushed world is staged (reflink or copy, see
+          `backup_staging`) and auto-save is re-enabled before the archive is built from the copy.
+        - **Disk space**: The size of the backup is predicted first; old auto backups are deleted
+          to make room, and the backup fails up front if it still would not fit.
         """
         async with self._lock:
             timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M')
+            ext = '.zip' if config.BACKUP_FORMAT == 'zip' else SNAPSHOT_EXT
             
             if custom_name:
-                filename = f"backup_custom_{timestamp}_{custom_name}.zip"
+                filename = f"backup_custom_{timestamp}_{custom_name}{ext}"
                 dest_dir = self.custom_dir
+                kind = 'custom'
             else:
-                filename = f"backup_auto_{timestamp}.zip"
+                filename = f"backup_auto_{timestamp}{ext}"
                 dest_dir = self.auto_dir
+                kind = 'auto'
                 
             dest_path = os.path.join(dest_dir, filename)
             
@@ -44,7 +109,11 @@ class BackupManager:
             
             # Disable auto-save and flush to disk if server is running to prevent corruption
             save_disabled = False
+            staged_path = None
             try:
+                world_path = os.path.join(config.SERVER_DIR, config.WORLD_FOLDER)
+                started = time.time()
+                await self._ensure_disk_space(world_path, ext, staging=bool(server and server.is_running()))
                 if server and server.is_running():
                     from src.utils import rcon_cmd
                     logger.info("Server is running, disabling auto-save for backup...")
@@ -64,9 +133,23 @@ class BackupManager:
                         if not await log_dispatcher.wait_for_pattern("Saved the game", timeout=60):
                             logger.warning("Timed out waiting for 'Saved the game' confirmation. Proceeding anyway.")
 
-                # Run blocking zip operation in a separate thread (always, even if server is offline)
-                await asyncio.to_thread(self._zip_world, dest_path)
+                if save_disabled:
+                    staged_path = await self._stage_world(world_path, ext)
+                    if staged_path:
+                        # The copy is consistent; players get auto-save back while it is archived
+                        await self._save_on()
+                        save_disabled = False
+
+                # Run blocking archive operation in a separate thread (always, even if server is offline)
+                source = staged_path or world_path
+                manifest = sha256 = None
+                if ext == SNAPSHOT_EXT:
+                    manifest = await asyncio.to_thread(self._snapshot_world, dest_path, source)
+                else:
+                    sha256 = await asyncio.to_thread(self._zip_world, dest_path, source)
                 logger.info(f"Backup created successfully: {dest_path}")
+                await self._catalog_add(dest_path, kind, manifest, created=started, world=config.WORLD_FOLDER,
+                                        mc_version=config.INSTALLED_VERSION, sha256=sha256)
                 
                 if not custom_name:
                     await self._cleanup_auto_backups()
@@ -77,50 +160,296 @@ class BackupManager:
                 return False, str(e), None
             finally:
                 if save_disabled:
-                    from src.utils import rcon_cmd
-                    logger.info("Re-enabling auto-save after backup.")
-                    _, _ = await rcon_cmd("save-on")
+                    await self._save_on()
+                if staged_path:
+                    await asyncio.to_thread(shutil.rmtree, self._staging_root(), True)
+
+    async def _ensure_disk_space(self, world_path, ext, staging=False):
+        """
+        Predicts the next backup's size from the previous one of the same format, plus a full
+        staging copy of the world when one may be made, and makes sure both fit on their
+        filesystems, pruning auto backups if needed. Raises InsufficientDiskSpace before anything
+        is written.
+        """
+        entries = await self.list_backups()
+        estimate = estimate_backup_bytes(entries, 'dedup' if ext == SNAPSHOT_EXT else 'zip')
+        stages_copy = staging and self._may_stage_copy(ext)
+        world_size = 0
+        if estimate is None or stages_copy:
+            world_size = await asyncio.to_thread(world_bytes, world_path)
+        needs = {self.backup_dir: int((world_size if estimate is None else estimate) * ESTIMATE_MARGIN)}
+        if stages_copy:
+            needs[config.SERVER_DIR] = world_size
 
-    def _zip_world(self, dest_path):
-        """Zips the world folder directly without creating a temp copy."""
-        world_path = os.path.join(config.SERVER_DIR, config.WORLD_FOLDER)
+        shortfall = await asyncio.to_thread(self._shortfall, needs)
+        if shortfall.get(self.backup_dir, 0) > 0:
+            logger.warning(
+                f"Backup needs ~{shortfall[self.backup_dir] / 1024 / 1024:.0f} MiB more free space on the "
+                f"backup disk; pruning old auto backups"
+            )
+            await self._cleanup_auto_backups(free_bytes=shortfall[self.backup_dir])
+            shortfall = await asyncio.to_thread(self._shortfall, needs)
+        for path, missing in shortfall.items():
+            if missing > 0:
+                raise InsufficientDiskSpace(
+                    f"Not enough disk space: the backup needs about {missing / 1024 / 1024:.0f} MiB more "
+                    f"free space on {'the backup disk' if path == self.backup_dir else 'the server disk (staging copy)'}"
+                )
+
+    @staticmethod
+    def _shortfall(needs):
+        """
+        {path: bytes still missing} for {path: bytes needed}. Paths on the same filesystem share
+        its free space; the first path of each filesystem carries the whole shortfall.
+        """
+        by_device = {}
+        for path, needed in needs.items():
+            device = os.stat(path).st_dev
+            first, total = by_device.get(device, (path, RESERVED_BYTES))
+            by_device[device] = (first, total + needed)
+        shortfall = {path: 0 for path in needs}
+        for first, total in by_device.values():
+            shortfall[first] = total - shutil.disk_usage(first).free
+        return shortfall
+
+    def _may_stage_copy(self, ext):
+        """Whether staging may fall back to a full copy of the world (see _stage_world())."""
+        mode = config.BACKUP_STAGING
+        if mode == 'copy':
+            return True
+        # "auto" copies zip backups when reflink fails; assume it might until a reflink has worked
+        return mode == 'auto' and ext != SNAPSHOT_EXT and not self._reflink_works
+
+    async def _catalog_add(self, path, kind, manifest=None, **known):
+        # The backup itself succeeded; a catalog failure is repaired by the next reconcile
+        try:
+            await asyncio.to_thread(self.catalog.add, path, kind, manifest, **known)
+        except Exception as e:
+            logger.error(f"Failed to add {os.path.basename(path)} to the backup catalog: {e}")
+
+    def _kind_of(self, path):
+        return 'custom' if os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.custom_dir) else 'auto'
+
+    async def _save_on(self):
+        from src.utils import rcon_cmd
+        logger.info("Re-enabling auto-save after backup.")
+        _, _ = await rcon_cmd("save-on")
+
+    def _staging_root(self):
+        # Next to the world (not under backups/) so reflinks stay on the same filesystem
+        return os.path.join(config.SERVER_DIR, '.backup-staging')
+
+    async def _stage_world(self, world_path, ext):
+        """
+        Copies the flushed world into the staging dir according to `backup_staging`:
+        - "reflink": clone only; no staging if the filesystem can't.
+        - "copy": parallel copy.
+        - "auto": reflink, else copy for zip backups. Snapshots skip the copy fallback: they only
+          read changed files and chunks, which is already less I/O than copying the whole world.
+        - "off": never stage.
+        Returns the staged world path, or None to archive the live world under save-off.
+        """
+        mode = config.BACKUP_STAGING
+        if mode == 'off':
+            return None
+        staging_root = self._staging_root()
+        staged_path = os.path.join(staging_root, os.path.basename(world_path))
+        await asyncio.to_thread(shutil.rmtree, staging_root, True)  # leftovers from a crash
+        started = time.monotonic()
+
+        method = 'copy' if mode == 'copy' else 'reflink'
+        try:
+            staged_bytes = await asyncio.to_thread(stage_world, world_path, staged_path, method, self._workers())
+            if method == 'reflink':
+                self._reflink_works = True
+        except ReflinkUnsupported as e:
+            self._reflink_works = False
+            if mode == 'reflink' or ext == SNAPSHOT_EXT:
+                logger.info(f"Backup staging: reflink not available ({e}); archiving the live world")
+                return None
+            logger.info(f"Backup staging: reflink not available ({e}); copying instead")
+            method = 'copy'
+            staged_bytes = await asyncio.to_thread(stage_world, world_path, staged_path, method, self._workers())
+
+        logger.info(
+            f"Staged world by {method} ({staged_bytes / 1024 / 1024:.1f} MiB) "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+        return staged_path
+
+    def _zip_world(self, dest_path, world_path=None):
+        """
+        Zips the world folder directly without creating a temp copy (deflate runs on a thread pool).
+        Returns the SHA-256 of the archive, hashed as it is written.
+        """
+        world_path = world_path or os.path.join(config.SERVER_DIR, config.WORLD_FOLDER)
         
         if not os.path.isdir(world_path):
             raise FileNotFoundError(f"World directory not found: {world_path}")
-        # Direct zipping - no temp copy (saves disk space and faster)
-        with zipfile.ZipFile(dest_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+
+        def world_files():
             for root, dirs, files in os.walk(world_path):
                 for file in files:
                     # Skip session.lock to avoid errors if server is running
                     if file == 'session.lock':
                         continue
                     file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, world_path)
-                    zf.write(file_path, arcname)
+                    yield os.path.relpath(file_path, world_path).replace(os.sep, '/'), file_path
 
-    async def _cleanup_auto_backups(self):
-        """Deletes auto backups older than retention days."""
-        now = datetime.now()
-        retention_days = config.BACKUP_RETENTION_DAYS
-        
+        # Direct zipping - no temp copy (saves disk space and faster)
+        workers, level, method = self._zip_options()
+        with open(dest_path, 'wb') as f:
+            out = HashingWriter(f)
+            with ZipWriter(out, workers, level) as zw:
+                zw.add_files(world_files(), method)
+        return out.hexdigest()
+
+    def _snapshot_world(self, dest_path, world_path=None):
+        """Snapshots the world into the chunk store; only new chunks are written. Returns the manifest."""
+        world_path = world_path or os.path.join(config.SERVER_DIR, config.WORLD_FOLDER)
+        previous = self._latest_manifest()
+        manifest = backup_store.create_snapshot(world_path, dest_path, self.chunk_store(), previous, self._workers())
+        stats = manifest['stats']
+        logger.info(
+            f"Snapshot: {stats['files']} files, {stats['bytes'] / 1024 / 1024:.1f} MiB, "
+            f"read {stats['read_bytes'] / 1024 / 1024:.1f} MiB, {stats['new_bytes'] / 1024 / 1024:.1f} MiB new, "
+            f"{stats['reused_files']} files / {stats['reused_chunks']} region chunks unchanged"
+        )
+        return manifest
+
+    def _snapshot_paths(self):
+        # Garbage collection must see every manifest on disk, so this lists the folders rather
+        # than trusting the catalog
+        paths = []
+        for directory in (self.auto_dir, self.custom_dir):
+            try:
+                paths.extend(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(SNAPSHOT_EXT))
+            except FileNotFoundError:
+                pass
+        return paths
+
+    def _latest_manifest(self):
+        """Newest readable snapshot manifest (lets unchanged files skip hashing), or None."""
+        self.catalog.ensure_loaded()
+        for entry in self.catalog.entries():
+            if entry['format'] != 'dedup':
+                continue
+            path = entry['path']
+            try:
+                return backup_store.load_manifest(path)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable snapshot {os.path.basename(path)}: {e}")
+        return None
+
+    def fits_upload(self, path, limit):
+        """Whether a backup can be attached to a Discord message as-is: a `.zip` of at most `limit` bytes."""
+        if not path.endswith('.zip'):
+            return False
+        try:
+            return os.path.getsize(path) <= limit
+        except OSError:
+            return False
+
+    def snapshot_attachment(self, path, limit):
+        """
+        Writes a `.snap` backup out as the zip a download link would serve, if that zip is at most
+        `limit` bytes, so small snapshots can still be attached. Returns the temporary file's path
+        (the caller deletes it) or None. Blocking.
+        """
+        from src.backup_export import VirtualZip, compute_crcs
+        manifest = backup_store.load_manifest(path)
+        if sum(e['size'] for e in manifest['files']) > limit:
+            return None     # a STORED zip is never smaller than its contents
+        store = self.chunk_store()
+        archive = VirtualZip(manifest, compute_crcs(manifest, store), store)
+        if archive.size > limit:
+            return None
+        os.makedirs(self.export_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".attach.", suffix=".tmp", dir=self.export_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for data in archive.iter_range(0, archive.size):
+                    f.write(data)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+
+    async def restore_backup(self, path, dest_dir):
+        """
+        Reassembles a backup (`.snap` or `.zip`) into `dest_dir`, which must not exist yet.
+        The server should be stopped before `dest_dir` replaces the live world.
+        """
+        if os.path.exists(dest_dir):
+            raise FileExistsError(f"Restore target already exists: {dest_dir}")
+        await asyncio.to_thread(self._restore, path, dest_dir)
+        logger.info(f"Restored {os.path.basename(path)} to {dest_dir}")
+
+    def _restore(self, path, dest_dir):
+        if path.endswith(SNAPSHOT_EXT):
+            manifest = backup_store.load_manifest(path)
+            backup_store.restore_snapshot(manifest, dest_dir, self.chunk_store())
+        else:
+            with zipfile.ZipFile(path) as zf:
+                zf.extractall(dest_dir)
+
+    async def delete_backup(self, path):
+        """Deletes one backup; for snapshots, chunks no other snapshot uses are freed too."""
+        async with self._lock:
+            await asyncio.to_thread(os.remove, path)
+            logger.info(f"Deleted backup: {os.path.basename(path)}")
+            await asyncio.to_thread(self.catalog.remove, self._kind_of(path), os.path.basename(path))
+            if path.endswith(SNAPSHOT_EXT):
+                await self._collect_garbage()
+
+    async def _collect_garbage(self):
+        # Callers hold self._lock, so no snapshot is half-written while chunks are swept
+        try:
+            await asyncio.to_thread(backup_store.collect_garbage, self.chunk_store(), self._snapshot_paths())
+        except Exception as e:
+            logger.error(f"Backup store garbage collection failed: {e}")
+
+    async def free_space(self, free_bytes):
+        """Deletes old auto backups (retention first, then oldest) until about `free_bytes` are reclaimed."""
+        async with self._lock:
+            return await self._cleanup_auto_backups(free_bytes=free_bytes)
+
+    def _plan_retention(self, free_bytes):
+        from src.backup_export import published_backups
+        entries = self.catalog.entries()
+        policy = RetentionPolicy.from_config(config)
+        ledger = None
+        if policy.max_total_bytes or free_bytes:
+            # Space questions need chunks shared between snapshots counted once (reads all manifests)
+            ledger = build_ledger(entries, self.chunk_store())
+        # A backup with a live download link stays until the link expires, so garbage collection
+        # cannot free chunks a download is still reading
+        return plan_retention(entries, policy, time.time(), free_bytes, ledger, published_backups(self.export_dir))
+
+    async def _cleanup_auto_backups(self, free_bytes=0):
+        """
+        Applies the retention policy (see src/backup_retention.py) to auto backups, then frees
+        unreferenced chunks. Returns the names of the deleted backups.
+        """
         logger.info("Running backup cleanup...")
         
-        # Use asyncio.to_thread for directory listing
-        files = await asyncio.to_thread(os.listdir, self.auto_dir)
+        # One folder scan per run also picks up backups added or removed by hand
+        await asyncio.to_thread(self.catalog.reconcile)
+        plan = await asyncio.to_thread(self._plan_retention, free_bytes)
+        deleted = []
         
-        for fname in files:
-            if not fname.endswith('.zip'):
-                continue
-                
-            fpath = os.path.join(self.auto_dir, fname)
+        for entry, reason in plan:
+            fname = entry['name']
             try:
-                # Use asyncio.to_thread for file stat operations
-                mtime_timestamp = await asyncio.to_thread(os.path.getmtime, fpath)
-                mtime = datetime.fromtimestamp(mtime_timestamp)
-                if (now - mtime).days > retention_days:
-                    await asyncio.to_thread(os.remove, fpath)
-                    logger.info(f"Deleted old backup: {fname}")
+                await asyncio.to_thread(os.remove, entry['path'])
+                await asyncio.to_thread(self.catalog.remove, 'auto', fname)
+                logger.info(f"Deleted old backup: {fname} ({reason})")
+                deleted.append(fname)
             except Exception as e:
                 logger.error(f"Failed to delete old backup {fname}: {e}")
 
+        if any(fname.endswith(SNAPSHOT_EXT) for fname in deleted):
+            await self._collect_garbage()
+        return deleted
+
 backup_manager = BackupManager()
@@ -0,0 +1,200 @@
+import os
+from collections import Counter
+from datetime import datetime
+from src import backup_store
+from src.logger import logger
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Retention planning for auto backups.
+#
+# plan_retention() is a pure function over backup catalog entries: it picks
+# which auto backups to delete and why, and BackupManager carries it out (off
+# the event loop). Three rules, applied in order:
+#   1. Age: grandfather-father-son tiers (newest backup of each of the last N
+#      hours / days / weeks / months) when any tier is configured, otherwise
+#      the plain `backup_keep_days` cut-off.
+#   2. Size budget: while the backups use more than `backup_max_total_gb`,
+#      the oldest remaining auto backup goes.
+#   3. Free space: the same, until a requested number of bytes is freed
+#      (before a backup that would not fit, or when the disk is nearly full).
+#      If even deleting every candidate would not free enough, rule 3 deletes
+#      nothing.
+# The newest auto backup and all custom backups are never deleted. Custom
+# backups still count towards the size budget.
+#
+# Space is accounted by SpaceLedger: chunks shared between snapshots are
+# counted once and only "freed" when the last snapshot using them goes. So
+# deleting the oldest snapshot of a mostly unchanged world frees almost
+# nothing, and the planner knows it.
+# ──────────────────────────────────────────────────────────────────────────────
+
+GIB             = 1024 * 1024 * 1024
+ESTIMATE_MARGIN = 1.5                # headroom on the predicted size of the next backup
+RESERVED_BYTES  = 512 * 1024 * 1024  # always left free for the server itself
+
+# tier -> bucket of a backup's local creation time
+TIERS = {
+    "hourly":  lambda t: (t.year, t.month, t.day, t.hour),
+    "daily":   lambda t: (t.year, t.month, t.day),
+    "weekly":  lambda t: t.isocalendar()[:2],
+    "monthly": lambda t: (t.year, t.month),
+}
+
+
+class InsufficientDiskSpace(Exception):
+    pass
+
+
+class RetentionPolicy:
+    """
+    `tiers` maps "hourly"/"daily"/"weekly"/"monthly" to how many of those periods to keep
+    (0/None = tier off). `keep_days` applies when no tier is on. `max_total_bytes` None = no budget.
+    """
+
+    def __init__(self, keep_days: int = 7, tiers: dict | None = None, max_total_bytes: int | None = None):
+        self.keep_days = keep_days
+        self.tiers = {tier: count for tier, count in (tiers or {}).items() if count}
+        self.max_total_bytes = max_total_bytes
+
+    @classmethod
+    def from_config(cls, config) -> "RetentionPolicy":
+        return cls(
+            keep_days=config.BACKUP_RETENTION_DAYS,
+            tiers={
+                "hourly": config.BACKUP_KEEP_HOURLY,
+                "daily": config.BACKUP_KEEP_DAILY,
+                "weekly": config.BACKUP_KEEP_WEEKLY,
+                "monthly": config.BACKUP_KEEP_MONTHLY,
+            },
+            max_total_bytes=config.BACKUP_MAX_TOTAL_GB * GIB if config.BACKUP_MAX_TOTAL_GB else None,
+        )
+
+
+class SpaceLedger:
+    """
+    Disk space held by a set of backups. `digests` maps (kind, name) of each snapshot to the
+    objects it references and `object_sizes` gives their size on disk; an object counts once,
+    however many snapshots share it. Without them, a snapshot only holds its manifest file.
+    """
+
+    def __init__(self, entries: list[dict], digests: dict | None = None, object_sizes: dict | None = None):
+        self._digests = digests or {}
+        self._sizes = object_sizes or {}
+        self._refs = Counter()
+        for refs in self._digests.values():
+            self._refs.update(refs)
+        self.total = sum(e["size"] for e in entries) + sum(self._sizes.get(d, 0) for d in self._refs)
+
+    def release(self, entry: dict) -> int:
+        """Account for deleting a backup; returns the bytes that actually come back."""
+        freed = entry["size"]
+        for digest in self._digests.pop((entry["kind"], entry["name"]), ()):
+            self._refs[digest] -= 1
+            if self._refs[digest] == 0:
+                freed += self._sizes.get(digest, 0)
+        self.total -= freed
+        return freed
+
+
+def build_ledger(entries: list[dict], store) -> SpaceLedger:
+    """SpaceLedger over catalog entries, reading every snapshot manifest and sizing the chunk store. Blocking."""
+    digests = {}
+    for entry in entries:
+        if entry.get("format") != "dedup":
+            continue
+        try:
+            digests[(entry["kind"], entry["name"])] = backup_store.manifest_digests(
+                backup_store.load_manifest(entry["path"]))
+        except Exception as e:
+            # Its chunks are then never counted as freed; garbage collection refuses to run anyway
+            logger.warning(f"Retention: cannot read {entry['name']}: {e}")
+    return SpaceLedger(entries, digests, store.object_sizes() if digests else {})
+
+
+def plan_retention(entries: list[dict], policy: RetentionPolicy, now: float,
+                   free_bytes: int = 0, ledger: SpaceLedger | None = None,
+                   pinned: frozenset[str] = frozenset()) -> list[tuple[dict, str]]:
+    """
+    Auto backups to delete, oldest first, as (entry, reason). `entries` are catalog entries of
+    any kind; `free_bytes` asks for at least that much space to be reclaimed. `ledger` (see
+    build_ledger()) accounts for chunks shared between snapshots; it is consumed. Backups whose
+    path is in `pinned` (published for download) are never deleted.
+    """
+    autos = sorted((e for e in entries if e["kind"] == "auto"), key=lambda e: e["created"], reverse=True)
+    if not autos:
+        return []
+    ledger = ledger or SpaceLedger(entries)
+
+    if policy.tiers:
+        kept = {id(autos[0])}
+        for tier, count in policy.tiers.items():
+            bucket_of, buckets = TIERS[tier], set()
+            for entry in autos:
+                bucket = bucket_of(datetime.fromtimestamp(entry["created"]))
+                if bucket not in buckets:
+                    if len(buckets) == count:
+                        break
+                    buckets.add(bucket)
+                    kept.add(id(entry))
+        survivors = [e for e in autos if id(e) in kept]
+        reason = "retention tiers"
+    else:
+        cutoff = datetime.fromtimestamp(now)
+        survivors = [e for i, e in enumerate(autos)
+                     if i == 0 or (cutoff - datetime.fromtimestamp(e["created"])).days <= policy.keep_days]
+        reason = f"older than {policy.keep_days} days"
+
+    kept_ids = {id(e) for e in survivors}
+    plan = [(e, reason) for e in reversed(autos) if id(e) not in kept_ids and e.get("path") not in pinned]
+    freed = sum(ledger.release(e) for e, _ in plan)
+
+    # Oldest survivors go first; the newest auto backup always stays
+    candidates = [e for e in reversed(survivors[1:]) if e.get("path") not in pinned]
+    if policy.max_total_bytes:
+        while ledger.total > policy.max_total_bytes and candidates:
+            entry = candidates.pop(0)
+            freed += ledger.release(entry)
+            plan.append((entry, "size budget"))
+        if ledger.total > policy.max_total_bytes:
+            logger.warning(
+                f"Retention: backups still use {ledger.total / GIB:.1f} GiB, over the "
+                f"{policy.max_total_bytes / GIB:.0f} GiB budget (custom backups and the newest one are kept)"
+            )
+
+    if freed < free_bytes:
+        extra = []
+        while freed < free_bytes and candidates:
+            entry = candidates.pop(0)
+            freed += ledger.release(entry)
+            extra.append((entry, "disk space"))
+        if freed >= free_bytes:
+            plan += extra
+        elif extra:
+            logger.warning(
+                f"Retention: deleting all {len(extra)} remaining old auto backups would free only "
+                f"part of the {free_bytes / 1024 / 1024:.0f} MiB needed; keeping them"
+            )
+    return plan
+
+
+def estimate_backup_bytes(entries: list[dict], fmt: str) -> int | None:
+    """
+    Predicted disk space of the next backup in format `fmt` ("dedup"/"zip"): what the previous
+    backup of that format added. None if there is none to go by.
+    """
+    previous = max((e for e in entries if e.get("format") == fmt), key=lambda e: e["created"], default=None)
+    if previous is None:
+        return None
+    return previous["new_bytes"] if fmt == "dedup" and previous.get("new_bytes") is not None else previous["size"]
+
+
+def world_bytes(world_path: str) -> int:
+    """Total size of the world folder (fallback estimate: an uncompressed full copy)."""
+    total = 0
+    for root, dirs, names in os.walk(world_path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError as e:
+                logger.debug(f"Retention: cannot stat {name}: {e}")
+    return total
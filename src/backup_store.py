@@ -0,0 +1,601 @@
+import gzip
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from src.logger import logger
+from src.zip_writer import STORED_EXTENSIONS, ZipWriter, method_for
+
+try:
+    import zstandard  # optional: enables the "zstd" codec
+except ImportError:
+    zstandard = None
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Deduplicating world snapshots.
+#
+# A snapshot is a small manifest (`<name>.snap`, gzip'd JSON) that lists every
+# world file as a sequence of chunk hashes. Chunk data lives once in a
+# content-addressed store (`backups/store/objects/ab/cdef…`), shared by all
+# snapshots, so a nightly backup only writes chunks that are new.
+#
+# Chunking is content-defined on 4 KiB sector boundaries (the unit region
+# files are laid out in): a sector ends a chunk when its CRC matches
+# CDC_MASK, within CDC_MIN..CDC_MAX. Moving a region chunk therefore only
+# changes the chunks around it. Files whose size and mtime match the previous
+# snapshot are not read at all.
+#
+# Region files (.mca — region/, entities/, poi/) are not chunked by content.
+# Their 8 KiB header is read and compared with the previous snapshot: a
+# Minecraft chunk whose (timestamp, offset, sector count) is unchanged reuses
+# its stored object, so only modified chunks are read from disk. Restore
+# rebuilds the full file with every chunk at its original sector offset.
+# Each chunk keeps its own CRC-32; the file's CRC (for zip exports) is
+# combined from them, so it costs no extra read either.
+#
+# Hashing and compression run on a thread pool (hashlib, zlib and zstd release
+# the GIL). Data that is already compressed — region chunk payloads, gzip'd
+# .dat files — is stored as is.
+# ──────────────────────────────────────────────────────────────────────────────
+
+SNAPSHOT_EXT     = ".snap"
+MANIFEST_VERSION = 2
+READABLE_VERSIONS = (1, 2)          # v1 had no region entries
+SECTOR           = 4096
+CDC_MIN          = 32 * 1024        # bytes — smallest chunk (except at end of file)
+CDC_MAX          = 1024 * 1024      # bytes — forced cut
+CDC_MASK         = 0x1F             # 1 in 32 sectors ends a chunk → ~128 KiB average
+READ_BUFFER      = 1024 * 1024
+QUEUE_DEPTH      = 4                # chunks in flight per worker (bounds memory)
+
+COMPRESSIONS   = ("deflate", "store", "zstd")
+DEFAULT_LEVELS = {"deflate": 6, "zstd": 3}
+
+CODEC_RAW  = b"r"
+CODEC_ZLIB = b"z"
+CODEC_ZSTD = b"s"
+
+REGION_EXT     = ".mca"
+REGION_HEADER  = 2 * SECTOR         # chunk locations + chunk timestamps
+REGION_CHUNKS  = 1024               # 32 × 32 chunks per region
+
+SKIPPED_FILES = {"session.lock"}
+
+
+_warned = set()
+
+
+def _warn_once(message: str):
+    if message not in _warned:
+        _warned.add(message)
+        logger.warning(message)
+
+
+class ChunkStore:
+    """
+    Content-addressed object store: sha256(data) → one file, compressed with `compression`
+    ("deflate", "store" or "zstd"; zstd falls back to deflate when `zstandard` is not installed).
+    """
+
+    def __init__(self, root: str, compression: str = "deflate", level: int | None = None):
+        if compression == "zstd" and zstandard is None:
+            _warn_once("Backup: zstd requested but the 'zstandard' package is not installed, using deflate")
+            compression = "deflate"
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.compression = compression
+        self.level = level or DEFAULT_LEVELS.get(compression, 0)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def has(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def put(self, data: bytes, compress: bool = True) -> tuple[str, int]:
+        """
+        Store a chunk (thread-safe). `compress` False stores already-compressed data as is.
+        Returns (digest, bytes written — 0 if it was already stored).
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        blob = self._pack(data) if compress else CODEC_RAW + data
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".obj.", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return digest, len(blob)
+
+    def _pack(self, data: bytes) -> bytes:
+        if self.compression == "deflate":
+            codec, packed = CODEC_ZLIB, zlib.compress(data, min(self.level, 9))
+        elif self.compression == "zstd":
+            # Compressor objects are not thread-safe; one per call is cheap
+            codec, packed = CODEC_ZSTD, zstandard.ZstdCompressor(level=self.level).compress(data)
+        else:
+            return CODEC_RAW + data
+        return codec + packed if len(packed) < len(data) else CODEC_RAW + data
+
+    def get(self, digest: str) -> bytes:
+        with open(self._path(digest), "rb") as f:
+            blob = f.read()
+        codec, payload = blob[:1], blob[1:]
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(payload)
+        if codec == CODEC_RAW:
+            return payload
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError(f"Chunk {digest} is zstd-compressed; install the 'zstandard' package to read it")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        raise ValueError(f"Unknown chunk codec {codec!r} in {digest}")
+
+    def iter_digests(self):
+        if not os.path.isdir(self.objects_dir):
+            return
+        for prefix in os.listdir(self.objects_dir):
+            subdir = os.path.join(self.objects_dir, prefix)
+            if not os.path.isdir(subdir):
+                continue
+            for name in os.listdir(subdir):
+                if not name.startswith("."):
+                    yield prefix + name
+
+    def object_sizes(self) -> dict[str, int]:
+        """digest -> bytes on disk, for every object (one scandir per prefix directory)."""
+        sizes = {}
+        if not os.path.isdir(self.objects_dir):
+            return sizes
+        for prefix in os.listdir(self.objects_dir):
+            subdir = os.path.join(self.objects_dir, prefix)
+            if not os.path.isdir(subdir):
+                continue
+            with os.scandir(subdir) as it:
+                for item in it:
+                    if not item.name.startswith("."):
+                        sizes[prefix + item.name] = item.stat().st_size
+        return sizes
+
+    def remove(self, digest: str) -> int:
+        path = self._path(digest)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except FileNotFoundError:
+            return 0
+
+
+def iter_chunks(f):
+    """Split a binary stream into content-defined chunks (see module header)."""
+    chunk = bytearray()
+    while True:
+        sector = f.read(SECTOR)
+        if not sector:
+            break
+        chunk += sector
+        if len(chunk) >= CDC_MAX or (len(chunk) >= CDC_MIN and zlib.crc32(sector) & CDC_MASK == CDC_MASK):
+            yield bytes(chunk)
+            chunk = bytearray()
+    if chunk:
+        yield bytes(chunk)
+
+
+class _ParallelPut:
+    """
+    Runs ChunkStore.put() on a thread pool. put() returns a Future (or, with one worker,
+    the digest directly); resolve() swaps the futures in a manifest for their digests.
+    """
+
+    def __init__(self, store: ChunkStore, workers: int, totals: dict):
+        self._store = store
+        self._totals = totals
+        self._jobs = []
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="backup") if workers > 1 else None
+        self._slots = threading.BoundedSemaphore(max(workers, 1) * QUEUE_DEPTH)
+
+    def put(self, data: bytes, compress: bool = True):
+        if self._pool is None:
+            digest, written = self._store.put(data, compress)
+            self._totals["new_bytes"] += written
+            return digest
+        self._slots.acquire()
+        job = self._pool.submit(self._store.put, data, compress)
+        job.add_done_callback(lambda _: self._slots.release())
+        self._jobs.append(job)
+        return job
+
+    def close(self, cancel: bool = False):
+        if self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=cancel)
+            self._pool = None
+
+    def resolve(self, files: list):
+        self.close()
+        for job in self._jobs:
+            self._totals["new_bytes"] += job.result()[1]  # re-raises a failed write
+        for entry in files:
+            for chunk in entry["chunks"]:
+                chunk[0] = _digest(chunk[0])
+            region = entry.get("region")
+            if region:
+                region["header"][0] = _digest(region["header"][0])
+                for chunk in region["chunks"]:
+                    chunk[4] = _digest(chunk[4])
+
+
+def _digest(value):
+    return value.result()[0] if isinstance(value, Future) else value
+
+
+# ── Manifests ─────────────────────────────────────────────────────────────────
+
+def load_manifest(path: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") not in READABLE_VERSIONS:
+        raise ValueError(f"Unsupported snapshot version {manifest.get('version')} in {path}")
+    return manifest
+
+
+def _write_manifest(path: str, manifest: dict):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".snap.", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                gz.write(json.dumps(manifest, separators=(",", ":")).encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# ── Snapshot / restore ────────────────────────────────────────────────────────
+
+def create_snapshot(world_path: str, dest_path: str, store: ChunkStore, previous: dict | None = None,
+                    workers: int = 1) -> dict:
+    """
+    Snapshot `world_path` into `store` and write the manifest to `dest_path`.
+    `previous` (a loaded manifest) lets unchanged files (same size and mtime) skip reading.
+    `workers` > 1 hashes and compresses chunks on that many threads.
+    """
+    if not os.path.isdir(world_path):
+        raise FileNotFoundError(f"World directory not found: {world_path}")
+
+    reusable = {e["path"]: e for e in previous["files"]} if previous else {}
+    files = []
+    totals = {"new_bytes": 0, "read_bytes": 0, "reused_files": 0, "reused_chunks": 0}
+
+    writer = _ParallelPut(store, workers, totals)
+    try:
+        for root, dirs, names in os.walk(world_path):
+            dirs.sort()
+            for name in sorted(names):
+                if name in SKIPPED_FILES:
+                    continue
+                file_path = os.path.join(root, name)
+                rel = os.path.relpath(file_path, world_path).replace(os.sep, "/")
+                st = os.stat(file_path)
+
+                old = reusable.get(rel)
+                if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                    if old.get("region") and old.get("crc32") is None:
+                        # From a snapshot taken before region CRCs were recorded
+                        with open(file_path, "rb", buffering=READ_BUFFER) as f:
+                            old["crc32"] = _region_crc(f, old["region"], old["size"], totals)
+                    files.append(old)
+                    totals["reused_files"] += 1
+                    continue
+
+                with open(file_path, "rb", buffering=READ_BUFFER) as f:
+                    if name.endswith(REGION_EXT) and st.st_size >= REGION_HEADER:
+                        entry = _snapshot_region(f, st.st_size, old, writer, totals)
+                    else:
+                        entry = _snapshot_file(f, writer, totals, compress=not name.endswith(STORED_EXTENSIONS))
+                entry.update(path=rel, mtime_ns=st.st_mtime_ns, mode=st.st_mode & 0o777)
+                files.append(entry)
+        writer.resolve(files)
+    finally:
+        writer.close(cancel=True)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "world": os.path.basename(os.path.normpath(world_path)),
+        "files": files,
+        "stats": {
+            "files": len(files),
+            "bytes": sum(e["size"] for e in files),
+            **totals,
+        },
+    }
+    _write_manifest(dest_path, manifest)
+    return manifest
+
+
+def _snapshot_file(f, writer: _ParallelPut, totals: dict, compress: bool = True) -> dict:
+    chunks, crc = [], 0
+    for data in iter_chunks(f):
+        digest = writer.put(data, compress)
+        totals["read_bytes"] += len(data)
+        crc = zlib.crc32(data, crc)
+        chunks.append([digest, len(data)])
+    return {"size": sum(size for _, size in chunks), "crc32": crc, "chunks": chunks}
+
+
+def _snapshot_region(f, size: int, old: dict | None, writer: _ParallelPut, totals: dict) -> dict:
+    """
+    Store a region file as its header plus one object per Minecraft chunk. Chunks whose
+    (timestamp, offset, sector count) match the previous snapshot are not read.
+    Files whose header does not describe a valid layout are stored byte for byte instead.
+    """
+    header = f.read(REGION_HEADER)
+    totals["read_bytes"] += len(header)
+    layout = _region_layout(header, size)
+    if layout is None:
+        f.seek(0)
+        return _snapshot_file(f, writer, totals, compress=False)
+
+    previous = {}
+    if old and "region" in old:
+        previous = {c[0]: c for c in old["region"]["chunks"]}
+
+    chunks = []
+    for index, timestamp, offset, count in layout:
+        prev = previous.get(index)
+        if prev and prev[1:4] == [timestamp, offset, count]:
+            chunks.append(prev)
+            totals["reused_chunks"] += 1
+            continue
+        f.seek(offset * SECTOR)
+        data = f.read(count * SECTOR)
+        totals["read_bytes"] += len(data)
+        length = struct.unpack(">I", data[:4])[0] if len(data) >= 4 else -1
+        if not 0 < length <= len(data) - 4:
+            logger.warning(f"Backup: malformed chunk {index} in a region file, storing the file whole")
+            f.seek(0)
+            return _snapshot_file(f, writer, totals, compress=False)
+        # Only the payload (length prefix + compressed chunk); the sector padding is not kept
+        data = data[:4 + length]
+        # Compression type 3 = uncompressed chunk; everything else is already zlib/gzip/LZ4
+        digest = writer.put(data, compress=data[4] == 3)
+        chunks.append([index, timestamp, offset, count, digest, len(data), zlib.crc32(data)])
+
+    region = {"header": [writer.put(header), len(header)], "chunks": chunks}
+    return {
+        "size": size,
+        "crc32": _region_crc(f, region, size, totals, header),
+        "chunks": [],
+        "region": region,
+    }
+
+
+def _region_crc(f, region: dict, size: int, totals: dict, header: bytes | None = None) -> int:
+    """
+    CRC-32 of a region file as restore rebuilds it (sector padding zeroed), combined from the
+    per-chunk CRCs. Chunks from snapshots taken before those were recorded are read once from
+    `f` (they are unchanged, so the file still holds them) and get their CRC filled in.
+    """
+    if header is None:
+        header = f.read(REGION_HEADER)
+        totals["read_bytes"] += len(header)
+    crc = zlib.crc32(header)
+    pos = REGION_HEADER
+    for chunk in sorted(region["chunks"], key=lambda c: c[2]):
+        offset, length = chunk[2] * SECTOR, chunk[5]
+        if len(chunk) < 7:
+            f.seek(offset)
+            data = f.read(length)
+            totals["read_bytes"] += len(data)
+            chunk.append(zlib.crc32(data))
+        for zeros in _zeros(offset - pos):
+            crc = zlib.crc32(zeros, crc)
+        crc = crc32_combine(crc, chunk[6], length)
+        pos = offset + length
+    for zeros in _zeros(size - pos):
+        crc = zlib.crc32(zeros, crc)
+    return crc
+
+
+# ── CRC-32 combination (zlib's crc32_combine, which Python does not expose) ──
+
+_CRC_POLY = 0xEDB88320
+_shift_tables = []   # [k] -> byte tables of the operator "append 2**k zero bytes" to a CRC
+
+
+def _gf2_apply(matrix: list, vector: int) -> int:
+    result, bit = 0, 0
+    while vector:
+        if vector & 1:
+            result ^= matrix[bit]
+        vector >>= 1
+        bit += 1
+    return result
+
+
+def _shift_table(k: int) -> list:
+    while len(_shift_tables) <= k:
+        if _shift_tables:
+            matrix = _shift_tables[-1][0]
+            matrix = [_gf2_apply(matrix, column) for column in matrix]
+        else:
+            matrix = [_CRC_POLY] + [1 << i for i in range(31)]   # one zero bit
+            for _ in range(3):                                   # → one zero byte
+                matrix = [_gf2_apply(matrix, column) for column in matrix]
+        tables = [[_gf2_apply(matrix, b << shift) for b in range(256)] for shift in (0, 8, 16, 24)]
+        _shift_tables.append((matrix, tables))
+    return _shift_tables[k][1]
+
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """CRC-32 of A+B from crc1 = crc32(A), crc2 = crc32(B) and len2 = len(B)."""
+    k = 0
+    while len2:
+        if len2 & 1:
+            t0, t1, t2, t3 = _shift_table(k)
+            crc1 = t0[crc1 & 0xFF] ^ t1[(crc1 >> 8) & 0xFF] ^ t2[(crc1 >> 16) & 0xFF] ^ t3[crc1 >> 24]
+        len2 >>= 1
+        k += 1
+    return crc1 ^ crc2
+
+
+def _region_layout(header: bytes, size: int) -> list[tuple] | None:
+    """[(index, timestamp, offset, count)] from a region header, or None if it is inconsistent."""
+    locations = struct.unpack(f">{REGION_CHUNKS}I", header[:SECTOR])
+    timestamps = struct.unpack(f">{REGION_CHUNKS}I", header[SECTOR:])
+    sectors = -(-size // SECTOR)
+    layout = []
+    for index, location in enumerate(locations):
+        if location == 0:
+            continue
+        offset, count = location >> 8, location & 0xFF
+        if offset < REGION_HEADER // SECTOR or count == 0 or offset + count > sectors:
+            return None
+        layout.append((index, timestamps[index], offset, count))
+    # Chunks must not share sectors — otherwise restore could not place both
+    end = 0
+    for _, _, offset, count in sorted(layout, key=lambda c: c[2]):
+        if offset < end:
+            return None
+        end = offset + count
+    return layout
+
+
+def entry_digests(entry: dict):
+    """Every object a manifest entry refers to."""
+    for digest, _ in entry["chunks"]:
+        yield digest
+    region = entry.get("region")
+    if region:
+        yield region["header"][0]
+        for chunk in region["chunks"]:
+            yield chunk[4]
+
+
+def manifest_digests(manifest: dict) -> set[str]:
+    """Every object a snapshot refers to."""
+    return {digest for entry in manifest["files"] for digest in entry_digests(entry)}
+
+
+def iter_file_data(entry: dict, store: ChunkStore):
+    """Yield the contents of one manifest entry, chunk by chunk."""
+    return iter_file_range(entry, store, 0, entry["size"])
+
+
+def iter_file_range(entry: dict, store: ChunkStore, start: int, end: int):
+    """Yield bytes [start, end) of one manifest entry; objects wholly outside the range are not read."""
+    pos = 0
+    for length, digest in _segments(entry):
+        seg_end = pos + length
+        if seg_end > start and length:
+            lo, hi = max(start - pos, 0), min(end, seg_end) - pos
+            if digest is None:
+                yield from _zeros(hi - lo)
+            else:
+                data = store.get(digest)
+                yield data if (lo, hi) == (0, len(data)) else data[lo:hi]
+        pos = seg_end
+        if pos >= end:
+            return
+
+
+def _segments(entry: dict):
+    """(length, digest) pieces that make up a file; digest None = zeros."""
+    region = entry.get("region")
+    if not region:
+        yield from ((size, digest) for digest, size in entry["chunks"])
+        return
+    # Header, then every chunk at its sector offset; unused sectors and padding come back zeroed
+    yield region["header"][1], region["header"][0]
+    pos = REGION_HEADER
+    for _, _, offset, _, digest, length, *_ in sorted(region["chunks"], key=lambda c: c[2]):
+        yield offset * SECTOR - pos, None
+        yield length, digest
+        pos = offset * SECTOR + length
+    yield entry["size"] - pos, None
+
+
+def _zeros(n: int):
+    while n > 0:
+        step = min(n, READ_BUFFER)
+        yield bytes(step)
+        n -= step
+
+
+def restore_snapshot(manifest: dict, dest_dir: str, store: ChunkStore):
+    """Write every file of a snapshot under `dest_dir` (which should be empty or absent)."""
+    for entry in manifest["files"]:
+        target = os.path.join(dest_dir, *entry["path"].split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            for data in iter_file_data(entry, store):
+                f.write(data)
+        os.chmod(target, entry.get("mode", 0o644))
+        mtime = entry["mtime_ns"]
+        os.utime(target, ns=(mtime, mtime))
+
+
+def export_zip(manifest: dict, zip_path: str, store: ChunkStore, workers: int = 1, level: int = 6,
+               method: int | None = None):
+    """
+    Reassemble a snapshot into a regular zip (for downloads). Deflate runs on `workers` threads;
+    `method` None stores already-compressed files (STORED_EXTENSIONS) and deflates the rest.
+    """
+    directory = os.path.dirname(zip_path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".export.", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f, ZipWriter(f, workers, level) as zw:
+            zw.add_all(
+                (e["path"], iter_file_data(e, store), e["mtime_ns"], e.get("mode", 0o644), method_for(e["path"], method))
+                for e in manifest["files"]
+            )
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# ── Garbage collection ────────────────────────────────────────────────────────
+
+def collect_garbage(store: ChunkStore, manifest_paths) -> tuple[int, int]:
+    """
+    Delete chunks no remaining snapshot references. Returns (chunks removed, bytes freed).
+    A manifest that cannot be read aborts the sweep, so its chunks are never deleted.
+    """
+    live = set()
+    for path in manifest_paths:
+        live |= manifest_digests(load_manifest(path))
+
+    removed = freed = 0
+    for digest in list(store.iter_digests()):
+        if digest not in live:
+            freed += store.remove(digest)
+            removed += 1
+    if removed:
+        logger.info(f"Backup store: removed {removed} unreferenced chunks ({freed / 1024 / 1024:.1f} MiB)")
+    return removed, freed
@@ -1,3 +1,5 @@
+import asyncio
+import copy
 import json
 import os
 import re
@@ -14,6 +16,10 @@ load_dotenv()
 
 # --- Validation Utilities ---
 
+BACKUP_FORMATS = ('dedup', 'zip')  # user_config['backup_format']: chunked snapshots (default) or plain zips
+BACKUP_COMPRESSIONS = ('deflate', 'store', 'zstd')  # user_config['backup_compression']; zstd needs `zstandard`
+BACKUP_STAGING_MODES = ('auto', 'reflink', 'copy', 'off')  # user_config['backup_staging']
+
 def validate_user_config(data: dict) -> tuple[bool, list[str]]:
     """
     Validate user config dictionary without requiring external schema packages.
@@ -64,6 +70,28 @@ def validate_user_config(data: dict) -> tuple[bool, list[str]]:
         except Exception:
             pass
     
+    # Optional integers
+    for key, min_val, max_val in [
+        ('backup_workers', 1, 32),
+        ('backup_compression_level', 1, 19),
+        ('backup_keep_hourly', 0, 1000),
+        ('backup_keep_daily', 0, 1000),
+        ('backup_keep_weekly', 0, 1000),
+        ('backup_keep_monthly', 0, 1000),
+        ('backup_max_total_gb', 1, 100000)
+    ]:
+        if key in data and (not isinstance(data[key], int) or not min_val <= data[key] <= max_val):
+            errors.append(f"{key} must be an integer between {min_val} and {max_val}")
+    
+    # Optional enums
+    for key, choices in [
+        ('backup_format', BACKUP_FORMATS),
+        ('backup_compression', BACKUP_COMPRESSIONS),
+        ('backup_staging', BACKUP_STAGING_MODES)
+    ]:
+        if key in data and data[key] not in choices:
+            errors.append(f"{key} must be one of: {', '.join(choices)}")
+    
     # Time format (HH:MM)
     for key in ['backup_time', 'restart_time']:
         if key not in data:
@@ -97,6 +125,13 @@ class Config:
 
     Handles loading/saving of `bot_config.json` (system state) and `user_config.json` (preferences).
     Provides thread-safe access via `FileLock`.
+
+    Every committed change (save_*, update_*, load) publishes a versioned in-memory snapshot of the
+    affected file. Hot paths read `user_snapshot` / `user_config_version` (or register a change
+    listener) instead of re-reading the JSON from disk.
+
+    Coroutines use the async variants (`aload_*`, `asave_*`, `aupdate_*`), which never wait on the
+    file lock on the event loop thread.
     """
     _instance = None
 
@@ -110,6 +145,8 @@ class Config:
             # Use singleton locks with a timeout to prevent blocking the event loop indefinitely
             cls._instance._bot_lock = FileLock(cls._instance.BOT_CONFIG_FILE + ".lock", timeout=10)
             cls._instance._user_lock = FileLock(cls._instance.USER_CONFIG_FILE + ".lock", timeout=10)
+            cls._instance._init_snapshots()
+            cls._instance._init_async()
             cls._instance.load()
         return cls._instance
 
@@ -119,12 +156,11 @@ class Config:
 
         Validates `user_config.json` on load.
         Uses non-locking internal methods to avoid deadlocks when called from within update_* contexts.
+
+        This is the full (re)load used at startup and by /reload_config. Saves and updates only
+        re-apply the section they just wrote via `_apply_user_config()` / `_apply_bot_config()`.
         """
-        self.TOKEN = os.getenv("DISCORD_TOKEN") or os.getenv("BOT_TOKEN")
-        self.RCON_PASSWORD = os.getenv("RCON_PASSWORD")
-        self.ENABLE_PLAYIT = os.getenv("ENABLE_PLAYIT", "true").lower() == "true"
-        _dry_run = getattr(self, 'dry_run', False)
-        self.dry_run = _dry_run
+        self._apply_env()
         
         # Check for old config and migrate
         if os.path.exists(os.path.join(PROJECT_ROOT, 'config.json')) and not os.path.exists(self.USER_CONFIG_FILE):
@@ -210,18 +246,66 @@ class Config:
             else:
                 bot_cfg = self._load_bot_config_no_lock()
         
-        # Apply user config
+        self._apply_user_config(user_cfg)
+        self._apply_bot_config(bot_cfg)
+        
+        # Legacy: Create ROLES dict with ID -> commands mapping (populated at runtime)
+        self.ROLES = {}
+        self.ADMIN_ROLE_ID = None  # Set during setup
+
+    def _apply_env(self):
+        """Apply environment variables and hardcoded defaults (not user-configurable)."""
+        self.TOKEN = os.getenv("DISCORD_TOKEN") or os.getenv("BOT_TOKEN")
+        self.RCON_PASSWORD = os.getenv("RCON_PASSWORD")
+        self.ENABLE_PLAYIT = os.getenv("ENABLE_PLAYIT", "true").lower() == "true"
+        _dry_run = getattr(self, 'dry_run', False)
+        self.dry_run = _dry_run
+
+        self.RCON_HOST = os.getenv("RCON_HOST", "127.0.0.1")
+        self.HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT")  # None = src/http_client.py default
+        # Backup download server (src/backup_export.py)
+        self.BACKUP_HTTP_HOST = os.getenv("BACKUP_HTTP_HOST", "127.0.0.1")  # "0.0.0.0" to serve links publicly (opt-in)
+        self.BACKUP_HTTP_PORT = int(os.getenv("BACKUP_HTTP_PORT", "8765"))
+        self.BACKUP_HTTP_URL = os.getenv("BACKUP_HTTP_URL")  # public base URL; None = http://<custom_ip or localhost>:<port>
+
+        self.RCON_PORT = 25575
+        self.SERVER_JAR = "server.jar"
+        self.JAVA_PATH = "java"
+        self.RESTART_DELAY = 5
+        self.CRASH_CHECK_INTERVAL = 30
+        self.LOG_LINES_DEFAULT = 10
+        self.STATUS_COOLDOWN = 5
+        self.LOGS_COOLDOWN = 10
+
+    def _apply_user_config(self, user_cfg: dict):
+        """
+        Apply an already-validated user config dict to memory attributes and publish it.
+        No disk access; the timezone lookup only runs when the `timezone` setting itself changed.
+        """
         self.JAVA_XMX = user_cfg['java_ram_max']
         self.JAVA_XMS = user_cfg['java_ram_min']
         self.BACKUP_TIME = user_cfg['backup_time']
         self.BACKUP_RETENTION_DAYS = user_cfg['backup_keep_days']
+        self.BACKUP_FORMAT = user_cfg.get('backup_format', 'dedup')
+        self.BACKUP_COMPRESSION = user_cfg.get('backup_compression', 'deflate')
+        self.BACKUP_COMPRESSION_LEVEL = user_cfg.get('backup_compression_level')  # None = codec default
+        self.BACKUP_WORKERS = user_cfg.get('backup_workers')  # None = chosen from the CPU count
+        self.BACKUP_STAGING = user_cfg.get('backup_staging', 'auto')
+        # Retention tiers (None/0 = off; all off = keep `backup_keep_days` days) and size budget
+        self.BACKUP_KEEP_HOURLY = user_cfg.get('backup_keep_hourly')
+        self.BACKUP_KEEP_DAILY = user_cfg.get('backup_keep_daily')
+        self.BACKUP_KEEP_WEEKLY = user_cfg.get('backup_keep_weekly')
+        self.BACKUP_KEEP_MONTHLY = user_cfg.get('backup_keep_monthly')
+        self.BACKUP_MAX_TOTAL_GB = user_cfg.get('backup_max_total_gb')  # None = no budget
         self.RESTART_TIME = user_cfg['restart_time']
         self.MAX_AUTO_RESTARTS = user_cfg.get('max_auto_restarts', 3)
         self.STARTUP_TIMEOUT = user_cfg.get('startup_timeout', 300)
         self.CUSTOM_IP = user_cfg.get('custom_ip')
         
         user_tz = user_cfg.get('timezone', 'auto')
-        if user_tz.lower() == 'auto':
+        if user_tz == getattr(self, '_applied_timezone', None):
+            pass  # Unchanged — keep the resolved TIMEZONE, don't hit ip-api again
+        elif user_tz.lower() == 'auto':
             self.TIMEZONE = 'UTC'
             def fetch_tz():
                 """Fetch timezone from IP API."""
@@ -234,10 +318,13 @@ class Config:
             threading.Thread(target=fetch_tz, daemon=True).start()
         else:
             self.TIMEZONE = user_tz
+        self._applied_timezone = user_tz
             
         self.ROLE_PERMISSIONS = user_cfg['permissions']
-        
-        # Apply bot config
+        self._publish('user', user_cfg)
+
+    def _apply_bot_config(self, bot_cfg: dict):
+        """Apply a bot config dict to memory attributes and publish it. No disk access."""
         server_dir = bot_cfg.get('server_directory', './mc-server')
         if not os.path.isabs(server_dir):
             self.SERVER_DIR = os.path.abspath(os.path.join(PROJECT_ROOT, server_dir))
@@ -254,23 +341,68 @@ class Config:
         self.OWNER_ID = bot_cfg.get('owner_id')
         self.INSTALLED_VERSION = bot_cfg.get('installed_version')
         self.INSTALLED_PLATFORM = bot_cfg.get('installed_platform')
-        
-        # Hardcoded/default values (not user-configurable)
-        self.RCON_HOST = os.getenv("RCON_HOST", "127.0.0.1")
-
-        self.RCON_PORT = 25575
-        self.SERVER_JAR = "server.jar"
-        self.JAVA_PATH = "java"
-        self.RESTART_DELAY = 5
-        self.CRASH_CHECK_INTERVAL = 30
-        self.LOG_LINES_DEFAULT = 10
-        self.STATUS_COOLDOWN = 5
-        self.LOGS_COOLDOWN = 10
         self.STATE_FILE = os.path.join(self.SERVER_DIR, 'bot_state.json')
-        
-        # Legacy: Create ROLES dict with ID -> commands mapping (populated at runtime)
-        self.ROLES = {}
-        self.ADMIN_ROLE_ID = None  # Set during setup
+        self._publish('bot', bot_cfg)
+
+    # --- Change Notification ---
+
+    def _init_snapshots(self):
+        """Initialise the published snapshot state (called once from __new__)."""
+        self._snapshot_lock = threading.Lock()
+        self._snapshots = {'user': {}, 'bot': {}}
+        self._versions = {'user': 0, 'bot': 0}
+        self._listeners = []
+
+    def _publish(self, section: str, data: dict):
+        """
+        Publish a new snapshot of `section` ('user' or 'bot') if its content changed.
+        The version only increases on real changes, so readers can cheaply compare it.
+        """
+        with self._snapshot_lock:
+            if data == self._snapshots[section]:
+                return
+            snapshot = copy.deepcopy(data)
+            self._snapshots[section] = snapshot
+            self._versions[section] += 1
+            version = self._versions[section]
+            listeners = list(self._listeners)
+
+        for callback in listeners:
+            try:
+                callback(section, version, snapshot)
+            except Exception as e:
+                logger.error(f"Config change listener {callback!r} failed: {e}")
+
+    def add_change_listener(self, callback):
+        """
+        Register `callback(section, version, snapshot)`, called after each committed change
+        to user_config.json ('user') or bot_config.json ('bot'). It may run on any thread
+        that saved the config, so keep it cheap and don't block.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    @property
+    def user_snapshot(self) -> dict:
+        """Last committed user_config.json contents. Shared — treat as read-only."""
+        return self._snapshots['user']
+
+    @property
+    def user_config_version(self) -> int:
+        return self._versions['user']
+
+    @property
+    def bot_snapshot(self) -> dict:
+        """Last committed bot_config.json contents. Shared — treat as read-only."""
+        return self._snapshots['bot']
+
+    @property
+    def bot_config_version(self) -> int:
+        return self._versions['bot']
 
     def _migrate_old_config(self):
         """Migrate from old config.json to new split config."""
@@ -458,7 +590,7 @@ class Config:
         """
         with self._bot_lock:
             self._save_bot_config_no_lock(data)
-            self.load()
+            self._apply_bot_config(data)
 
     def _load_user_config_no_lock(self) -> dict:
         """Internal helper to load user config without acquiring a lock."""
@@ -489,10 +621,18 @@ class Config:
 
         Args:
             data (dict): The user preferences to save.
+
+        Raises:
+            ValueError: If `data` fails validation (nothing is written).
         """
+        valid, errors = validate_user_config(data)
+        if not valid:
+            error_msg = "❌ Invalid user_config.json:\n" + "\n".join(f"  - {e}" for e in errors)
+            raise ValueError(error_msg)
+
         with self._user_lock:
             self._save_user_config_no_lock(data)
-            self.load()
+            self._apply_user_config(data)
     
     @contextmanager
     def update_bot_config(self):
@@ -507,9 +647,8 @@ class Config:
             
             self._save_bot_config_no_lock(data)
             
-            # Refresh memory config
-            # load() uses non-locking methods internally, so it won't deadlock
-            self.load()
+            # Refresh memory config from the dict we just wrote — no re-read of either file
+            self._apply_bot_config(data)
 
     @contextmanager
     def update_user_config(self):
@@ -530,9 +669,132 @@ class Config:
 
             self._save_user_config_no_lock(data)
             
-            # Refresh memory config
-            # load() uses non-locking methods internally, so it won't deadlock
-            self.load()
+            # Refresh memory config from the dict we just wrote — no re-read of either file
+            self._apply_user_config(data)
+
+    # --- Async API ---
+    #
+    # The sync methods above wait up to 10s for the FileLock, which freezes the whole bot when they
+    # are called from a coroutine and another process (or thread) holds the lock. The async variants
+    # serialise callers of this process on an asyncio.Lock per file, so at most one worker thread
+    # per file waits on the FileLock, and do the locking and file I/O via asyncio.to_thread.
+    #
+    # aupdate_* takes a mutator instead of being a context manager: the file lock is then only held
+    # for the read-mutate-write in the worker thread, never across an `await` in the caller.
+    # Mutators queued while a write is in flight are applied together in a single write.
+
+    def _init_async(self):
+        """Initialise the async locking state (called once from __new__)."""
+        self._async_loop = None
+        self._async_locks = {}
+        self._pending_updates = {'user': [], 'bot': []}
+        self._update_tasks = {}
+
+    def _async_lock(self, section: str) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if loop is not self._async_loop:
+            # asyncio primitives belong to one loop; start fresh if the loop changed (tests, restarts)
+            self._async_loop = loop
+            self._async_locks = {}
+            self._pending_updates = {'user': [], 'bot': []}
+            self._update_tasks = {}
+        if section not in self._async_locks:
+            self._async_locks[section] = asyncio.Lock()
+        return self._async_locks[section]
+
+    async def aload_bot_config(self) -> dict:
+        """Async `load_bot_config()`: the lock wait and file read happen off the event loop."""
+        async with self._async_lock('bot'):
+            return await asyncio.to_thread(self.load_bot_config)
+
+    async def aload_user_config(self) -> dict:
+        """Async `load_user_config()`: the lock wait and file read happen off the event loop."""
+        async with self._async_lock('user'):
+            return await asyncio.to_thread(self.load_user_config)
+
+    async def asave_bot_config(self, data: dict):
+        """Async `save_bot_config()`."""
+        async with self._async_lock('bot'):
+            await asyncio.to_thread(self.save_bot_config, data)
+
+    async def asave_user_config(self, data: dict):
+        """Async `save_user_config()`. Raises ValueError if `data` fails validation."""
+        async with self._async_lock('user'):
+            await asyncio.to_thread(self.save_user_config, data)
+
+    async def aupdate_bot_config(self, mutator):
+        """
+        Apply `mutator(data)` to bot_config.json atomically, off the event loop.
+
+        `mutator` is a plain (non-async) callable that edits the dict in place; it runs in a
+        worker thread while the file lock is held. Returns whatever it returns. If it raises,
+        its edits are discarded and the exception is re-raised here; mutators batched with it
+        are unaffected.
+        """
+        return await self._enqueue_update('bot', mutator)
+
+    async def aupdate_user_config(self, mutator):
+        """
+        Apply `mutator(data)` to user_config.json atomically, off the event loop.
+
+        Same contract as `aupdate_bot_config()`. An edit that leaves the config invalid is
+        discarded and raises ValueError.
+        """
+        return await self._enqueue_update('user', mutator)
+
+    async def _enqueue_update(self, section: str, mutator):
+        lock = self._async_lock(section)
+        future = asyncio.get_running_loop().create_future()
+        self._pending_updates[section].append((mutator, future))
+        task = self._update_tasks.get(section)
+        if task is None or task.done():
+            self._update_tasks[section] = asyncio.create_task(self._drain_updates(section, lock))
+        return await future
+
+    async def _drain_updates(self, section: str, lock: asyncio.Lock):
+        """Write queued mutators in batches until the queue is empty."""
+        async with lock:
+            while self._pending_updates[section]:
+                batch, self._pending_updates[section] = self._pending_updates[section], []
+                # Callers that gave up (cancelled) before their turn are not applied
+                batch = [(mutator, future) for mutator, future in batch if not future.done()]
+                if not batch:
+                    continue
+                try:
+                    outcomes = await asyncio.to_thread(self._apply_updates, section, [m for m, _ in batch])
+                except Exception as e:
+                    # Lock timeout or I/O error: nothing was written
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, future), (result, error) in zip(batch, outcomes):
+                    if future.done():
+                        continue
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(result)
+
+    def _apply_updates(self, section: str, mutators: list) -> list[tuple]:
+        """Run mutators against one locked read/write of `section`. Returns (result, error) per mutator."""
+        update = self.update_user_config if section == 'user' else self.update_bot_config
+        outcomes = []
+        with update() as data:
+            for mutator in mutators:
+                before = copy.deepcopy(data)
+                try:
+                    result = mutator(data)
+                    if section == 'user':
+                        valid, errors = validate_user_config(data)
+                        if not valid:
+                            raise ValueError("❌ Invalid user_config.json modification:\n" + "\n".join(f"  - {e}" for e in errors))
+                    outcomes.append((result, None))
+                except Exception as e:
+                    data.clear()
+                    data.update(before)
+                    outcomes.append((None, e))
+        return outcomes
 
     def resolve_role_permissions(self, guild: discord.Guild):
         """
@@ -585,27 +847,13 @@ class Config:
     def WORLD_FOLDER(self) -> str:
         """
         Read level-name from server.properties; fall back to 'world'.
+        Served from the mtime-invalidated cache in src/server_properties.py.
 
         Returns:
             str: The name of the world folder.
         """
-        props_path = os.path.join(self.SERVER_DIR, "server.properties")
-        try:
-            with open(props_path, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith("level-name="):
-                        value = line.split("=", 1)[1].strip()
-                        return value if value else "world"
-        except FileNotFoundError:
-            pass
-        except Exception as e:
-            try:
-                from src.logger import logger
-                logger.error(f"Error reading server.properties: {e}")
-            except ImportError:
-                print(f"Error reading server.properties: {e}")
-        return "world"
+        from src.server_properties import server_properties
+        return server_properties.level_name
 
     @property
     def ONLINE_MODE(self) -> bool:
@@ -615,23 +863,8 @@ class Config:
         Returns:
             bool: True if online-mode is true, False otherwise.
         """
-        props_path = os.path.join(self.SERVER_DIR, "server.properties")
-        try:
-            with open(props_path, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith("online-mode="):
-                        value = line.split("=", 1)[1].strip().lower()
-                        return value == "true"
-        except FileNotFoundError:
-            pass
-        except Exception as e:
-            try:
-                from src.logger import logger
-                logger.error(f"Error reading server.properties for online-mode: {e}")
-            except ImportError:
-                print(f"Error reading server.properties for online-mode: {e}")
-        return False
+        from src.server_properties import server_properties
+        return server_properties.online_mode
 
     @property
     def WHITELIST_ENABLED(self) -> bool:
@@ -641,23 +874,8 @@ class Config:
         Returns:
             bool: True if white-list is true, False otherwise.
         """
-        props_path = os.path.join(self.SERVER_DIR, "server.properties")
-        try:
-            with open(props_path, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith("white-list="):
-                        value = line.split("=", 1)[1].strip().lower()
-                        return value == "true"
-        except FileNotFoundError:
-            pass
-        except Exception as e:
-            try:
-                from src.logger import logger
-                logger.error(f"Error reading server.properties for white-list: {e}")
-            except ImportError:
-                print(f"Error reading server.properties for white-list: {e}")
-        return False
+        from src.server_properties import server_properties
+        return server_properties.whitelist_enabled
 
 
 config = Config()
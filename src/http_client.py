@@ -0,0 +1,121 @@
+import asyncio
+import time
+import aiohttp
+from urllib.parse import urlsplit
+from src.logger import logger
+
+# ──────────────────────────────────────────────────────────────────────────────
+# One pooled aiohttp session for all outbound HTTP (Mojang, Modrinth, Adoptium,
+# Paper/Fabric/Mojang version APIs, playit.gg, GitHub).
+#
+# Keep-alive connections and the DNS cache are reused across calls, so an
+# autocomplete keystroke doesn't pay for a new TCP + TLS handshake. Callers pass
+# their own `timeout=` per request; the session default only bounds connect and
+# idle reads so long downloads are not cut off.
+# ──────────────────────────────────────────────────────────────────────────────
+
+DEFAULT_USER_AGENT = "slogiker/mc-bot/v3.3.0 (https://github.com/slogiker/mc-bot)"
+CONNECTION_LIMIT   = 64     # open connections in total
+PER_HOST_LIMIT     = 8      # open connections per host
+KEEPALIVE_TIMEOUT  = 60     # seconds an idle connection is kept for reuse
+DNS_CACHE_TTL      = 300    # seconds
+DEFAULT_TIMEOUT    = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+
+
+class HTTPClient:
+    """
+    Bot-lifetime registry for the shared ClientSession.
+
+    `session()` creates the session on first use (on the running loop) and recreates it if
+    it was closed or belongs to a loop that is gone. `close()` is called from shutdown_handler.
+    Every request is timed per host; see `metrics()`.
+    """
+
+    def __init__(self, user_agent: str | None = None):
+        self._user_agent = user_agent
+        self._session = None
+        self._loop = None
+        self._metrics = {}           # host -> {"requests", "errors", "total_ms", "max_ms"}
+
+    @property
+    def user_agent(self) -> str:
+        if self._user_agent:
+            return self._user_agent
+        from src.config import config
+        return getattr(config, "HTTP_USER_AGENT", None) or DEFAULT_USER_AGENT
+
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session. Do not close it — it outlives the caller."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._session = self._create_session()
+            self._loop = loop
+        return self._session
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=PER_HOST_LIMIT,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+        )
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_end.append(self._on_request_end)
+        trace.on_request_exception.append(self._on_request_exception)
+        logger.debug("Initialized shared aiohttp ClientSession")
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=DEFAULT_TIMEOUT,
+            headers={"User-Agent": self.user_agent},
+            trace_configs=[trace],
+        )
+
+    async def close(self):
+        session, self._session, self._loop = self._session, None, None
+        if session is not None and not session.closed:
+            await session.close()
+            logger.info("Shared aiohttp session closed")
+
+    # ── Metrics ───────────────────────────────────────────────────────────────
+
+    def metrics(self) -> dict:
+        """Per-host request count, error count, and average/max latency in ms."""
+        return {
+            host: {
+                "requests": m["requests"],
+                "errors":   m["errors"],
+                "avg_ms":   round(m["total_ms"] / m["requests"], 1) if m["requests"] else 0.0,
+                "max_ms":   round(m["max_ms"], 1),
+            }
+            for host, m in self._metrics.items()
+        }
+
+    def _record(self, url, started: float | None, error: bool):
+        host = urlsplit(str(url)).hostname or "?"
+        m = self._metrics.setdefault(host, {"requests": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        m["requests"] += 1
+        if error:
+            m["errors"] += 1
+        if started is not None:
+            elapsed = (time.perf_counter() - started) * 1000
+            m["total_ms"] += elapsed
+            m["max_ms"] = max(m["max_ms"], elapsed)
+
+    async def _on_request_start(self, session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def _on_request_end(self, session, ctx, params):
+        # Time to response headers; body streaming is up to the caller
+        self._record(params.url, getattr(ctx, "started", None), error=params.response.status >= 500)
+
+    async def _on_request_exception(self, session, ctx, params):
+        self._record(params.url, getattr(ctx, "started", None), error=True)
+
+
+http_client = HTTPClient()
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Shortcut for `http_client.session()`."""
+    return http_client.session()
@@ -2,8 +2,7 @@ import asyncio
 import secrets
 import time
 import discord
-from src.mc_link_manager import MCLinkManager
-from src.mojang import verify_premium_mc_account
+from src.mc_link_manager import MCLinkManager, link_within_grace
 from src.logger import logger
 from src.utils import rcon_cmd
 
@@ -16,19 +15,26 @@ COOLDOWN_SECONDS   = 60       # 60 seconds — minimum gap between two challenge
 CODE_ALPHABET      = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"  # no 0/O, 1/I (visually confusing)
 CODE_LENGTH        = 6        # 34^6 ≈ 1.6 billion combinations
 
+LOGIN_DECISION_BUDGET = 0.5   # seconds — link lookup must finish within this or the login fails closed
+KICK_RETRY_DELAYS     = (0.1, 0.2, 0.3, 0.5, 0.8, 1.0)   # waits between kick attempts while the player is still joining
+PLAYER_NOT_FOUND      = "No player was found"   # RCON reply to a kick before the player entity exists
+
 
 class JoinGuard:
     """
     Security gatekeeper for offline-mode Minecraft servers.
 
-    Decision tree on every login:
+    Decision tree on every login (one link lookup, decided within LOGIN_DECISION_BUDGET):
 
-    1. Premium account (Mojang API confirms)  → ALLOW silently
-    2. Not in mc_links.json                   → KICK with /link instructions
-    3. Within 30-minute grace window          → ALLOW silently
-    4. Within 60-second anti-spam cooldown    → IGNORE silently (no kick, no log spam)
-    5. Otherwise                              → KICK with 6-char code in kick reason
+    1. No Discord link                        → KICK with /link instructions
+    2. Within grace window                    → ALLOW silently
+    3. Within 60-second anti-spam cooldown    → KICK with the existing code (no new challenge)
+    4. Otherwise                              → KICK with 6-char code in kick reason
                                                 Player uses /verify <code> in Discord #commands
+
+    No Mojang lookup: in offline mode anyone can claim a premium name, so it could never
+    allow a login. The links are loaded at cog setup (cogs/link.py), so the lookup is a
+    dict hit.
     """
 
     def __init__(self, bot: discord.Client):
@@ -60,10 +66,11 @@ class JoinGuard:
 
         key = mc_username.lower()
         logger.info(f"JoinGuard: login event for {mc_username}")
+        started = time.monotonic()
 
         try:
-            # Step 1: Link check
-            link = await self.link_manager.get_link_by_mc(mc_username)
+            # Step 1: Link check (single lookup; the record also carries the grace stamps)
+            link = await asyncio.wait_for(self.link_manager.get_link_by_mc(mc_username), LOGIN_DECISION_BUDGET)
             if not link:
                 logger.warning(f"JoinGuard: {mc_username} has no Discord link — kicking")
                 await self._kick(
@@ -73,8 +80,8 @@ class JoinGuard:
                 )
                 return
 
-            # Step 2: Grace window (30 min from last /verify)
-            if await self.link_manager.is_within_grace(mc_username):
+            # Step 2: Grace window (30 min from last /verify, 12h from last disconnect)
+            if link_within_grace(link):
                 logger.info(f"JoinGuard: {mc_username} is within grace window — allow")
                 return
 
@@ -100,11 +107,22 @@ class JoinGuard:
             await self._issue_challenge(mc_username, link["discord_id"])
 
         except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = f"link lookup exceeded {LOGIN_DECISION_BUDGET}s"
             logger.error(f"JoinGuard: Error during login verification for {mc_username}: {e}", exc_info=True)
             await self._kick(
                 mc_username,
                 "Napaka pri preverjanju varnosti. Prosimo, poskusite znova."
             )
+        finally:
+            logger.debug(f"JoinGuard: login of {mc_username} handled in {(time.monotonic() - started) * 1000:.0f} ms")
+
+    def _spawn(self, coro):
+        """Run a coroutine in the background, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
 
     def handle_player_quit(self, mc_username: str):
         """
@@ -117,9 +135,7 @@ class JoinGuard:
         if config.ONLINE_MODE:
             return
 
-        task = asyncio.create_task(self.link_manager.record_disconnect(mc_username))
-        self._background_tasks.add(task)
-        task.add_done_callback(self._background_tasks.discard)
+        self._spawn(self.link_manager.record_disconnect(mc_username))
         logger.debug(f"JoinGuard: recorded disconnect for {mc_username}")
 
     async def handle_collision(self, mc_username: str):
@@ -241,9 +257,7 @@ class JoinGuard:
         self._kick_cooldowns[key] = time.time()
 
         # Schedule expiry cleanup
-        task = asyncio.create_task(self._expire_challenge(key, expires_at))
-        self._background_tasks.add(task)
-        task.add_done_callback(self._background_tasks.discard)
+        self._spawn(self._expire_challenge(key, expires_at))
 
         # Kick with code in reason
         reason = (
@@ -264,16 +278,24 @@ class JoinGuard:
             logger.debug(f"JoinGuard: challenge expired for {key}")
 
     async def _kick(self, mc_username: str, reason: str):
-        """Kick a player via RCON. Waits 0.5 seconds to ensure player is fully connected."""
-        await asyncio.sleep(0.5)
+        """
+        Kick a player via RCON.
+        The login line is logged before the player entity exists, so the kick is sent at once and
+        retried with short waits (KICK_RETRY_DELAYS) while the server replies "No player was found".
+        """
         # Escape quotes and collapse newlines (RCON kick reason is single-line)
         escaped = reason.replace('"', '\\"').replace("\n", " | ")
+        delays = iter(KICK_RETRY_DELAYS)
         try:
-            # We use rcon_cmd directly here
-            success, response = await rcon_cmd(f'kick {mc_username} "{escaped}"')
-            if success:
-                logger.info(f"JoinGuard: kicked {mc_username}")
-            else:
-                logger.error(f"JoinGuard: failed to kick {mc_username}: {response}")
+            while True:
+                success, response = await rcon_cmd(f'kick {mc_username} "{escaped}"')
+                if success and PLAYER_NOT_FOUND not in (response or ""):
+                    logger.info(f"JoinGuard: kicked {mc_username}")
+                    return
+                delay = next(delays, None)
+                if delay is None:
+                    logger.error(f"JoinGuard: failed to kick {mc_username}: {response}")
+                    return
+                await asyncio.sleep(delay)
         except Exception as e:
             logger.error(f"JoinGuard: exception while kicking {mc_username}: {e}")
@@ -8,8 +8,8 @@ import platform
 import shutil
 import tarfile
 import tempfile
-import aiohttp
 import aiofiles
+from src.http_client import get_session
 from src.logger import logger
 
 class JREManager:
@@ -104,23 +104,22 @@ class JREManager:
         temp_tar = os.path.join(self.jre_base_dir, f"jre_{java_version}.tar.gz")
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, allow_redirects=True) as resp:
-                    if resp.status != 200:
-                        raise Exception(f"Failed to download JRE {java_version}: HTTP {resp.status}")
-                    
-                    total_size = int(resp.headers.get('content-length', 0))
-                    downloaded = 0
-                    
-                    async with aiofiles.open(temp_tar, 'wb') as f:
-                        async for chunk in resp.content.iter_chunked(1024 * 1024):
-                            await f.write(chunk)
-                            downloaded += len(chunk)
-                            if total_size > 0 and progress_callback:
-                                percent = int((downloaded / total_size) * 100)
-                                # Throttle callbacks slightly
-                                if percent % 10 == 0 or downloaded == total_size:
-                                    await progress_callback(f"📥 Downloading JRE {java_version} ({percent}%)...")
+            async with get_session().get(url, allow_redirects=True) as resp:
+                if resp.status != 200:
+                    raise Exception(f"Failed to download JRE {java_version}: HTTP {resp.status}")
+                
+                total_size = int(resp.headers.get('content-length', 0))
+                downloaded = 0
+                
+                async with aiofiles.open(temp_tar, 'wb') as f:
+                    async for chunk in resp.content.iter_chunked(1024 * 1024):
+                        await f.write(chunk)
+                        downloaded += len(chunk)
+                        if total_size > 0 and progress_callback:
+                            percent = int((downloaded / total_size) * 100)
+                            # Throttle callbacks slightly
+                            if percent % 10 == 0 or downloaded == total_size:
+                                await progress_callback(f"📥 Downloading JRE {java_version} ({percent}%)...")
 
             # Extract JRE
             logger.info(f"Extracting JRE {java_version} to {dest_dir}...")
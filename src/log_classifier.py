@@ -0,0 +1,109 @@
+import re
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Central log line classifier.
+#
+# The LogDispatcher runs every line through classify() exactly once and hands
+# the resulting LogEvent to all batch subscribers, so consumers branch on
+# `event.kind` instead of re-running their own regexes on the raw text.
+#
+# Target format (Vanilla/Paper/Fabric, Forge adds a logger tag):
+#   [10:22:34] [Server thread/INFO]: Steve joined the game
+#   [10:22:34] [Server thread/INFO] [minecraft/DedicatedServer]: Done (4.2s)! ...
+# ──────────────────────────────────────────────────────────────────────────────
+
+DEATH_WORDS = [
+    "was slain", "was shot", "drowned", "experienced kinetic energy",
+    "blew up", "was killed", "hit the ground", "fell from",
+    "went up in flames", "burned to death", "walked into fire",
+    "tried to swim in lava", "died", "was squashed", "was pummeled",
+    "was pricked", "starved to death", "suffocated", "was impaled",
+    "was frozen", "withered away",
+]
+
+_HEADER_RE = re.compile(
+    r'^\[(?P<time>[^\]]+)\] \[(?P<thread>[^\]]+?)/(?P<level>[A-Z]+)\](?: \[[^\]]*\])*: (?P<msg>.*)$'
+)
+
+# One alternation, anchored at the start of the message. Each alternative is an
+# outer named group `k_<kind>`; match.lastgroup therefore names the event kind.
+_MESSAGE_RE = re.compile(
+    r'(?P<k_auth>UUID of player (?P<auth_player>[A-Za-z0-9_]+) is (?P<auth_uuid>[0-9a-fA-F-]+))'
+    r'|(?P<k_join>(?P<join_player>[A-Za-z0-9_]+) joined the game)'
+    r'|(?P<k_leave>(?P<leave_player>[A-Za-z0-9_]+) left the game)'
+    r'|(?P<k_collision>(?P<collision_player>[A-Za-z0-9_]+) lost connection: You logged in from another location)'
+    r'|(?P<k_connect>(?P<connect_player>[A-Za-z0-9_]+)\[[^\]]*\] logged in with entity id)'
+    r'|(?P<k_started>Done \()'
+    r'|(?P<k_stopping>Stopping (?:the )?server)'
+    r'|(?P<k_starting>Starting minecraft server version (?P<starting_version>\S+))'
+    r'|(?P<k_saved>Saved the game)'
+    r'|(?P<k_chat>(?:\[Not Secure\] )?<(?P<chat_player>[^>]+)> (?P<chat_text>.*))'
+    r'|(?P<k_death>(?P<death_player>[A-Za-z0-9_]+) .*?(?:'
+    + "|".join(re.escape(w) for w in DEATH_WORDS)
+    + r'))'
+)
+
+# Events that are only trusted when logged by the expected thread, so a plugin
+# or mod printing look-alike text cannot spoof logins, quits or lifecycle changes.
+_AUTH_THREADS = ("User Authenticator", "Netty")
+_SERVER_THREAD_KINDS = {"leave", "started", "stopping"}
+
+
+class LogEvent:
+    """
+    One parsed log line.
+
+    kind is one of: auth, join, leave, collision, connect, started, stopping,
+    starting, saved, chat, death, other. `player` is set for player events;
+    `data` carries the UUID (auth), version (starting), chat text (chat) or the
+    full death message (death).
+    """
+    __slots__ = ("raw", "time", "thread", "level", "message", "kind", "player", "data")
+
+    def __init__(self, raw: str, time: str | None = None, thread: str | None = None,
+                 level: str | None = None, message: str | None = None,
+                 kind: str = "other", player: str | None = None, data: str | None = None):
+        self.raw = raw
+        self.time = time
+        self.thread = thread
+        self.level = level
+        self.message = message if message is not None else raw
+        self.kind = kind
+        self.player = player
+        self.data = data
+
+    def __repr__(self):
+        return f"LogEvent(kind={self.kind!r}, player={self.player!r}, raw={self.raw!r})"
+
+
+def classify(line: str) -> LogEvent:
+    """Parse a raw log line into a LogEvent. Lines without a log header are kind 'other'."""
+    header = _HEADER_RE.match(line)
+    if not header:
+        return LogEvent(line)
+
+    time, thread, level, msg = header.group("time", "thread", "level", "msg")
+    event = LogEvent(line, time, thread, level, msg)
+
+    m = _MESSAGE_RE.match(msg)
+    if not m:
+        return event
+
+    kind = m.lastgroup[2:]
+    if kind == "auth" and not thread.startswith(_AUTH_THREADS):
+        return event
+    if kind in _SERVER_THREAD_KINDS and thread != "Server thread":
+        return event
+
+    event.kind = kind
+    if kind == "auth":
+        event.player, event.data = m.group("auth_player", "auth_uuid")
+    elif kind == "starting":
+        event.data = m.group("starting_version")
+    elif kind == "chat":
+        event.player, event.data = m.group("chat_player", "chat_text")
+    elif kind == "death":
+        event.player, event.data = m.group("death_player"), msg
+    elif kind in ("join", "leave", "collision", "connect"):
+        event.player = m.group(f"{kind}_player")
+    return event
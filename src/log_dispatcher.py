@@ -1,26 +1,229 @@
 import asyncio
+import time
 from src.logger import logger
 from collections import deque
+from src.log_tailer import LogTailer
+from src.log_classifier import LogEvent, classify
+
+BATCH_MAX_LINES = 500    # a pending batch is flushed as soon as it reaches this many lines
+BATCH_WINDOW    = 0.05   # seconds — otherwise lines are collected this long before a flush
+
+SUBSCRIBER_MAXSIZE = 100    # queued items (lines or batches) before the overflow policy applies
+OVERFLOW_LIMIT     = 1000   # extra items allowed past maxsize for priority lines / stalled "block" consumers
+BLOCK_TIMEOUT      = 5.0    # seconds the dispatcher waits on a full "block" subscriber before moving on
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class LogSubscription:
+    """
+    A subscriber queue with an explicit overflow policy and delivery accounting.
+
+    Policies once `maxsize` items are queued:
+    - "block":       nothing is dropped; the dispatcher stops reading the log until the
+                     consumer catches up (the file on disk is the buffer).
+    - "drop_oldest": the oldest queued item is discarded to make room.
+    - "drop_newest": the incoming item is discarded.
+
+    `priority` is a tuple of substrings. Lines containing one of them are never discarded
+    by the drop policies — they may exceed maxsize by up to OVERFLOW_LIMIT items, in order.
+    A "block" subscriber takes anything up to that limit (the dispatcher gives up waiting on
+    it after BLOCK_TIMEOUT); beyond it, it behaves like "drop_oldest" for its priority lines.
+    """
+
+    def __init__(self, name: str, batch: bool = False, policy: str = "drop_newest",
+                 maxsize: int = SUBSCRIBER_MAXSIZE, priority: tuple = ()):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}' (expected one of {OVERFLOW_POLICIES})")
+        self.name = name
+        self.batch = batch
+        self.policy = policy
+        self.maxsize = maxsize
+        self.priority = tuple(priority)
+
+        self._items = deque()           # (item, enqueue monotonic time)
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+        # Accounting (counted in lines, not batches)
+        self.delivered = 0
+        self.dropped = 0
+        self.peak_depth = 0
+        self.peak_lag = 0.0             # seconds between enqueue and get()
+        self.last_lag = 0.0
+        self.stalls = 0                 # times a "block" subscriber held the dispatcher past BLOCK_TIMEOUT
+
+    # ── Queue API (mirrors asyncio.Queue) ─────────────────────────────────────
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def full(self) -> bool:
+        return len(self._items) >= self.maxsize
+
+    def get_nowait(self):
+        if not self._items:
+            raise asyncio.QueueEmpty
+        item, queued_at = self._items.popleft()
+        lag = time.monotonic() - queued_at
+        self.last_lag = lag
+        self.peak_lag = max(self.peak_lag, lag)
+        self.delivered += self._count(item)
+        if not self._items:
+            self._not_empty.clear()
+        if len(self._items) < self.maxsize:
+            self._not_full.set()
+        return item
+
+    async def get(self):
+        while not self._items:
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    # ── Producer side (dispatcher only) ───────────────────────────────────────
+
+    def offer(self, item):
+        """Enqueue an item according to the overflow policy."""
+        hard_limit = self.maxsize + OVERFLOW_LIMIT
+        if len(self._items) < self.maxsize or (self.policy == "block" and len(self._items) < hard_limit):
+            self._append(item)
+            return
+
+        if self.policy == "drop_oldest":
+            item = self._evict_oldest(item)
+            if len(self._items) < self.maxsize:
+                self._append(item)
+                return
+        elif self.policy == "block":
+            # Stalled past the overflow limit: ordinary lines are lost, but the oldest
+            # of them make room for this item's priority lines
+            kept = self._salvage(item)
+            if kept:
+                carried = self._evict_oldest(kept)
+                if len(self._items) < hard_limit:
+                    self.dropped += self._count(item) - self._count(kept)
+                    self._append(carried)
+                else:
+                    self.dropped += self._count(item) + self._count(carried) - self._count(kept)
+            else:
+                self.dropped += self._count(item)
+            return
+
+        # drop_newest, or nothing evictable: only the priority lane gets through
+        kept = self._salvage(item)
+        if kept and len(self._items) < hard_limit:
+            self.dropped += self._count(item) - self._count(kept)
+            self._append(kept)
+        else:
+            self.dropped += self._count(item)
+
+    async def wait_for_space(self, timeout: float) -> bool:
+        """Wait until the queue is below maxsize. Returns False on timeout."""
+        if not self.full():
+            return True
+        self._not_full.clear()
+        try:
+            await asyncio.wait_for(self._not_full.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.stalls += 1
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "policy": self.policy,
+            "depth": len(self._items),
+            "peak_depth": self.peak_depth,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "last_lag": self.last_lag,
+            "peak_lag": self.peak_lag,
+            "stalls": self.stalls,
+        }
+
+    def _append(self, item):
+        self._items.append((item, time.monotonic()))
+        self.peak_depth = max(self.peak_depth, len(self._items))
+        if len(self._items) >= self.maxsize:
+            self._not_full.clear()
+        self._not_empty.set()
+
+    def _count(self, item) -> int:
+        return len(item) if self.batch else 1
+
+    def _salvage(self, item):
+        """Return the priority part of an item (None if there is none)."""
+        if not self.priority:
+            return None
+        if self.batch:
+            kept = [event for event in item if any(p in event.raw for p in self.priority)]
+            return kept or None
+        return item if any(p in item for p in self.priority) else None
+
+    def _evict_oldest(self, incoming):
+        """
+        Discard the oldest item that is not entirely priority lines.
+        Priority lines of an evicted batch are carried into the next item so order is kept.
+        Returns the (possibly extended) incoming item.
+        """
+        for idx, (item, queued_at) in enumerate(self._items):
+            kept = self._salvage(item)
+            if kept is not None and self._count(kept) == self._count(item):
+                continue
+            del self._items[idx]
+            self.dropped += self._count(item) - (self._count(kept) if kept else 0)
+            if kept:
+                if idx < len(self._items):
+                    nxt, _ = self._items[idx]
+                    self._items[idx] = (kept + nxt, queued_at)
+                else:
+                    incoming = kept + incoming
+            return incoming
+        return incoming
+
 
 class LogDispatcher:
     def __init__(self):
-        self._subscribers = []
+        self._subscribers = []        # LogSubscription instances (per-line and batch)
         self._running = False
         self._task = None
         self._buffer = deque(maxlen=200)
-        self._process = None
+        self._pending = []            # LogEvents waiting for the next batch flush
+        self._flush_handle = None
 
-    def subscribe(self) -> asyncio.Queue:
-        q = asyncio.Queue(maxsize=100)
-        self._subscribers.append(q)
-        return q
+    def subscribe(self, batch: bool = False, name: str = None, policy: str = "drop_newest",
+                  maxsize: int = SUBSCRIBER_MAXSIZE, priority: tuple = ()) -> LogSubscription:
+        """
+        Returns a queue fed with every new log line (raw str).
+        With batch=True the queue receives lists of classified LogEvents instead, collected for up to
+        BATCH_WINDOW seconds or BATCH_MAX_LINES lines, so consumers wake once per burst. Batches are shared
+        between subscribers and must not be mutated.
+        See LogSubscription for the overflow policies and the priority lane.
+        """
+        sub = LogSubscription(name or f"subscriber-{len(self._subscribers) + 1}",
+                              batch=batch, policy=policy, maxsize=maxsize, priority=priority)
+        self._subscribers.append(sub)
+        return sub
 
-    def unsubscribe(self, q: asyncio.Queue):
+    def unsubscribe(self, q: LogSubscription):
         if q in self._subscribers:
             self._subscribers.remove(q)
 
+    def get_stats(self) -> list[dict]:
+        """Per-subscriber delivery counters (depth, drops, lag) for /status."""
+        return [sub.stats() for sub in self._subscribers]
+
     def get_recent_logs(self) -> list:
-        """Return the last 50 lines of logs."""
+        """Return the last 200 lines of logs."""
+        return [event.raw for event in self._buffer]
+
+    def get_recent_events(self) -> list[LogEvent]:
+        """Return the last 200 lines of logs as classified LogEvents."""
         return list(self._buffer)
 
     async def wait_for_pattern(self, pattern: str, timeout: int = 180) -> bool:
@@ -28,18 +231,18 @@ class LogDispatcher:
         Subscribes to live logs and waits for a specific string to appear.
         Returns True if found, False if it times out.
         """
-        q = self.subscribe()
+        q = self.subscribe(batch=True, name=f"wait_for:{pattern}", policy="drop_oldest", priority=(pattern,))
         try:
             # Check the buffer first in case it just happened a second ago
-            for line in reversed(self._buffer):
-                if pattern in line:
+            for event in reversed(self._buffer):
+                if pattern in event.raw:
                     return True
-            
+
             # Wait for it live
             async with asyncio.timeout(timeout):
                 while True:
-                    line = await q.get()
-                    if pattern in line:
+                    events = await q.get()
+                    if any(pattern in event.raw for event in events):
                         return True
         except asyncio.TimeoutError:
             return False
@@ -54,13 +257,10 @@ class LogDispatcher:
 
     async def stop(self):
         self._running = False
-        if self._process:
-            try:
-                self._process.terminate()
-                await self._process.wait()
-            except Exception:
-                pass
-            self._process = None
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending = []
         if self._task:
             self._task.cancel()
             try:
@@ -71,75 +271,84 @@ class LogDispatcher:
     async def _tail_logs(self):
         from src.config import config
         import os
-        
+
         log_path = os.path.join(config.SERVER_DIR, 'logs', 'latest.log')
         logger.info(f"LogDispatcher: Starting tail of {log_path}")
-        
+
         while self._running:
             try:
-                if not os.path.exists(log_path):
-                    await asyncio.sleep(2)
-                    continue
-                
-                logger.info("LogDispatcher: Starting tail -F subprocess")
-                
-                # Use tail -F for instant line delivery (follows file renames/rotations)
-                self._process = await asyncio.create_subprocess_exec(
-                    "tail", "-F", "-n", "0", log_path,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.DEVNULL
-                )
-                
-                while self._running and self._process.returncode is None:
-                    try:
-                        line_bytes = await asyncio.wait_for(
-                            self._process.stdout.readline(),
-                            timeout=5.0
-                        )
-                    except asyncio.TimeoutError:
-                        continue
-                    
-                    if not line_bytes:
-                        # Process ended
-                        break
-                    
-                    line = line_bytes.decode('utf-8', errors='ignore').strip()
-                    if not line:
-                        continue
-                    
-                    # Mirror to main bot logs for Docker visibility
-                    logger.info(f"[MC-SERVER] {line}")
-                    
-                    # Store in rolling buffer
-                    self._buffer.append(line)
-                    
-                    # Broadcast to all subscribers
-                    for q in self._subscribers.copy():
-                        try:
-                            q.put_nowait(line)
-                        except asyncio.QueueFull:
-                            pass
-                
-                # Process ended, clean up and retry
-                if self._process:
-                    try:
-                        self._process.terminate()
-                        await self._process.wait()
-                    except Exception:
-                        pass
-                    self._process = None
-                
-                logger.warning("LogDispatcher: tail process ended, restarting...")
-                await asyncio.sleep(2)
-                    
+                # In-process tailer: follows rotations itself, so no restart gap between files
+                tailer = LogTailer(log_path)
+                async for lines in tailer.follow():
+                    await self._dispatch(lines)
+
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"LogDispatcher error: {e}")
-                if self._process:
-                    try:
-                        self._process.terminate()
-                    except Exception:
-                        pass
-                    self._process = None
                 await asyncio.sleep(5)
 
+    async def _dispatch(self, lines: list[str]):
+        """Fan one chunk of tailed lines out to every subscriber, then apply backpressure."""
+        line_subs = [s for s in self._subscribers if not s.batch]
+        events = []
+        for line in lines:
+            # Mirror to main bot logs for Docker visibility
+            logger.info(f"[MC-SERVER] {line}")
+
+            # Parse once here; batch subscribers get the typed event
+            event = classify(line)
+            events.append(event)
+
+            # Store in rolling buffer
+            self._buffer.append(event)
+
+            # Broadcast to all per-line subscribers
+            for sub in line_subs:
+                sub.offer(line)
+
+        self._queue_batch(events)
+        if self._pending and any(s.batch and s.policy == "block" for s in self._subscribers):
+            # A blocking batch consumer is only judged once the batch is in its queue;
+            # checking before the flush would let it fall a batch behind every time
+            await asyncio.sleep(BATCH_WINDOW)
+            self._flush_batch()
+        await self._apply_backpressure()
+
+    async def _apply_backpressure(self):
+        """
+        Holds the tailer while a "block" subscriber is full. Nothing is lost meanwhile:
+        the tailer resumes from its byte offset. A consumer that stays stuck for
+        BLOCK_TIMEOUT is logged and skipped so it cannot stall every other subscriber.
+        """
+        for sub in self._subscribers.copy():
+            if sub.policy == "block" and sub.full():
+                if not await sub.wait_for_space(BLOCK_TIMEOUT):
+                    logger.warning(
+                        f"LogDispatcher: subscriber '{sub.name}' is not keeping up "
+                        f"({sub.qsize()} queued, stall #{sub.stalls})"
+                    )
+
+    def _queue_batch(self, events: list):
+        """Add events to the pending batch; flush now if it is full, else after BATCH_WINDOW."""
+        if not any(s.batch for s in self._subscribers):
+            return
+        self._pending.extend(events)
+        if len(self._pending) >= BATCH_MAX_LINES:
+            self._flush_batch()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(BATCH_WINDOW, self._flush_batch)
+
+    def _flush_batch(self):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+
+        batch_subs = [s for s in self._subscribers if s.batch]
+        for start in range(0, len(pending), BATCH_MAX_LINES):
+            batch = pending[start:start + BATCH_MAX_LINES]
+            for sub in batch_subs:
+                sub.offer(batch)
+
 log_dispatcher = LogDispatcher()
@@ -0,0 +1,246 @@
+import asyncio
+import ctypes
+import ctypes.util
+import os
+from src.logger import logger
+
+# ──────────────────────────────────────────────────────────────────────────────
+# In-process replacement for `tail -F`.
+#
+# Wake-ups come from inotify (Linux) on the log *directory*, so creations and
+# renames of latest.log are seen too. Where inotify is unavailable we fall back
+# to polling os.stat(). Either way the file itself is read in large chunks from
+# a tracked byte offset and split into lines here, instead of one readline()
+# wake-up per line.
+# ──────────────────────────────────────────────────────────────────────────────
+
+CHUNK_SIZE      = 256 * 1024  # bytes per read() — large enough to swallow a burst in one go
+POLL_INTERVAL   = 0.25        # seconds between stat() polls when inotify is unavailable
+RESYNC_INTERVAL = 2.0         # seconds — safety re-check even when inotify is active
+
+# inotify constants (linux/inotify.h)
+_IN_MODIFY      = 0x00000002
+_IN_ATTRIB      = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM  = 0x00000040
+_IN_MOVED_TO    = 0x00000080
+_IN_CREATE      = 0x00000100
+_IN_DELETE      = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF   = 0x00000800
+_IN_NONBLOCK    = 0o4000
+_IN_CLOEXEC     = 0o2000000
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF
+)
+
+
+def _load_libc():
+    """Return libc with inotify symbols, or None on platforms without them."""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _load_libc()
+
+
+class LogTailer:
+    """
+    Follows a growing log file and yields batches of complete lines.
+
+    Behaves like `tail -F -n 0`:
+    - Starts at the end of the file if it already exists, or at the start once it appears.
+    - Detects rotation by inode (rename + new file) and truncation by size, then
+      continues from offset 0 of the new file without the 2s restart gap.
+    - Lines are only emitted once their trailing newline has been written.
+    """
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE,
+                 poll_interval: float = POLL_INTERVAL, use_inotify: bool = True):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and _libc is not None
+
+        self.offset = 0          # byte offset of the next read in the current file
+        self._fd = None          # fd of the file currently being followed
+        self._ino = None         # (st_dev, st_ino) of that file
+        self._partial = b""      # bytes after the last newline, waiting for the rest of the line
+
+        self._wake = asyncio.Event()
+        self._inotify_fd = None
+        self._watched_dir = None  # (st_dev, st_ino) of the watched directory
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    async def follow(self):
+        """Async generator yielding non-empty lists of decoded, stripped lines."""
+        try:
+            self._open(from_end=True)
+            while True:
+                self._wake.clear()
+                self._ensure_watch()
+
+                lines = self._read_chunk()
+                if lines:
+                    yield lines
+                    continue
+                if self._check_rotation():
+                    continue
+
+                await self._wait()
+        finally:
+            self.close()
+
+    def close(self):
+        """Release the file and inotify descriptors."""
+        self._close_file()
+        self._close_inotify()
+
+    def _close_inotify(self):
+        if self._inotify_fd is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._inotify_fd)
+            except (RuntimeError, ValueError):
+                pass
+            try:
+                os.close(self._inotify_fd)
+            except OSError:
+                pass
+            self._inotify_fd = None
+            self._watched_dir = None
+
+    # ── File handling ─────────────────────────────────────────────────────────
+
+    def _open(self, from_end: bool):
+        """Open the log file if it exists. Returns True on success."""
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        st = os.fstat(fd)
+        self._fd = fd
+        self._ino = (st.st_dev, st.st_ino)
+        self.offset = st.st_size if from_end else 0
+        self._partial = b""
+        return True
+
+    def _close_file(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+        self._fd = None
+        self._ino = None
+
+    def _read_chunk(self) -> list[str]:
+        """Read up to chunk_size bytes from the current offset and split them into lines."""
+        if self._fd is None:
+            return []
+        data = os.pread(self._fd, self.chunk_size, self.offset)
+        if not data:
+            return []
+        self.offset += len(data)
+
+        data = self._partial + data
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            self._partial = data
+            return []
+        self._partial = data[cut + 1:]
+        return self._split(data[:cut])
+
+    @staticmethod
+    def _split(data: bytes) -> list[str]:
+        lines = []
+        for raw in data.split(b"\n"):
+            line = raw.decode("utf-8", errors="ignore").strip()
+            if line:
+                lines.append(line)
+        return lines
+
+    def _check_rotation(self) -> bool:
+        """
+        Called once the current file is drained.
+        Returns True if a different file (or a truncated one) should now be read.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+
+        if self._fd is None:
+            # File appeared after we started — read it from the beginning
+            return self._open(from_end=False)
+
+        if (st.st_dev, st.st_ino) != self._ino:
+            logger.debug(f"LogTailer: {self.path} rotated, following new file")
+            self._close_file()
+            self._open(from_end=False)
+            return True
+
+        if st.st_size < self.offset:
+            logger.debug(f"LogTailer: {self.path} truncated, restarting from offset 0")
+            self.offset = 0
+            self._partial = b""
+            return True
+
+        return False
+
+    # ── Wake-ups ──────────────────────────────────────────────────────────────
+
+    def _ensure_watch(self):
+        """(Re)arm the inotify watch on the log directory. Falls back to polling on failure."""
+        if not self.use_inotify:
+            return
+        directory = os.path.dirname(self.path) or "."
+        try:
+            st = os.stat(directory)
+        except FileNotFoundError:
+            return
+        dir_id = (st.st_dev, st.st_ino)
+        if dir_id == self._watched_dir:
+            return
+
+        loop = asyncio.get_running_loop()
+        if self._inotify_fd is None:
+            fd = _libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd < 0:
+                logger.warning(f"LogTailer: inotify_init1 failed (errno {ctypes.get_errno()}), polling instead")
+                self.use_inotify = False
+                return
+            self._inotify_fd = fd
+            loop.add_reader(fd, self._on_inotify)
+
+        wd = _libc.inotify_add_watch(self._inotify_fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            logger.warning(f"LogTailer: inotify_add_watch failed (errno {ctypes.get_errno()}), polling instead")
+            self._close_inotify()
+            self.use_inotify = False
+            return
+        self._watched_dir = dir_id
+
+    def _on_inotify(self):
+        # Drain the event queue; we only care that *something* changed.
+        try:
+            while os.read(self._inotify_fd, 64 * 1024):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        self._wake.set()
+
+    async def _wait(self):
+        if self._inotify_fd is None:
+            await asyncio.sleep(self.poll_interval)
+            return
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=RESYNC_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
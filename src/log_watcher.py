@@ -1,7 +1,11 @@
 import asyncio
-import re
 from src.logger import logger
 from src.log_dispatcher import log_dispatcher
+from src.log_classifier import LogEvent, classify
+from src.usercache import usercache
+
+# Lines JoinGuard and the session bookkeeping cannot miss: kept even past a stall
+_GUARDED_EVENTS = ("UUID of player", "left the game", "lost connection")
 
 class LogWatcher:
     """
@@ -17,32 +21,6 @@ class LogWatcher:
         self._task = None
         self._running = False
         self._queue = None
-        
-        # Regex to capture Username and UUID from Vanilla/Paper/Fabric logs
-        # Login: fires before player is fully in-game — used for JoinGuard
-        self.auth_pattern = re.compile(
-            r'\[(?:[0-9:]+)\] \[User Authenticator #\d+/INFO\].*?UUID of player (?P<username>[A-Za-z0-9_]+) is (?P<uuid>[0-9a-fA-F-]+)'
-        )
-        
-        # Fallback regex for Forge/NeoForge which sometimes formats differently
-        self.auth_pattern_forge = re.compile(
-            r'\[(?:[0-9:]+)\] \[Netty(?:[a-zA-Z0-9 _#-]+)?/INFO\].*?: UUID of player (?P<username>[A-Za-z0-9_]+) is (?P<uuid>[0-9a-fA-F-]+)'
-        )
-
-        # Leave
-        self.leave_pattern = re.compile(
-            r'\[(?:[0-9:]+)\] \[Server thread/INFO\].*?(?P<username>[A-Za-z0-9_]+) left the game'
-        )
-
-        # Collision (impersonation detection)
-        self.collision_pattern = re.compile(
-            r'\[(?:[0-9:]+)\] \[.*?/INFO\].*?(?P<username>[A-Za-z0-9_]+) lost connection: You logged in from another location'
-        )
-
-        # Lifecycle patterns
-        self.started_pattern = re.compile(r'\[(?:[0-9:]+)\] \[Server thread/INFO\].*?Done \(')
-        self.stopping_pattern = re.compile(r'\[(?:[0-9:]+)\] \[Server thread/INFO\].*?Stopping (?:the )?server')
-
 
     def start(self):
         if self._task is None or self._task.done():
@@ -51,7 +29,11 @@ class LogWatcher:
                 log_dispatcher.unsubscribe(self._queue)
                 
             self._running = True
-            self._queue = log_dispatcher.subscribe()
+            # JoinGuard depends on every auth line — never drop, apply backpressure instead.
+            # If the consumer stalls past BLOCK_TIMEOUT the priority lane still keeps these lines.
+            self._queue = log_dispatcher.subscribe(
+                batch=True, name="log_watcher", policy="block", priority=_GUARDED_EVENTS
+            )
             self._task = asyncio.create_task(self._process_logs())
             logger.info("Started Minecraft Log Watcher (via LogDispatcher)")
 
@@ -68,40 +50,28 @@ class LogWatcher:
     async def _process_logs(self):
         try:
             while self._running and self._queue:
-                line = await self._queue.get()
-                self._check_line(line)
+                events = await self._queue.get()
+                for event in events:
+                    self._check_event(event)
         except asyncio.CancelledError:
             pass
 
     def _check_line(self, line: str):
-        # 1. Login match
-        auth_match = self.auth_pattern.search(line) or self.auth_pattern_forge.search(line)
-        if auth_match:
-            username = auth_match.group('username')
-            uuid = auth_match.group('uuid')
-            self.bot.dispatch('minecraft_player_login', username, uuid)
-            return
-
-        # 2. Leave match
-        leave_match = self.leave_pattern.search(line)
-        if leave_match:
-            username = leave_match.group('username')
-            self.bot.dispatch('minecraft_player_quit', username)
-            return
+        self._check_event(classify(line))
 
-        # 3. Collision match
-        collision_match = self.collision_pattern.search(line)
-        if collision_match:
-            username = collision_match.group('username')
-            self.bot.dispatch('minecraft_collision', username)
-            return
+    def _check_event(self, event: LogEvent):
+        # Parsing (and the thread checks that stop chat/plugins spoofing these lines)
+        # is done once by src/log_classifier.py
+        kind = event.kind
 
-        # 4. Started match
-        if self.started_pattern.search(line):
+        if kind == 'auth':
+            usercache.record(event.player, event.data)
+            self.bot.dispatch('minecraft_player_login', event.player, event.data)
+        elif kind == 'leave':
+            self.bot.dispatch('minecraft_player_quit', event.player)
+        elif kind == 'collision':
+            self.bot.dispatch('minecraft_collision', event.player)
+        elif kind == 'started':
             self.bot.dispatch('minecraft_started')
-            return
-
-        # 5. Stopping match
-        if self.stopping_pattern.search(line):
+        elif kind == 'stopping':
             self.bot.dispatch('minecraft_stopping')
-            return
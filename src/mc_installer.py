@@ -1,11 +1,14 @@
 import os
+import asyncio
 import json
 from collections import deque
 import aiohttp
 import aiofiles
 from src.config import config
+from src.http_client import get_session
 from src.logger import logger
 from src.version_fetcher import version_fetcher
+from src.server_properties import ServerProperties
 
 class MinecraftInstaller:
     """Handles downloading and installing Minecraft servers"""
@@ -95,114 +98,114 @@ class MinecraftInstaller:
         processed = set()
         success_count = 0
         
-        async with aiohttp.ClientSession(timeout=self.API_TIMEOUT) as session:
-            while queue:
-                current_slug = queue.popleft()
-                if current_slug in processed:
-                    continue
-                
-                processed.add(current_slug)
-                
-                if callback:
-                    await callback(f"🔍 Resolving `{current_slug}`...")
-                
-                # 1. Get version info
-                api_url = f"https://api.modrinth.com/v2/project/{current_slug}/version"
-                params = {
-                    "loaders": f'["{loader}"]',
-                    "game_versions": f'["{game_version}"]'
-                }
-                
-                try:
-                    async with session.get(api_url, params=params) as resp:
-                        if resp.status != 200:
-                            logger.warning(f"Failed to fetch versions for {current_slug}: HTTP {resp.status}")
-                            continue
-                        
-                        versions = await resp.json()
-                        if not versions:
-                            logger.warning(f"No compatible versions for {current_slug} on {game_version} ({loader})")
-                            continue
-                        
-                        # Use latest release (or latest if no release)
-                        latest = versions[0]
-                        for v in versions:
-                            if v.get("version_type") == "release":
-                                latest = v
-                                break
-                        
-                        # 2. Check dependencies
-                        for dep in latest.get("dependencies", []):
-                            if dep.get("dependency_type") == "required":
-                                dep_id = dep.get("project_id") or dep.get("version_id")
-                                if dep_id and dep_id not in processed:
-                                    queue.append(dep_id)
+        session = get_session()
+        while queue:
+            current_slug = queue.popleft()
+            if current_slug in processed:
+                continue
+            
+            processed.add(current_slug)
+            
+            if callback:
+                await callback(f"🔍 Resolving `{current_slug}`...")
+            
+            # 1. Get version info
+            api_url = f"https://api.modrinth.com/v2/project/{current_slug}/version"
+            params = {
+                "loaders": f'["{loader}"]',
+                "game_versions": f'["{game_version}"]'
+            }
+            
+            try:
+                async with session.get(api_url, params=params, timeout=self.API_TIMEOUT) as resp:
+                    if resp.status != 200:
+                        logger.warning(f"Failed to fetch versions for {current_slug}: HTTP {resp.status}")
+                        continue
+                    
+                    versions = await resp.json()
+                    if not versions:
+                        logger.warning(f"No compatible versions for {current_slug} on {game_version} ({loader})")
+                        continue
+                    
+                    # Use latest release (or latest if no release)
+                    latest = versions[0]
+                    for v in versions:
+                        if v.get("version_type") == "release":
+                            latest = v
+                            break
+                    
+                    # 2. Check dependencies
+                    for dep in latest.get("dependencies", []):
+                        if dep.get("dependency_type") == "required":
+                            dep_id = dep.get("project_id") or dep.get("version_id")
+                            if dep_id and dep_id not in processed:
+                                queue.append(dep_id)
+                    
+                    # 3. Download file
+                    files = latest.get("files", [])
+                    primary_file = next((f for f in files if f.get("primary")), files[0] if files else None)
+                    
+                    if primary_file:
+                        dest_dir = os.path.join(self.server_dir, "plugins" if loader == "paper" else "mods")
+                        os.makedirs(dest_dir, exist_ok=True)
                         
-                        # 3. Download file
-                        files = latest.get("files", [])
-                        primary_file = next((f for f in files if f.get("primary")), files[0] if files else None)
+                        file_path = os.path.join(dest_dir, primary_file["filename"])
                         
-                        if primary_file:
-                            dest_dir = os.path.join(self.server_dir, "plugins" if loader == "paper" else "mods")
-                            os.makedirs(dest_dir, exist_ok=True)
-                            
-                            file_path = os.path.join(dest_dir, primary_file["filename"])
-                            
-                            if os.path.exists(file_path):
-                                logger.info(f"Mod {primary_file['filename']} already exists, skipping download.")
-                                success_count += 1
-                                continue
+                        if os.path.exists(file_path):
+                            logger.info(f"Mod {primary_file['filename']} already exists, skipping download.")
+                            success_count += 1
+                            continue
 
-                            async with session.get(primary_file["url"]) as mod_resp:
-                                if mod_resp.status == 200:
-                                    async with aiofiles.open(file_path, 'wb') as f:
-                                        async for chunk in mod_resp.content.iter_chunked(8192):
-                                            await f.write(chunk)
-                                    logger.info(f"Successfully downloaded: {primary_file['filename']}")
-                                    if callback:
-                                        await callback(f"✅ Downloaded `{primary_file['filename']}`")
-                                    success_count += 1
-                except Exception as e:
-                    logger.error(f"Error processing mod {current_slug}: {e}")
-                    continue
+                        async with session.get(primary_file["url"], timeout=self.API_TIMEOUT) as mod_resp:
+                            if mod_resp.status == 200:
+                                async with aiofiles.open(file_path, 'wb') as f:
+                                    async for chunk in mod_resp.content.iter_chunked(8192):
+                                        await f.write(chunk)
+                                logger.info(f"Successfully downloaded: {primary_file['filename']}")
+                                if callback:
+                                    await callback(f"✅ Downloaded `{primary_file['filename']}`")
+                                success_count += 1
+            except Exception as e:
+                logger.error(f"Error processing mod {current_slug}: {e}")
+                continue
         
         return success_count > 0
 
     async def _download_paper(self, version: str, jar_path: str, callback) -> tuple[bool, str]:
         """Download Paper server"""
         try:
-            async with aiohttp.ClientSession(timeout=self.API_TIMEOUT) as session:
-                # Get build number
-                async with session.get(f"{self.PAPER_API}/versions/{version}") as resp:
-                    data = await resp.json()
-                    build = data['builds'][-1]
-                
-                # Get download URL
-                download_url = f"{self.PAPER_API}/versions/{version}/builds/{build}/downloads/paper-{version}-{build}.jar"
-                
-                if callback:
-                    await callback(f"📥 Downloading Paper {version} (Build {build})...")
+            session = get_session()
+            # Get build number
+            async with session.get(f"{self.PAPER_API}/versions/{version}", timeout=self.API_TIMEOUT) as resp:
+                data = await resp.json()
+                build = data['builds'][-1]
+            
+            # Get download URL
+            download_url = f"{self.PAPER_API}/versions/{version}/builds/{build}/downloads/paper-{version}-{build}.jar"
+            
+            if callback:
+                await callback(f"📥 Downloading Paper {version} (Build {build})...")
+            
+            # Download
+            async with session.get(download_url, timeout=self.API_TIMEOUT) as resp:
+                if resp.status != 200:
+                    return False, f"Download failed: HTTP {resp.status}"
                 
-                # Download
-                async with session.get(download_url) as resp:
-                    if resp.status != 200:
-                        return False, f"Download failed: HTTP {resp.status}"
-                    
-                    total_size = int(resp.headers.get('content-length', 0))
-                    downloaded = 0
-                    
-                    async with aiofiles.open(jar_path, 'wb') as f:
-                        async for chunk in resp.content.iter_chunked(8192):
-                            await f.write(chunk)
-                            downloaded += len(chunk)
-                            
-                            # Progress update every 5MB
-                            if callback and downloaded % (5 * 1024 * 1024) < 8192:
-                                progress = (downloaded / total_size * 100) if total_size > 0 else 0
-                                await callback(f"📥 Downloading... {progress:.1f}% ({downloaded // (1024*1024)}MB)")
+                total_size = int(resp.headers.get('content-length', 0))
+                downloaded = 0
                 
-                size_mb = os.path.getsize(jar_path) / (1024 * 1024)
-                return True, f"Downloaded Paper {version} ({size_mb:.1f}MB)"
+                async with aiofiles.open(jar_path, 'wb') as f:
+                    async for chunk in resp.content.iter_chunked(8192):
+                        await f.write(chunk)
+                        downloaded += len(chunk)
+                        
+                        # Progress update every 5MB
+                        if callback and downloaded % (5 * 1024 * 1024) < 8192:
+                            progress = (downloaded / total_size * 100) if total_size > 0 else 0
+                            await callback(f"📥 Downloading... {progress:.1f}% ({downloaded // (1024*1024)}MB)")
+            
+            size_mb = os.path.getsize(jar_path) / (1024 * 1024)
+            return True, f"Downloaded Paper {version} ({size_mb:.1f}MB)"
                 
         except Exception as e:
             logger.error(f"Paper download failed: {e}")
@@ -211,44 +214,44 @@ class MinecraftInstaller:
     async def _download_vanilla(self, version: str, jar_path: str, callback) -> tuple[bool, str]:
         """Download Vanilla server"""
         try:
-            async with aiohttp.ClientSession(timeout=self.API_TIMEOUT) as session:
-                # Get version manifest
-                async with session.get(self.VANILLA_API) as resp:
-                    manifest = await resp.json()
-                
-                # Find version
-                version_data = None
-                for v in manifest['versions']:
-                    if v['id'] == version:
-                        version_data = v
-                        break
-                
-                if not version_data:
-                    return False, f"Version {version} not found"
-                
-                # Get version details
-                async with session.get(version_data['url']) as resp:
-                    details = await resp.json()
-                
-                if 'downloads' not in details or 'server' not in details['downloads']:
-                    return False, f"Mojang API does not provide a server download for version {version}. Please pick a more recent version (1.2.5+)."
-                
-                download_url = details['downloads']['server']['url']
-                
-                if callback:
-                    await callback(f"📥 Downloading Vanilla {version}...")
-                
-                # Download
-                async with session.get(download_url) as resp:
-                    if resp.status != 200:
-                        return False, f"Download failed: HTTP {resp.status}"
-                    
-                    async with aiofiles.open(jar_path, 'wb') as f:
-                        async for chunk in resp.content.iter_chunked(8192):
-                            await f.write(chunk)
+            session = get_session()
+            # Get version manifest
+            async with session.get(self.VANILLA_API, timeout=self.API_TIMEOUT) as resp:
+                manifest = await resp.json()
+            
+            # Find version
+            version_data = None
+            for v in manifest['versions']:
+                if v['id'] == version:
+                    version_data = v
+                    break
+            
+            if not version_data:
+                return False, f"Version {version} not found"
+            
+            # Get version details
+            async with session.get(version_data['url'], timeout=self.API_TIMEOUT) as resp:
+                details = await resp.json()
+            
+            if 'downloads' not in details or 'server' not in details['downloads']:
+                return False, f"Mojang API does not provide a server download for version {version}. Please pick a more recent version (1.2.5+)."
+            
+            download_url = details['downloads']['server']['url']
+            
+            if callback:
+                await callback(f"📥 Downloading Vanilla {version}...")
+            
+            # Download
+            async with session.get(download_url, timeout=self.API_TIMEOUT) as resp:
+                if resp.status != 200:
+                    return False, f"Download failed: HTTP {resp.status}"
                 
-                size_mb = os.path.getsize(jar_path) / (1024 * 1024)
-                return True, f"Downloaded Vanilla {version} ({size_mb:.1f}MB)"
+                async with aiofiles.open(jar_path, 'wb') as f:
+                    async for chunk in resp.content.iter_chunked(8192):
+                        await f.write(chunk)
+            
+            size_mb = os.path.getsize(jar_path) / (1024 * 1024)
+            return True, f"Downloaded Vanilla {version} ({size_mb:.1f}MB)"
                 
         except Exception as e:
             logger.error(f"Vanilla download failed: {e}")
@@ -257,31 +260,31 @@ class MinecraftInstaller:
     async def _download_fabric(self, version: str, jar_path: str, callback) -> tuple[bool, str]:
         """Download Fabric server"""
         try:
-            async with aiohttp.ClientSession(timeout=self.API_TIMEOUT) as session:
-                # Get latest loader
-                async with session.get(f"{self.FABRIC_API}/{version}") as resp:
-                    loaders = await resp.json()
-                    if not loaders:
-                        return False, "No Fabric loader found for this version"
-                    loader_version = loaders[0]['loader']['version']
-                
-                # Download installer
-                installer_url = f"https://meta.fabricmc.net/v2/versions/loader/{version}/{loader_version}/1.0.0/server/jar"
-                
-                if callback:
-                    await callback(f"📥 Downloading Fabric {version}...")
-                
-                async with session.get(installer_url) as resp:
-                    if resp.status != 200:
-                        return False, f"Download failed: HTTP {resp.status}"
-                    
-                    async with aiofiles.open(jar_path, 'wb') as f:
-                        async for chunk in resp.content.iter_chunked(8192):
-                            await f.write(chunk)
-                
-                size_mb = os.path.getsize(jar_path) / (1024 * 1024)
+            session = get_session()
+            # Get latest loader
+            async with session.get(f"{self.FABRIC_API}/{version}", timeout=self.API_TIMEOUT) as resp:
+                loaders = await resp.json()
+                if not loaders:
+                    return False, "No Fabric loader found for this version"
+                loader_version = loaders[0]['loader']['version']
+            
+            # Download installer
+            installer_url = f"https://meta.fabricmc.net/v2/versions/loader/{version}/{loader_version}/1.0.0/server/jar"
+            
+            if callback:
+                await callback(f"📥 Downloading Fabric {version}...")
+            
+            async with session.get(installer_url, timeout=self.API_TIMEOUT) as resp:
+                if resp.status != 200:
+                    return False, f"Download failed: HTTP {resp.status}"
                 
-                return True, f"Downloaded Fabric {version} ({size_mb:.1f}MB)"
+                async with aiofiles.open(jar_path, 'wb') as f:
+                    async for chunk in resp.content.iter_chunked(8192):
+                        await f.write(chunk)
+            
+            size_mb = os.path.getsize(jar_path) / (1024 * 1024)
+            
+            return True, f"Downloaded Fabric {version} ({size_mb:.1f}MB)"
                 
         except Exception as e:
             logger.error(f"Fabric download failed: {e}")
@@ -348,23 +351,11 @@ class MinecraftInstaller:
                 'motd': 'Minecraft Server - Managed by Discord Bot'
             }
             
-            # Read existing properties if they exist
-            if os.path.exists(props_path):
-                async with aiofiles.open(props_path, 'r') as f:
-                    content = await f.read()
-                    for line in content.split('\n'):
-                        if '=' in line and not line.startswith('#'):
-                            key, value = line.split('=', 1)
-                            # Only override if we have a setting for it
-                            if key.strip() not in properties:
-                                properties[key.strip()] = value.strip()
-            
-            # Write properties
-            async with aiofiles.open(props_path, 'w') as f:
-                await f.write("# Minecraft server properties\n")
-                await f.write("# Managed by Discord Bot\n")
-                for key, value in properties.items():
-                    await f.write(f"{key}={value}\n")
+            # Edit in place: unrelated keys and comments survive, write is atomic
+            await asyncio.to_thread(
+                ServerProperties(props_path).update, properties,
+                ["Minecraft server properties", "Managed by Discord Bot"]
+            )
             
             logger.info("server.properties configured")
             return True
@@ -380,12 +371,7 @@ class MinecraftInstaller:
             whitelist_path = os.path.join(self.server_dir, "whitelist.json")
             props_path = os.path.join(self.server_dir, "server.properties")
             
-            online_mode = True
-            if os.path.exists(props_path):
-                async with aiofiles.open(props_path, 'r') as f:
-                    content = await f.read()
-                    if "online-mode=false" in content.lower():
-                        online_mode = False
+            online_mode = await asyncio.to_thread(ServerProperties(props_path).get_bool, 'online-mode', True)
             
             # Load existing whitelist
             whitelist = []
@@ -414,29 +400,29 @@ class MinecraftInstaller:
                 return True
             
             # Get UUID from Mojang API
-            async with aiohttp.ClientSession(timeout=self.API_TIMEOUT) as session:
-                async with session.get(f"https://api.mojang.com/users/profiles/minecraft/{username}") as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        player_uuid = data['id']
-                        # Format UUID with dashes
-                        player_uuid = f"{player_uuid[:8]}-{player_uuid[8:12]}-{player_uuid[12:16]}-{player_uuid[16:20]}-{player_uuid[20:]}"
-                        
-                        # Add to whitelist
-                        whitelist.append({
-                            "uuid": player_uuid,
-                            "name": username
-                        })
-                        
-                        # Save
-                        async with aiofiles.open(whitelist_path, 'w') as f:
-                            await f.write(json.dumps(whitelist, indent=2))
-                        
-                        logger.info(f"Added {username} to whitelist")
-                        return True
-                    else:
-                        logger.warning(f"Player {username} not found")
-                        return False
+            session = get_session()
+            async with session.get(f"https://api.mojang.com/users/profiles/minecraft/{username}", timeout=self.API_TIMEOUT) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    player_uuid = data['id']
+                    # Format UUID with dashes
+                    player_uuid = f"{player_uuid[:8]}-{player_uuid[8:12]}-{player_uuid[12:16]}-{player_uuid[16:20]}-{player_uuid[20:]}"
+                    
+                    # Add to whitelist
+                    whitelist.append({
+                        "uuid": player_uuid,
+                        "name": username
+                    })
+                    
+                    # Save
+                    async with aiofiles.open(whitelist_path, 'w') as f:
+                        await f.write(json.dumps(whitelist, indent=2))
+                    
+                    logger.info(f"Added {username} to whitelist")
+                    return True
+                else:
+                    logger.warning(f"Player {username} not found")
+                    return False
                         
         except Exception as e:
             logger.error(f"Failed to add to whitelist: {e}")
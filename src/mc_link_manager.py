@@ -1,7 +1,8 @@
-import json
-import os
+import time
 import asyncio
 from datetime import datetime, timezone
+from src.logger import logger
+from src.storage import Storage, get_storage, init_storage
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Schema per record (keyed by str(discord_id)):
@@ -12,104 +13,267 @@ from datetime import datetime, timezone
 #     "last_verified":   float | null,  — unix timestamp of last successful /verify
 #     "last_disconnect": float | null,  — unix timestamp of last MC disconnect
 # }
+# Persisted in the `links` table of data/state.db (src/storage.py).
 # ──────────────────────────────────────────────────────────────────────────────
 
-PROJECT_ROOT             = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 GRACE_SECONDS            = 30 * 60   # 30 minutes — how long after /verify the player can rejoin freely
 DISCONNECT_GRACE_SECONDS = 12 * 60 * 60  # 12 hours — how long after disconnecting the player can rejoin freely
-LINKS_PATH      = os.path.join(PROJECT_ROOT, "data", "mc_links.json")
-LOCK_PATH       = os.path.join(PROJECT_ROOT, "data", "mc_links.json.lock")
+WRITE_DELAY     = 1.0   # seconds — session stamps within this window cost a single storage write
 
 
-class MCLinkManager:
-    _lock = None
+def link_within_grace(entry: dict, now: float | None = None) -> bool:
+    """
+    Returns True if the link record is inside a grace window:
+    1. The player successfully verified within the last GRACE_SECONDS (30 min).
+    2. The player disconnected within the last DISCONNECT_GRACE_SECONDS (12 hours).
+    """
+    now = time.time() if now is None else now
+    # Check 1: Last verified (Discord /verify)
+    lv = entry.get("last_verified")
+    if lv is not None and (now - lv) <= GRACE_SECONDS:
+        return True
+
+    # Check 2: Last disconnect (Minecraft leave)
+    ld = entry.get("last_disconnect")
+    if ld is not None and (now - ld) <= DISCONNECT_GRACE_SECONDS:
+        return True
+
+    return False
+
+
+class LinkStore:
+    """
+    Resident copy of the links table with two indexes:
+    records by str(discord_id) and discord_id by lowercase MC username.
+
+    All MCLinkManager instances for the same Storage share one store (see `get_store`), so
+    links are loaded once instead of on every call. Lookups are dict hits on the event loop.
+
+    link/unlink are written to storage straight away (the command only answers once the change
+    is stored) and then applied in memory, one at a time, so concurrent /link calls cannot
+    interleave their write and index update. Session stamps (record_verified/record_disconnect)
+    are applied in memory first and written behind, batched for WRITE_DELAY seconds.
+    """
+
+    def __init__(self, storage: Storage):
+        self.storage = storage
+        self._records = None         # str(discord_id) -> entry, None until loaded
+        self._by_mc = {}             # mc_username.lower() -> str(discord_id)
+        self._load_task = None
+        self._mutation_lock = asyncio.Lock()   # put/remove: storage write + index update as one step
+        self._stamps = {}            # (discord_id, field) -> timestamp not yet written
+        self._write_handle = None
+        self._handle_loop = None
+        self._write_task = None
+
+    # ── Loading ───────────────────────────────────────────────────────────────
+
+    async def ensure_loaded(self):
+        if self._records is not None:
+            return
+        if self._load_task is None or self._load_task.done() or self._load_task.get_loop() is not asyncio.get_running_loop():
+            self._load_task = asyncio.create_task(asyncio.to_thread(self.storage.load_links))
+        # Shielded: a caller giving up (JoinGuard's decision budget) must not cancel the shared load
+        records = await asyncio.shield(self._load_task)
+        if self._records is None:
+            self._records = records
+            self._reindex()
+
+    def _reindex(self):
+        self._by_mc = {}
+        for d_id, entry in self._records.items():
+            self._by_mc.setdefault(entry["mc_username"].lower(), d_id)
 
-    def __init__(self, data_file: str = LINKS_PATH):
-        self.data_file = data_file
-        if MCLinkManager._lock is None:
-            MCLinkManager._lock = asyncio.Lock()
-        self.lock = MCLinkManager._lock
-        self._ensure_file()
+    # ── Lookups ───────────────────────────────────────────────────────────────
 
-    # ── File helpers ──────────────────────────────────────────────────────────
+    def get(self, discord_id) -> dict | None:
+        return self._records.get(str(discord_id))
 
-    def _ensure_file(self):
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        if not os.path.exists(self.data_file):
-            with open(self.data_file, "w") as f:
-                json.dump({}, f)
+    def find_mc(self, mc_username: str) -> tuple[str, dict] | tuple[None, None]:
+        """(discord_id, entry) owning this MC username (case-insensitive)."""
+        d_id = self._by_mc.get(mc_username.lower())
+        if d_id is None:
+            return None, None
+        return d_id, self._records[d_id]
 
-    def _read_sync(self) -> dict:
+    # ── Mutations ─────────────────────────────────────────────────────────────
+
+    async def put(self, discord_id, entry: dict):
+        d_id = str(discord_id)
+        async with self._mutation_lock:
+            await asyncio.to_thread(self.storage.put_link, d_id, entry)
+            self._forget(d_id)
+            owner = self._by_mc.get(entry["mc_username"].lower())
+            if owner is not None:
+                self._forget(owner)
+            self._records[d_id] = entry
+            self._by_mc[entry["mc_username"].lower()] = d_id
+
+    async def remove(self, discord_id) -> bool:
+        d_id = str(discord_id)
+        async with self._mutation_lock:
+            if d_id not in self._records:
+                return False
+            await asyncio.to_thread(self.storage.delete_link, d_id)
+            self._forget(d_id)
+            return True
+
+    def _forget(self, d_id: str):
+        entry = self._records.pop(d_id, None)
+        if entry is None:
+            return
+        self._by_mc.pop(entry["mc_username"].lower(), None)
+        for key in [k for k in self._stamps if k[0] == d_id]:
+            del self._stamps[key]
+
+    def stamp(self, d_id: str, field: str, value: float):
+        """Set a session stamp in memory and schedule the write."""
+        self._records[d_id][field] = value
+        self._stamps[(d_id, field)] = value
         try:
-            with open(self.data_file, "r") as f:
-                content = f.read().strip()
-                return json.loads(content) if content else {}
-        except FileNotFoundError:
-            return {}
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+        if self._write_handle is not None and self._handle_loop is not loop:
+            # Scheduled on a loop that is gone (tests, restarts)
+            self._write_handle.cancel()
+            self._write_handle = None
+        if self._write_handle is None:
+            self._handle_loop = loop
+            self._write_handle = loop.call_later(WRITE_DELAY, self._start_write)
+
+    # ── Write-behind ──────────────────────────────────────────────────────────
+
+    def _write_in_flight(self) -> bool:
+        task = self._write_task
+        return task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop()
+
+    def _start_write(self):
+        self._write_handle = None
+        if self._write_in_flight():
+            # A write is in flight; it re-checks the pending stamps when it finishes
+            return
+        self._write_task = asyncio.create_task(self._write_loop())
+        # Failures are logged by _write_loop; nobody awaits a timer-started write
+        self._write_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _write_loop(self):
+        while self._stamps:
+            pending, self._stamps = self._stamps, {}
+            try:
+                await asyncio.to_thread(self.storage.update_link_stamps,
+                                        [(d_id, field, ts) for (d_id, field), ts in pending.items()])
+            except Exception as e:
+                # Keep them for the next attempt unless they were superseded meanwhile
+                for key, ts in pending.items():
+                    self._stamps.setdefault(key, ts)
+                logger.error(f"LinkStore: failed to write session stamps: {e}")
+                raise
+
+    async def flush(self):
+        """Write pending stamps now and wait until they are stored."""
+        if self._write_handle:
+            self._write_handle.cancel()
+            self._write_handle = None
+        if not self._write_in_flight():
+            if not self._stamps:
+                return
+            self._write_task = asyncio.create_task(self._write_loop())
+        await self._write_task
 
-    def _write_sync(self, data: dict):
-        with open(self.data_file, "w") as f:
-            json.dump(data, f, indent=4)
+    def flush_sync(self):
+        """Write pending stamps synchronously (no event loop)."""
+        if self._write_handle:
+            self._write_handle.cancel()
+            self._write_handle = None
+        if self._stamps:
+            pending, self._stamps = self._stamps, {}
+            self.storage.update_link_stamps([(d_id, field, ts) for (d_id, field), ts in pending.items()])
 
-    async def _read(self) -> dict:
-        async with self.lock:
-            return await asyncio.to_thread(self._read_sync)
 
-    async def _write(self, data: dict):
-        async with self.lock:
-            await asyncio.to_thread(self._write_sync, data)
+_stores = {}    # Storage -> LinkStore
+
+
+def get_store(storage: Storage | None = None) -> LinkStore:
+    """The shared LinkStore for a Storage (default: data/state.db)."""
+    storage = storage or get_storage()
+    store = _stores.get(storage)
+    if store is None:
+        store = _stores[storage] = LinkStore(storage)
+    return store
+
+
+async def flush_all():
+    """Write every store's pending session stamps (shutdown)."""
+    for store in list(_stores.values()):
+        try:
+            await store.flush()
+        except Exception as e:
+            logger.error(f"LinkStore: flush failed: {e}")
+
+
+class MCLinkManager:
+    """
+    Async facade over the shared LinkStore.
+    Cheap to construct — every instance for the same Storage sees the same records.
+    """
+
+    def __init__(self, storage: Storage | None = None):
+        self._storage = storage      # None = data/state.db, opened off the event loop on first use
+
+    @property
+    def _store(self) -> LinkStore:
+        return get_store(self._storage)
+
+    async def _loaded(self) -> LinkStore:
+        if self._storage is None:
+            self._storage = await init_storage()
+        store = get_store(self._storage)
+        await store.ensure_loaded()
+        return store
+
+    async def load(self):
+        """Load the links now (cog setup) so the first login is decided from memory."""
+        await self._loaded()
 
     # ── Read helpers ──────────────────────────────────────────────────────────
 
     async def get_link_by_discord(self, discord_id: int) -> dict | None:
         """Return entry for a Discord ID, or None."""
-        data = await self._read()
-        return data.get(str(discord_id))
+        store = await self._loaded()
+        entry = store.get(discord_id)
+        return dict(entry) if entry is not None else None
 
     async def get_link_by_mc(self, mc_username: str) -> dict | None:
         """Return entry (including discord_id key) for an MC username. Case-insensitive."""
-        data = await self._read()
-        for d_id, entry in data.items():
-            if entry["mc_username"].lower() == mc_username.lower():
-                return {"discord_id": int(d_id), **entry}
-        return None
+        store = await self._loaded()
+        d_id, entry = store.find_mc(mc_username)
+        if entry is None:
+            return None
+        return {"discord_id": int(d_id), **entry}
 
     # ── Write helpers ─────────────────────────────────────────────────────────
 
     async def link_account(self, discord_id: int, mc_username: str, is_premium: bool = False):
         """
         Link a Discord account to a Minecraft username.
-        If another Discord account already owns this MC username, that link is removed first.
-        Entire read-modify-write is held under one lock to prevent race conditions.
+        If another Discord account already owns this MC username, that link is removed first
+        (username theft prevention). Returns once the change is stored.
         """
-        async with self.lock:
-            data = await asyncio.to_thread(self._read_sync)
-
-            # Remove any existing link for this MC username (username theft prevention)
-            data = {
-                k: v for k, v in data.items()
-                if v["mc_username"].lower() != mc_username.lower()
-            }
-
-            data[str(discord_id)] = {
-                "mc_username":     mc_username,
-                "is_premium":      is_premium,
-                "linked_at":       datetime.now(timezone.utc).isoformat(),
-                "last_verified":   None,
-                "last_disconnect": None,
-            }
-
-            await asyncio.to_thread(self._write_sync, data)
+        store = await self._loaded()
+        await store.put(discord_id, {
+            "mc_username":     mc_username,
+            "is_premium":      is_premium,
+            "linked_at":       datetime.now(timezone.utc).isoformat(),
+            "last_verified":   None,
+            "last_disconnect": None,
+        })
 
     async def unlink_account(self, discord_id: int) -> bool:
         """Remove link. Returns True if something was removed."""
-        async with self.lock:
-            data = await asyncio.to_thread(self._read_sync)
-            if str(discord_id) not in data:
-                return False
-            del data[str(discord_id)]
-            await asyncio.to_thread(self._write_sync, data)
-            return True
+        store = await self._loaded()
+        return await store.remove(discord_id)
 
     # ── Session state ─────────────────────────────────────────────────────────
 
@@ -118,28 +282,20 @@ class MCLinkManager:
         Called when /verify succeeds.
         Sets last_verified = now, opening the 30-minute grace window.
         """
-        async with self.lock:
-            data = await asyncio.to_thread(self._read_sync)
-            import time
-            for entry in data.values():
-                if entry["mc_username"].lower() == mc_username.lower():
-                    entry["last_verified"] = time.time()
-                    break
-            await asyncio.to_thread(self._write_sync, data)
+        await self._stamp(mc_username, "last_verified")
 
     async def record_disconnect(self, mc_username: str):
         """
         Called when a player leaves or gets collision-kicked.
         Sets last_disconnect = now. Does NOT reset grace window.
         """
-        async with self.lock:
-            data = await asyncio.to_thread(self._read_sync)
-            import time
-            for entry in data.values():
-                if entry["mc_username"].lower() == mc_username.lower():
-                    entry["last_disconnect"] = time.time()
-                    break
-            await asyncio.to_thread(self._write_sync, data)
+        await self._stamp(mc_username, "last_disconnect")
+
+    async def _stamp(self, mc_username: str, field: str):
+        store = await self._loaded()
+        d_id, entry = store.find_mc(mc_username)
+        if entry is not None:
+            store.stamp(d_id, field, time.time())
 
     async def grant_emergency_grace(self, mc_username: str):
         """
@@ -149,24 +305,7 @@ class MCLinkManager:
         await self.record_verified(mc_username)
 
     async def is_within_grace(self, mc_username: str) -> bool:
-        """
-        Returns True if:
-        1. The player successfully verified within the last GRACE_SECONDS (30 min).
-        2. The player disconnected within the last DISCONNECT_GRACE_SECONDS (12 hours).
-        """
-        import time
-        data = await self._read()
-        for entry in data.values():
-            if entry["mc_username"].lower() == mc_username.lower():
-                # Check 1: Last verified (Discord /verify)
-                lv = entry.get("last_verified")
-                if lv is not None and (time.time() - lv) <= GRACE_SECONDS:
-                    return True
-                
-                # Check 2: Last disconnect (Minecraft leave)
-                ld = entry.get("last_disconnect")
-                if ld is not None and (time.time() - ld) <= DISCONNECT_GRACE_SECONDS:
-                    return True
-                    
-                return False
-        return False
+        """True if the player's link is inside a grace window (see `link_within_grace`)."""
+        store = await self._loaded()
+        _, entry = store.find_mc(mc_username)
+        return entry is not None and link_within_grace(entry)
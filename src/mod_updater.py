@@ -8,8 +8,11 @@ import json
 from collections import deque
 from datetime import datetime
 from src.config import config
+from src.http_client import get_session
 from src.logger import logger
 
+MODRINTH_TIMEOUT = aiohttp.ClientTimeout(total=45)
+
 class ModUpdater:
     def __init__(self, callback=None):
         self.api_base = "https://api.modrinth.com/v2"
@@ -42,7 +45,7 @@ class ModUpdater:
             return None
         url = f"{self.api_base}/project/{project_id}"
         try:
-            async with session.get(url) as resp:
+            async with session.get(url, timeout=MODRINTH_TIMEOUT) as resp:
                 if resp.status == 200:
                     return await resp.json()
         except Exception:
@@ -55,7 +58,7 @@ class ModUpdater:
         url = f"{self.api_base}/search"
         params = {"query": query, "limit": 1}
         try:
-            async with session.get(url, params=params) as resp:
+            async with session.get(url, params=params, timeout=MODRINTH_TIMEOUT) as resp:
                 if resp.status == 200:
                     hits = (await resp.json()).get("hits", [])
                     return hits[0] if hits else None
@@ -97,7 +100,7 @@ class ModUpdater:
     async def _get_mod_versions(self, session, project_id):
         url = f"{self.api_base}/project/{project_id}/version"
         try:
-            async with session.get(url) as resp:
+            async with session.get(url, timeout=MODRINTH_TIMEOUT) as resp:
                 if resp.status == 200:
                     return await resp.json()
         except Exception:
@@ -124,7 +127,7 @@ class ModUpdater:
         outpath = os.path.join(target_dir, fname)
         
         try:
-            async with session.get(primary_file.get("url")) as resp:
+            async with session.get(primary_file.get("url"), timeout=MODRINTH_TIMEOUT) as resp:
                 if resp.status == 200:
                     with open(outpath, "wb") as f:
                         f.write(await resp.read())
@@ -179,64 +182,64 @@ class ModUpdater:
         mods_to_process = deque()
         processed_or_queued = set()
 
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=45)) as session:
-            # 2. Identify projects from backed-up (or local) jars
-            for filename in local_mods:
-                jar_path = os.path.join(scan_dir, filename)
-                mod_id = await asyncio.to_thread(self._find_modrinth_project_sync, jar_path, filename)
+        session = get_session()
+        # 2. Identify projects from backed-up (or local) jars
+        for filename in local_mods:
+            jar_path = os.path.join(scan_dir, filename)
+            mod_id = await asyncio.to_thread(self._find_modrinth_project_sync, jar_path, filename)
+            
+            project = await self._get_project_from_id(session, mod_id)
+            if not project:
+                project = await self._search_project_by_name(session, mod_id)
                 
-                project = await self._get_project_from_id(session, mod_id)
-                if not project:
-                    project = await self._search_project_by_name(session, mod_id)
-                    
-                if project and project.get("slug"):
-                    slug = project["slug"]
-                    title = project.get("title", slug)
-                    if slug not in processed_or_queued:
-                        mods_to_process.append(slug)
-                        processed_or_queued.add(slug)
-                        summary[slug] = {"title": title, "status": "Queued", "version": "---"}
-                else:
-                    summary[filename] = {"title": filename, "status": "Not Found", "version": "---"}
-                    
-            if is_setup:
-                await self._send_status(f"📡 Installing foundational mods for Minecraft `{game_version}` ({loader})...")
+            if project and project.get("slug"):
+                slug = project["slug"]
+                title = project.get("title", slug)
+                if slug not in processed_or_queued:
+                    mods_to_process.append(slug)
+                    processed_or_queued.add(slug)
+                    summary[slug] = {"title": title, "status": "Queued", "version": "---"}
             else:
-                await self._send_status(f"📡 Downloading updates for Minecraft `{game_version}` ({loader})...")
-
-            # 3. Process the queue (including discovered dependencies)
-            updated_count = 0
-            while mods_to_process:
-                slug = mods_to_process.popleft()
+                summary[filename] = {"title": filename, "status": "Not Found", "version": "---"}
                 
-                versions = await self._get_mod_versions(session, slug)
-                candidates = self._filter_versions(versions, game_version, loader)
+        if is_setup:
+            await self._send_status(f"📡 Installing foundational mods for Minecraft `{game_version}` ({loader})...")
+        else:
+            await self._send_status(f"📡 Downloading updates for Minecraft `{game_version}` ({loader})...")
+
+        # 3. Process the queue (including discovered dependencies)
+        updated_count = 0
+        while mods_to_process:
+            slug = mods_to_process.popleft()
+            
+            versions = await self._get_mod_versions(session, slug)
+            candidates = self._filter_versions(versions, game_version, loader)
+            
+            if not candidates:
+                summary[slug].update({"status": "Incompatible", "version": "N/A"})
+                continue
                 
-                if not candidates:
-                    summary[slug].update({"status": "Incompatible", "version": "N/A"})
-                    continue
-                    
-                latest = candidates[0]
-                ver_num = latest.get("version_number", "Unknown")
+            latest = candidates[0]
+            ver_num = latest.get("version_number", "Unknown")
+            
+            success, fname_or_err = await self._download_version(session, latest, self.target_dir)
+            if success:
+                summary[slug].update({"status": "Updated", "version": ver_num})
+                updated_count += 1
+            else:
+                summary[slug].update({"status": "Failed", "version": "N/A"})
                 
-                success, fname_or_err = await self._download_version(session, latest, self.target_dir)
-                if success:
-                    summary[slug].update({"status": "Updated", "version": ver_num})
-                    updated_count += 1
-                else:
-                    summary[slug].update({"status": "Failed", "version": "N/A"})
-                    
-                # 4. Check array of dependencies
-                for dep in latest.get("dependencies", []):
-                    if dep.get("dependency_type") == "required":
-                        dep_slug = dep.get("project_id")
-                        if dep_slug and dep_slug not in processed_or_queued:
-                            dep_details = await self._get_project_from_id(session, dep_slug)
-                            dep_title = dep_details.get("title", dep_slug) if dep_details else dep_slug
-                            
-                            mods_to_process.append(dep_slug)
-                            processed_or_queued.add(dep_slug)
-                            summary[dep_slug] = {"title": dep_title, "status": "Dep Queued", "version": "---"}
+            # 4. Check array of dependencies
+            for dep in latest.get("dependencies", []):
+                if dep.get("dependency_type") == "required":
+                    dep_slug = dep.get("project_id")
+                    if dep_slug and dep_slug not in processed_or_queued:
+                        dep_details = await self._get_project_from_id(session, dep_slug)
+                        dep_title = dep_details.get("title", dep_slug) if dep_details else dep_slug
+                        
+                        mods_to_process.append(dep_slug)
+                        processed_or_queued.add(dep_slug)
+                        summary[dep_slug] = {"title": dep_title, "status": "Dep Queued", "version": "---"}
                             
         if is_setup:
             await self._send_status(f"✨ Installation complete! Downloaded **{updated_count}** `.jar` files.")
@@ -1,33 +1,193 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
 import aiohttp
+from src.http_client import get_session
 from src.logger import logger
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Mojang profile lookups (name → {"id", "name"}), shared by /link and /stats.
+#
+# Results are cached: found profiles for POSITIVE_TTL, unknown names for
+# NEGATIVE_TTL. Concurrent lookups of the same name share one request. A 429
+# puts the whole cache into backoff (Retry-After or exponential), during which
+# expired entries are served instead of calling the API. The cache is saved
+# to data/mojang_profiles.json so a restart doesn't start cold.
+# ──────────────────────────────────────────────────────────────────────────────
+
+PROJECT_ROOT    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_PATH      = os.path.join(PROJECT_ROOT, "data", "mojang_profiles.json")
+PROFILE_URL     = "https://api.mojang.com/users/profiles/minecraft/{}"
+
+POSITIVE_TTL    = 6 * 60 * 60   # 6 hours — names rarely change owner
+NEGATIVE_TTL    = 30 * 60       # 30 minutes — a name can be registered at any time
+REQUEST_TIMEOUT = 2             # seconds — keeps /link and /stats responsive
+BACKOFF_MIN     = 2             # seconds — first backoff after a 429 without Retry-After
+BACKOFF_MAX     = 120           # seconds
+PERSIST_DELAY   = 5.0           # seconds — lookups within this window cost a single cache file write
+
+
+class MojangProfileCache:
+    """
+    Name → profile cache with positive/negative TTLs, request coalescing and 429 backoff.
+    Transient failures (timeouts, 5xx, rate limits) are never cached as "not premium".
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._entries = None         # name.lower() -> {"profile": dict | None, "expires": epoch}
+        self._inflight = {}          # name.lower() -> Task
+        self._backoff_until = 0.0
+        self._backoff = 0.0
+        self._persist_handle = None
+        self._handle_loop = None
+        self._dirty = False
+
+    # ── Lookups ───────────────────────────────────────────────────────────────
+
+    async def lookup(self, username: str, session: aiohttp.ClientSession = None) -> dict | None:
+        """
+        Return {"id", "name"} for a premium account, or None if the name is unknown to Mojang
+        (or Mojang could not be reached and nothing is cached).
+        """
+        if self._entries is None:
+            await asyncio.to_thread(self._load)
+
+        key = username.lower()
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry and entry["expires"] > now:
+            return entry["profile"]
+        if now < self._backoff_until:
+            # Rate limited: stale data beats no data, and beats another 429
+            return entry["profile"] if entry else None
+
+        task = self._inflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._refresh(key, username, session))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+        # Shielded so one cancelled caller doesn't cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _refresh(self, key: str, username: str, session: aiohttp.ClientSession | None) -> dict | None:
+        status, profile = await self._fetch(username, session)
+        if status == "error":
+            stale = self._entries.get(key)
+            return stale["profile"] if stale else None
+
+        ttl = POSITIVE_TTL if status == "found" else NEGATIVE_TTL
+        self._entries[key] = {"profile": profile, "expires": time.time() + ttl}
+        self._schedule_persist()
+        return profile
+
+    async def _fetch(self, username: str, session: aiohttp.ClientSession | None) -> tuple[str, dict | None]:
+        """One API call. Returns ("found", profile), ("missing", None) or ("error", None)."""
+        url = PROFILE_URL.format(username)
+        if session is None or session.closed:
+            session = get_session()
+        try:
+            return await self._request(url, username, session)
+        except Exception as e:
+            logger.warning(f"Failed to reach Mojang API for {username}: {e}")
+            return "error", None
+
+    async def _request(self, url: str, username: str, session: aiohttp.ClientSession) -> tuple[str, dict | None]:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)) as response:
+            if response.status == 200:
+                data = await response.json()
+                self._backoff = 0.0
+                if "id" not in data:
+                    return "missing", None
+                return "found", {"id": data["id"], "name": data.get("name", username)}
+            if response.status in (204, 404):
+                self._backoff = 0.0
+                return "missing", None
+            if response.status == 429:
+                self._enter_backoff(response.headers.get("Retry-After"))
+                return "error", None
+            logger.warning(f"Mojang API status {response.status} for {username}")
+            return "error", None
+
+    def _enter_backoff(self, retry_after: str | None):
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = min(BACKOFF_MAX, max(BACKOFF_MIN, self._backoff * 2))
+        self._backoff = delay
+        self._backoff_until = time.time() + delay
+        logger.warning(f"Mojang API rate limit hit — backing off for {delay:.0f}s")
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        entries = {}
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            now = time.time()
+            # Expired entries are kept: they are served while rate limited
+            entries = {k: v for k, v in data.items() if isinstance(v, dict) and "expires" in v}
+            logger.debug(f"Mojang cache: {sum(1 for v in entries.values() if v['expires'] > now)} fresh entries loaded")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Mojang cache: could not read {self.path}: {e}")
+        self._entries = entries
+
+    def _schedule_persist(self):
+        self._dirty = True
+        loop = asyncio.get_running_loop()
+        if self._persist_handle is not None and self._handle_loop is not loop:
+            # Scheduled on a loop that is gone (tests, restarts)
+            self._persist_handle.cancel()
+            self._persist_handle = None
+        if self._persist_handle is None:
+            self._handle_loop = loop
+            self._persist_handle = loop.call_later(PERSIST_DELAY, self._start_persist)
+
+    def _start_persist(self):
+        self._persist_handle = None
+        task = asyncio.create_task(asyncio.to_thread(self.flush))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def flush(self):
+        """Write the cache file if anything changed (blocking)."""
+        if not self._dirty or self._entries is None:
+            return
+        self._dirty = False
+        now = time.time()
+        # Drop entries that have been stale for longer than they were ever fresh
+        data = {k: v for k, v in list(self._entries.items()) if v["expires"] > now - POSITIVE_TTL}
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".mojang_profiles.", dir=directory)
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except Exception as e:
+            logger.warning(f"Mojang cache: could not write {self.path}: {e}")
+
+
+mojang_profiles = MojangProfileCache()
+
+
 async def verify_premium_mc_account(username: str, session: aiohttp.ClientSession = None) -> bool:
     """
     Verifies if a Minecraft username is a premium account by checking Mojang's API.
     A valid response with an ID implies it's a real, paid account.
     Returns True if premium, False if not (or on API error).
     """
-    url = f"https://api.mojang.com/users/profiles/minecraft/{username}"
-    
-    # Use provided session or create a temporary one (shared is preferred)
-    if session is None:
-        async with aiohttp.ClientSession() as temp_session:
-            return await _verify_with_session(url, username, temp_session)
-    else:
-        return await _verify_with_session(url, username, session)
-
-async def _verify_with_session(url: str, username: str, session: aiohttp.ClientSession) -> bool:
-    try:
-        # Reduced timeout (2s) for faster JoinGuard response
-        async with session.get(url, timeout=2) as response:
-            if response.status == 200:
-                data = await response.json()
-                return "id" in data
-            elif response.status in (204, 404):
-                return False
-            else:
-                logger.warning(f"Mojang API status {response.status} for {username}. Failing closed.")
-                return False
-    except Exception as e:
-        logger.warning(f"Failed to reach Mojang API for {username}: {e}. Failing closed.")
-        return False
+    return await mojang_profiles.lookup(username, session=session) is not None
@@ -0,0 +1,201 @@
+import gzip
+import struct
+import zlib
+from src.logger import logger
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Field-selective NBT reader.
+#
+# nbtlib.load() builds the whole tree — for a player file that is the
+# inventory, ender chest, attributes and whatever mods add. read_nbt_fields()
+# streams the decompressed data and builds values only for the requested
+# paths. Everything else is skipped by length, and reading stops as soon as
+# every requested root key has been seen.
+# ──────────────────────────────────────────────────────────────────────────────
+
+TAG_END, TAG_BYTE, TAG_SHORT, TAG_INT, TAG_LONG, TAG_FLOAT, TAG_DOUBLE = range(7)
+TAG_BYTE_ARRAY, TAG_STRING, TAG_LIST, TAG_COMPOUND, TAG_INT_ARRAY, TAG_LONG_ARRAY = range(7, 13)
+
+# Fixed-size payloads: tag -> (struct format, size)
+_SCALARS = {
+    TAG_BYTE:   (">b", 1),
+    TAG_SHORT:  (">h", 2),
+    TAG_INT:    (">i", 4),
+    TAG_LONG:   (">q", 8),
+    TAG_FLOAT:  (">f", 4),
+    TAG_DOUBLE: (">d", 8),
+}
+_ARRAYS = {TAG_BYTE_ARRAY: ("b", 1), TAG_INT_ARRAY: ("i", 4), TAG_LONG_ARRAY: ("q", 8)}
+
+SKIP_CHUNK = 64 * 1024
+
+
+class NBTFormatError(ValueError):
+    pass
+
+
+def read_nbt_fields(path: str, fields) -> dict:
+    """
+    Read only `fields` from an NBT file (gzip, zlib or uncompressed).
+
+    `fields` are dotted paths from the root compound, e.g. ("Pos", "XpLevel", "abilities.flying").
+    Returns a nested dict with plain Python values (int, float, str, list, dict) for the paths
+    that exist; missing paths are simply absent.
+    """
+    wanted = _path_tree(fields)
+    with open(path, "rb") as raw:
+        magic = raw.read(2)
+        raw.seek(0)
+        if magic == b"\x1f\x8b":
+            stream = gzip.GzipFile(fileobj=raw)
+        elif magic[:1] == b"\x78":
+            stream = _ZlibReader(raw)
+        else:
+            stream = raw
+        reader = _Reader(stream)
+
+        tag = reader.u8()
+        if tag != TAG_COMPOUND:
+            raise NBTFormatError(f"root tag is {tag}, expected a compound")
+        reader.skip(reader.u16())  # root name
+        return reader.compound(wanted, stop_when_complete=True)
+
+
+def _path_tree(fields) -> dict:
+    """("Pos", "abilities.flying") -> {"Pos": True, "abilities": {"flying": True}}"""
+    tree = {}
+    for field in fields:
+        node = tree
+        parts = field.split(".")
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is True:
+                break  # a parent is already read whole
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+class _ZlibReader:
+    """Minimal file-like wrapper for zlib-compressed NBT (used by some tools)."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._z = zlib.decompressobj()
+        self._buf = b""
+
+    def read(self, n: int) -> bytes:
+        while len(self._buf) < n:
+            chunk = self._raw.read(SKIP_CHUNK)
+            if not chunk:
+                self._buf += self._z.flush()
+                break
+            self._buf += self._z.decompress(chunk)
+        out, self._buf = self._buf[:n], self._buf[n:]
+        return out
+
+
+class _Reader:
+    def __init__(self, stream):
+        self._stream = stream
+
+    # ── Primitives ────────────────────────────────────────────────────────────
+
+    def read(self, n: int) -> bytes:
+        data = self._stream.read(n)
+        if len(data) != n:
+            raise NBTFormatError("unexpected end of NBT data")
+        return data
+
+    def skip(self, n: int):
+        # Decompression can't seek; read through in bounded chunks
+        while n > 0:
+            step = min(n, SKIP_CHUNK)
+            self.read(step)
+            n -= step
+
+    def u8(self) -> int:
+        return self.read(1)[0]
+
+    def u16(self) -> int:
+        return struct.unpack(">H", self.read(2))[0]
+
+    def i32(self) -> int:
+        return struct.unpack(">i", self.read(4))[0]
+
+    def name(self) -> str:
+        return self.read(self.u16()).decode("utf-8", errors="replace")
+
+    # ── Payloads ──────────────────────────────────────────────────────────────
+
+    def value(self, tag: int):
+        """Read a payload whole."""
+        if tag in _SCALARS:
+            fmt, size = _SCALARS[tag]
+            return struct.unpack(fmt, self.read(size))[0]
+        if tag == TAG_STRING:
+            return self.name()
+        if tag in _ARRAYS:
+            code, size = _ARRAYS[tag]
+            count = self.i32()
+            return list(struct.unpack(f">{count}{code}", self.read(count * size))) if count > 0 else []
+        if tag == TAG_LIST:
+            item_tag, count = self.u8(), self.i32()
+            return [self.value(item_tag) for _ in range(max(count, 0))]
+        if tag == TAG_COMPOUND:
+            return self.compound(None)
+        raise NBTFormatError(f"unknown tag type {tag}")
+
+    def skip_value(self, tag: int):
+        """Step over a payload without building it."""
+        if tag in _SCALARS:
+            self.skip(_SCALARS[tag][1])
+        elif tag == TAG_STRING:
+            self.skip(self.u16())
+        elif tag in _ARRAYS:
+            self.skip(max(self.i32(), 0) * _ARRAYS[tag][1])
+        elif tag == TAG_LIST:
+            item_tag, count = self.u8(), max(self.i32(), 0)
+            if item_tag in _SCALARS:
+                self.skip(count * _SCALARS[item_tag][1])
+            else:
+                for _ in range(count):
+                    self.skip_value(item_tag)
+        elif tag == TAG_COMPOUND:
+            while True:
+                child = self.u8()
+                if child == TAG_END:
+                    return
+                self.skip(self.u16())
+                self.skip_value(child)
+        else:
+            raise NBTFormatError(f"unknown tag type {tag}")
+
+    def compound(self, wanted: dict | None, stop_when_complete: bool = False) -> dict:
+        """
+        Read a compound's entries. `wanted` None = everything; otherwise only the keys in it
+        (True = whole value, dict = recurse into a nested compound).
+        """
+        out = {}
+        while True:
+            tag = self.u8()
+            if tag == TAG_END:
+                return out
+            key = self.name()
+            if wanted is None:
+                out[key] = self.value(tag)
+                continue
+            spec = wanted.get(key)
+            if spec is None:
+                self.skip_value(tag)
+            elif spec is True:
+                out[key] = self.value(tag)
+            elif tag == TAG_COMPOUND:
+                out[key] = self.compound(spec)
+            else:
+                logger.debug(f"NBT: '{key}' is not a compound, cannot select {list(spec)}")
+                self.skip_value(tag)
+            if stop_when_complete and len(out) == len(wanted):
+                # Root level: nothing left that we want, don't decompress the rest
+                return out
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from src.storage import get_storage
+from src.logger import logger
+
+PERSIST_DELAY = 2.0   # seconds — join/leave bursts within this window cost a single storage write
+
+
+class OnlinePlayers:
+    """
+    In-memory registry of players currently on the server.
+
+    Fed by PlayerTracker from join/leave log events; read by /players, /info, the economy
+    loop and presence updates without touching disk. The list is still persisted to the
+    `online_players` table of data/state.db (for restarts and RCON-down fallbacks), but
+    writes are debounced and done off the event loop.
+    """
+
+    def __init__(self):
+        self._sessions = {}          # name -> session start (epoch seconds, None if unknown)
+        self._loaded = False
+        self._persist_handle = None
+        self._persist_task = None
+        self._dirty = False
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+
+    def names(self) -> list[str]:
+        """Online player names in join order."""
+        self._ensure_loaded()
+        return list(self._sessions)
+
+    @property
+    def count(self) -> int:
+        self._ensure_loaded()
+        return len(self._sessions)
+
+    def __contains__(self, name: str) -> bool:
+        self._ensure_loaded()
+        return name in self._sessions
+
+    def session_start(self, name: str) -> float | None:
+        """Epoch time the player joined, or None if unknown (restored from storage)."""
+        self._ensure_loaded()
+        return self._sessions.get(name)
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def add(self, name: str) -> bool:
+        """Mark a player online. Returns False if they already were."""
+        self._ensure_loaded()
+        if name in self._sessions:
+            return False
+        self._sessions[name] = time.time()
+        self._schedule_persist()
+        return True
+
+    def remove(self, name: str) -> float | None:
+        """Mark a player offline. Returns the session length in seconds if known."""
+        self._ensure_loaded()
+        if name not in self._sessions:
+            return None
+        started = self._sessions.pop(name)
+        self._schedule_persist()
+        return time.time() - started if started else None
+
+    def clear(self):
+        """Forget everyone — used on stop/restart/kill/crash where no leave lines are logged."""
+        self._ensure_loaded()
+        if not self._sessions:
+            return
+        self._sessions.clear()
+        self._schedule_persist()
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def load(self):
+        """(Re)load the player list from storage."""
+        try:
+            names = get_storage().get_online_players()
+        except Exception as e:
+            logger.error(f"OnlinePlayers: failed to load online_players: {e}")
+            names = []
+        self._sessions = {name: None for name in names}
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _schedule_persist(self):
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts/tests): write straight away
+            self.flush()
+            return
+        if self._persist_handle is None:
+            self._persist_handle = loop.call_later(PERSIST_DELAY, self._start_persist)
+
+    def _start_persist(self):
+        self._persist_handle = None
+        if self._persist_task and not self._persist_task.done():
+            # A write is in flight; it re-checks _dirty when it finishes
+            return
+        self._persist_task = asyncio.create_task(self._persist())
+
+    async def _persist(self):
+        while self._dirty:
+            self._dirty = False
+            try:
+                await asyncio.to_thread(self._write, list(self._sessions))
+            except Exception as e:
+                logger.error(f"OnlinePlayers: failed to persist online_players: {e}")
+
+    def _write(self, names: list[str]):
+        get_storage().set_online_players(names)
+
+    def flush(self):
+        """Write pending changes synchronously (shutdown)."""
+        if self._persist_handle:
+            self._persist_handle.cancel()
+            self._persist_handle = None
+        if self._dirty:
+            self._dirty = False
+            try:
+                self._write(list(self._sessions))
+            except Exception as e:
+                logger.error(f"OnlinePlayers: failed to persist online_players: {e}")
+
+
+online_players = OnlinePlayers()
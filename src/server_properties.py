@@ -0,0 +1,178 @@
+import os
+import tempfile
+import threading
+from src.logger import logger
+
+
+class ServerProperties:
+    """
+    Parsed view of `server.properties`, re-parsed only when the file changes.
+
+    Each access costs one os.stat(); the file is only opened again when its
+    (path, mtime, size, inode) differ from the cached parse. By default the path
+    follows `config.SERVER_DIR`, so changing the server directory is picked up too.
+
+    Edits go through `update()`, which rewrites the file atomically (temp file +
+    os.replace) and keeps comments, ordering and unknown keys intact.
+    """
+
+    def __init__(self, path: str | None = None):
+        self._path = path
+        self._lock = threading.Lock()
+        self._key = None             # (path, mtime_ns, size, ino) of the cached parse
+        self._props = {}
+        self._exists = False
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+
+    @property
+    def path(self) -> str:
+        if self._path:
+            return self._path
+        from src.config import config
+        return os.path.join(config.SERVER_DIR, "server.properties")
+
+    @property
+    def exists(self) -> bool:
+        self._refresh()
+        return self._exists
+
+    def as_dict(self) -> dict[str, str]:
+        """A copy of all key/value pairs."""
+        self._refresh()
+        return dict(self._props)
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        self._refresh()
+        return self._props.get(key, default)
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = self.get(key)
+        if value is None or value == "":
+            return default
+        return value.lower() == "true"
+
+    def get_int(self, key: str, default: int | None = None) -> int | None:
+        value = self.get(key)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
+
+    @property
+    def level_name(self) -> str:
+        """World folder name; 'world' if unset or empty."""
+        return self.get("level-name") or "world"
+
+    @property
+    def online_mode(self) -> bool:
+        return self.get_bool("online-mode", False)
+
+    @property
+    def whitelist_enabled(self) -> bool:
+        return self.get_bool("white-list", False)
+
+    def _refresh(self):
+        path = self.path
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._key = (path, None, None, None)
+                self._props = {}
+                self._exists = False
+            return
+        except OSError as e:
+            logger.error(f"Error reading server.properties: {e}")
+            return
+
+        key = (path, st.st_mtime_ns, st.st_size, st.st_ino)
+        if key == self._key:
+            return
+
+        with self._lock:
+            if key == self._key:
+                return
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    self._props = self._parse(f)
+                self._exists = True
+                self._key = key
+            except FileNotFoundError:
+                self._props, self._exists, self._key = {}, False, (path, None, None, None)
+            except Exception as e:
+                logger.error(f"Error reading server.properties: {e}")
+
+    @staticmethod
+    def _parse(lines) -> dict[str, str]:
+        props = {}
+        for line in lines:
+            line = line.strip()
+            # Skip comments and empty lines
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                props[key.strip()] = value.strip()
+        return props
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def update(self, changes: dict, header: list[str] | None = None):
+        """
+        Set the given keys atomically.
+
+        Existing lines are edited in place (comments and order preserved); new keys are
+        appended. `header` comment lines are only written when the file is created.
+        Values are converted with str(); booleans become 'true'/'false'.
+        """
+        path = self.path
+        pending = {k: self._format(v) for k, v in changes.items()}
+
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    lines = f.read().splitlines()
+            except FileNotFoundError:
+                lines = [f"# {h}" for h in (header or [])]
+
+            out = []
+            for line in lines:
+                stripped = line.strip()
+                if stripped and not stripped.startswith('#') and '=' in stripped:
+                    key = stripped.split('=', 1)[0].strip()
+                    if key in pending:
+                        out.append(f"{key}={pending.pop(key)}")
+                        continue
+                out.append(line)
+            out.extend(f"{key}={value}" for key, value in pending.items())
+
+            directory = os.path.dirname(path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".server.properties.", dir=directory)
+            try:
+                try:
+                    mode = os.stat(path).st_mode & 0o777
+                except FileNotFoundError:
+                    mode = 0o644
+                os.chmod(tmp_path, mode)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write("\n".join(out) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            # Force a re-parse on next access
+            self._key = None
+
+    @staticmethod
+    def _format(value) -> str:
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return "" if value is None else str(value)
+
+
+server_properties = ServerProperties()
@@ -10,7 +10,7 @@ from typing import Optional, Dict, Any
 from src.mc_installer import mc_installer
 from src.logger import logger
 from src.config import config
-import aiohttp
+from src.http_client import get_session
 from src.setup_helper import SetupHelper
 import shutil
 import os
@@ -23,12 +23,12 @@ async def fetch_versions():
     if GLOBAL_VERSIONS:
         return GLOBAL_VERSIONS
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get("https://api.modrinth.com/v2/tag/game_version") as resp:
-                data = await resp.json()
-                # Get the first 24 release versions
-                GLOBAL_VERSIONS = [v['version'] for v in data if v['version_type'] == 'release'][:24]
-                return GLOBAL_VERSIONS
+        session = get_session()
+        async with session.get("https://api.modrinth.com/v2/tag/game_version") as resp:
+            data = await resp.json()
+            # Get the first 24 release versions
+            GLOBAL_VERSIONS = [v['version'] for v in data if v['version_type'] == 'release'][:24]
+            return GLOBAL_VERSIONS
     except Exception as e:
         logger.error(f"Failed to fetch Modrinth versions: {e}")
         GLOBAL_VERSIONS = ["26.1.2", "26.1.1", "26.1", "25.4.1", "25.3"] # Fallback
@@ -0,0 +1,174 @@
+import heapq
+import json
+import os
+import threading
+from src.logger import logger
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Columnar index over world/stats/<uuid>.json for leaderboards.
+#
+# One row per player, one list per stat. refresh() stats every file but only
+# re-parses the ones whose (mtime, size) changed, so a periodic refresh costs a
+# directory scan. top() answers from memory.
+# ──────────────────────────────────────────────────────────────────────────────
+
+# column -> (stats category, key); key None = sum of the whole category
+STAT_COLUMNS = {
+    "play_time":    ("minecraft:custom", "minecraft:play_time"),
+    "deaths":       ("minecraft:custom", "minecraft:deaths"),
+    "player_kills": ("minecraft:custom", "minecraft:player_kills"),
+    "mob_kills":    ("minecraft:custom", "minecraft:mob_kills"),
+    "mined":        ("minecraft:mined", None),
+}
+
+
+def extract_columns(stats_json: dict) -> dict[str, int]:
+    """The indexed stats of one stats file (missing → 0)."""
+    stats = stats_json.get("stats", {}) if isinstance(stats_json, dict) else {}
+    values = {}
+    for column, (category, key) in STAT_COLUMNS.items():
+        section = stats.get(category, {})
+        if not isinstance(section, dict):
+            values[column] = 0
+        elif key is None:
+            values[column] = sum(v for v in section.values() if isinstance(v, int))
+        else:
+            value = section.get(key, 0)
+            values[column] = value if isinstance(value, int) else 0
+    return values
+
+
+class StatsIndex:
+    """
+    In-memory table of STAT_COLUMNS for every player with a stats file.
+    By default the directory follows `config.SERVER_DIR` / `config.WORLD_FOLDER`.
+    """
+
+    def __init__(self, stats_dir: str | None = None):
+        self._stats_dir = stats_dir
+        self._lock = threading.Lock()          # guards the table (queries run on the event loop)
+        self._refresh_lock = threading.Lock()  # one refresh at a time
+        self._dir = None             # directory the rows below were read from
+        self._uuids = []             # row -> uuid
+        self._rows = {}              # uuid -> row
+        self._keys = {}              # uuid -> (mtime_ns, size) of the indexed file
+        self._columns = {c: [] for c in STAT_COLUMNS}
+        self.loaded = False
+
+    @property
+    def stats_dir(self) -> str:
+        if self._stats_dir:
+            return self._stats_dir
+        from src.config import config
+        return os.path.join(config.SERVER_DIR, config.WORLD_FOLDER, "stats")
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    def top(self, column: str, k: int = 10) -> list[tuple[str, int]]:
+        """The k highest (uuid, value) pairs for a column, zeros excluded."""
+        if column not in STAT_COLUMNS:
+            raise KeyError(column)
+        with self._lock:
+            values = self._columns[column]
+            rows = heapq.nlargest(k, range(len(values)), key=values.__getitem__)
+            return [(self._uuids[r], values[r]) for r in rows if values[r] > 0]
+
+    def get(self, uuid: str) -> dict[str, int] | None:
+        with self._lock:
+            row = self._rows.get(uuid)
+            if row is None:
+                return None
+            return {c: col[row] for c, col in self._columns.items()}
+
+    def __len__(self) -> int:
+        return len(self._uuids)
+
+    # ── Refresh (blocking — call via asyncio.to_thread) ───────────────────────
+
+    def refresh(self) -> int:
+        """Bring the table up to date with the stats directory. Returns the number of changed rows."""
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        directory = self.stats_dir
+        if directory != self._dir:
+            # World changed (or first run): start over
+            with self._lock:
+                self._clear()
+                self._dir = directory
+
+        seen = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json") or not entry.is_file():
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    seen[entry.name[:-5]] = (st.st_mtime_ns, st.st_size, entry.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"StatsIndex: cannot scan {directory}: {e}")
+            return 0
+
+        changed = 0
+        for uuid, (mtime_ns, size, path) in seen.items():
+            if self._keys.get(uuid) == (mtime_ns, size):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    values = extract_columns(json.load(f))
+            except (OSError, ValueError) as e:
+                # Half-written by the server; picked up on the next refresh
+                logger.debug(f"StatsIndex: skipping {path}: {e}")
+                continue
+            with self._lock:
+                self._set_row(uuid, values)
+                self._keys[uuid] = (mtime_ns, size)
+            changed += 1
+
+        for uuid in [u for u in self._rows if u not in seen]:
+            with self._lock:
+                self._drop_row(uuid)
+            changed += 1
+
+        self.loaded = True
+        return changed
+
+    def _clear(self):
+        self._uuids, self._rows, self._keys = [], {}, {}
+        self._columns = {c: [] for c in STAT_COLUMNS}
+        self.loaded = False
+
+    def _set_row(self, uuid: str, values: dict[str, int]):
+        row = self._rows.get(uuid)
+        if row is None:
+            row = self._rows[uuid] = len(self._uuids)
+            self._uuids.append(uuid)
+            for column, col in self._columns.items():
+                col.append(values[column])
+        else:
+            for column, col in self._columns.items():
+                col[row] = values[column]
+
+    def _drop_row(self, uuid: str):
+        # Swap with the last row so the columns stay dense
+        row = self._rows.pop(uuid)
+        self._keys.pop(uuid, None)
+        last = len(self._uuids) - 1
+        if row != last:
+            moved = self._uuids[last]
+            self._uuids[row] = moved
+            self._rows[moved] = row
+            for col in self._columns.values():
+                col[row] = col[last]
+        self._uuids.pop()
+        for col in self._columns.values():
+            col.pop()
+
+
+stats_index = StatsIndex()
@@ -0,0 +1,391 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from src.logger import logger
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Persistent bot state that changes at runtime: account links, economy
+# balances, scheduled events and the online player list.
+#
+# These used to live in data/mc_links.json and bot_config.json, which were
+# rewritten whole on every change. A Storage backend updates single rows
+# instead. All methods are blocking — call them via asyncio.to_thread from
+# coroutines.
+# ──────────────────────────────────────────────────────────────────────────────
+
+PROJECT_ROOT     = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DB_PATH    = os.path.join(PROJECT_ROOT, "data", "state.db")
+LINKS_JSON_PATH  = os.path.join(PROJECT_ROOT, "data", "mc_links.json")   # pre-SQLite link store (migrated once)
+
+LINK_STAMP_FIELDS = ("last_verified", "last_disconnect")
+MIGRATED_BOT_KEYS = ("economy", "events", "online_players")
+
+
+class Storage(ABC):
+    """
+    Abstract interface for the runtime state store.
+    Allows swapping the SQLite implementation for another backend.
+    """
+
+    # ── Links ─────────────────────────────────────────────────────────────────
+
+    @abstractmethod
+    def load_links(self) -> dict[str, dict]:
+        """All links keyed by str(discord_id) (schema: see src/mc_link_manager.py)."""
+        pass
+
+    @abstractmethod
+    def put_link(self, discord_id, entry: dict):
+        """Store a link, replacing this Discord ID's link and any other link to the same MC username."""
+        pass
+
+    @abstractmethod
+    def delete_link(self, discord_id) -> bool:
+        """Remove a link. Returns True if one existed."""
+        pass
+
+    @abstractmethod
+    def update_link_stamps(self, stamps: list[tuple[str, str, float]]):
+        """Set (discord_id, field, timestamp) session stamps; field is one of LINK_STAMP_FIELDS."""
+        pass
+
+    # ── Economy ───────────────────────────────────────────────────────────────
+
+    @abstractmethod
+    def get_balance(self, user_id) -> int:
+        pass
+
+    @abstractmethod
+    def add_balance(self, user_id, amount: int) -> int:
+        """Add (or subtract) coins. Returns the new balance."""
+        pass
+
+    # ── Events ────────────────────────────────────────────────────────────────
+
+    @abstractmethod
+    def list_events(self) -> list[dict]:
+        """Scheduled events ordered by time, each with its storage `id`."""
+        pass
+
+    @abstractmethod
+    def add_event(self, event: dict) -> int:
+        """Store a new event. Returns its id."""
+        pass
+
+    @abstractmethod
+    def delete_event(self, event_id: int) -> bool:
+        pass
+
+    @abstractmethod
+    def mark_event_reminded(self, event_id: int, flag: str):
+        """Set 'reminded_24h' or 'reminded_1h' on an event."""
+        pass
+
+    @abstractmethod
+    def delete_events_before(self, cutoff: str) -> int:
+        """Remove events whose ISO time is before `cutoff`. Returns how many were removed."""
+        pass
+
+    # ── Online players ────────────────────────────────────────────────────────
+
+    @abstractmethod
+    def get_online_players(self) -> list[str]:
+        pass
+
+    @abstractmethod
+    def set_online_players(self, names: list[str]):
+        pass
+
+    # ── Migration ─────────────────────────────────────────────────────────────
+
+    @abstractmethod
+    def import_json_state(self, bot_cfg: dict, links: dict) -> bool:
+        """
+        One-time import of the pre-storage JSON data (bot_config economy/events/online_players
+        and mc_links.json). Returns False if an import already happened.
+        """
+        pass
+
+
+class SQLiteStorage(Storage):
+    """
+    SQLite implementation (WAL mode).
+
+    One connection is shared by the worker threads that call in, guarded by a lock;
+    WAL lets a backup or external reader open the file while the bot writes.
+    """
+
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= self.SCHEMA_VERSION:
+                return
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS links (
+                    discord_id      TEXT PRIMARY KEY,
+                    mc_username     TEXT NOT NULL,
+                    mc_lower        TEXT NOT NULL UNIQUE,
+                    is_premium      INTEGER NOT NULL DEFAULT 0,
+                    linked_at       TEXT,
+                    last_verified   REAL,
+                    last_disconnect REAL
+                );
+                CREATE TABLE IF NOT EXISTS economy (
+                    user_id TEXT PRIMARY KEY,
+                    balance INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS events (
+                    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name         TEXT NOT NULL,
+                    time         TEXT NOT NULL,
+                    description  TEXT NOT NULL DEFAULT '',
+                    mentions     TEXT NOT NULL DEFAULT '',
+                    creator      INTEGER,
+                    reminded_24h INTEGER NOT NULL DEFAULT 0,
+                    reminded_1h  INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS events_time ON events(time);
+                CREATE TABLE IF NOT EXISTS online_players (
+                    position INTEGER PRIMARY KEY,
+                    name     TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key   TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+            self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ── Links ─────────────────────────────────────────────────────────────────
+
+    def load_links(self) -> dict[str, dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM links ORDER BY rowid").fetchall()
+        return {
+            row["discord_id"]: {
+                "mc_username":     row["mc_username"],
+                "is_premium":      bool(row["is_premium"]),
+                "linked_at":       row["linked_at"],
+                "last_verified":   row["last_verified"],
+                "last_disconnect": row["last_disconnect"],
+            }
+            for row in rows
+        }
+
+    def put_link(self, discord_id, entry: dict):
+        with self._lock, self._conn:
+            self._put_link(str(discord_id), entry)
+
+    def _put_link(self, d_id: str, entry: dict, replace: bool = True):
+        mc_lower = entry["mc_username"].lower()
+        if replace:
+            # Username theft prevention: a name belongs to one Discord account
+            self._conn.execute("DELETE FROM links WHERE discord_id = ? OR mc_lower = ?", (d_id, mc_lower))
+        self._conn.execute(
+            "INSERT OR IGNORE INTO links (discord_id, mc_username, mc_lower, is_premium, linked_at, last_verified, last_disconnect) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (d_id, entry["mc_username"], mc_lower, int(bool(entry.get("is_premium"))), entry.get("linked_at"),
+             entry.get("last_verified"), entry.get("last_disconnect")),
+        )
+
+    def delete_link(self, discord_id) -> bool:
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM links WHERE discord_id = ?", (str(discord_id),))
+        return cur.rowcount > 0
+
+    def update_link_stamps(self, stamps: list[tuple[str, str, float]]):
+        with self._lock, self._conn:
+            for field in LINK_STAMP_FIELDS:
+                rows = [(ts, str(d_id)) for d_id, f, ts in stamps if f == field]
+                if rows:
+                    self._conn.executemany(f"UPDATE links SET {field} = ? WHERE discord_id = ?", rows)
+
+    # ── Economy ───────────────────────────────────────────────────────────────
+
+    def get_balance(self, user_id) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT balance FROM economy WHERE user_id = ?", (str(user_id),)).fetchone()
+        return row["balance"] if row else 0
+
+    def add_balance(self, user_id, amount: int) -> int:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO economy (user_id, balance) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET balance = balance + excluded.balance",
+                (str(user_id), amount),
+            )
+            row = self._conn.execute("SELECT balance FROM economy WHERE user_id = ?", (str(user_id),)).fetchone()
+        return row["balance"]
+
+    # ── Events ────────────────────────────────────────────────────────────────
+
+    def list_events(self) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM events ORDER BY time, id").fetchall()
+        return [
+            {
+                "id":           row["id"],
+                "name":         row["name"],
+                "time":         row["time"],
+                "description":  row["description"],
+                "mentions":     row["mentions"],
+                "creator":      row["creator"],
+                "reminded_24h": bool(row["reminded_24h"]),
+                "reminded_1h":  bool(row["reminded_1h"]),
+            }
+            for row in rows
+        ]
+
+    def add_event(self, event: dict) -> int:
+        with self._lock, self._conn:
+            return self._add_event(event)
+
+    def _add_event(self, event: dict) -> int:
+        cur = self._conn.execute(
+            "INSERT INTO events (name, time, description, mentions, creator, reminded_24h, reminded_1h) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (event["name"], event["time"], event.get("description", ""), event.get("mentions", ""),
+             event.get("creator"), int(bool(event.get("reminded_24h"))), int(bool(event.get("reminded_1h")))),
+        )
+        return cur.lastrowid
+
+    def delete_event(self, event_id: int) -> bool:
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM events WHERE id = ?", (event_id,))
+        return cur.rowcount > 0
+
+    def mark_event_reminded(self, event_id: int, flag: str):
+        if flag not in ("reminded_24h", "reminded_1h"):
+            raise ValueError(f"Unknown reminder flag '{flag}'")
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE events SET {flag} = 1 WHERE id = ?", (event_id,))
+
+    def delete_events_before(self, cutoff: str) -> int:
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM events WHERE time < ?", (cutoff,))
+        return cur.rowcount
+
+    # ── Online players ────────────────────────────────────────────────────────
+
+    def get_online_players(self) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT name FROM online_players ORDER BY position").fetchall()
+        return [row["name"] for row in rows]
+
+    def set_online_players(self, names: list[str]):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM online_players")
+            self._conn.executemany("INSERT INTO online_players (position, name) VALUES (?, ?)", enumerate(names))
+
+    # ── Migration ─────────────────────────────────────────────────────────────
+
+    def import_json_state(self, bot_cfg: dict, links: dict) -> bool:
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+                return False
+
+            # File order decides which duplicate link wins, as the old linear scan did. A hand-edited
+            # row that doesn't parse is skipped, so it can't abort the migration on every start
+            for d_id, entry in links.items():
+                try:
+                    self._put_link(str(d_id), entry, replace=False)
+                except (KeyError, TypeError, AttributeError, sqlite3.IntegrityError) as e:
+                    logger.warning(f"Storage: skipped malformed link for {d_id}: {e!r}")
+            for user_id, balance in bot_cfg.get("economy", {}).items():
+                try:
+                    self._conn.execute("INSERT OR REPLACE INTO economy (user_id, balance) VALUES (?, ?)",
+                                       (str(user_id), int(balance)))
+                except (TypeError, ValueError) as e:
+                    logger.warning(f"Storage: skipped malformed balance for {user_id}: {e!r}")
+            for event in bot_cfg.get("events", []):
+                try:
+                    self._add_event(event)
+                except (KeyError, TypeError, AttributeError, sqlite3.IntegrityError) as e:
+                    logger.warning(f"Storage: skipped malformed event {event!r}: {e!r}")
+            self._conn.executemany("INSERT INTO online_players (position, name) VALUES (?, ?)",
+                                   enumerate(bot_cfg.get("online_players", [])))
+
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('json_imported', datetime('now'))")
+        return True
+
+
+def migrate_json_state(storage: Storage, links_path: str = LINKS_JSON_PATH):
+    """
+    Import the JSON-era state into `storage` once, then remove it from bot_config.json and
+    rename mc_links.json to mc_links.json.migrated so stale copies are not mistaken for live data.
+    """
+    from src.config import config
+
+    links = {}
+    if os.path.exists(links_path):
+        try:
+            with open(links_path, "r") as f:
+                content = f.read().strip()
+                links = json.loads(content) if content else {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Storage: could not read {links_path} for migration: {e}")
+            return
+
+    bot_cfg = config.load_bot_config()
+    if not storage.import_json_state(bot_cfg, links):
+        return
+
+    logger.info(
+        f"Storage: migrated {len(links)} links, {len(bot_cfg.get('economy', {}))} balances and "
+        f"{len(bot_cfg.get('events', []))} events from JSON"
+    )
+    try:
+        if any(key in bot_cfg for key in MIGRATED_BOT_KEYS):
+            with config.update_bot_config() as data:
+                for key in MIGRATED_BOT_KEYS:
+                    data.pop(key, None)
+        if os.path.exists(links_path):
+            os.replace(links_path, links_path + ".migrated")
+    except Exception as e:
+        logger.error(f"Storage: migration cleanup failed (data is already imported): {e}")
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+    """The shared state store (data/state.db), created and migrated on first use. Blocking the first time."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                storage = SQLiteStorage(STATE_DB_PATH)
+                migrate_json_state(storage)
+                _storage = storage
+    return _storage
+
+
+async def init_storage() -> Storage:
+    """
+    get_storage() for coroutines: opening the database, creating the schema and the JSON
+    migration (which takes the config file lock) run in a worker thread. Called once at bot
+    startup, so later get_storage() calls on the event loop return at once.
+    """
+    if _storage is not None:
+        return _storage
+    return await asyncio.to_thread(get_storage)
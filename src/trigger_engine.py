@@ -0,0 +1,168 @@
+import re
+import time
+from src.logger import logger
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Chat trigger matching for AutomationCog.
+#
+# user_config['triggers'] maps a phrase to either a command string (legacy) or
+#   {"command": "say hi", "regex": false, "cooldown": 10}
+#
+# Plain phrases are compiled into one Aho-Corasick automaton, so a line is
+# scanned once no matter how many triggers exist. Regex triggers are kept in a
+# separate list and tried individually. The automaton is only rebuilt when the
+# trigger set actually changes.
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class AhoCorasick:
+    """Case-sensitive multi-pattern substring matcher (callers lowercase both sides)."""
+
+    def __init__(self, patterns: list[str]):
+        self._goto = [{}]    # state -> {char: next_state}
+        self._fail = [0]
+        self._out = [()]     # state -> indexes of patterns ending here
+
+        for index, pattern in enumerate(patterns):
+            if pattern:
+                self._insert(pattern, index)
+        self._link()
+
+    def _insert(self, pattern: str, index: int):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state] = self._out[state] + (index,)
+
+    def _link(self):
+        """Breadth-first construction of failure links; outputs are merged along them."""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> set[int]:
+        """Return the indexes of all patterns occurring in text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class Trigger:
+    """One configured trigger plus its runtime counters."""
+    __slots__ = ("phrase", "command", "regex", "cooldown", "pattern", "hits", "suppressed", "last_fired")
+
+    def __init__(self, phrase: str, command: str, regex: bool = False, cooldown: float = 0):
+        self.phrase = phrase
+        self.command = command
+        self.regex = regex
+        self.cooldown = cooldown
+        self.pattern = re.compile(phrase, re.IGNORECASE) if regex else None
+        self.hits = 0           # times the command was fired
+        self.suppressed = 0     # matches skipped because of the cooldown
+        self.last_fired = 0.0
+
+
+def parse_trigger(phrase: str, spec) -> Trigger:
+    """Build a Trigger from a user_config entry. Raises ValueError/re.error on bad input."""
+    if isinstance(spec, str):
+        return Trigger(phrase, spec)
+    if isinstance(spec, dict) and isinstance(spec.get("command"), str):
+        return Trigger(phrase, spec["command"], bool(spec.get("regex", False)), float(spec.get("cooldown", 0) or 0))
+    raise ValueError(f"Invalid trigger definition for '{phrase}': {spec!r}")
+
+
+class TriggerEngine:
+    def __init__(self):
+        self._source = None          # copy of the triggers dict the engine was built from
+        self._triggers = []          # Trigger objects in config order
+        self._plain = []             # Trigger objects matched by the automaton (same index)
+        self._regex = []             # Trigger objects with their own compiled pattern
+        self._automaton = None
+
+    @property
+    def triggers(self) -> list[Trigger]:
+        return list(self._triggers)
+
+    def load(self, triggers: dict) -> bool:
+        """
+        (Re)build from user_config['triggers'] if it differs from the last load.
+        Counters of triggers that still exist are carried over. Returns True if rebuilt.
+        """
+        if triggers == self._source:
+            return False
+
+        previous = {(t.phrase, t.regex): t for t in self._triggers}
+        built = []
+        for phrase, spec in triggers.items():
+            try:
+                trigger = parse_trigger(phrase, spec)
+            except (ValueError, re.error) as e:
+                logger.warning(f"Skipping trigger '{phrase}': {e}")
+                continue
+            old = previous.get((trigger.phrase, trigger.regex))
+            if old:
+                trigger.hits, trigger.suppressed, trigger.last_fired = old.hits, old.suppressed, old.last_fired
+            built.append(trigger)
+
+        self._triggers = built
+        self._plain = [t for t in built if not t.regex]
+        self._regex = [t for t in built if t.regex]
+        self._automaton = AhoCorasick([t.phrase.lower() for t in self._plain]) if self._plain else None
+        self._source = {k: (dict(v) if isinstance(v, dict) else v) for k, v in triggers.items()}
+        logger.info(f"Trigger engine rebuilt: {len(self._plain)} phrase / {len(self._regex)} regex triggers")
+        return True
+
+    def match(self, line: str, now: float | None = None) -> list[Trigger]:
+        """
+        Return the triggers that fire for this line — phrase triggers first, then regex
+        triggers, each in config order.
+        Triggers still in their cooldown are counted as suppressed and not returned.
+        """
+        if not self._triggers:
+            return []
+
+        matched = []
+        if self._automaton:
+            hits = self._automaton.search(line.lower())
+            matched.extend(self._plain[i] for i in sorted(hits))
+        for trigger in self._regex:
+            if trigger.pattern.search(line):
+                matched.append(trigger)
+        if not matched:
+            return []
+
+        now = time.monotonic() if now is None else now
+        fired = []
+        for trigger in matched:
+            if trigger.cooldown and trigger.last_fired and now - trigger.last_fired < trigger.cooldown:
+                trigger.suppressed += 1
+                continue
+            trigger.hits += 1
+            trigger.last_fired = now
+            fired.append(trigger)
+        return fired
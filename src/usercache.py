@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+from src.logger import logger
+
+
+class UserCache:
+    """
+    Indexed view of the server's `usercache.json` (name ↔ UUID).
+
+    Like ServerProperties, each access costs one os.stat(); the file is only parsed again
+    when its (path, mtime, size, inode) change. By default the path follows `config.SERVER_DIR`.
+
+    The server only writes usercache.json now and then, so `record()` lets LogWatcher feed
+    in the UUID from each login ("UUID of player X is ...") as it happens. Those live
+    entries take precedence until the file catches up.
+    """
+
+    def __init__(self, path: str | None = None):
+        self._path = path
+        self._lock = threading.Lock()
+        self._key = None             # (path, mtime_ns, size, ino) of the cached parse
+        self._by_name = {}           # name.lower() -> (name, uuid)
+        self._by_uuid = {}           # uuid without hyphens, lower-case -> name
+        self._live = {}              # name.lower() -> (name, uuid) seen in the log, not yet in the file
+
+    @property
+    def path(self) -> str:
+        if self._path:
+            return self._path
+        from src.config import config
+        return os.path.join(config.SERVER_DIR, "usercache.json")
+
+    # ── Lookups ───────────────────────────────────────────────────────────────
+
+    def get_uuid(self, username: str) -> str | None:
+        """UUID (with hyphens) for a username, case-insensitive."""
+        self._refresh()
+        entry = self._live.get(username.lower()) or self._by_name.get(username.lower())
+        return entry[1] if entry else None
+
+    def get_name(self, uuid: str) -> str | None:
+        """Last known username for a UUID (hyphens and case don't matter)."""
+        self._refresh()
+        uuid = self._normalize_uuid(uuid)
+        for name, live_uuid in self._live.values():
+            if self._normalize_uuid(live_uuid) == uuid:
+                return name
+        return self._by_uuid.get(uuid)
+
+    def resolve(self, usernames) -> dict[str, str | None]:
+        """Bulk lookup: {username: uuid or None}, with a single freshness check."""
+        self._refresh()
+        result = {}
+        for username in usernames:
+            entry = self._live.get(username.lower()) or self._by_name.get(username.lower())
+            result[username] = entry[1] if entry else None
+        return result
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._by_name.keys() | self._live.keys())
+
+    # ── Live feed ─────────────────────────────────────────────────────────────
+
+    def record(self, username: str, uuid: str):
+        """Remember a name → UUID pair seen in the server log."""
+        with self._lock:
+            self._live[username.lower()] = (username, uuid)
+
+    # ── Loading ───────────────────────────────────────────────────────────────
+
+    def _refresh(self):
+        path = self.path
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._key = (path, None, None, None)
+                self._by_name, self._by_uuid = {}, {}
+            return
+        except OSError as e:
+            logger.error(f"Failed to read usercache.json: {e}")
+            return
+
+        key = (path, st.st_mtime_ns, st.st_size, st.st_ino)
+        if key == self._key:
+            return
+
+        with self._lock:
+            if key == self._key:
+                return
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    users = json.load(f)
+            except FileNotFoundError:
+                self._key, self._by_name, self._by_uuid = (path, None, None, None), {}, {}
+                return
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                # Usually a half-written file; keep the previous index and retry next time
+                logger.error(f"Failed to read usercache.json: {e}")
+                return
+            if not isinstance(users, list):
+                logger.error("usercache.json does not contain a list")
+                users = []
+            self._index(users)
+            self._key = key
+
+    def _index(self, users: list):
+        by_name, by_uuid = {}, {}
+        for user in users:
+            if not isinstance(user, dict):
+                continue
+            name, uuid = user.get("name"), user.get("uuid")
+            if not name or not uuid:
+                continue
+            # First entry wins, as with the old linear scan
+            by_name.setdefault(name.lower(), (name, uuid))
+            by_uuid.setdefault(self._normalize_uuid(uuid), name)
+        self._by_name, self._by_uuid = by_name, by_uuid
+        # Live entries the file now agrees with are no longer needed
+        self._live = {
+            k: (name, uuid) for k, (name, uuid) in self._live.items()
+            if k not in by_name or self._normalize_uuid(by_name[k][1]) != self._normalize_uuid(uuid)
+        }
+
+    @staticmethod
+    def _normalize_uuid(uuid: str) -> str:
+        return uuid.replace("-", "").lower()
+
+
+usercache = UserCache()
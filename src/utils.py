@@ -1,10 +1,10 @@
 import os
-import json
 import asyncio
 import discord
 from discord import app_commands
 from src.config import config
 from src.logger import logger
+from src.usercache import usercache
 
 async def send_debug(bot: discord.Client, msg: str) -> None:
     """
@@ -113,6 +113,7 @@ async def rcon_cmd(cmd: str) -> tuple[bool, str]:
 async def get_uuid(username: str) -> str | None:
     """
     Retrieve a player's UUID from the server's `usercache.json`.
+    Served from the resident index in `src/usercache.py`; the file is only re-read when it changes.
     
     Args:
         username (str): The Minecraft username.
@@ -120,36 +121,8 @@ async def get_uuid(username: str) -> str | None:
     Returns:
         str | None: The UUID string including hyphens, or None if not found.
     """
-    import aiofiles
-    usercache_path = os.path.join(config.SERVER_DIR, 'usercache.json')
-    
     try:
-        # Use asyncio.to_thread for os.path.exists check
-        exists = await asyncio.to_thread(os.path.exists, usercache_path)
-        if not exists:
-            return None
-        
-        # Use aiofiles for reading
-        try:
-            async with aiofiles.open(usercache_path, 'r') as f:
-                content = await f.read()
-                users = json.loads(content)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Failed to read usercache.json: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error reading usercache.json: {e}")
-            return None
-        
-        # Validate users is a list
-        if not isinstance(users, list):
-            logger.error("usercache.json does not contain a list")
-            return None
-        
-        for user in users:
-            if isinstance(user, dict) and user.get('name', '').lower() == username.lower():
-                return user.get('uuid')
-        return None
+        return await asyncio.to_thread(usercache.get_uuid, username)
     except Exception as e:
         logger.error(f"Error in get_uuid: {e}")
         return None
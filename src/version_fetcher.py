@@ -5,6 +5,7 @@ import aiohttp
 import asyncio
 from datetime import datetime, timedelta
 from typing import Optional, List
+from src.http_client import get_session
 from src.logger import logger
 
 class VersionFetcher:
@@ -92,15 +93,15 @@ class VersionFetcher:
     
     async def _fetch_versions(self, platform: str) -> List[str]:
         """Fetch versions from API"""
-        async with aiohttp.ClientSession() as session:
-            if platform == "paper":
-                return await self._fetch_paper_versions(session)
-            elif platform == "vanilla":
-                return await self._fetch_vanilla_versions(session)
-            elif platform == "fabric":
-                return await self._fetch_fabric_versions(session)
-            else:
-                return []
+        session = get_session()
+        if platform == "paper":
+            return await self._fetch_paper_versions(session)
+        elif platform == "vanilla":
+            return await self._fetch_vanilla_versions(session)
+        elif platform == "fabric":
+            return await self._fetch_fabric_versions(session)
+        else:
+            return []
     
     async def _fetch_paper_versions(self, session: aiohttp.ClientSession) -> List[str]:
         """Fetch Paper versions"""
@@ -0,0 +1,90 @@
+import errno
+import fcntl
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from src.logger import logger
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Point-in-time copy of the world for backups.
+#
+# The server only has to stay in save-off until the world is staged; the
+# archive is then built from the staging copy with autosave back on.
+# Reflinks (FICLONE — btrfs, XFS, bcachefs, …) share extents copy-on-write, so
+# staging costs metadata only. Elsewhere files are copied on a thread pool
+# (shutil.copy2 → copy_file_range in the kernel). Hardlinks are not an option:
+# the server rewrites region files in place, so a hardlinked "copy" would keep
+# changing after save-on.
+# ──────────────────────────────────────────────────────────────────────────────
+
+FICLONE = 0x40049409                # _IOW(0x94, 9, int) from <linux/fs.h>
+STAGING_METHODS = ("reflink", "copy")
+SKIPPED_FILES = {"session.lock"}
+
+# errno values meaning "this filesystem (pair) cannot clone", as opposed to a real I/O error
+_NO_REFLINK = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM}
+
+
+class ReflinkUnsupported(OSError):
+    pass
+
+
+def reflink(src: str, dst: str):
+    """Clone `src` to a new file `dst` sharing the same extents. Raises ReflinkUnsupported if impossible."""
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError as e:
+            if e.errno in _NO_REFLINK:
+                raise ReflinkUnsupported(e.errno, f"reflink not supported: {e.strerror}") from e
+            raise
+    shutil.copystat(src, dst)
+
+
+def stage_world(world_path: str, staging_dir: str, method: str, workers: int = 4) -> int:
+    """
+    Copy `world_path` to `staging_dir` (which must not exist) with `method` "reflink" or "copy".
+    Modification times are kept, so snapshots can still skip unchanged files.
+    Returns the number of bytes staged. If the very first reflink fails, ReflinkUnsupported
+    is raised and `staging_dir` is removed, so the caller can fall back.
+    """
+    if not os.path.isdir(world_path):
+        raise FileNotFoundError(f"World directory not found: {world_path}")
+
+    files = []
+    for root, dirs, names in os.walk(world_path):
+        target_root = os.path.join(staging_dir, os.path.relpath(root, world_path))
+        os.makedirs(target_root, exist_ok=True)
+        for name in names:
+            if name not in SKIPPED_FILES:
+                src = os.path.join(root, name)
+                files.append((os.path.getsize(src), src, os.path.join(target_root, name)))
+    # Biggest first, so one large region file doesn't finish last on a single worker
+    files.sort(reverse=True)
+    total = sum(size for size, _, _ in files)
+    files = [(src, dst) for _, src, dst in files]
+
+    try:
+        if method == "reflink" and files:
+            # Probe on one file: an unsupported filesystem fails here, before anything is queued
+            reflink(*files[0])
+            files = files[1:]
+            copy = _reflink_or_copy
+        else:
+            copy = shutil.copy2
+        with ThreadPoolExecutor(max(workers, 1), thread_name_prefix="stage") as pool:
+            list(pool.map(lambda pair: copy(*pair), files))
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    return total
+
+
+def _reflink_or_copy(src: str, dst: str):
+    try:
+        reflink(src, dst)
+    except ReflinkUnsupported as e:
+        # e.g. a file on another mount inside the world folder
+        logger.debug(f"Staging: copying {src} ({e})")
+        shutil.copy2(src, dst)
@@ -0,0 +1,262 @@
+import os
+import struct
+import tempfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Streaming zip writer with parallel deflate.
+#
+# zipfile compresses on the calling thread, one file at a time. Here each
+# entry is cut into BLOCK_SIZE blocks that are deflated independently on a
+# thread pool (zlib releases the GIL). Non-final blocks end with a sync flush,
+# so they concatenate into one valid deflate stream, the same way pigz does it.
+# Blocks of consecutive entries are in flight together, so many small files
+# keep the pool busy as well. Results are written strictly in order; CRCs and
+# sizes of deflated entries go into a data descriptor after each entry.
+# STORED entries are spooled (in memory, on disk past STORED_SPOOL) and written
+# with their CRC and sizes in the local header: readers such as Java's
+# ZipInputStream reject STORED entries with a data descriptor, since they
+# cannot find the end of the data. Zip64 records are added when needed.
+# ──────────────────────────────────────────────────────────────────────────────
+
+ZIP_STORED   = 0
+ZIP_DEFLATED = 8
+BLOCK_SIZE   = 1024 * 1024
+ZIP64_LIMIT  = 0xFFFFFFFF
+QUEUE_DEPTH  = 4                    # blocks in flight per worker (bounds memory)
+STORED_SPOOL = 64 * 1024 * 1024     # bytes of a STORED entry held in memory before spilling to disk
+
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8            = 0x800
+VERSION_DEFAULT      = 20
+VERSION_ZIP64        = 45
+
+# Already-compressed world data: deflating it again costs CPU and saves nothing
+STORED_EXTENSIONS = (".mca", ".mcc", ".dat", ".dat_old", ".gz", ".zip", ".png")
+
+
+def dos_datetime(mtime_ns: int) -> tuple[int, int]:
+    """(dos_time, dos_date) for a zip header."""
+    t = datetime.fromtimestamp(mtime_ns / 1e9)
+    year = min(max(t.year, 1980), 2107)
+    return (t.hour << 11) | (t.minute << 5) | (t.second // 2), ((year - 1980) << 9) | (t.month << 5) | t.day
+
+
+def method_for(name: str, method: int | None = None) -> int:
+    """The compression method for a file: `method` if given, else the STORED_EXTENSIONS policy."""
+    if method is not None:
+        return method
+    return ZIP_STORED if name.endswith(STORED_EXTENSIONS) else ZIP_DEFLATED
+
+
+def deflate_block(data: bytes, level: int, last: bool) -> bytes:
+    c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return c.compress(data) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class ZipWriter:
+    """
+    Write a zip archive to a binary file object, entry by entry.
+
+    `workers` threads deflate blocks of the current and following entries while the
+    writer thread keeps output in order. Use as a context manager; `close()` writes
+    the central directory.
+    """
+
+    def __init__(self, f, workers: int = 1, level: int = 6):
+        self._f = f
+        self._level = level
+        self._offset = 0
+        self._records = []           # (name, method, dos_time, dos_date, crc, csize, usize, offset, mode)
+        self._entry = None           # the same fields for the entry being written
+        self._spool = None           # contents of the current STORED entry, written at its end
+        self._pool = ThreadPoolExecutor(max(workers, 1), thread_name_prefix="zip") if workers > 1 else None
+        self._window = max(workers, 1) * QUEUE_DEPTH
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    # ── Entries ───────────────────────────────────────────────────────────────
+
+    def add(self, name: str, blocks, mtime_ns: int, mode: int = 0o644, method: int = ZIP_DEFLATED):
+        """Add one file. `blocks` yields its raw contents (any block size; BLOCK_SIZE is ideal)."""
+        self.add_all([(name, blocks, mtime_ns, mode, method)])
+
+    def add_files(self, files, method: int | None = None):
+        """
+        Add files from disk: `files` yields (arcname, path). `method` None follows the
+        STORED_EXTENSIONS policy; the contents are read lazily, in order.
+        """
+        def entries():
+            for name, path in files:
+                st = os.stat(path)
+                yield name, _read_blocks(path), st.st_mtime_ns, st.st_mode & 0o777, method_for(path, method)
+        self.add_all(entries())
+
+    def add_all(self, entries):
+        """
+        Add several files: `entries` yields (name, blocks, mtime_ns, mode, method).
+        Blocks are compressed up to the window ahead of the one being written.
+        """
+        pending = deque()
+        for name, blocks, mtime_ns, mode, method in entries:
+            pending.append((self._start_entry, (name, mtime_ns, mode, method)))
+            if method == ZIP_DEFLATED:
+                blocks = _coalesce(blocks)
+            for raw, last in _mark_last(blocks):
+                job = raw if method == ZIP_STORED else self._submit(raw, last)
+                pending.append((self._write_block, (raw, job)))
+                while len(pending) > self._window:
+                    step, args = pending.popleft()
+                    step(*args)
+            pending.append((self._end_entry, ()))
+        while pending:
+            step, args = pending.popleft()
+            step(*args)
+
+    def _start_entry(self, name: str, mtime_ns: int, mode: int, method: int):
+        dos_time, dos_date = dos_datetime(mtime_ns)
+        encoded = name.encode("utf-8")
+        self._entry = [encoded, method, dos_time, dos_date, 0, 0, 0, self._offset, mode]
+        if method == ZIP_STORED:
+            # The header needs the CRC and size, so it is written once the entry is complete
+            self._spool = tempfile.SpooledTemporaryFile(STORED_SPOOL)
+            return
+        # Sizes are not known yet: zeros here, real values in the data descriptor.
+        # The zip64 extra announces 8-byte descriptor sizes, so any entry may exceed 4 GiB.
+        self._write(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, VERSION_ZIP64, FLAG_DATA_DESCRIPTOR | FLAG_UTF8, method,
+            dos_time, dos_date, 0, ZIP64_LIMIT, ZIP64_LIMIT, len(encoded), 20,
+        ) + encoded + struct.pack("<HHQQ", 0x0001, 16, 0, 0))
+
+    def _write_block(self, raw: bytes, job):
+        payload = job if isinstance(job, bytes) else job.result()
+        entry = self._entry
+        entry[4] = zlib.crc32(raw, entry[4])
+        entry[5] += len(payload)
+        entry[6] += len(raw)
+        if self._spool is not None:
+            self._spool.write(payload)
+        else:
+            self._write(payload)
+
+    def _end_entry(self):
+        encoded, method, dos_time, dos_date, crc, csize, usize = self._entry[:7]
+        if self._spool is not None:
+            self._write(local_header(encoded, method, dos_time, dos_date, crc, csize, usize))
+            with self._spool as spool:
+                spool.seek(0)
+                while block := spool.read(BLOCK_SIZE):
+                    self._write(block)
+            self._spool = None
+        else:
+            self._write(struct.pack("<IIQQ", 0x08074B50, crc, csize, usize))
+        self._records.append(tuple(self._entry))
+        self._entry = None
+
+    def _submit(self, data: bytes, last: bool):
+        if self._pool is None:
+            return deflate_block(data, self._level, last)
+        return self._pool.submit(deflate_block, data, self._level, last)
+
+    # ── Central directory ─────────────────────────────────────────────────────
+
+    def close(self):
+        if self._pool:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        cd_offset = self._offset
+        for encoded, method, dos_time, dos_date, crc, csize, usize, offset, mode in self._records:
+            flags = FLAG_UTF8 if method == ZIP_STORED else FLAG_DATA_DESCRIPTOR | FLAG_UTF8
+            self._write(central_record(encoded, method, dos_time, dos_date, crc, csize, usize, offset, mode, flags))
+        self._write(end_records(len(self._records), self._offset - cd_offset, cd_offset))
+
+    def _write(self, data: bytes):
+        self._f.write(data)
+        self._offset += len(data)
+
+
+def local_header(encoded: bytes, method: int, dos_time: int, dos_date: int, crc: int,
+                 csize: int, usize: int) -> bytes:
+    """Local file header for an entry whose sizes and CRC are known up front (no data descriptor)."""
+    extra = b""
+    if usize >= ZIP64_LIMIT or csize >= ZIP64_LIMIT:
+        extra = struct.pack("<HHQQ", 0x0001, 16, usize, csize)
+    return struct.pack(
+        "<IHHHHHIIIHH", 0x04034B50, VERSION_ZIP64 if extra else VERSION_DEFAULT, FLAG_UTF8, method,
+        dos_time, dos_date, crc, ZIP64_LIMIT if extra else csize, ZIP64_LIMIT if extra else usize,
+        len(encoded), len(extra),
+    ) + encoded + extra
+
+
+def central_record(encoded: bytes, method: int, dos_time: int, dos_date: int, crc: int,
+                   csize: int, usize: int, offset: int, mode: int, flags: int = FLAG_DATA_DESCRIPTOR | FLAG_UTF8) -> bytes:
+    """One central directory entry, with a zip64 extra for whichever fields overflow."""
+    extra = b""
+    if usize >= ZIP64_LIMIT:
+        extra += struct.pack("<Q", usize)
+    if csize >= ZIP64_LIMIT:
+        extra += struct.pack("<Q", csize)
+    if offset >= ZIP64_LIMIT:
+        extra += struct.pack("<Q", offset)
+    if extra:
+        extra = struct.pack("<HH", 0x0001, len(extra)) + extra
+    return struct.pack(
+        "<IHHHHHHIIIHHHHHII", 0x02014B50, (3 << 8) | VERSION_ZIP64,
+        VERSION_ZIP64 if extra else VERSION_DEFAULT, flags, method, dos_time, dos_date, crc,
+        min(csize, ZIP64_LIMIT), min(usize, ZIP64_LIMIT), len(encoded), len(extra), 0, 0, 0,
+        (0o100000 | mode) << 16, min(offset, ZIP64_LIMIT),
+    ) + encoded + extra
+
+
+def end_records(count: int, cd_size: int, cd_offset: int) -> bytes:
+    """End of central directory (preceded by the zip64 variants when required)."""
+    out = b""
+    if count >= 0xFFFF or cd_size >= ZIP64_LIMIT or cd_offset >= ZIP64_LIMIT:
+        zip64_offset = cd_offset + cd_size
+        out += struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, VERSION_ZIP64, VERSION_ZIP64, 0, 0,
+                           count, count, cd_size, cd_offset)
+        out += struct.pack("<IIQI", 0x07064B50, 0, zip64_offset, 1)
+    out += struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+                       min(cd_size, ZIP64_LIMIT), min(cd_offset, ZIP64_LIMIT), 0)
+    return out
+
+
+def _coalesce(blocks):
+    """Regroup arbitrary pieces into ~BLOCK_SIZE blocks (tiny deflate blocks compress badly)."""
+    buffer = bytearray()
+    for piece in blocks:
+        buffer += piece
+        if len(buffer) >= BLOCK_SIZE:
+            yield bytes(buffer)
+            buffer = bytearray()
+    if buffer:
+        yield bytes(buffer)
+
+
+def _mark_last(blocks):
+    """Yield (block, is_last); an empty file still yields one empty block to finish the stream."""
+    it = iter(blocks)
+    current = next(it, b"")
+    for following in it:
+        yield current, False
+        current = following
+    yield current, True
+
+
+def _read_blocks(path: str):
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(BLOCK_SIZE)
+            if not block:
+                return
+            yield block
@@ -6,6 +6,8 @@ import time
 import zipfile
 import asyncio
 import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src import backup_store
 
 
 class TestBackupManager:
@@ -27,13 +29,14 @@ class TestBackupManager:
 
     @pytest.mark.asyncio
     async def test_create_auto_backup(self, temp_world_dir, temp_backup_dir):
-        """Auto backup creates a zip in the auto/ directory."""
+        """Auto backup in "zip" format creates a zip in the auto/ directory."""
         from src.config import config
         config.SERVER_DIR = temp_world_dir
         # Create server.properties to satisfy the WORLD_FOLDER property
         with open(os.path.join(temp_world_dir, "server.properties"), "w") as f:
             f.write("level-name=world\n")
         config.BACKUP_RETENTION_DAYS = 7
+        config.BACKUP_FORMAT = "zip"
 
         mgr = self._make_manager(temp_backup_dir, temp_world_dir)
         success, filename, path = await mgr.create_backup()
@@ -61,15 +64,106 @@ class TestBackupManager:
         with open(os.path.join(temp_world_dir, "server.properties"), "w") as f:
             f.write("level-name=world\n")
         config.BACKUP_RETENTION_DAYS = 7
+        config.BACKUP_FORMAT = "dedup"
 
         mgr = self._make_manager(temp_backup_dir, temp_world_dir)
         success, filename, path = await mgr.create_backup(custom_name="my-save")
 
         assert success is True
         assert "my-save" in filename
+        assert filename.endswith(".snap")
         assert "custom" in path
         assert os.path.exists(path)
 
+    @pytest.mark.asyncio
+    async def test_snapshot_backup_restore_and_download(self, temp_world_dir, temp_backup_dir, tmp_path):
+        """A dedup snapshot restores byte-for-byte and streams as a zip for download."""
+        from src.config import config
+        config.SERVER_DIR = temp_world_dir
+        with open(os.path.join(temp_world_dir, "server.properties"), "w") as f:
+            f.write("level-name=world\n")
+        config.BACKUP_RETENTION_DAYS = 7
+        config.BACKUP_FORMAT = "dedup"
+
+        mgr = self._make_manager(temp_backup_dir, temp_world_dir)
+        success, filename, path = await mgr.create_backup()
+        assert success is True
+        assert filename.startswith("backup_auto_") and filename.endswith(".snap")
+
+        restored = str(tmp_path / "restored")
+        await mgr.restore_backup(path, restored)
+        world = os.path.join(temp_world_dir, "world")
+        for rel in ("level.dat", "level.dat_old", os.path.join("region", "r.0.0.mca")):
+            with open(os.path.join(world, rel), "rb") as a, open(os.path.join(restored, rel), "rb") as b:
+                assert a.read() == b.read()
+        assert not os.path.exists(os.path.join(restored, "session.lock"))
+
+        # Small enough to attach: written out as the zip a download link would serve
+        assert mgr.snapshot_attachment(path, 1024) is None
+        zip_path = mgr.snapshot_attachment(path, 10 * 1024 * 1024)
+        try:
+            with zipfile.ZipFile(zip_path, 'r') as zf:
+                assert zf.testzip() is None
+                assert sorted(zf.namelist()) == ["level.dat", "level.dat_old", "region/r.0.0.mca"]
+        finally:
+            os.remove(zip_path)
+
+    @pytest.mark.asyncio
+    async def test_cleanup_old_snapshot_frees_chunks(self, temp_world_dir, temp_backup_dir):
+        """Deleting an expired snapshot removes chunks that only it referenced."""
+        from src.backup_store import ChunkStore
+        from src.config import config
+        config.SERVER_DIR = temp_world_dir
+        with open(os.path.join(temp_world_dir, "server.properties"), "w") as f:
+            f.write("level-name=world\n")
+        config.BACKUP_RETENTION_DAYS = 7
+        config.BACKUP_FORMAT = "dedup"
+
+        mgr = self._make_manager(temp_backup_dir, temp_world_dir)
+        _, _, old_path = await mgr.create_backup(custom_name="old")
+        old_chunks = set(ChunkStore(mgr.store_dir).iter_digests())
+
+        with open(os.path.join(temp_world_dir, "world", "level.dat"), "w") as f:
+            f.write("changed level data")
+        _, _, new_path = await mgr.create_backup(custom_name="new")
+        assert len(set(ChunkStore(mgr.store_dir).iter_digests()) - old_chunks) == 1
+
+        await mgr.delete_backup(old_path)
+        remaining = set(ChunkStore(mgr.store_dir).iter_digests())
+        assert len(old_chunks - remaining) == 1
+
+        restored = os.path.join(temp_backup_dir, "restored")
+        await mgr.restore_backup(new_path, restored)
+        with open(os.path.join(restored, "level.dat")) as f:
+            assert f.read() == "changed level data"
+
+    @pytest.mark.asyncio
+    async def test_backups_are_recorded_in_catalog(self, temp_world_dir, temp_backup_dir):
+        """Created backups are cataloged with their checksum; deleted ones drop out."""
+        from src.backup_catalog import sha256_file
+        from src.config import config
+        config.SERVER_DIR = temp_world_dir
+        with open(os.path.join(temp_world_dir, "server.properties"), "w") as f:
+            f.write("level-name=world\n")
+        config.BACKUP_RETENTION_DAYS = 7
+        config.BACKUP_FORMAT = "zip"
+
+        mgr = self._make_manager(temp_backup_dir, temp_world_dir)
+        _, zip_name, zip_path = await mgr.create_backup(custom_name="z")
+        config.BACKUP_FORMAT = "dedup"
+        _, snap_name, snap_path = await mgr.create_backup()
+
+        entries = await mgr.list_backups()
+        assert [e["name"] for e in entries] == [snap_name, zip_name]
+        zip_entry = entries[1]
+        assert zip_entry["kind"] == "custom" and zip_entry["world"] == "world"
+        assert zip_entry["sha256"] == sha256_file(zip_path)
+        assert zip_entry["files"] == 3
+        assert entries[0]["kind"] == "auto" and entries[0]["format"] == "dedup"
+
+        await mgr.delete_backup(zip_path)
+        assert [e["name"] for e in await mgr.list_backups()] == [snap_name]
+
     @pytest.mark.asyncio
     async def test_cleanup_old_auto_backups(self, temp_backup_dir):
         """Auto backups older than retention days are deleted."""
@@ -115,6 +209,87 @@ class TestBackupManager:
 
         assert os.path.exists(txt_file), "Non-zip files should not be deleted"
 
+    def _old_auto_backups(self, mgr):
+        for name, days in (("backup_auto_a.zip", 3), ("backup_auto_b.zip", 2)):
+            path = os.path.join(mgr.auto_dir, name)
+            with open(path, "w") as f:
+                f.write("backup")
+            os.utime(path, (time.time() - days * 86400,) * 2)
+
+    @pytest.mark.asyncio
+    async def test_backup_prunes_old_backups_to_make_room(self, temp_world_dir, temp_backup_dir):
+        """A backup that would not fit deletes the oldest auto backup when that frees enough."""
+        from src.backup_retention import RESERVED_BYTES
+        from src.config import config
+        config.SERVER_DIR = temp_world_dir
+        with open(os.path.join(temp_world_dir, "server.properties"), "w") as f:
+            f.write("level-name=world\n")
+        config.BACKUP_RETENTION_DAYS = 365
+        config.BACKUP_FORMAT = "zip"
+
+        mgr = self._make_manager(temp_backup_dir, temp_world_dir)
+        self._old_auto_backups(mgr)
+        oldest = os.path.join(mgr.auto_dir, "backup_auto_a.zip")
+
+        # Needs RESERVED_BYTES + 1.5 × 6 bytes; deleting the oldest 6-byte backup covers the gap
+        def disk_usage(path):
+            return MagicMock(free=RESERVED_BYTES + 5 if os.path.exists(oldest) else 10 ** 12)
+
+        with patch("src.backup_manager.shutil.disk_usage", side_effect=disk_usage):
+            success, _, path = await mgr.create_backup(custom_name="x")
+
+        assert success is True
+        assert os.listdir(mgr.auto_dir) == ["backup_auto_b.zip"]
+
+    @pytest.mark.asyncio
+    async def test_backup_fails_up_front_without_disk_space(self, temp_world_dir, temp_backup_dir):
+        """When pruning cannot free enough, nothing is deleted and the backup fails before save-off."""
+        from src.config import config
+        config.SERVER_DIR = temp_world_dir
+        with open(os.path.join(temp_world_dir, "server.properties"), "w") as f:
+            f.write("level-name=world\n")
+        config.BACKUP_RETENTION_DAYS = 365
+        config.BACKUP_FORMAT = "zip"
+
+        mgr = self._make_manager(temp_backup_dir, temp_world_dir)
+        self._old_auto_backups(mgr)
+
+        server = MagicMock()
+        server.is_running.return_value = True
+        with patch("src.backup_manager.shutil.disk_usage", return_value=MagicMock(free=0)), \
+             patch("src.utils.rcon_cmd", new_callable=AsyncMock) as rcon:
+            success, error, path = await mgr.create_backup(server=server)
+
+        assert success is False and path is None
+        assert "Not enough disk space" in error
+        rcon.assert_not_called()
+        assert sorted(os.listdir(mgr.auto_dir)) == ["backup_auto_a.zip", "backup_auto_b.zip"]
+
+    @pytest.mark.asyncio
+    async def test_snapshot_space_counts_shared_chunks_once(self, temp_world_dir, temp_backup_dir):
+        """Deleting an old snapshot whose chunks later snapshots share is not counted as freeing them."""
+        from src.backup_retention import RetentionPolicy, build_ledger, plan_retention
+        from src.config import config
+        config.SERVER_DIR = temp_world_dir
+        with open(os.path.join(temp_world_dir, "server.properties"), "w") as f:
+            f.write("level-name=world\n")
+        config.BACKUP_FORMAT = "dedup"
+        config.BACKUP_RETENTION_DAYS = 365
+
+        mgr = self._make_manager(temp_backup_dir, temp_world_dir)
+        await mgr.create_backup(custom_name="first")
+        with open(os.path.join(temp_world_dir, "world", "level.dat"), "w") as f:
+            f.write("changed level data")
+        await mgr.create_backup(custom_name="second")
+        entries = [dict(e, kind="auto") for e in await mgr.list_backups()]
+
+        first = entries[1]
+        ledger = build_ledger(entries, mgr.chunk_store())
+        # Only the old level.dat chunk and the manifest are exclusive to the first snapshot
+        assert ledger.release(first) < first["new_bytes"]
+        ledger = build_ledger(entries, mgr.chunk_store())
+        assert plan_retention(entries, RetentionPolicy(keep_days=365), time.time(), 10 ** 6, ledger) == []
+
     @pytest.mark.asyncio
     async def test_backup_missing_world_fails(self, temp_backup_dir):
         """Backup fails gracefully when world directory doesn't exist."""
@@ -127,3 +302,42 @@ class TestBackupManager:
 
         assert success is False
         assert path is None
+
+    @pytest.mark.asyncio
+    async def test_staged_backup_reenables_autosave_before_archiving(self, temp_world_dir, temp_backup_dir):
+        """With staging, save-on is sent before the archive is built, from the staged copy."""
+        from src.config import config
+        config.SERVER_DIR = temp_world_dir
+        with open(os.path.join(temp_world_dir, "server.properties"), "w") as f:
+            f.write("level-name=world\n")
+        config.BACKUP_RETENTION_DAYS = 7
+        config.BACKUP_FORMAT = "zip"
+        config.BACKUP_STAGING = "copy"
+
+        mgr = self._make_manager(temp_backup_dir, temp_world_dir)
+        server = MagicMock()
+        server.is_running.return_value = True
+        commands = []
+
+        async def rcon(cmd):
+            commands.append(cmd)
+            return True, ""
+
+        real_zip = mgr._zip_world
+
+        def zip_world(dest_path, world_path=None):
+            assert commands[-1] == "save-on"
+            assert ".backup-staging" in world_path
+            real_zip(dest_path, world_path)
+
+        with patch("src.utils.rcon_cmd", side_effect=rcon), \
+             patch("src.log_dispatcher.log_dispatcher.wait_for_pattern", new_callable=AsyncMock, return_value=True), \
+             patch.object(mgr, "_zip_world", side_effect=zip_world):
+            success, _, path = await mgr.create_backup(server=server)
+
+        config.BACKUP_STAGING = "auto"
+        assert success is True
+        assert commands == ["save-off", "save-all", "save-on"]
+        with zipfile.ZipFile(path) as zf:
+            assert "region/r.0.0.mca" in zf.namelist()
+        assert not os.path.exists(os.path.join(temp_world_dir, ".backup-staging"))
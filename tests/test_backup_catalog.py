@@ -0,0 +1,79 @@
+"""
+Tests for src/backup_catalog.py — backup index
+"""
+import json
+import os
+import zipfile
+import pytest
+from src.backup_catalog import BackupCatalog, sha256_file
+from src.backup_store import ChunkStore, create_snapshot
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    dirs = {"auto": str(tmp_path / "auto"), "custom": str(tmp_path / "custom")}
+    for directory in dirs.values():
+        os.makedirs(directory)
+    return dirs
+
+
+def _catalog(tmp_path, dirs):
+    return BackupCatalog(str(tmp_path / "catalog.json"), dirs)
+
+
+def _write_zip(path, files):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+
+
+def test_reconcile_describes_zip_and_snapshot(tmp_path, dirs):
+    _write_zip(os.path.join(dirs["custom"], "a.zip"), {"level.dat": b"x" * 10, "region/r.0.0.mca": b"y" * 20})
+    world = tmp_path / "world"
+    world.mkdir()
+    (world / "level.dat").write_bytes(b"level")
+    create_snapshot(str(world), os.path.join(dirs["auto"], "b.snap"), ChunkStore(str(tmp_path / "store")))
+    (tmp_path / "auto" / "notes.txt").write_text("not a backup")
+
+    catalog = _catalog(tmp_path, dirs)
+    assert catalog.reconcile() == (2, 0)
+
+    zip_entry = catalog.get("custom", "a.zip")
+    assert (zip_entry["format"], zip_entry["files"], zip_entry["data_bytes"]) == ("zip", 2, 30)
+    assert zip_entry["sha256"] is None          # found on disk: not hashed
+    snap_entry = catalog.get("auto", "b.snap")
+    assert (snap_entry["format"], snap_entry["world"], snap_entry["files"]) == ("dedup", "world", 1)
+    assert snap_entry["sha256"] == sha256_file(snap_entry["path"])
+    assert [e["name"] for e in catalog.entries("auto")] == ["b.snap"]
+
+
+def test_catalog_persists_and_tracks_changes(tmp_path, dirs):
+    path = os.path.join(dirs["auto"], "a.zip")
+    _write_zip(path, {"level.dat": b"x"})
+    catalog = _catalog(tmp_path, dirs)
+    catalog.add(path, "auto", mc_version="1.21.1", sha256="abc")
+
+    with open(tmp_path / "catalog.json") as f:
+        assert json.load(f)["backups"][0]["mc_version"] == "1.21.1"
+
+    # A fresh catalog (bot restart) loads the file and only rescans what changed
+    reloaded = _catalog(tmp_path, dirs)
+    assert reloaded.reconcile() == (0, 0)
+    assert reloaded.get("auto", "a.zip")["sha256"] == "abc"
+
+    os.remove(path)
+    _write_zip(os.path.join(dirs["auto"], "b.zip"), {"level.dat": b"y"})
+    assert reloaded.reconcile() == (1, 1)
+    assert [e["name"] for e in reloaded.entries()] == ["b.zip"]
+
+    reloaded.remove("auto", "b.zip")
+    assert len(_catalog(tmp_path, dirs).entries()) == 0
+
+
+def test_unreadable_backup_is_still_listed(tmp_path, dirs):
+    (tmp_path / "auto" / "broken.zip").write_bytes(b"not a zip")
+    (tmp_path / "catalog.json").write_text("{garbage")
+    catalog = _catalog(tmp_path, dirs)
+    catalog.reconcile()
+    entry = catalog.get("auto", "broken.zip")
+    assert entry["size"] == 9 and entry["files"] is None
@@ -35,6 +35,7 @@ def mock_interaction():
     interaction.followup = MagicMock()
     interaction.followup.send = AsyncMock()
     interaction.guild = MagicMock()
+    interaction.guild.filesize_limit = 25 * 1024 * 1024
     return interaction
 
 @pytest.mark.asyncio
@@ -160,28 +161,38 @@ async def test_backup_loop_time_not_matched(backup_cog):
         
         mock_create.assert_not_called()
 
+def _entry(name, kind):
+    """A backup catalog entry as returned by backup_manager.list_backups()."""
+    return {
+        'name': name, 'kind': kind, 'path': f"/fake/{kind}/{name}", 'size': 1536 * 1024,
+        'created': 1700000000, 'mc_version': "1.21.1", 'format': 'zip',
+    }
+
 @pytest.mark.asyncio
 async def test_backup_list(backup_cog, mock_interaction):
     """Test /backup_list command."""
+    catalog = {
+        'auto': [_entry("backup_auto_2.zip", 'auto'),
+                 dict(_entry("backup_auto_1.snap", 'auto'), format='dedup', size=40 * 1024,
+                      data_bytes=30 * 1024 ** 3, new_bytes=200 * 1024 * 1024)],
+        'custom': [_entry("backup_custom_2.zip", 'custom'), _entry("backup_custom_1.zip", 'custom')],
+    }
     with patch('cogs.backup.backup_manager') as mock_bm, \
-         patch('os.path.exists', return_value=True), \
          patch('os.listdir') as mock_listdir:
         
-        mock_bm.auto_dir = "/fake/auto"
-        mock_bm.custom_dir = "/fake/custom"
-        
-        mock_listdir.side_effect = [
-            ["backup_auto_2.zip", "backup_auto_1.zip"],
-            ["backup_custom_2.zip", "backup_custom_1.zip"]
-        ]
+        mock_bm.list_backups = AsyncMock(side_effect=lambda kind=None: catalog[kind])
         
         await backup_cog.backup_list.callback(backup_cog, mock_interaction)
         
+        mock_listdir.assert_not_called()
         mock_interaction.response.defer.assert_called_once_with(ephemeral=True)
         mock_interaction.followup.send.assert_called_once()
         msg = mock_interaction.followup.send.call_args[0][0]
-        assert "backup_auto_1.zip" in msg
+        assert "backup_auto_1.snap" in msg
         assert "backup_custom_1.zip" in msg
+        assert "1.5 MB" in msg
+        # A snapshot shows the world it holds and what it added, not its manifest file
+        assert "30,720.0 MB world (+200.0 MB new)" in msg
 
 @pytest.mark.asyncio
 async def test_backup_download_found(backup_cog, mock_interaction):
@@ -205,6 +216,88 @@ async def test_backup_download_found(backup_cog, mock_interaction):
         mock_interaction.followup.send.assert_any_call("⏳ Preparing download...", ephemeral=True)
         mock_interaction.followup.send.assert_any_call(file=mock_file, ephemeral=True)
 
+@pytest.mark.asyncio
+async def test_backup_download_links(backup_cog, mock_interaction):
+    """Test /backup_download sends links when the backup can't be attached."""
+    links = {
+        'name': "my_backup.zip", 'size': 3 * 1024**3,
+        'url': "http://host:8765/dl/tok/my_backup.zip",
+        'manifest_url': "http://host:8765/dl/tok/manifest.json",
+        'volumes': [(f"http://host:8765/dl/tok/my_backup.zip.{i:03d}", 1024**3) for i in range(1, 4)],
+        'expires': 1700000000,
+    }
+    with patch('cogs.backup.backup_manager') as mock_bm, \
+         patch('cogs.backup.export_server') as mock_export, \
+         patch('os.path.exists', side_effect=lambda path: "custom" in path), \
+         patch('discord.File') as mock_file_class:
+
+        mock_bm.custom_dir = "/fake/custom"
+        mock_bm.auto_dir = "/fake/auto"
+        mock_bm.fits_upload.return_value = False
+        mock_bm.snapshot_attachment.return_value = None
+        mock_export.publish = AsyncMock(return_value=links)
+
+        await backup_cog.backup_download.callback(backup_cog, mock_interaction, "my_backup.snap")
+
+        mock_export.publish.assert_awaited_once_with("/fake/custom/my_backup.snap")
+        mock_file_class.assert_not_called()
+        msg = mock_interaction.followup.send.call_args[0][0]
+        assert links['url'] in msg
+        assert "too large for Discord" in msg
+        assert "my_backup.zip.001" in msg
+        assert "cat my_backup.zip.*" in msg
+
+def test_format_links_wording_follows_reason():
+    """Only a download over the upload limit is called too large."""
+    from cogs.backup import format_links
+    links = {'name': "w.zip", 'size': 1024, 'url': "http://h/dl/t/w.zip",
+             'manifest_url': "http://h/dl/t/manifest.json", 'volumes': [], 'expires': 0}
+    assert "too large" not in format_links(links, 25 * 1024 * 1024)
+    assert "too large for Discord" in format_links(links, 512)
+
+@pytest.mark.asyncio
+async def test_backup_download_small_snapshot_is_attached(backup_cog, mock_interaction, tmp_path):
+    """A snapshot whose zip fits the upload limit is attached, not linked."""
+    attachment = tmp_path / ".attach.tmp"
+    attachment.write_bytes(b"zip")
+    with patch('cogs.backup.backup_manager') as mock_bm, \
+         patch('cogs.backup.export_server') as mock_export, \
+         patch('os.path.exists', side_effect=lambda path: "custom" in path), \
+         patch('discord.File') as mock_file_class:
+
+        mock_bm.custom_dir = "/fake/custom"
+        mock_bm.auto_dir = "/fake/auto"
+        mock_bm.fits_upload.return_value = False
+        mock_bm.snapshot_attachment.return_value = str(attachment)
+        mock_export.publish = AsyncMock()
+
+        await backup_cog.backup_download.callback(backup_cog, mock_interaction, "my_backup.snap")
+
+        mock_export.publish.assert_not_called()
+        mock_file_class.assert_called_once_with(str(attachment), filename="my_backup.zip")
+        mock_interaction.followup.send.assert_any_call(file=mock_file_class.return_value, ephemeral=True)
+        assert not attachment.exists()
+
+@pytest.mark.asyncio
+async def test_backup_download_without_exposed_server(backup_cog, mock_interaction):
+    """No dead link: a large backup with a localhost-only server gets instructions instead."""
+    with patch('cogs.backup.backup_manager') as mock_bm, \
+         patch('cogs.backup.export_server') as mock_export, \
+         patch('os.path.exists', side_effect=lambda path: "custom" in path):
+
+        mock_bm.custom_dir = "/fake/custom"
+        mock_bm.auto_dir = "/fake/auto"
+        mock_bm.fits_upload.return_value = False
+        mock_bm.snapshot_attachment.return_value = None
+        mock_export.exposed.return_value = False
+        mock_export.publish = AsyncMock()
+
+        await backup_cog.backup_download.callback(backup_cog, mock_interaction, "my_backup.snap")
+
+        mock_export.publish.assert_not_called()
+        msg = mock_interaction.followup.send.call_args[0][0]
+        assert "not exposed" in msg and "BACKUP_HTTP_HOST" in msg
+
 @pytest.mark.asyncio
 async def test_backup_download_not_found(backup_cog, mock_interaction):
     """Test /backup_download command when file is not found."""
@@ -221,19 +314,16 @@ async def test_backup_download_not_found(backup_cog, mock_interaction):
 @pytest.mark.asyncio
 async def test_backup_download_autocomplete(backup_cog, mock_interaction):
     """Test autocomplete for backup downloads."""
+    entries = [_entry(name, 'custom') for name in ("custom2.zip", "custom1.zip")] + \
+              [_entry(name, 'auto') for name in ("auto2.zip", "auto1.zip")]
     with patch('cogs.backup.backup_manager') as mock_bm, \
          patch('os.listdir') as mock_listdir:
         
-        mock_bm.custom_dir = "/fake/custom"
-        mock_bm.auto_dir = "/fake/auto"
-        
-        mock_listdir.side_effect = [
-            ["custom1.zip", "custom2.zip"],
-            ["auto1.zip", "auto2.zip"]
-        ]
+        mock_bm.list_backups = AsyncMock(return_value=entries)
         
         choices = await backup_cog.backup_download_autocomplete(mock_interaction, "custom")
         
+        mock_listdir.assert_not_called()
         assert len(choices) == 2
         assert choices[0].name == "custom2.zip"
         assert choices[1].name == "custom1.zip"
@@ -244,7 +334,8 @@ async def test_backup_download_view(mock_interaction):
     view = BackupDownloadView("/path/to/backup.zip")
     button = MagicMock(spec=discord.ui.Button)
     
-    with patch('discord.File') as mock_file_class:
+    with patch('discord.File') as mock_file_class, \
+         patch('cogs.backup.backup_manager.fits_upload', return_value=True):
         mock_file = MagicMock()
         mock_file_class.return_value = mock_file
         
@@ -0,0 +1,163 @@
+"""
+Tests for src/backup_export.py — virtual zip, volumes, ranges and the download server
+"""
+import random
+import zipfile
+import aiohttp
+import pytest
+import pytest_asyncio
+from unittest.mock import PropertyMock, patch
+from src.backup_export import ExportServer, VirtualZip, compute_crcs, parse_range, published_backups, volume_ranges
+from src.backup_store import ChunkStore, create_snapshot, load_manifest
+from tests.test_backup_store import _write_region
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    world = tmp_path / "world"
+    (world / "region").mkdir(parents=True)
+    rng = random.Random(5)
+    _write_region(world / "region" / "r.0.0.mca", {i: (1000, rng.randbytes(5000)) for i in range(0, 100, 9)})
+    (world / "level.dat").write_bytes(b"level" * 100)
+    (world / "data").mkdir()
+    (world / "data" / "raids.dat").write_bytes(rng.randbytes(70000))
+    store = ChunkStore(str(tmp_path / "store"))
+    path = str(tmp_path / "a.snap")
+    create_snapshot(str(world), path, store)
+    return world, path, store
+
+
+def _virtual_zip(path, store):
+    manifest = load_manifest(path)
+    return VirtualZip(manifest, compute_crcs(manifest, store), store)
+
+
+def test_virtual_zip_is_a_valid_archive(snapshot, tmp_path):
+    world, path, store = snapshot
+    archive = _virtual_zip(path, store)
+    zip_path = tmp_path / "out.zip"
+    zip_path.write_bytes(b"".join(archive.iter_range(0, archive.size)))
+    assert zip_path.stat().st_size == archive.size
+
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+        for name in ("level.dat", "data/raids.dat", "region/r.0.0.mca"):
+            assert zf.read(name) == (world / name).read_bytes()
+
+
+def test_ranges_and_volumes_match_whole_archive(snapshot):
+    _, path, store = snapshot
+    archive = _virtual_zip(path, store)
+    whole = b"".join(archive.iter_range(0, archive.size))
+
+    rng = random.Random(6)
+    for _ in range(20):
+        start = rng.randrange(archive.size)
+        end = rng.randrange(start, archive.size + 1)
+        assert b"".join(archive.iter_range(start, end)) == whole[start:end]
+
+    volumes = volume_ranges(archive.size, 10000)
+    assert len(volumes) == -(-archive.size // 10000)
+    assert b"".join(b"".join(archive.iter_range(s, e)) for s, e in volumes) == whole
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 10)
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=-5", 100) == (95, 100)
+    assert parse_range("bytes=50-500", 100) == (50, 100)
+    for bad in ("bytes=100-", "bytes=-", "items=0-1", "bytes=0-1,5-6"):
+        with pytest.raises(ValueError):
+            parse_range(bad, 100)
+
+
+def test_exposed_only_when_reachable():
+    from src.config import config
+    config.BACKUP_HTTP_URL = None
+    for host, exposed in (("127.0.0.1", False), ("localhost", False), ("::1", False),
+                          ("0.0.0.0", True), ("192.168.1.5", True)):
+        config.BACKUP_HTTP_HOST = host
+        assert ExportServer.exposed() is exposed
+    config.BACKUP_HTTP_HOST = "127.0.0.1"
+    config.BACKUP_HTTP_URL = "https://backups.example.com"
+    assert ExportServer.exposed() is True
+    config.BACKUP_HTTP_URL = None
+
+
+@pytest_asyncio.fixture
+async def server(snapshot, tmp_path):
+    from src.config import config
+    _, _, store = snapshot
+    config.BACKUP_HTTP_HOST = "127.0.0.1"
+    config.BACKUP_HTTP_PORT = 0
+    config.BACKUP_HTTP_URL = None
+    srv = ExportServer()
+    with patch.object(ExportServer, "export_dir", new_callable=PropertyMock, return_value=str(tmp_path / "exports")), \
+         patch.object(ExportServer, "_store", return_value=store):
+        yield srv
+        await srv.stop()
+
+
+@pytest.mark.asyncio
+async def test_server_serves_ranges_and_volumes(snapshot, server):
+    _, path, store = snapshot
+    whole = b"".join(_virtual_zip(path, store).iter_range(0, 10**9))
+
+    with patch("src.backup_export.VOLUME_SIZE", 20000):
+        links = await server.publish(path)
+    assert links["size"] == len(whole)
+    assert len(links["volumes"]) == -(-len(whole) // 20000)
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(links["url"], headers={"Range": "bytes=100-199"}) as resp:
+            assert resp.status == 206
+            assert resp.headers["Content-Range"] == f"bytes 100-199/{len(whole)}"
+            assert await resp.read() == whole[100:200]
+
+        parts = []
+        for url, size in links["volumes"]:
+            async with session.get(url) as resp:
+                assert resp.status == 200
+                parts.append(await resp.read())
+                assert len(parts[-1]) == size
+        assert b"".join(parts) == whole
+
+        async with session.get(links["url"], headers={"Range": f"bytes={len(whole)}-"}) as resp:
+            assert resp.status == 416
+        async with session.get(links["url"].replace(links["name"], "other.zip")) as resp:
+            assert resp.status == 404
+
+    # A second publish of the unchanged backup keeps the link (resumable across restarts)
+    assert (await server.publish(path))["url"] == links["url"]
+
+
+@pytest.mark.asyncio
+async def test_publish_does_not_read_back_and_links_survive_restart(snapshot, server, tmp_path):
+    _, path, store = snapshot
+    with patch("src.backup_export.compute_crcs") as compute:
+        links = await server.publish(path)
+    compute.assert_not_called()          # region CRCs come from the manifest
+
+    # A new server (bot restart) indexes the published records when it starts
+    restarted = ExportServer()
+    with patch.object(ExportServer, "export_dir", new_callable=PropertyMock, return_value=str(tmp_path / "exports")), \
+         patch.object(ExportServer, "_store", return_value=store):
+        await server.stop()
+        await restarted.start()
+        try:
+            assert restarted._lookup(links["url"].split("/")[-2])["name"] == links["name"]
+            assert restarted._lookup("unknown") is None
+        finally:
+            await restarted.stop()
+
+
+@pytest.mark.asyncio
+async def test_published_backups_until_the_link_expires(snapshot, server, tmp_path):
+    _, path, _ = snapshot
+    exports = str(tmp_path / "exports")
+    assert published_backups(exports) == frozenset()
+    await server.publish(path)
+    assert published_backups(exports) == {path}
+    with patch("src.backup_export.time.time", return_value=10**12):
+        assert published_backups(exports) == frozenset()
@@ -0,0 +1,105 @@
+"""
+Tests for src/backup_retention.py — retention planner and size estimates
+"""
+from datetime import datetime, timedelta
+from src.backup_retention import GIB, RetentionPolicy, SpaceLedger, estimate_backup_bytes, plan_retention
+
+NOW = datetime(2026, 6, 15, 12, 0)
+
+
+def _entry(name, age, kind="auto", size=GIB, fmt="zip", new_bytes=None):
+    return {
+        "name": name, "kind": kind, "format": fmt, "size": size,
+        "new_bytes": size if new_bytes is None else new_bytes,
+        "created": (NOW - age).timestamp(),
+    }
+
+
+def _deleted(entries, policy, free_bytes=0, ledger=None):
+    return [(e["name"], reason) for e, reason in plan_retention(entries, policy, NOW.timestamp(), free_bytes, ledger)]
+
+
+def test_keep_days_fallback_never_deletes_newest_or_custom():
+    entries = [
+        _entry("new", timedelta(days=1)),
+        _entry("old", timedelta(days=10)),
+        _entry("custom", timedelta(days=100), kind="custom"),
+    ]
+    assert _deleted(entries, RetentionPolicy(keep_days=7)) == [("old", "older than 7 days")]
+    # Even if every auto backup is expired, the newest one stays
+    assert _deleted(entries, RetentionPolicy(keep_days=0)) == [("old", "older than 0 days")]
+
+
+def test_gfs_tiers_keep_newest_per_period():
+    # One backup every 12 hours for 70 days
+    entries = [_entry(f"b{i}", timedelta(hours=12 * i)) for i in range(140)]
+    policy = RetentionPolicy(tiers={"daily": 3, "weekly": 2, "monthly": 2})
+    deleted = {name for name, _ in _deleted(entries, policy)}
+    kept = [e for e in entries if e["name"] not in deleted]
+
+    kept_days = {datetime.fromtimestamp(e["created"]).date() for e in kept}
+    assert {(NOW - timedelta(days=d)).date() for d in range(3)} <= kept_days
+    # Newest of this ISO week and the last, of this month and the last; nothing else
+    assert len(kept) <= 3 + 2 + 2
+    assert "b0" not in deleted
+    assert {datetime.fromtimestamp(e["created"]).month for e in kept} == {5, 6}
+
+
+def test_size_budget_and_free_space_delete_oldest_first():
+    entries = [
+        _entry("a", timedelta(days=1)),
+        _entry("b", timedelta(days=2)),
+        _entry("c", timedelta(days=3)),
+        _entry("custom", timedelta(days=4), kind="custom", size=2 * GIB),
+    ]
+    policy = RetentionPolicy(keep_days=30, max_total_bytes=4 * GIB)
+    assert _deleted(entries, policy) == [("c", "size budget")]
+    assert _deleted(entries, policy, free_bytes=GIB + 1) == [("c", "size budget"), ("b", "disk space")]
+    # More than deleting every old backup can free: nothing is deleted for it
+    assert _deleted(entries, policy, free_bytes=100 * GIB) == [("c", "size budget")]
+
+
+def test_published_backups_are_never_deleted():
+    entries = [_entry(name, timedelta(days=days)) for name, days in (("a", 1), ("b", 2), ("c", 3), ("d", 10))]
+    for e in entries:
+        e["path"] = f"/auto/{e['name']}"
+    pinned = frozenset({"/auto/c", "/auto/d"})
+    plan = plan_retention(entries, RetentionPolicy(keep_days=7, max_total_bytes=GIB), NOW.timestamp(), pinned=pinned)
+    # "d" is past keep_days and "c" over budget, but both have a live download link
+    assert [(e["name"], reason) for e, reason in plan] == [("b", "size budget")]
+
+
+def test_shared_snapshot_chunks_are_freed_only_with_the_last_snapshot():
+    entries = [
+        _entry("new", timedelta(days=1), fmt="dedup", size=10),
+        _entry("mid", timedelta(days=2), fmt="dedup", size=10),
+        _entry("old", timedelta(days=3), fmt="dedup", size=10, new_bytes=3 * GIB),
+    ]
+    digests = {
+        ("auto", "new"): {"base", "n"},
+        ("auto", "mid"): {"base", "m"},
+        ("auto", "old"): {"base", "o"},
+    }
+    sizes = {"base": 3 * GIB, "n": 100, "m": 100, "o": 100}
+
+    ledger = SpaceLedger(entries, digests, sizes)
+    assert ledger.total == 3 * GIB + 300 + 30
+    # "old" added 3 GiB, but "base" is still used by the newer snapshots
+    assert ledger.release(entries[2]) == 110
+
+    policy = RetentionPolicy(keep_days=30, max_total_bytes=GIB)
+    # The budget can never be met while the newest snapshot needs "base": both older ones go anyway
+    assert [n for n, _ in _deleted(entries, policy, ledger=SpaceLedger(entries, digests, sizes))] == ["old", "mid"]
+    # 1 GiB cannot be freed at all: nothing is deleted for disk space
+    assert _deleted(entries, RetentionPolicy(keep_days=30), GIB, SpaceLedger(entries, digests, sizes)) == []
+
+
+def test_estimate_uses_previous_backup_of_the_same_format():
+    entries = [
+        _entry("snap_old", timedelta(days=2), fmt="dedup", new_bytes=5 * GIB),
+        _entry("snap_new", timedelta(days=1), fmt="dedup", new_bytes=GIB // 10),
+        _entry("zip", timedelta(days=3), size=3 * GIB),
+    ]
+    assert estimate_backup_bytes(entries, "dedup") == GIB // 10
+    assert estimate_backup_bytes(entries, "zip") == 3 * GIB
+    assert estimate_backup_bytes([], "zip") is None
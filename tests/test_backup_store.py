@@ -0,0 +1,185 @@
+"""
+Tests for src/backup_store.py — chunking, snapshots, restore, export, GC
+"""
+import io
+import os
+import random
+import struct
+import zipfile
+import zlib
+import pytest
+from src.backup_store import (
+    CDC_MAX, CDC_MIN, SECTOR, ChunkStore, collect_garbage, crc32_combine, create_snapshot,
+    export_zip, iter_chunks, load_manifest, restore_snapshot,
+)
+
+
+@pytest.fixture
+def world(tmp_path):
+    path = tmp_path / "world"
+    (path / "region").mkdir(parents=True)
+    rng = random.Random(1)
+    (path / "region" / "r.0.0.mca").write_bytes(rng.randbytes(3 * 1024 * 1024))
+    (path / "level.dat").write_bytes(b"level" * 100)
+    (path / "session.lock").write_bytes(b"lock")
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ChunkStore(str(tmp_path / "store"))
+
+
+def test_chunks_are_sector_aligned_and_bounded():
+    data = random.Random(2).randbytes(5 * 1024 * 1024 + 123)
+    chunks = list(iter_chunks(io.BytesIO(data)))
+    assert b"".join(chunks) == data
+    for chunk in chunks[:-1]:
+        assert len(chunk) % SECTOR == 0
+        assert CDC_MIN <= len(chunk) <= CDC_MAX
+
+
+def test_insert_only_changes_nearby_chunks():
+    data = random.Random(3).randbytes(4 * 1024 * 1024)
+    shifted = data[:1024 * 1024] + b"\x01" * SECTOR + data[1024 * 1024:]
+    before = set(iter_chunks(io.BytesIO(data)))
+    after = list(iter_chunks(io.BytesIO(shifted)))
+    assert sum(1 for c in after if c not in before) <= 2
+
+
+def test_snapshot_roundtrip(world, store, tmp_path):
+    snap = str(tmp_path / "a.snap")
+    manifest = create_snapshot(str(world), snap, store)
+    assert [e["path"] for e in manifest["files"]] == ["level.dat", "region/r.0.0.mca"]
+    assert load_manifest(snap)["files"] == manifest["files"]
+
+    restored = tmp_path / "restored"
+    restore_snapshot(load_manifest(snap), str(restored), store)
+    assert (restored / "region" / "r.0.0.mca").read_bytes() == (world / "region" / "r.0.0.mca").read_bytes()
+    assert (restored / "level.dat").read_bytes() == (world / "level.dat").read_bytes()
+    assert not (restored / "session.lock").exists()
+
+
+def test_second_snapshot_reuses_unchanged_files(world, store, tmp_path):
+    first = create_snapshot(str(world), str(tmp_path / "a.snap"), store)
+    (world / "level.dat").write_bytes(b"changed")
+    second = create_snapshot(str(world), str(tmp_path / "b.snap"), store, previous=first)
+
+    assert second["stats"]["reused_files"] == 1
+    assert 0 < second["stats"]["new_bytes"] < 100
+    region = [e for e in second["files"] if e["path"] == "region/r.0.0.mca"][0]
+    assert region["chunks"] == first["files"][1]["chunks"]
+
+
+def test_export_zip(world, store, tmp_path):
+    manifest = create_snapshot(str(world), str(tmp_path / "a.snap"), store)
+    zip_path = str(tmp_path / "a.zip")
+    export_zip(manifest, zip_path, store)
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+        assert zf.read("region/r.0.0.mca") == (world / "region" / "r.0.0.mca").read_bytes()
+
+
+def test_collect_garbage_keeps_referenced_chunks(world, store, tmp_path):
+    a, b = str(tmp_path / "a.snap"), str(tmp_path / "b.snap")
+    create_snapshot(str(world), a, store)
+    (world / "level.dat").write_bytes(b"other level data")
+    create_snapshot(str(world), b, store)
+
+    os.remove(a)
+    removed, _ = collect_garbage(store, [b])
+    assert removed == 1
+
+    restored = tmp_path / "restored"
+    restore_snapshot(load_manifest(b), str(restored), store)
+    assert (restored / "level.dat").read_bytes() == b"other level data"
+
+
+def _write_region(path, chunks):
+    """chunks: {index: (timestamp, payload)} laid out back to back after the header."""
+    locations, timestamps, body = [0] * 1024, [0] * 1024, b""
+    for index, (timestamp, payload) in sorted(chunks.items()):
+        data = struct.pack(">I", len(payload) + 1) + b"\x02" + payload
+        sectors = -(-len(data) // SECTOR)
+        locations[index] = ((2 + len(body) // SECTOR) << 8) | sectors
+        timestamps[index] = timestamp
+        body += data.ljust(sectors * SECTOR, b"\x00")
+    path.write_bytes(struct.pack(">1024I", *locations) + struct.pack(">1024I", *timestamps) + body)
+
+
+def test_region_snapshot_reads_only_changed_chunks(tmp_path, store):
+    world = tmp_path / "world"
+    (world / "region").mkdir(parents=True)
+    region = world / "region" / "r.0.0.mca"
+    rng = random.Random(4)
+    chunks = {i: (1000, rng.randbytes(6000)) for i in range(0, 200, 7)}
+    _write_region(region, chunks)
+    first = create_snapshot(str(world), str(tmp_path / "a.snap"), store)
+
+    chunks[14] = (2000, rng.randbytes(6000))
+    _write_region(region, chunks)
+    second = create_snapshot(str(world), str(tmp_path / "b.snap"), store, previous=first)
+
+    stats = second["stats"]
+    assert stats["reused_chunks"] == len(chunks) - 1
+    assert stats["read_bytes"] == 2 * SECTOR + 2 * SECTOR  # header + the rewritten chunk's two sectors
+
+    restored = tmp_path / "restored"
+    restore_snapshot(load_manifest(str(tmp_path / "b.snap")), str(restored), store)
+    assert (restored / "region" / "r.0.0.mca").read_bytes() == region.read_bytes()
+
+
+def test_parallel_snapshot_matches_serial(world, tmp_path):
+    serial = create_snapshot(str(world), str(tmp_path / "a.snap"), ChunkStore(str(tmp_path / "s1")))
+    parallel = create_snapshot(str(world), str(tmp_path / "b.snap"), ChunkStore(str(tmp_path / "s2")), workers=4)
+    assert parallel["files"] == serial["files"]
+    assert parallel["stats"]["new_bytes"] == serial["stats"]["new_bytes"]
+
+
+def test_store_codec_and_precompressed_policy(world, tmp_path):
+    store = ChunkStore(str(tmp_path / "store"), compression="store")
+    manifest = create_snapshot(str(world), str(tmp_path / "a.snap"), store)
+    for entry in manifest["files"]:
+        for digest, _ in entry["chunks"]:
+            with open(store._path(digest), "rb") as f:
+                assert f.read(1) == b"r"
+    # level.dat is gzip'd NBT in a real world: stored as is even with deflate
+    deflate = ChunkStore(str(tmp_path / "deflate"))
+    manifest = create_snapshot(str(world), str(tmp_path / "b.snap"), deflate)
+    level = [e for e in manifest["files"] if e["path"] == "level.dat"][0]
+    with open(deflate._path(level["chunks"][0][0]), "rb") as f:
+        assert f.read(1) == b"r"
+
+
+def test_region_crc_is_recorded_without_reading_unchanged_chunks(tmp_path, store):
+    world = tmp_path / "world"
+    (world / "region").mkdir(parents=True)
+    region = world / "region" / "r.0.0.mca"
+    rng = random.Random(7)
+    other = world / "region" / "r.0.1.mca"
+    chunks = {i: (1000, rng.randbytes(6000)) for i in range(0, 300, 11)}
+    _write_region(region, chunks)
+    _write_region(other, {i: (1000, rng.randbytes(3000)) for i in range(5, 100, 13)})
+    first = create_snapshot(str(world), str(tmp_path / "a.snap"), store)
+    assert first["files"][0]["crc32"] == zlib.crc32(region.read_bytes())
+
+    # A snapshot from before per-chunk CRCs: the next one fills them in from the files
+    legacy = load_manifest(str(tmp_path / "a.snap"))
+    for entry in legacy["files"]:
+        entry["crc32"] = None
+        for chunk in entry["region"]["chunks"]:
+            del chunk[6:]
+    chunks[22] = (2000, rng.randbytes(6000))
+    _write_region(region, chunks)
+    second = create_snapshot(str(world), str(tmp_path / "b.snap"), store, previous=legacy)
+    assert second["stats"]["reused_files"] == 1
+    for entry, path in zip(second["files"], (region, other)):
+        assert entry["crc32"] == zlib.crc32(path.read_bytes())
+        assert all(len(chunk) == 7 for chunk in entry["region"]["chunks"])
+
+
+def test_crc32_combine():
+    rng = random.Random(8)
+    for _ in range(50):
+        a, b = rng.randbytes(rng.randrange(3000)), rng.randbytes(rng.randrange(300000))
+        assert crc32_combine(zlib.crc32(a), zlib.crc32(b), len(b)) == zlib.crc32(a + b)
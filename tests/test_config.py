@@ -1,7 +1,13 @@
 """
-Tests for src/config.py — validate_user_config()
+Tests for src/config.py — validate_user_config(), config snapshots, async API
 """
-from src.config import validate_user_config
+import asyncio
+import json
+import threading
+import pytest
+from filelock import FileLock
+from unittest.mock import patch
+from src.config import Config, validate_user_config
 
 
 class TestValidateUserConfig:
@@ -83,6 +89,20 @@ class TestValidateUserConfig:
         valid, errors = validate_user_config(valid_user_config)
         assert valid is False
 
+    def test_backup_format_invalid(self, valid_user_config):
+        valid_user_config["backup_format"] = "tar"
+        valid, errors = validate_user_config(valid_user_config)
+        assert valid is False
+        assert any("backup_format" in e for e in errors)
+
+    def test_backup_retention_tiers(self, valid_user_config):
+        valid_user_config.update(backup_keep_daily=7, backup_keep_weekly=4, backup_max_total_gb=50)
+        assert validate_user_config(valid_user_config)[0] is True
+        valid_user_config["backup_keep_monthly"] = -1
+        valid, errors = validate_user_config(valid_user_config)
+        assert valid is False
+        assert any("backup_keep_monthly" in e for e in errors)
+
     def test_missing_timezone(self, valid_user_config):
         del valid_user_config["timezone"]
         valid, errors = validate_user_config(valid_user_config)
@@ -120,3 +140,184 @@ class TestValidateUserConfig:
         valid_user_config["custom_ip"] = "mc.example.com"
         valid, errors = validate_user_config(valid_user_config)
         assert valid is True
+
+
+
+@pytest.fixture
+def isolated_config(tmp_path, valid_user_config):
+    """A Config instance bound to temp files instead of the real data/ directory."""
+    user_file = tmp_path / "user_config.json"
+    bot_file = tmp_path / "bot_config.json"
+    user_file.write_text(json.dumps(valid_user_config))
+    bot_file.write_text(json.dumps({"server_directory": str(tmp_path / "mc-server")}))
+
+    cfg = object.__new__(Config)
+    cfg.USER_CONFIG_FILE = str(user_file)
+    cfg.BOT_CONFIG_FILE = str(bot_file)
+    cfg._user_lock = FileLock(str(user_file) + ".lock", timeout=10)
+    cfg._bot_lock = FileLock(str(bot_file) + ".lock", timeout=10)
+    cfg._init_snapshots()
+    cfg._init_async()
+    cfg.load()
+    return cfg
+
+
+class TestConfigSnapshots:
+    """Versioned snapshots published on every committed change."""
+
+    def test_load_publishes_snapshot(self, isolated_config, valid_user_config):
+        assert isolated_config.user_config_version == 1
+        assert isolated_config.user_snapshot == valid_user_config
+
+    def test_update_bumps_version_and_notifies(self, isolated_config):
+        events = []
+        isolated_config.add_change_listener(lambda section, version, snap: events.append((section, version, snap)))
+
+        with isolated_config.update_user_config() as data:
+            data['triggers'] = {"hello": "say hi"}
+
+        assert isolated_config.user_config_version == 2
+        assert isolated_config.user_snapshot['triggers'] == {"hello": "say hi"}
+        assert events == [('user', 2, isolated_config.user_snapshot)]
+
+    def test_unchanged_content_keeps_version(self, isolated_config):
+        """Saving bot_config re-reads user_config, but an unchanged file must not look like a change."""
+        isolated_config.save_bot_config({"server_directory": "./mc-server", "guild_id": 1})
+        assert isolated_config.user_config_version == 1
+        assert isolated_config.bot_config_version == 2
+
+    def test_snapshot_is_a_copy(self, isolated_config):
+        data = isolated_config.load_user_config()
+        data['triggers'] = {"x": "y"}
+        isolated_config.save_user_config(data)
+        data['triggers']['z'] = "w"
+        assert isolated_config.user_snapshot['triggers'] == {"x": "y"}
+
+
+class TestIncrementalApply:
+    """Saves/updates re-apply only their own section from memory."""
+
+    def test_save_bot_config_does_not_reread_files(self, isolated_config):
+        with patch.object(isolated_config, '_load_user_config_no_lock') as load_user, \
+             patch.object(isolated_config, '_load_bot_config_no_lock') as load_bot:
+            isolated_config.save_bot_config({"server_directory": "/srv/mc", "guild_id": 42})
+        load_user.assert_not_called()
+        load_bot.assert_not_called()
+        assert isolated_config.GUILD_ID == 42
+        assert isolated_config.SERVER_DIR == "/srv/mc"
+
+    def test_update_user_config_applies_in_memory(self, isolated_config):
+        with patch.object(isolated_config, '_load_bot_config_no_lock') as load_bot:
+            with isolated_config.update_user_config() as data:
+                data['backup_keep_days'] = 14
+        load_bot.assert_not_called()
+        assert isolated_config.BACKUP_RETENTION_DAYS == 14
+
+    def test_timezone_lookup_only_when_setting_changes(self, isolated_config):
+        with patch('src.config.threading.Thread') as thread:
+            with isolated_config.update_user_config() as data:
+                data['timezone'] = 'auto'
+            assert thread.call_count == 1
+            assert isolated_config.TIMEZONE == 'UTC'
+
+            # Unrelated change: keep the resolved timezone, no new ip-api lookup
+            isolated_config.TIMEZONE = 'Europe/Ljubljana'
+            with isolated_config.update_user_config() as data:
+                data['backup_keep_days'] = 3
+            assert thread.call_count == 1
+            assert isolated_config.TIMEZONE == 'Europe/Ljubljana'
+
+    def test_save_user_config_rejects_invalid_before_writing(self, isolated_config):
+        before = open(isolated_config.USER_CONFIG_FILE).read()
+        data = isolated_config.load_user_config()
+        data['backup_keep_days'] = 0
+        with pytest.raises(ValueError):
+            isolated_config.save_user_config(data)
+        assert open(isolated_config.USER_CONFIG_FILE).read() == before
+
+    def test_save_keeps_resolved_roles(self, isolated_config):
+        isolated_config.ROLES = {"123": ["status"]}
+        isolated_config.save_bot_config({"server_directory": "./mc-server"})
+        assert isolated_config.ROLES == {"123": ["status"]}
+
+
+class TestAsyncConfig:
+    """aload_/asave_/aupdate_* keep file-lock waits off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_aupdate_runs_off_loop_and_returns_result(self, isolated_config):
+        loop_thread = threading.get_ident()
+        seen = []
+
+        def mutate(data):
+            seen.append(threading.get_ident())
+            data['events'] = [{"name": "party"}]
+            return "ok"
+
+        assert await isolated_config.aupdate_bot_config(mutate) == "ok"
+        assert seen and seen[0] != loop_thread
+        assert (await isolated_config.aload_bot_config())['events'] == [{"name": "party"}]
+        assert isolated_config.bot_snapshot['events'] == [{"name": "party"}]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_updates_are_coalesced(self, isolated_config):
+        with patch.object(isolated_config, '_save_bot_config_no_lock',
+                          wraps=isolated_config._save_bot_config_no_lock) as save:
+            def bump(data):
+                data['counter'] = data.get('counter', 0) + 1
+
+            await asyncio.gather(*(isolated_config.aupdate_bot_config(bump) for _ in range(20)))
+
+        assert json.load(open(isolated_config.BOT_CONFIG_FILE))['counter'] == 20
+        assert save.call_count < 20
+
+    @pytest.mark.asyncio
+    async def test_failing_mutator_does_not_affect_batch(self, isolated_config):
+        def good(data):
+            data['guild_id'] = 7
+
+        def bad(data):
+            data['guild_id'] = 999
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(isolated_config.aupdate_bot_config(bad),
+                                       isolated_config.aupdate_bot_config(good),
+                                       return_exceptions=True)
+        assert isinstance(results[0], RuntimeError)
+        assert isolated_config.GUILD_ID == 7
+
+    @pytest.mark.asyncio
+    async def test_invalid_user_update_is_rejected(self, isolated_config):
+        def invalid(data):
+            data['backup_keep_days'] = 0
+
+        with pytest.raises(ValueError):
+            await isolated_config.aupdate_user_config(invalid)
+        assert json.load(open(isolated_config.USER_CONFIG_FILE))['backup_keep_days'] != 0
+
+    @pytest.mark.asyncio
+    async def test_lock_contention_does_not_block_loop(self, isolated_config):
+        """While another thread holds the file lock, the event loop keeps running."""
+        release = threading.Event()
+        held = threading.Event()
+
+        def holder():
+            with FileLock(isolated_config.BOT_CONFIG_FILE + ".lock"):
+                held.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        held.wait(5)
+        try:
+            update = asyncio.create_task(isolated_config.aupdate_bot_config(lambda d: d.update(guild_id=5)))
+            ticks = 0
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+                ticks += 1
+            assert ticks == 5 and not update.done()
+        finally:
+            release.set()
+        await update
+        thread.join()
+        assert isolated_config.GUILD_ID == 5
@@ -0,0 +1,73 @@
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from src.http_client import HTTPClient
+
+
+@pytest_asyncio.fixture
+async def client():
+    c = HTTPClient(user_agent="mc-bot-tests/1.0")
+    yield c
+    await c.close()
+
+
+@pytest_asyncio.fixture
+async def server():
+    async def echo_agent(request):
+        return web.json_response({
+            "ua":   request.headers.get("User-Agent"),
+            "peer": request.transport.get_extra_info("peername")[1],
+        })
+
+    async def broken(request):
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_get("/ua", echo_agent)
+    app.router.add_get("/broken", broken)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    yield f"http://127.0.0.1:{port}"
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_session_is_shared_until_closed(client):
+    first = client.session()
+    assert client.session() is first
+
+    await client.close()
+    assert first.closed
+    assert client.session() is not first
+
+
+@pytest.mark.asyncio
+async def test_requests_carry_user_agent_and_reuse_connection(client, server):
+    session = client.session()
+    peers = set()
+    for _ in range(3):
+        async with session.get(f"{server}/ua") as resp:
+            data = await resp.json()
+            assert data["ua"] == "mc-bot-tests/1.0"
+            peers.add(data["peer"])
+
+    # Keep-alive: all three requests came from the same client port
+    assert len(peers) == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_per_host(client, server):
+    session = client.session()
+    async with session.get(f"{server}/ua") as resp:
+        await resp.read()
+    async with session.get(f"{server}/broken") as resp:
+        await resp.read()
+
+    stats = client.metrics()["127.0.0.1"]
+    assert stats["requests"] == 2
+    assert stats["errors"] == 1
+    assert stats["max_ms"] >= stats["avg_ms"] > 0
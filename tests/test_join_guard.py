@@ -57,17 +57,14 @@ async def test_handle_player_login_premium_link_challenged(join_guard):
 async def test_handle_player_login_cracked_no_link_kicked(join_guard):
     """Test that a cracked player with no link is kicked."""
     join_guard.link_manager.get_link_by_mc.return_value = None
+    join_guard._kick = AsyncMock()
     
-    with patch('src.join_guard.verify_premium_mc_account', new_callable=AsyncMock) as mock_verify:
-        mock_verify.return_value = False
-        join_guard._kick = AsyncMock()
-        
-        await join_guard.handle_player_login("CrackedPlayer", "uuid-456")
-        
-        join_guard._kick.assert_called_once()
-        args, _ = join_guard._kick.call_args
-        assert args[0] == "CrackedPlayer"
-        assert "ni povezan z Discordom" in args[1]
+    await join_guard.handle_player_login("CrackedPlayer", "uuid-456")
+    
+    join_guard._kick.assert_called_once()
+    args, _ = join_guard._kick.call_args
+    assert args[0] == "CrackedPlayer"
+    assert "ni povezan z Discordom" in args[1]
 
 @pytest.mark.asyncio
 async def test_handle_player_login_cracked_link_grace_period(join_guard):
@@ -75,15 +72,13 @@ async def test_handle_player_login_cracked_link_grace_period(join_guard):
     join_guard.link_manager.get_link_by_mc.return_value = {
         "discord_id": 123,
         "mc_username": "CrackedLinked",
-        "is_premium": False
+        "is_premium": False,
+        "last_verified": time.time() - 60,
     }
-    join_guard.link_manager.is_within_grace.return_value = True
     join_guard._kick = AsyncMock()
     
-    with patch('src.join_guard.verify_premium_mc_account', new_callable=AsyncMock) as mock_verify:
-        mock_verify.return_value = False
-        await join_guard.handle_player_login("CrackedLinked", "uuid-abc")
-        join_guard._kick.assert_not_called()
+    await join_guard.handle_player_login("CrackedLinked", "uuid-abc")
+    join_guard._kick.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_handle_player_login_cracked_link_issue_challenge(join_guard):
@@ -96,14 +91,58 @@ async def test_handle_player_login_cracked_link_issue_challenge(join_guard):
     join_guard.link_manager.is_within_grace.return_value = False
     join_guard._kick = AsyncMock()
     
-    with patch('src.join_guard.verify_premium_mc_account', new_callable=AsyncMock) as mock_verify:
-        mock_verify.return_value = False
-        await join_guard.handle_player_login("CrackedLinked", "uuid-abc")
-        
-        # In new JoinGuard, issuing challenge means kicking with a code
-        join_guard._kick.assert_called_once()
-        assert "Koda:" in join_guard._kick.call_args[0][1]
-        assert "crackedlinked" in join_guard.active_challenges
+    await join_guard.handle_player_login("CrackedLinked", "uuid-abc")
+    
+    # In new JoinGuard, issuing challenge means kicking with a code
+    join_guard._kick.assert_called_once()
+    assert "Koda:" in join_guard._kick.call_args[0][1]
+    assert "crackedlinked" in join_guard.active_challenges
+
+@pytest.mark.asyncio
+async def test_login_looks_up_link_once(join_guard):
+    """The grace window is read from the fetched record — no second lookup."""
+    join_guard.link_manager.get_link_by_mc.return_value = {
+        "discord_id": 123,
+        "mc_username": "CrackedLinked",
+        "last_disconnect": time.time() - 3600,
+    }
+    join_guard._kick = AsyncMock()
+
+    await join_guard.handle_player_login("CrackedLinked", "uuid-abc")
+
+    join_guard._kick.assert_not_called()
+    join_guard.link_manager.get_link_by_mc.assert_called_once_with("CrackedLinked")
+    join_guard.link_manager.is_within_grace.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_slow_link_lookup_fails_closed(join_guard, monkeypatch):
+    monkeypatch.setattr('src.join_guard.LOGIN_DECISION_BUDGET', 0.05)
+
+    async def slow_lookup(name):
+        await asyncio.sleep(1)
+
+    join_guard.link_manager.get_link_by_mc = slow_lookup
+    join_guard._kick = AsyncMock()
+
+    await join_guard.handle_player_login("SomePlayer", "uuid-1")
+
+    join_guard._kick.assert_called_once()
+    assert "Napaka" in join_guard._kick.call_args[0][1]
+
+@pytest.mark.asyncio
+async def test_kick_retries_until_player_has_joined(join_guard, monkeypatch):
+    monkeypatch.setattr('src.join_guard.KICK_RETRY_DELAYS', (0, 0, 0))
+    replies = [(True, "No player was found"), (True, "No player was found"), (True, "Kicked SomePlayer")]
+    with patch('src.join_guard.rcon_cmd', new_callable=AsyncMock, side_effect=replies) as rcon:
+        await join_guard._kick("SomePlayer", "bye")
+    assert rcon.call_count == 3
+
+@pytest.mark.asyncio
+async def test_kick_gives_up_after_retries(join_guard, monkeypatch):
+    monkeypatch.setattr('src.join_guard.KICK_RETRY_DELAYS', (0, 0))
+    with patch('src.join_guard.rcon_cmd', new_callable=AsyncMock, return_value=(False, "RCON down")) as rcon:
+        await join_guard._kick("SomePlayer", "bye")
+    assert rcon.call_count == 3
 
 @pytest.mark.asyncio
 async def test_verify_code_success(join_guard):
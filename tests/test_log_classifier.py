@@ -0,0 +1,52 @@
+"""
+Tests for src/log_classifier.py — classify()
+"""
+import pytest
+from src.log_classifier import classify
+
+
+@pytest.mark.parametrize("line, kind, player, data", [
+    ("[10:22:34] [User Authenticator #1/INFO]: UUID of player Steve is 1234abcd-5678-90ef-1234-567890abcdef",
+     "auth", "Steve", "1234abcd-5678-90ef-1234-567890abcdef"),
+    ("[10:22:34] [Netty Server IO #1/INFO]: UUID of player forge_user is 00000000-0000-0000-0000-000000000000",
+     "auth", "forge_user", "00000000-0000-0000-0000-000000000000"),
+    ("[10:22:35] [Server thread/INFO]: Steve joined the game", "join", "Steve", None),
+    ("[10:22:36] [Server thread/INFO]: Steve left the game", "leave", "Steve", None),
+    ("[10:22:36] [Server thread/INFO]: Steve lost connection: You logged in from another location",
+     "collision", "Steve", None),
+    ("[10:22:35] [Server thread/INFO]: Steve[/127.0.0.1:51234] logged in with entity id 42 at (0.5, 64.0, 0.5)",
+     "connect", "Steve", None),
+    ("[10:20:00] [Server thread/INFO]: Starting minecraft server version 1.21.1", "starting", None, "1.21.1"),
+    ("[10:21:00] [Server thread/INFO] [minecraft/DedicatedServer]: Done (4.213s)! For help, type \"help\"",
+     "started", None, None),
+    ("[11:00:00] [Server thread/INFO]: Stopping server", "stopping", None, None),
+    ("[11:00:00] [Server thread/INFO]: Saved the game", "saved", None, None),
+    ("[10:30:00] [Server thread/INFO]: <Steve> hello world", "chat", "Steve", "hello world"),
+    ("[10:30:00] [Server thread/INFO]: [Not Secure] <Steve> hi", "chat", "Steve", "hi"),
+    ("[10:31:00] [Server thread/INFO]: Steve was slain by Zombie", "death", "Steve", "Steve was slain by Zombie"),
+])
+def test_classify_kinds(line, kind, player, data):
+    event = classify(line)
+    assert (event.kind, event.player, event.data) == (kind, player, data)
+
+
+def test_header_fields():
+    event = classify("[10:22:34] [Server thread/WARN]: Can't keep up!")
+    assert (event.time, event.thread, event.level, event.message) == ("10:22:34", "Server thread", "WARN", "Can't keep up!")
+    assert event.kind == "other"
+
+
+def test_headerless_line():
+    event = classify("\tat net.minecraft.server.Main.main(Main.java:1)")
+    assert event.kind == "other"
+    assert event.level is None
+
+
+def test_chat_cannot_spoof_events():
+    """Look-alike text inside chat stays chat."""
+    assert classify("[10:30:00] [Server thread/INFO]: <bob> alice left the game").kind == "chat"
+
+
+def test_wrong_thread_is_not_trusted():
+    assert classify("[10:30:00] [Server thread/INFO]: UUID of player admin is 0000").kind == "other"
+    assert classify("[10:30:00] [Worker-1/INFO]: Stopping server").kind == "other"
@@ -0,0 +1,157 @@
+"""
+Tests for src/log_dispatcher.py — batched fan-out and subscriber overflow policies
+"""
+import asyncio
+import pytest
+from src import log_dispatcher as ld
+from src.log_dispatcher import LogDispatcher, LogSubscription
+from src.log_classifier import classify
+
+
+@pytest.mark.asyncio
+async def test_batch_subscriber_gets_lines_coalesced():
+    """Several tailer chunks inside the window arrive as one list."""
+    d = LogDispatcher()
+    q = d.subscribe(batch=True)
+
+    d._queue_batch(["a", "b"])
+    d._queue_batch(["c"])
+    assert q.empty()
+
+    batch = await asyncio.wait_for(q.get(), timeout=1.0)
+    assert batch == ["a", "b", "c"]
+    assert q.empty()
+
+
+@pytest.mark.asyncio
+async def test_batch_flushes_immediately_when_full(monkeypatch):
+    """Reaching BATCH_MAX_LINES flushes without waiting for the window, split into size-limited lists."""
+    monkeypatch.setattr(ld, "BATCH_MAX_LINES", 3)
+    d = LogDispatcher()
+    q = d.subscribe(batch=True)
+
+    d._queue_batch(["1", "2", "3", "4", "5"])
+
+    assert q.get_nowait() == ["1", "2", "3"]
+    assert q.get_nowait() == ["4", "5"]
+    assert d._flush_handle is None
+
+
+@pytest.mark.asyncio
+async def test_no_batching_without_batch_subscribers():
+    """Per-line-only setups never accumulate pending batches."""
+    d = LogDispatcher()
+    d.subscribe()
+    d._queue_batch(["x"])
+    assert d._pending == []
+    assert d._flush_handle is None
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_batch_queue():
+    d = LogDispatcher()
+    q = d.subscribe(batch=True)
+    d.unsubscribe(q)
+    assert d._subscribers == []
+
+
+def test_drop_newest_counts_drops():
+    sub = LogSubscription("t", maxsize=2)
+    for line in ("a", "b", "c"):
+        sub.offer(line)
+    assert [sub.get_nowait(), sub.get_nowait()] == ["a", "b"]
+    assert sub.stats()["dropped"] == 1
+    assert sub.stats()["delivered"] == 2
+
+
+def test_drop_oldest_keeps_newest():
+    sub = LogSubscription("t", policy="drop_oldest", maxsize=2)
+    for line in ("a", "b", "c"):
+        sub.offer(line)
+    assert [sub.get_nowait(), sub.get_nowait()] == ["b", "c"]
+    assert sub.dropped == 1
+
+
+def test_priority_lines_survive_overflow_in_order():
+    """Auth lines are never discarded, even when the queue is full."""
+    sub = LogSubscription("t", batch=True, policy="drop_oldest", maxsize=1, priority=("UUID of player",))
+    sub.offer([classify("noise 1"), classify("UUID of player a is 1")])
+    sub.offer([classify("noise 2")])
+    sub.offer([classify("UUID of player b is 2")])
+
+    lines = []
+    while not sub.empty():
+        lines.extend(event.raw for event in sub.get_nowait())
+    assert lines == ["UUID of player a is 1", "UUID of player b is 2"]
+    assert sub.dropped == 2
+
+
+def test_block_policy_never_drops():
+    sub = LogSubscription("t", policy="block", maxsize=2)
+    for i in range(5):
+        sub.offer(str(i))
+    assert sub.qsize() == 5
+    assert sub.dropped == 0
+    assert sub.peak_depth == 5
+
+
+@pytest.mark.asyncio
+async def test_backpressure_waits_for_block_subscriber():
+    """The dispatcher holds the tailer until a blocking consumer drains below maxsize."""
+    d = LogDispatcher()
+    sub = d.subscribe(name="guard", policy="block", maxsize=1)
+    sub.offer("x")
+
+    waiter = asyncio.ensure_future(d._apply_backpressure())
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    sub.get_nowait()
+    await asyncio.wait_for(waiter, timeout=1.0)
+    assert sub.stalls == 0
+
+
+@pytest.mark.asyncio
+async def test_backpressure_gives_up_on_stuck_subscriber(monkeypatch):
+    monkeypatch.setattr(ld, "BLOCK_TIMEOUT", 0.05)
+    d = LogDispatcher()
+    sub = d.subscribe(name="stuck", policy="block", maxsize=1)
+    sub.offer("x")
+
+    await asyncio.wait_for(d._apply_backpressure(), timeout=1.0)
+    assert d.get_stats()[0]["stalls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dispatch_applies_backpressure_after_flush():
+    """A blocking batch consumer is judged with the new batch already queued, not one batch late."""
+    d = LogDispatcher()
+    sub = d.subscribe(batch=True, name="guard", policy="block", maxsize=1)
+
+    waiter = asyncio.ensure_future(d._dispatch(["UUID of player Steve is 1234"]))
+    await asyncio.sleep(ld.BATCH_WINDOW * 3)
+    assert sub.qsize() == 1
+    assert not waiter.done()
+
+    batch = sub.get_nowait()
+    await asyncio.wait_for(waiter, timeout=1.0)
+    assert [event.raw for event in batch] == ["UUID of player Steve is 1234"]
+
+
+def test_stalled_block_subscriber_keeps_priority_lines():
+    """Past the overflow limit a "block" consumer only takes its priority lines."""
+    sub = LogSubscription("guard", batch=True, policy="block", maxsize=1, priority=("UUID of player",))
+    for _ in range(1 + ld.OVERFLOW_LIMIT):
+        sub.offer([classify("noise")])
+    sub.offer([classify("noise")])
+    assert sub.dropped == 1
+
+    sub.offer([classify("noise"), classify("UUID of player Steve is 1234")])
+    assert sub.dropped == 3                      # the new noise line and the oldest queued one
+    assert sub.qsize() == 1 + ld.OVERFLOW_LIMIT
+    assert [e.raw for e in sub._items[-1][0]] == ["UUID of player Steve is 1234"]
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        LogSubscription("t", policy="lossy")
@@ -0,0 +1,98 @@
+"""
+Tests for src/log_tailer.py — LogTailer
+"""
+import os
+import asyncio
+import pytest
+from src.log_tailer import LogTailer
+
+
+async def _next_batch(gen, timeout=3.0):
+    return await asyncio.wait_for(gen.__anext__(), timeout=timeout)
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "logs" / "latest.log"
+    path.parent.mkdir()
+    path.write_text("[12:00:00] [Server thread/INFO]: old line\n")
+    return path
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+@pytest.mark.asyncio
+async def test_follows_appended_lines_from_end(log_file, use_inotify):
+    """Existing content is skipped; appended lines arrive as one batch."""
+    tailer = LogTailer(str(log_file), poll_interval=0.05, use_inotify=use_inotify)
+    gen = tailer.follow()
+    task = asyncio.ensure_future(_next_batch(gen))
+    await asyncio.sleep(0.1)
+
+    with open(log_file, "a") as f:
+        f.write("first\nsecond\n")
+
+    assert await task == ["first", "second"]
+    await gen.aclose()
+
+
+@pytest.mark.asyncio
+async def test_partial_line_is_held_back(log_file):
+    """A line without its newline is only emitted once it is completed."""
+    tailer = LogTailer(str(log_file), poll_interval=0.05, use_inotify=False)
+    gen = tailer.follow()
+    task = asyncio.ensure_future(_next_batch(gen))
+    await asyncio.sleep(0.1)
+
+    with open(log_file, "a") as f:
+        f.write("hal")
+    await asyncio.sleep(0.2)
+    assert not task.done()
+
+    with open(log_file, "a") as f:
+        f.write("f done\n")
+    assert await task == ["half done"]
+    await gen.aclose()
+
+
+@pytest.mark.asyncio
+async def test_rotation_switches_to_new_file(log_file):
+    """Renaming latest.log and creating a new one continues from offset 0 of the new file."""
+    tailer = LogTailer(str(log_file), poll_interval=0.05)
+    gen = tailer.follow()
+    task = asyncio.ensure_future(_next_batch(gen))
+    await asyncio.sleep(0.1)
+
+    os.rename(log_file, log_file.parent / "2026-01-01-1.log")
+    log_file.write_text("fresh start\n")
+
+    assert await task == ["fresh start"]
+    await gen.aclose()
+
+
+@pytest.mark.asyncio
+async def test_truncation_restarts_from_zero(log_file):
+    """A copytruncate-style rotation (same inode, smaller size) is detected."""
+    tailer = LogTailer(str(log_file), poll_interval=0.05, use_inotify=False)
+    gen = tailer.follow()
+    task = asyncio.ensure_future(_next_batch(gen))
+    await asyncio.sleep(0.1)
+
+    with open(log_file, "w") as f:
+        f.write("after\n")
+
+    assert await task == ["after"]
+    await gen.aclose()
+
+
+@pytest.mark.asyncio
+async def test_waits_for_missing_file(tmp_path):
+    """If the log does not exist yet, it is read from the start once it appears."""
+    path = tmp_path / "latest.log"
+    tailer = LogTailer(str(path), poll_interval=0.05)
+    gen = tailer.follow()
+    task = asyncio.ensure_future(_next_batch(gen))
+    await asyncio.sleep(0.1)
+
+    path.write_text("booting\n")
+    assert await task == ["booting"]
+    await gen.aclose()
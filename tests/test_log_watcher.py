@@ -2,6 +2,7 @@ import pytest
 import asyncio
 from unittest.mock import MagicMock, patch
 from src.log_watcher import LogWatcher
+from src.log_classifier import classify
 
 @pytest.fixture
 def mock_bot():
@@ -40,6 +41,22 @@ def test_check_line_no_match(log_watcher, mock_bot):
     
     mock_bot.dispatch.assert_not_called()
 
+def test_check_line_spoofed_auth_in_chat_ignored(log_watcher, mock_bot):
+    """A player typing the auth line in chat must not trigger a login event."""
+    line = "[10:22:34] [Server thread/INFO]: <mallory> UUID of player admin is 00000000-0000-0000-0000-000000000000"
+    log_watcher._check_line(line)
+
+    mock_bot.dispatch.assert_not_called()
+
+def test_check_line_leave_and_lifecycle(log_watcher, mock_bot):
+    log_watcher._check_line("[10:22:34] [Server thread/INFO]: slogiker left the game")
+    log_watcher._check_line("[10:22:35] [Server thread/INFO] [minecraft/DedicatedServer]: Done (4.2s)! For help, type \"help\"")
+    log_watcher._check_line("[10:22:36] [Server thread/INFO]: Stopping the server")
+
+    assert [c.args for c in mock_bot.dispatch.call_args_list] == [
+        ('minecraft_player_quit', 'slogiker'), ('minecraft_started',), ('minecraft_stopping',)
+    ]
+
 @pytest.mark.asyncio
 async def test_process_logs(log_watcher, mock_bot):
     """Test the log processing loop."""
@@ -48,7 +65,7 @@ async def test_process_logs(log_watcher, mock_bot):
     
     # Put a line in the queue
     line = "[10:22:34] [User Authenticator #1/INFO]: UUID of player slogiker is 1234abcd-5678-90ef-1234-567890abcdef"
-    await log_watcher._queue.put(line)
+    await log_watcher._queue.put([classify(line)])
     
     # Run _process_logs in a task
     task = asyncio.create_task(log_watcher._process_logs())
@@ -59,8 +76,30 @@ async def test_process_logs(log_watcher, mock_bot):
     # Stop it
     log_watcher._running = False
     # Put another line to wake up the await queue.get()
-    await log_watcher._queue.put("dummy line")
+    await log_watcher._queue.put([classify("dummy line")])
     
     await asyncio.wait_for(task, timeout=1.0)
 
     mock_bot.dispatch.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_process_logs_handles_whole_batch(log_watcher, mock_bot):
+    """Every line of a batch is checked in one wake-up."""
+    log_watcher._queue = asyncio.Queue()
+    log_watcher._running = True
+
+    await log_watcher._queue.put([classify(line) for line in (
+        "[10:22:34] [User Authenticator #1/INFO]: UUID of player slogiker is 1234abcd-5678-90ef-1234-567890abcdef",
+        "[10:22:35] [Server thread/INFO]: noise",
+        "[10:25:00] [Server thread/INFO]: slogiker left the game",
+    )])
+
+    task = asyncio.create_task(log_watcher._process_logs())
+    await asyncio.sleep(0.1)
+    log_watcher._running = False
+    await log_watcher._queue.put([])
+    await asyncio.wait_for(task, timeout=1.0)
+
+    assert [c.args[0] for c in mock_bot.dispatch.call_args_list] == [
+        'minecraft_player_login', 'minecraft_player_quit'
+    ]
@@ -1,21 +1,19 @@
 import pytest
-import os
-import json
 import asyncio
+import time
+from src import mc_link_manager as mlm
 from src.mc_link_manager import MCLinkManager
+from src.storage import SQLiteStorage
 
-TEST_DB_PATH = "data/test_mc_links.json"
+@pytest.fixture
+def storage(tmp_path):
+    store = SQLiteStorage(str(tmp_path / "state.db"))
+    yield store
+    store.close()
 
 @pytest.fixture
-def manager():
-    # Setup
-    if os.path.exists(TEST_DB_PATH):
-        os.remove(TEST_DB_PATH)
-    mgr = MCLinkManager(data_file=TEST_DB_PATH)
-    yield mgr
-    # Teardown
-    if os.path.exists(TEST_DB_PATH):
-        os.remove(TEST_DB_PATH)
+def manager(storage):
+    return MCLinkManager(storage=storage)
 
 @pytest.mark.asyncio
 async def test_link_account(manager):
@@ -65,3 +63,76 @@ async def test_stealing_link(manager):
     
     link2 = await manager.get_link_by_discord(222)
     assert link2["mc_username"] == "playerOne"
+
+@pytest.mark.asyncio
+async def test_instances_share_one_cache(manager, storage):
+    await manager.link_account(12345, "playerOne", False)
+    other = MCLinkManager(storage=storage)
+    assert other._store is manager._store
+    assert (await other.get_link_by_mc("PLAYERONE"))["discord_id"] == 12345
+
+@pytest.mark.asyncio
+async def test_links_are_stored(manager, storage):
+    await manager.link_account(111, "playerOne", False)
+    await manager.link_account(222, "playerOne", True)
+    assert list(storage.load_links()) == ["222"]
+
+@pytest.mark.asyncio
+async def test_session_stamps_are_written_behind(manager, storage, monkeypatch):
+    monkeypatch.setattr(mlm, "WRITE_DELAY", 0.05)
+    await manager.link_account(1, "alpha", False)
+    await manager.link_account(2, "beta", False)
+
+    writes = []
+    original = storage.update_link_stamps
+    monkeypatch.setattr(storage, "update_link_stamps", lambda stamps: writes.append(stamps) or original(stamps))
+
+    await manager.record_disconnect("Alpha")
+    await manager.record_verified("BETA")
+    assert await manager.is_within_grace("alpha")
+    assert await manager.is_within_grace("beta")
+    assert writes == []
+
+    await asyncio.sleep(0.2)
+    assert len(writes) == 1
+    links = storage.load_links()
+    assert links["1"]["last_disconnect"] is not None
+    assert links["2"]["last_verified"] is not None
+
+@pytest.mark.asyncio
+async def test_timed_out_lookup_does_not_cancel_load(storage, monkeypatch):
+    """A caller giving up on a cold lookup (JoinGuard's budget) leaves the shared load running."""
+    storage.put_link("111", {"mc_username": "playerOne", "is_premium": False, "linked_at": "2026-01-01T00:00:00+00:00",
+                             "last_verified": None, "last_disconnect": None})
+    load_links = storage.load_links
+
+    def slow_load():
+        time.sleep(0.2)
+        return load_links()
+
+    monkeypatch.setattr(storage, "load_links", slow_load)
+    manager = MCLinkManager(storage=storage)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(manager.get_link_by_mc("playerOne"), 0.05)
+    assert not manager._store._load_task.cancelled()
+
+    await manager.load()
+    assert (await manager.get_link_by_mc("playerOne"))["discord_id"] == 111
+
+@pytest.mark.asyncio
+async def test_concurrent_unlink_and_link_keep_index_consistent(manager, storage, monkeypatch):
+    """/unlink and a new /link for the same account: storage and the in-memory index end up agreeing."""
+    await manager.link_account(111, "playerOne")
+    delete_link = storage.delete_link
+
+    def slow_delete(d_id):
+        result = delete_link(d_id)
+        time.sleep(0.1)     # the delete is stored, but its caller resumes late
+        return result
+
+    monkeypatch.setattr(storage, "delete_link", slow_delete)
+    await asyncio.gather(manager.unlink_account(111), manager.link_account(111, "playerTwo"))
+
+    stored = storage.load_links()
+    link = await manager.get_link_by_discord(111)
+    assert (link["mc_username"] if link else None) == (stored["111"]["mc_username"] if "111" in stored else None)
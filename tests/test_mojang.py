@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src import mojang
+from src.mojang import MojangProfileCache, verify_premium_mc_account
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return MojangProfileCache(path=str(tmp_path / "mojang_profiles.json"))
+
+
+PROFILE = {"id": "abc123", "name": "Steve"}
+
+
+@pytest.mark.asyncio
+async def test_positive_result_is_cached(cache):
+    with patch.object(cache, "_fetch", AsyncMock(return_value=("found", PROFILE))) as fetch:
+        assert await cache.lookup("Steve") == PROFILE
+        assert await cache.lookup("steve") == PROFILE
+    fetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_negative_result_expires(cache):
+    with patch.object(cache, "_fetch", AsyncMock(return_value=("missing", None))) as fetch:
+        assert await cache.lookup("Nobody") is None
+        assert await cache.lookup("Nobody") is None
+        assert fetch.await_count == 1
+
+        cache._entries["nobody"]["expires"] = time.time() - 1
+        assert await cache.lookup("Nobody") is None
+        assert fetch.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(cache):
+    with patch.object(cache, "_fetch", AsyncMock(side_effect=[("error", None), ("found", PROFILE)])) as fetch:
+        assert await cache.lookup("Steve") is None
+        assert await cache.lookup("Steve") == PROFILE
+    assert fetch.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_request(cache):
+    calls = 0
+
+    async def slow_fetch(username, session):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "found", PROFILE
+
+    with patch.object(cache, "_fetch", slow_fetch):
+        results = await asyncio.gather(*(cache.lookup("Steve") for _ in range(5)))
+
+    assert results == [PROFILE] * 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_serves_stale_without_calling_api(cache):
+    with patch.object(cache, "_fetch", AsyncMock(return_value=("found", PROFILE))):
+        await cache.lookup("Steve")
+    cache._entries["steve"]["expires"] = time.time() - 1
+    cache._enter_backoff("30")
+
+    with patch.object(cache, "_fetch", AsyncMock()) as fetch:
+        assert await cache.lookup("Steve") == PROFILE
+        assert await cache.lookup("Unknown") is None
+    fetch.assert_not_awaited()
+
+
+def test_backoff_grows_without_retry_after(cache):
+    cache._enter_backoff(None)
+    first = cache._backoff
+    cache._enter_backoff(None)
+    assert first == mojang.BACKOFF_MIN
+    assert cache._backoff == first * 2
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_restart(cache, tmp_path):
+    with patch.object(cache, "_fetch", AsyncMock(return_value=("found", PROFILE))):
+        await cache.lookup("Steve")
+    cache.flush()
+
+    with open(cache.path) as f:
+        assert json.load(f)["steve"]["profile"] == PROFILE
+
+    restarted = MojangProfileCache(path=cache.path)
+    with patch.object(restarted, "_fetch", AsyncMock()) as fetch:
+        assert await restarted.lookup("Steve") == PROFILE
+    fetch.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_verify_premium_uses_shared_cache(cache):
+    with patch.object(mojang, "mojang_profiles", cache), \
+         patch.object(cache, "_fetch", AsyncMock(return_value=("found", PROFILE))) as fetch:
+        assert await verify_premium_mc_account("Steve") is True
+        assert await verify_premium_mc_account("Steve") is True
+    fetch.assert_awaited_once()
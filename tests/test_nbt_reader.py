@@ -0,0 +1,87 @@
+"""
+Tests for src/nbt_reader.py — read_nbt_fields
+"""
+import gzip
+import pytest
+import nbtlib
+from src.nbt_reader import NBTFormatError, read_nbt_fields
+
+
+def _root():
+    return {
+        "Inventory": nbtlib.List[nbtlib.Compound]([
+            nbtlib.Compound({"id": nbtlib.String(f"minecraft:item_{i}"), "Count": nbtlib.Byte(1),
+                             "tag": nbtlib.Compound({"Data": nbtlib.ByteArray([1] * 500)})})
+            for i in range(50)
+        ]),
+        "Heights": nbtlib.LongArray([1, 2, 3]),
+        "Pos": nbtlib.List[nbtlib.Double]([10.5, 70.0, -20.25]),
+        "Health": nbtlib.Float(18.5),
+        "XpLevel": nbtlib.Int(30),
+        "Dimension": nbtlib.String("minecraft:the_nether"),
+        "abilities": nbtlib.Compound({"flying": nbtlib.Byte(1), "walkSpeed": nbtlib.Float(0.25)}),
+        "EnderItems": nbtlib.List[nbtlib.Compound]([]),
+    }
+
+
+@pytest.fixture
+def player_dat(tmp_path):
+    path = str(tmp_path / "player.dat")
+    nbtlib.File(_root()).save(path, gzipped=True)
+    return path
+
+
+def test_reads_only_requested_fields(player_dat):
+    data = read_nbt_fields(player_dat, ("Pos", "Health", "XpLevel", "Dimension"))
+    assert data == {
+        "Pos": [10.5, 70.0, -20.25],
+        "Health": 18.5,
+        "XpLevel": 30,
+        "Dimension": "minecraft:the_nether",
+    }
+
+
+def test_nested_paths_and_arrays(player_dat):
+    data = read_nbt_fields(player_dat, ("abilities.flying", "Heights", "Missing", "Inventory.id"))
+    # Inventory is a list, so a nested path into it selects nothing
+    assert data == {"abilities": {"flying": 1}, "Heights": [1, 2, 3]}
+
+
+def test_whole_compound_when_parent_requested(player_dat):
+    data = read_nbt_fields(player_dat, ("abilities", "abilities.flying"))
+    assert data == {"abilities": {"flying": 1, "walkSpeed": 0.25}}
+
+
+def test_matches_nbtlib_for_full_values(player_dat):
+    data = read_nbt_fields(player_dat, ("Inventory",))
+    full = nbtlib.load(player_dat)["Inventory"]
+    assert len(data["Inventory"]) == len(full) == 50
+    for ours, theirs in zip(data["Inventory"], full):
+        assert ours["id"] == str(theirs["id"])
+        assert ours["Count"] == int(theirs["Count"])
+        assert ours["tag"]["Data"] == [int(b) for b in theirs["tag"]["Data"]]
+
+
+def test_stops_after_last_wanted_root_key(tmp_path):
+    # Everything after Pos is garbage: the reader must not get that far
+    path = tmp_path / "truncated.dat"
+    good = str(tmp_path / "good.dat")
+    nbtlib.File({"Pos": nbtlib.List[nbtlib.Double]([1.0, 2.0, 3.0])}).save(good, gzipped=False)
+    raw = open(good, "rb").read()
+    path.write_bytes(raw[:-1] + b"\x63\xff\xff")
+    assert read_nbt_fields(str(path), ("Pos",)) == {"Pos": [1.0, 2.0, 3.0]}
+
+
+def test_uncompressed_file(tmp_path):
+    path = str(tmp_path / "raw.dat")
+    nbtlib.File(_root()).save(path, gzipped=False)
+    assert read_nbt_fields(path, ("XpLevel",)) == {"XpLevel": 30}
+
+
+def test_truncated_file_raises(tmp_path, player_dat):
+    with gzip.open(player_dat, "rb") as f:
+        data = f.read()
+    path = tmp_path / "short.dat"
+    path.write_bytes(data[:100])
+    with pytest.raises(NBTFormatError):
+        read_nbt_fields(str(path), ("Dimension",))
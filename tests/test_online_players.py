@@ -0,0 +1,61 @@
+"""
+Tests for src/online_players.py — OnlinePlayers
+"""
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from src import online_players as op
+from src.online_players import OnlinePlayers
+
+
+@pytest.fixture
+def registry():
+    reg = OnlinePlayers()
+    storage = MagicMock()
+    storage.get_online_players.return_value = ['Alex']
+    with patch('src.online_players.get_storage', return_value=storage):
+        reg.load()
+    return reg
+
+
+def test_restores_from_storage(registry):
+    assert registry.names() == ['Alex']
+    assert registry.session_start('Alex') is None
+
+
+def test_add_remove_tracks_sessions(registry):
+    with patch.object(registry, '_write') as write:
+        assert registry.add('Steve') is True
+        assert registry.add('Steve') is False
+        assert 'Steve' in registry
+        assert registry.session_start('Steve') is not None
+
+        duration = registry.remove('Steve')
+        assert duration is not None and duration >= 0
+        assert registry.remove('Steve') is None
+    # Outside an event loop every change is written immediately
+    assert write.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_persistence_is_debounced(registry, monkeypatch):
+    """A login wave results in a single off-loop write of the final list."""
+    monkeypatch.setattr(op, "PERSIST_DELAY", 0.05)
+    with patch.object(registry, '_write') as write:
+        for name in ('a', 'b', 'c'):
+            registry.add(name)
+        registry.remove('a')
+        assert write.call_count == 0
+
+        await asyncio.sleep(0.2)
+    write.assert_called_once_with(['Alex', 'b', 'c'])
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_pending_changes(registry):
+    with patch.object(registry, '_write') as write:
+        registry.clear()
+        registry.flush()
+        write.assert_called_once_with([])
+        registry.flush()
+        write.assert_called_once()
@@ -0,0 +1,79 @@
+"""
+Tests for src/server_properties.py — ServerProperties
+"""
+import os
+import pytest
+from unittest.mock import patch
+from src.server_properties import ServerProperties
+
+
+@pytest.fixture
+def props_file(tmp_path):
+    path = tmp_path / "server.properties"
+    path.write_text(
+        "#Minecraft server properties\n"
+        "level-name=survival\n"
+        "online-mode=false\n"
+        "white-list=true\n"
+        "max-players=20\n"
+    )
+    return path
+
+
+def test_typed_accessors(props_file):
+    props = ServerProperties(str(props_file))
+    assert props.level_name == "survival"
+    assert props.online_mode is False
+    assert props.whitelist_enabled is True
+    assert props.get_int("max-players") == 20
+    assert props.get_int("missing", 7) == 7
+
+
+def test_missing_file_defaults(tmp_path):
+    props = ServerProperties(str(tmp_path / "nope.properties"))
+    assert props.exists is False
+    assert props.level_name == "world"
+    assert props.online_mode is False
+    assert props.as_dict() == {}
+
+
+def test_parsed_once_until_file_changes(props_file):
+    props = ServerProperties(str(props_file))
+    with patch.object(ServerProperties, "_parse", wraps=ServerProperties._parse) as parse:
+        for _ in range(5):
+            props.online_mode
+        assert parse.call_count == 1
+
+        props_file.write_text("online-mode=true\nlevel-name=survival\n")
+        assert props.online_mode is True
+        assert parse.call_count == 2
+
+
+def test_update_is_atomic_and_preserves_comments(props_file):
+    props = ServerProperties(str(props_file))
+    props.online_mode  # warm the cache
+    ino_before = os.stat(props_file).st_ino
+
+    props.update({"online-mode": True, "motd": "hi"})
+
+    text = props_file.read_text()
+    assert text.startswith("#Minecraft server properties\n")
+    assert "online-mode=true\n" in text
+    assert text.endswith("motd=hi\n")
+    assert os.stat(props_file).st_ino != ino_before  # replaced, not rewritten in place
+    assert props.online_mode is True
+    assert not [f for f in os.listdir(props_file.parent) if f.startswith(".server.properties.")]
+
+
+def test_update_creates_file_with_header(tmp_path):
+    path = tmp_path / "server.properties"
+    ServerProperties(str(path)).update({"white-list": False}, header=["Managed by Discord Bot"])
+    assert path.read_text() == "# Managed by Discord Bot\nwhite-list=false\n"
+
+
+def test_default_instance_follows_server_dir(tmp_path):
+    from src.config import config
+    (tmp_path / "server.properties").write_text("level-name=other\n")
+    props = ServerProperties()
+    with patch.object(config, "SERVER_DIR", str(tmp_path)):
+        assert props.level_name == "other"
@@ -3,6 +3,7 @@ import json
 import pytest
 import asyncio
 import discord
+import nbtlib
 from unittest.mock import AsyncMock, MagicMock, patch, PropertyMock
 from cogs.stats import StatsCog
 
@@ -29,31 +30,9 @@ def mock_interaction():
 
 @pytest.mark.asyncio
 async def test_get_uuid_online_success(stats_cog):
-    """Test get_uuid_online when Mojang API returns 200."""
-    mock_json = {"id": "1234567890", "name": "MojangPlayer"}
-    
-    class MockResponse:
-        def __init__(self, status, json_data):
-            self.status = status
-            self._json_data = json_data
-        async def json(self):
-            return self._json_data
-        async def __aenter__(self):
-            return self
-        async def __aexit__(self, exc_type, exc_val, exc_tb):
-            pass
-
-    class MockSession:
-        def __init__(self, *args, **kwargs):
-            pass
-        def get(self, url, *args, **kwargs):
-            return MockResponse(200, mock_json)
-        async def __aenter__(self):
-            return self
-        async def __aexit__(self, exc_type, exc_val, exc_tb):
-            pass
-
-    with patch('aiohttp.ClientSession', new=MockSession):
+    """Test get_uuid_online when Mojang knows the name."""
+    profile = {"id": "1234567890", "name": "MojangPlayer"}
+    with patch('cogs.stats.mojang_profiles.lookup', new_callable=AsyncMock, return_value=profile):
         uuid, name = await stats_cog.get_uuid_online("MojangPlayer")
         assert uuid == "1234567890"
         assert name == "MojangPlayer"
@@ -61,25 +40,7 @@ async def test_get_uuid_online_success(stats_cog):
 @pytest.mark.asyncio
 async def test_get_uuid_online_failure(stats_cog):
     """Test get_uuid_online when Mojang API fails or returns non-200."""
-    class MockResponse:
-        def __init__(self, status):
-            self.status = status
-        async def __aenter__(self):
-            return self
-        async def __aexit__(self, exc_type, exc_val, exc_tb):
-            pass
-
-    class MockSession:
-        def __init__(self, *args, **kwargs):
-            pass
-        def get(self, url, *args, **kwargs):
-            return MockResponse(404)
-        async def __aenter__(self):
-            return self
-        async def __aexit__(self, exc_type, exc_val, exc_tb):
-            pass
-
-    with patch('aiohttp.ClientSession', new=MockSession):
+    with patch('cogs.stats.mojang_profiles.lookup', new_callable=AsyncMock, return_value=None):
         uuid, name = await stats_cog.get_uuid_online("NonExistent")
         assert uuid is None
         assert name is None
@@ -112,21 +73,22 @@ def test_get_stats_from_nbt(stats_cog, tmp_path):
         }
     }
     stats_json_file.write_text(json.dumps(stats_content))
-    (playerdata_dir / f"{uuid_formatted}.dat").touch()
-
-    with patch('nbtlib.load') as mock_nbt_load, \
-         patch('src.config.Config.WORLD_FOLDER', new_callable=PropertyMock) as mock_world:
+    nbtlib.File({
+        "Inventory": nbtlib.List[nbtlib.Compound]([nbtlib.Compound({"id": nbtlib.String("minecraft:stone"), "Count": nbtlib.Byte(64)})]),
+        "Pos": nbtlib.List[nbtlib.Double]([1.5, 64.0, -3.5]),
+        "Health": nbtlib.Float(20.0),
+        "XpLevel": nbtlib.Int(7),
+        "Dimension": nbtlib.String("minecraft:overworld"),
+    }).save(str(playerdata_dir / f"{uuid_formatted}.dat"), gzipped=True)
+
+    with patch('src.config.Config.WORLD_FOLDER', new_callable=PropertyMock) as mock_world:
         mock_world.return_value = "world"
-        
-        mock_nbt_file = MagicMock()
-        mock_nbt_file.root = {"Inventory": []}
-        mock_nbt_load.return_value = mock_nbt_file
 
         stats, nbt = stats_cog.get_stats_from_nbt(uuid_hex, str(tmp_path))
         
         assert stats == stats_content
-        assert nbt == {"Inventory": []}
-        mock_nbt_load.assert_called_once_with(os.path.join(playerdata_dir, f"{uuid_formatted}.dat"))
+        # Only the fields /stats uses are read; the inventory is skipped
+        assert nbt == {"Pos": [1.5, 64.0, -3.5], "Health": 20.0, "XpLevel": 7, "Dimension": "minecraft:overworld"}
 
 @pytest.mark.asyncio
 async def test_stats_command_no_args_not_linked(stats_cog, mock_interaction):
@@ -250,3 +212,34 @@ async def test_stats_command_player_specified_cracked_with_data(stats_cog, mock_
         assert embed.fields[0].value == "2.00 hours"
         assert embed.thumbnail.url == "https://minecraft-heads.com/avatar/Steve/64"
         assert embed.footer.text == "Account Type: Cracked / Offline"
+
+@pytest.mark.asyncio
+async def test_leaderboard_command(stats_cog, mock_interaction):
+    """Test leaderboard ranks from the stats index and resolves names via the usercache."""
+    with patch('cogs.stats.stats_index') as mock_index, \
+         patch('cogs.stats.usercache') as mock_usercache:
+        mock_index.loaded = True
+        mock_index.top.return_value = [("uuid-1", 144000), ("uuid-2", 72000)]
+        mock_index.__len__.return_value = 7
+        mock_usercache.get_name.side_effect = lambda u: {"uuid-1": "Steve"}.get(u)
+
+        await stats_cog.leaderboard.callback(stats_cog, mock_interaction, stat="play_time")
+
+        mock_index.refresh.assert_not_called()
+        mock_index.top.assert_called_once_with("play_time", 10)
+        embed = mock_interaction.followup.send.call_args.kwargs["embed"]
+        assert embed.title == "🏆 Playtime Leaderboard"
+        assert embed.description == "**1.** Steve — 2.0 h\n**2.** uuid-2 — 1.0 h"
+        assert embed.footer.text == "7 players tracked"
+
+@pytest.mark.asyncio
+async def test_leaderboard_command_empty(stats_cog, mock_interaction):
+    """Test leaderboard loads the index on first use and reports when there is no data."""
+    with patch('cogs.stats.stats_index') as mock_index:
+        mock_index.loaded = False
+        mock_index.top.return_value = []
+
+        await stats_cog.leaderboard.callback(stats_cog, mock_interaction, stat="deaths")
+
+        mock_index.refresh.assert_called_once()
+        mock_interaction.followup.send.assert_called_once_with("❌ No player statistics found yet.")
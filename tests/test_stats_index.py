@@ -0,0 +1,91 @@
+"""
+Tests for src/stats_index.py — StatsIndex
+"""
+import json
+import os
+import pytest
+from unittest.mock import patch
+from src.stats_index import StatsIndex, extract_columns
+
+
+def _write(stats_dir, uuid, play_time=0, deaths=0, mined=None, bump=0):
+    path = stats_dir / f"{uuid}.json"
+    path.write_text(json.dumps({"stats": {
+        "minecraft:custom": {"minecraft:play_time": play_time, "minecraft:deaths": deaths},
+        "minecraft:mined": mined or {},
+    }}))
+    if bump:
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))
+    return path
+
+
+@pytest.fixture
+def stats_dir(tmp_path):
+    d = tmp_path / "stats"
+    d.mkdir()
+    _write(d, "aaaa", play_time=100, deaths=3, mined={"minecraft:stone": 40, "minecraft:dirt": 2})
+    _write(d, "bbbb", play_time=500, deaths=1)
+    _write(d, "cccc", play_time=300)
+    return d
+
+
+def test_extract_columns_defaults():
+    values = extract_columns({"stats": {"minecraft:mined": {"minecraft:stone": 5}}})
+    assert values["mined"] == 5
+    assert values["play_time"] == 0
+    assert extract_columns({})["deaths"] == 0
+
+
+def test_top_k(stats_dir):
+    index = StatsIndex(str(stats_dir))
+    assert index.refresh() == 3
+    assert index.top("play_time", 2) == [("bbbb", 500), ("cccc", 300)]
+    assert index.top("mined") == [("aaaa", 42)]
+    assert index.get("aaaa")["deaths"] == 3
+    with pytest.raises(KeyError):
+        index.top("jumps")
+
+
+def test_refresh_only_reads_changed_files(stats_dir):
+    index = StatsIndex(str(stats_dir))
+    index.refresh()
+
+    with patch("src.stats_index.json.load", wraps=json.load) as load:
+        assert index.refresh() == 0
+        assert load.call_count == 0
+
+        _write(stats_dir, "cccc", play_time=900, bump=1_000_000_000)
+        assert index.refresh() == 1
+        assert load.call_count == 1
+
+    assert index.top("play_time", 1) == [("cccc", 900)]
+
+
+def test_removed_files_drop_rows(stats_dir):
+    index = StatsIndex(str(stats_dir))
+    index.refresh()
+    os.remove(stats_dir / "aaaa.json")
+
+    assert index.refresh() == 1
+    assert len(index) == 2
+    assert index.get("aaaa") is None
+    assert index.top("play_time") == [("bbbb", 500), ("cccc", 300)]
+
+
+def test_half_written_file_is_retried(stats_dir):
+    index = StatsIndex(str(stats_dir))
+    (stats_dir / "dddd.json").write_text('{"stats": {')
+    index.refresh()
+    assert index.get("dddd") is None
+
+    _write(stats_dir, "dddd", play_time=50, bump=1_000_000_000)
+    index.refresh()
+    assert index.get("dddd")["play_time"] == 50
+
+
+def test_missing_directory(tmp_path):
+    index = StatsIndex(str(tmp_path / "nope"))
+    assert index.refresh() == 0
+    assert index.loaded
+    assert index.top("deaths") == []
@@ -0,0 +1,111 @@
+"""
+Tests for src/storage.py — SQLiteStorage and the JSON migration
+"""
+import json
+import pytest
+from contextlib import contextmanager
+from unittest.mock import patch
+from src.storage import SQLiteStorage, migrate_json_state
+
+
+@pytest.fixture
+def storage(tmp_path):
+    store = SQLiteStorage(str(tmp_path / "state.db"))
+    yield store
+    store.close()
+
+
+def _link(name, **extra):
+    return {"mc_username": name, "is_premium": False, "linked_at": "2026-01-01T00:00:00+00:00",
+            "last_verified": None, "last_disconnect": None, **extra}
+
+
+def test_uses_wal(storage):
+    assert storage._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_put_link_replaces_owner_case_insensitively(storage):
+    storage.put_link(1, _link("Steve"))
+    storage.put_link(2, _link("steve"))
+    assert list(storage.load_links()) == ["2"]
+
+
+def test_link_stamps_are_partial_updates(storage):
+    storage.put_link(1, _link("Steve"))
+    storage.update_link_stamps([("1", "last_disconnect", 123.0)])
+    entry = storage.load_links()["1"]
+    assert entry["last_disconnect"] == 123.0
+    assert entry["linked_at"] == "2026-01-01T00:00:00+00:00"
+
+
+def test_economy_upsert(storage):
+    assert storage.get_balance(42) == 0
+    assert storage.add_balance(42, 100) == 100
+    assert storage.add_balance("42", 50) == 150
+
+
+def test_events_ordered_flagged_and_expired(storage):
+    late = storage.add_event({"name": "late", "time": "2026-05-02T18:00:00"})
+    early = storage.add_event({"name": "early", "time": "2026-05-01T18:00:00"})
+    assert [e["name"] for e in storage.list_events()] == ["early", "late"]
+
+    storage.mark_event_reminded(late, "reminded_1h")
+    assert storage.list_events()[1]["reminded_1h"] is True
+    with pytest.raises(ValueError):
+        storage.mark_event_reminded(late, "reminded_soon")
+
+    assert storage.delete_events_before("2026-05-02T00:00:00") == 1
+    assert [e["id"] for e in storage.list_events()] == [late]
+    assert storage.delete_event(early) is False
+
+
+def test_online_players_keep_order(storage):
+    storage.set_online_players(["b", "a"])
+    storage.set_online_players(["b", "a", "c"])
+    assert storage.get_online_players() == ["b", "a", "c"]
+
+
+def test_migration_imports_once_and_cleans_up(storage, tmp_path):
+    links_path = tmp_path / "mc_links.json"
+    links_path.write_text(json.dumps({"1": _link("Steve"), "2": _link("STEVE"), "3": _link("Alex")}))
+    bot_cfg = {
+        "guild_id": 7,
+        "economy": {"1": 300},
+        "events": [{"name": "party", "time": "2026-05-01T18:00:00", "reminded_24h": True}],
+        "online_players": ["Alex"],
+    }
+
+    @contextmanager
+    def update_bot_config():
+        yield bot_cfg
+
+    with patch('src.config.config.load_bot_config', side_effect=lambda: dict(bot_cfg)), \
+         patch('src.config.config.update_bot_config', side_effect=update_bot_config):
+        migrate_json_state(storage, str(links_path))
+        # A second run must not duplicate anything
+        migrate_json_state(storage, str(links_path))
+
+    # First entry wins for duplicate usernames, like the old linear scan
+    assert sorted(storage.load_links()) == ["1", "3"]
+    assert storage.get_balance(1) == 300
+    assert storage.list_events()[0]["reminded_24h"] is True
+    assert storage.get_online_players() == ["Alex"]
+
+    assert bot_cfg == {"guild_id": 7}
+    assert not links_path.exists()
+    assert (tmp_path / "mc_links.json.migrated").exists()
+
+
+def test_migration_skips_malformed_rows(storage):
+    links = {"1": _link("Steve"), "2": {"is_premium": True}, "3": "Alex"}
+    bot_cfg = {
+        "economy": {"1": 300, "2": "lots"},
+        "events": [{"time": "2026-05-01T18:00:00"}, {"name": None, "time": "x"},
+                   {"name": "party", "time": "2026-05-01T18:00:00"}],
+    }
+    assert storage.import_json_state(bot_cfg, links) is True
+    assert list(storage.load_links()) == ["1"]
+    assert storage.get_balance(1) == 300 and storage.get_balance(2) == 0
+    assert [e["name"] for e in storage.list_events()] == ["party"]
+    # Recorded as done, so the next start doesn't retry and fail again
+    assert storage.import_json_state(bot_cfg, links) is False
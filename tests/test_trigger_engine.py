@@ -0,0 +1,74 @@
+"""
+Tests for src/trigger_engine.py — AhoCorasick, TriggerEngine
+"""
+import random
+import string
+from src.trigger_engine import AhoCorasick, TriggerEngine
+
+
+def test_aho_corasick_overlapping_patterns():
+    ac = AhoCorasick(["he", "she", "his", "hers"])
+    assert ac.search("ushers") == {0, 1, 3}
+    assert ac.search("nothing") == set()
+
+
+def test_aho_corasick_matches_naive_scan():
+    """Randomised cross-check against `in` over a small alphabet (lots of shared prefixes/suffixes)."""
+    rng = random.Random(1234)
+    for _ in range(200):
+        patterns = ["".join(rng.choices("abc", k=rng.randint(1, 4))) for _ in range(rng.randint(1, 8))]
+        text = "".join(rng.choices("abc", k=rng.randint(0, 30)))
+        expected = {i for i, p in enumerate(patterns) if p in text}
+        assert AhoCorasick(patterns).search(text) == expected, (patterns, text)
+
+
+def test_engine_legacy_format_case_insensitive():
+    engine = TriggerEngine()
+    engine.load({"Hello Bot": "say hi", "diamond": "say shiny"})
+
+    fired = engine.match("[10:00:00] [Server thread/INFO]: <Steve> hello bot, found a DIAMOND")
+    assert [t.command for t in fired] == ["say hi", "say shiny"]
+
+
+def test_engine_regex_trigger():
+    engine = TriggerEngine()
+    engine.load({r"<(\w+)> !tp": {"command": "say teleporting", "regex": True}})
+    assert [t.command for t in engine.match("<Steve> !TP please")] == ["say teleporting"]
+    assert engine.match("<Steve> tp") == []
+
+
+def test_engine_cooldown_and_counters():
+    engine = TriggerEngine()
+    engine.load({"gg": {"command": "say gg", "cooldown": 10}})
+
+    assert len(engine.match("gg", now=100.0)) == 1
+    assert engine.match("gg", now=105.0) == []
+    assert len(engine.match("gg", now=111.0)) == 1
+
+    trigger = engine.triggers[0]
+    assert (trigger.hits, trigger.suppressed) == (2, 1)
+
+
+def test_engine_rebuilds_only_on_change():
+    engine = TriggerEngine()
+    triggers = {"a": "say a"}
+    assert engine.load(triggers) is True
+    assert engine.load({"a": "say a"}) is False
+
+    engine.match("a")
+    assert engine.load({"a": "say a", "b": "say b"}) is True
+    # Counters survive a rebuild for triggers that still exist
+    assert engine.triggers[0].hits == 1
+
+
+def test_engine_skips_invalid_entries():
+    engine = TriggerEngine()
+    engine.load({"(": {"command": "say x", "regex": True}, "ok": "say ok", "bad": 42})
+    assert [t.phrase for t in engine.triggers] == ["ok"]
+
+
+def test_engine_many_triggers():
+    words = ["".join(random.Random(i).choices(string.ascii_lowercase, k=8)) for i in range(500)]
+    engine = TriggerEngine()
+    engine.load({w: f"say {w}" for w in words})
+    assert [t.phrase for t in engine.match(f"<Steve> {words[123]} and {words[7]}")] == [words[7], words[123]]
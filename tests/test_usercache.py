@@ -0,0 +1,81 @@
+"""
+Tests for src/usercache.py — UserCache
+"""
+import json
+import os
+import pytest
+from unittest.mock import patch
+from src.usercache import UserCache
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    path = tmp_path / "usercache.json"
+    path.write_text(json.dumps([
+        {"name": "Steve", "uuid": "11111111-1111-1111-1111-111111111111", "expiresOn": "2026-11-01 10:00:00 +0000"},
+        {"name": "Alex", "uuid": "22222222-2222-2222-2222-222222222222", "expiresOn": "2026-11-01 10:00:00 +0000"},
+    ]))
+    return path
+
+
+def _bump(path, content):
+    st = os.stat(path)
+    path.write_text(content)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_lookups_both_ways(cache_file):
+    cache = UserCache(str(cache_file))
+    assert cache.get_uuid("steve") == "11111111-1111-1111-1111-111111111111"
+    assert cache.get_name("22222222222222222222222222222222") == "Alex"
+    assert cache.get_uuid("Herobrine") is None
+    assert len(cache) == 2
+
+
+def test_parsed_once_until_file_changes(cache_file):
+    cache = UserCache(str(cache_file))
+    with patch("src.usercache.json.load", wraps=json.load) as load:
+        cache.get_uuid("Steve")
+        cache.get_uuid("Alex")
+        assert load.call_count == 1
+
+        _bump(cache_file, json.dumps([{"name": "Notch", "uuid": "33333333-3333-3333-3333-333333333333"}]))
+        assert cache.get_uuid("Notch") == "33333333-3333-3333-3333-333333333333"
+        assert cache.get_uuid("Steve") is None
+        assert load.call_count == 2
+
+
+def test_corrupt_file_keeps_previous_index(cache_file):
+    cache = UserCache(str(cache_file))
+    assert cache.get_uuid("Steve") is not None
+    _bump(cache_file, "[{\"name\": \"Ste")
+    assert cache.get_uuid("Steve") == "11111111-1111-1111-1111-111111111111"
+
+
+def test_live_entries_until_file_catches_up(cache_file):
+    cache = UserCache(str(cache_file))
+    cache.record("Newbie", "44444444-4444-4444-4444-444444444444")
+    assert cache.get_uuid("newbie") == "44444444-4444-4444-4444-444444444444"
+    assert cache.get_name("44444444-4444-4444-4444-444444444444") == "Newbie"
+
+    data = json.loads(cache_file.read_text())
+    data.append({"name": "Newbie", "uuid": "44444444-4444-4444-4444-444444444444"})
+    _bump(cache_file, json.dumps(data))
+    assert cache.get_uuid("Newbie") == "44444444-4444-4444-4444-444444444444"
+    assert cache._live == {}
+
+
+def test_bulk_resolve(cache_file):
+    cache = UserCache(str(cache_file))
+    assert cache.resolve(["Steve", "ALEX", "Nobody"]) == {
+        "Steve": "11111111-1111-1111-1111-111111111111",
+        "ALEX": "22222222-2222-2222-2222-222222222222",
+        "Nobody": None,
+    }
+
+
+def test_missing_file(tmp_path):
+    cache = UserCache(str(tmp_path / "usercache.json"))
+    assert cache.get_uuid("Steve") is None
+    cache.record("Steve", "11111111-1111-1111-1111-111111111111")
+    assert cache.get_uuid("Steve") == "11111111-1111-1111-1111-111111111111"
@@ -3,13 +3,17 @@ Tests for src/version_fetcher.py — VersionFetcher
 Live API integration tests (run inside Docker with network access).
 """
 import pytest
+import pytest_asyncio
+from src.http_client import http_client
 from src.version_fetcher import VersionFetcher
 
 
-@pytest.fixture
-def fetcher():
+@pytest_asyncio.fixture
+async def fetcher():
     """Fresh VersionFetcher with empty cache."""
-    return VersionFetcher()
+    yield VersionFetcher()
+    # The shared session belongs to this test's event loop
+    await http_client.close()
 
 
 class TestVersionFetcherLive:
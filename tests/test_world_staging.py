@@ -0,0 +1,45 @@
+"""
+Tests for src/world_staging.py — stage_world / reflink
+"""
+import errno
+import os
+from unittest.mock import patch
+import pytest
+from src.world_staging import ReflinkUnsupported, stage_world
+
+
+@pytest.fixture
+def world(tmp_path):
+    path = tmp_path / "world"
+    (path / "region").mkdir(parents=True)
+    (path / "region" / "r.0.0.mca").write_bytes(os.urandom(50_000))
+    (path / "level.dat").write_bytes(b"level")
+    (path / "session.lock").write_bytes(b"lock")
+    os.utime(path / "level.dat", ns=(1_600_000_000_123_456_789, 1_600_000_000_123_456_789))
+    return path
+
+
+def test_copy_keeps_contents_and_mtime(world, tmp_path):
+    staged = tmp_path / "staging" / "world"
+    staged_bytes = stage_world(str(world), str(staged), "copy", workers=2)
+
+    assert staged_bytes == 50_000 + 5
+    assert (staged / "region" / "r.0.0.mca").read_bytes() == (world / "region" / "r.0.0.mca").read_bytes()
+    assert os.stat(staged / "level.dat").st_mtime_ns == 1_600_000_000_123_456_789
+    assert not (staged / "session.lock").exists()
+
+
+def test_reflink_unsupported_cleans_up(world, tmp_path):
+    staged = tmp_path / "staging" / "world"
+    with patch("src.world_staging.fcntl.ioctl", side_effect=OSError(errno.EOPNOTSUPP, "Operation not supported")):
+        with pytest.raises(ReflinkUnsupported):
+            stage_world(str(world), str(staged), "reflink")
+    assert not staged.exists()
+
+
+def test_reflink_other_errors_propagate(world, tmp_path):
+    staged = tmp_path / "staging" / "world"
+    with patch("src.world_staging.fcntl.ioctl", side_effect=OSError(errno.EIO, "I/O error")):
+        with pytest.raises(OSError) as excinfo:
+            stage_world(str(world), str(staged), "reflink")
+    assert not isinstance(excinfo.value, ReflinkUnsupported)
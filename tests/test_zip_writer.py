@@ -0,0 +1,88 @@
+"""
+Tests for src/zip_writer.py — ZipWriter (parallel deflate, store policy)
+"""
+import io
+import os
+import random
+import struct
+import zipfile
+import zlib
+import pytest
+from unittest.mock import patch
+from src.zip_writer import BLOCK_SIZE, ZIP_DEFLATED, ZIP_STORED, ZipWriter
+
+
+def _blocks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_roundtrip_multi_block(workers):
+    rng = random.Random(5)
+    # Compressible but not trivial, spanning several deflate blocks
+    big = b"".join(rng.choice([b"stone", b"dirt", b"air", b"grass"]) for _ in range(3 * BLOCK_SIZE // 4))
+    files = {"big.json": big, "empty.txt": b"", "small.txt": b"hello"}
+
+    out = io.BytesIO()
+    with ZipWriter(out, workers=workers, level=6) as zw:
+        zw.add_all(
+            (name, _blocks(data, 100_000), 1_700_000_000 * 10**9, 0o644, ZIP_DEFLATED)
+            for name, data in files.items()
+        )
+
+    with zipfile.ZipFile(io.BytesIO(out.getvalue())) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == list(files)
+        for name, data in files.items():
+            assert zf.read(name) == data
+        assert zf.getinfo("big.json").compress_size < len(big) // 2
+
+
+def test_add_files_stores_region_files(tmp_path):
+    (tmp_path / "r.0.0.mca").write_bytes(os.urandom(10_000))
+    (tmp_path / "notes.txt").write_bytes(b"a" * 10_000)
+
+    out = io.BytesIO()
+    with ZipWriter(out, workers=2) as zw:
+        zw.add_files([(name, str(tmp_path / name)) for name in ("r.0.0.mca", "notes.txt")])
+
+    with zipfile.ZipFile(io.BytesIO(out.getvalue())) as zf:
+        assert zf.getinfo("r.0.0.mca").compress_type == ZIP_STORED
+        assert zf.getinfo("notes.txt").compress_type == ZIP_DEFLATED
+        assert zf.read("r.0.0.mca") == (tmp_path / "r.0.0.mca").read_bytes()
+
+
+def test_forced_method(tmp_path):
+    (tmp_path / "notes.txt").write_bytes(b"a" * 1000)
+    out = io.BytesIO()
+    with ZipWriter(out) as zw:
+        zw.add_files([("notes.txt", str(tmp_path / "notes.txt"))], method=ZIP_STORED)
+    with zipfile.ZipFile(io.BytesIO(out.getvalue())) as zf:
+        assert zf.getinfo("notes.txt").compress_type == ZIP_STORED
+        assert zf.read("notes.txt") == b"a" * 1000
+
+
+def test_stored_entries_have_sizes_in_local_header():
+    """Streaming readers (Java's ZipInputStream) reject STORED entries with a data descriptor."""
+    region = os.urandom(3 * BLOCK_SIZE // 2)
+    out = io.BytesIO()
+    with patch("src.zip_writer.STORED_SPOOL", BLOCK_SIZE), ZipWriter(out, workers=2) as zw:   # spills to disk
+        zw.add_all([
+            ("r.0.0.mca", _blocks(region, 100_000), 1_700_000_000 * 10**9, 0o644, ZIP_STORED),
+            ("notes.txt", [b"a" * 1000], 1_700_000_000 * 10**9, 0o644, ZIP_DEFLATED),
+        ])
+    data = out.getvalue()
+
+    # Read the first entry front to back, as a streaming reader would
+    _, _, flags, method, _, _, crc, csize, usize, name_len, extra_len = struct.unpack_from("<IHHHHHIIIHH", data)
+    assert method == ZIP_STORED and not flags & 0x08
+    assert (crc, csize, usize) == (zlib.crc32(region), len(region), len(region))
+    start = 30 + name_len + extra_len
+    assert data[start:start + csize] == region
+    assert struct.unpack_from("<I", data, start + csize)[0] == 0x04034B50   # next entry follows directly
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert zf.getinfo("r.0.0.mca").flag_bits & 0x08 == 0
+        assert zf.getinfo("notes.txt").flag_bits & 0x08
+        assert zf.read("notes.txt") == b"a" * 1000